@@ -0,0 +1,287 @@
+"""
+Admission Control
+=================
+
+Load shedding in front of the API: each endpoint class (heavy scoring,
+streaming, light scoring, browse, static) gets its own concurrency limit and wait
+queue, so a burst of large scoring requests cannot starve cheap endpoints,
+and requests that would wait longer than the class's queue-wait SLO are
+refused right away with 503 and Retry-After instead of piling up.
+
+Features:
+- Path / method rules map requests to classes; unmatched paths (probes,
+  metrics) bypass admission control
+- Streamed NDJSON endpoints have their own class: a long stream's service
+  time would otherwise make the heavy class's wait estimate reject short
+  scoring requests
+- FIFO wait queue per class, bounded by length and by the SLO
+- Queue wait estimated from the position in the queue and the class's
+  recent service time (EWMA); a request whose estimate exceeds the SLO is
+  rejected on arrival, one that waits past the SLO is rejected then
+- ASGI middleware, so service time covers the whole response, streamed
+  bodies included, and a slot is freed even when the client disconnects
+- Per-class in-flight / queued / admitted / rejected counters, queue-wait
+  and service-time percentiles
+
+Configuration (environment):
+    ADMISSION_CONTROL=false                 disable
+    ADMISSION_<CLASS>_CONCURRENCY=4         concurrent requests of a class
+    ADMISSION_<CLASS>_QUEUE=64              waiting requests of a class
+    ADMISSION_<CLASS>_SLO_MS=2000           longest acceptable queue wait
+"""
+
+import asyncio
+import logging
+import math
+import os
+import threading
+import time
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+from starlette.responses import JSONResponse
+
+from streaming_stats import StreamingHistogram
+
+logger = logging.getLogger(__name__)
+
+# Weight of the latest request in the service-time average
+SERVICE_TIME_ALPHA = 0.2
+
+
+class Overloaded(Exception):
+    """A request was not admitted; retry after ``retry_after`` seconds."""
+
+    def __init__(self, endpoint_class: str, retry_after: float, reason: str):
+        super().__init__(f"{endpoint_class}: {reason}")
+        self.endpoint_class = endpoint_class
+        self.retry_after = max(1, math.ceil(retry_after))
+        self.reason = reason
+
+
+class EndpointClassLimiter:
+    """Concurrency limit plus FIFO wait queue of one endpoint class (event-loop only)."""
+
+    def __init__(self, name: str, concurrency: int, max_queue: int, slo_ms: float):
+        self.name = name
+        self.concurrency = max(1, concurrency)
+        self.max_queue = max(0, max_queue)
+        self.slo_s = max(0.0, slo_ms) / 1000.0
+        self.in_flight = 0
+        self._waiters: Deque[asyncio.Future] = deque()
+        self.service_time_s: Optional[float] = None
+
+        self._lock = threading.Lock()  # Stats are read from other threads
+        self.admitted = 0
+        self.rejected = 0
+        self.rejected_queue_full = 0
+        self.timed_out = 0
+        self.max_queued = 0
+        self.queue_wait_ms = StreamingHistogram()
+        self.service_ms = StreamingHistogram()
+
+    @property
+    def queued(self) -> int:
+        return sum(1 for waiter in self._waiters if not waiter.done())
+
+    def estimated_wait(self, position: int) -> float:
+        """
+        Seconds until a request at queue ``position`` (0 = next) gets a slot:
+        the requests ahead of it over the class's throughput (concurrency /
+        service time).
+        """
+        if self.service_time_s is None:
+            return 0.0
+        return (position + 1) * self.service_time_s / self.concurrency
+
+    def _reject(self, retry_after: float, reason: str, queue_full: bool = False) -> Overloaded:
+        with self._lock:
+            self.rejected += 1
+            if queue_full:
+                self.rejected_queue_full += 1
+        return Overloaded(self.name, retry_after, reason)
+
+    async def acquire(self) -> float:
+        """Wait for a slot; returns the seconds waited, raises Overloaded instead of waiting past the SLO."""
+        if self.in_flight < self.concurrency and not self.queued:
+            self.in_flight += 1
+            with self._lock:
+                self.admitted += 1
+                self.queue_wait_ms.record(0.0)
+            return 0.0
+
+        position = self.queued
+        if position >= self.max_queue:
+            raise self._reject(self.estimated_wait(position), f"queue full ({position} waiting)", queue_full=True)
+        estimate = self.estimated_wait(position)
+        if estimate > self.slo_s:
+            raise self._reject(estimate, f"estimated queue wait {estimate * 1000:.0f}ms over the "
+                                         f"{self.slo_s * 1000:.0f}ms SLO")
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        self.max_queued = max(self.max_queued, position + 1)
+        started = time.perf_counter()
+        try:
+            await asyncio.wait_for(asyncio.shield(waiter), timeout=self.slo_s)
+        except (asyncio.TimeoutError, asyncio.CancelledError) as e:
+            if waiter.done() and not waiter.cancelled():
+                # The slot was handed over just as the wait ended: keep it
+                if isinstance(e, asyncio.CancelledError):
+                    self.release(None)
+                    raise
+            else:
+                waiter.cancel()
+                if isinstance(e, asyncio.CancelledError):
+                    raise
+                with self._lock:
+                    self.timed_out += 1
+                raise self._reject(self.estimated_wait(self.queued), f"queue wait over the "
+                                                                     f"{self.slo_s * 1000:.0f}ms SLO")
+        finally:
+            self._prune()
+
+        waited = time.perf_counter() - started
+        with self._lock:
+            self.admitted += 1
+            self.queue_wait_ms.record(waited * 1000)
+        return waited
+
+    def _prune(self) -> None:
+        while self._waiters and self._waiters[0].done():
+            self._waiters.popleft()
+
+    def release(self, service_s: Optional[float]) -> None:
+        """Free a slot (handing it to the next waiter); ``service_s`` is how long the request held it."""
+        if service_s is not None:
+            self.service_time_s = service_s if self.service_time_s is None else \
+                SERVICE_TIME_ALPHA * service_s + (1 - SERVICE_TIME_ALPHA) * self.service_time_s
+            with self._lock:
+                self.service_ms.record(service_s * 1000)
+        self._prune()
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)  # Slot passes to the waiter: in_flight unchanged
+                return
+        self.in_flight -= 1
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                'concurrency': self.concurrency,
+                'max_queue': self.max_queue,
+                'queue_slo_ms': round(self.slo_s * 1000, 1),
+                'in_flight': self.in_flight,
+                'queued': self.queued,
+                'max_queued': self.max_queued,
+                'admitted': self.admitted,
+                'rejected': self.rejected,
+                'rejected_queue_full': self.rejected_queue_full,
+                'timed_out': self.timed_out,
+                'service_time_ewma_ms': round(self.service_time_s * 1000, 2) if self.service_time_s is not None else None,
+                'queue_wait_ms': {k: round(v, 2) for k, v in self.queue_wait_ms.summary((50, 95, 99)).items()},
+                'service_ms': {k: round(v, 2) for k, v in self.service_ms.summary((50, 95, 99)).items()}
+            }
+
+
+# (class, method or None for any, path, prefix match); first match wins
+DEFAULT_RULES: List[Tuple[str, Optional[str], str, bool]] = [
+    ('light_scoring', 'GET', '/recommend/enhanced/results/', True),
+    ('heavy_scoring', 'POST', '/recommend/enhanced', False),
+    ('heavy_scoring', 'POST', '/recommend/batch', False),
+    ('streaming', 'POST', '/recommend/bulk', False),
+    ('streaming', 'POST', '/recommend/pairs/stream', False),
+    ('light_scoring', 'POST', '/recommend', False),
+    ('light_scoring', 'POST', '/recommend/grid', False),
+    ('browse', None, '/movies/', True),
+    ('browse', None, '/genres', False),
+    ('browse', None, '/metrics', False),
+    ('browse', None, '/system/status', False),
+    ('static', 'GET', '/', False),
+    ('static', 'GET', '/static/', True),
+    ('static', 'GET', '/posters/', True),
+    ('static', 'GET', '/app_netflix.js', False),
+    ('static', 'GET', '/netflix_style.css', False),
+    ('static', 'GET', '/movies_catalog.json', False),
+]
+
+# class -> (concurrency, max queue, queue-wait SLO in ms)
+DEFAULT_LIMITS: Dict[str, Tuple[int, int, float]] = {
+    'heavy_scoring': (4, 32, 2000.0),
+    'streaming': (2, 8, 30000.0),
+    'light_scoring': (32, 256, 500.0),
+    'browse': (32, 256, 500.0),
+    'static': (64, 512, 1000.0),
+}
+
+
+class AdmissionController:
+    """Endpoint classification plus one EndpointClassLimiter per class."""
+
+    def __init__(self, limits: Optional[Dict[str, Tuple[int, int, float]]] = None,
+                 rules: Optional[List[Tuple[str, Optional[str], str, bool]]] = None):
+        self.rules = list(DEFAULT_RULES if rules is None else rules)
+        self.limiters = {
+            name: EndpointClassLimiter(name, *limit)
+            for name, limit in (DEFAULT_LIMITS if limits is None else limits).items()
+        }
+
+    @classmethod
+    def from_env(cls, heavy_concurrency: Optional[int] = None) -> 'AdmissionController':
+        """Default limits overridden by ADMISSION_<CLASS>_* variables (heavy concurrency defaults to ``heavy_concurrency``)."""
+        limits = {}
+        for name, (concurrency, max_queue, slo_ms) in DEFAULT_LIMITS.items():
+            if name == 'heavy_scoring' and heavy_concurrency:
+                concurrency = heavy_concurrency
+            prefix = f"ADMISSION_{name.upper()}_"
+            limits[name] = (
+                int(os.getenv(prefix + 'CONCURRENCY', str(concurrency))),
+                int(os.getenv(prefix + 'QUEUE', str(max_queue))),
+                float(os.getenv(prefix + 'SLO_MS', str(slo_ms)))
+            )
+        return cls(limits)
+
+    def classify(self, method: str, path: str) -> Optional[str]:
+        """Endpoint class of a request, or None when it bypasses admission control."""
+        for name, rule_method, rule_path, prefix in self.rules:
+            if rule_method is not None and rule_method != method:
+                continue
+            if (path.startswith(rule_path) if prefix else path == rule_path) and name in self.limiters:
+                return name
+        return None
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {name: limiter.get_stats() for name, limiter in self.limiters.items()}
+
+
+class AdmissionControlMiddleware:
+    """ASGI middleware admitting HTTP requests through an AdmissionController."""
+
+    def __init__(self, app, controller: AdmissionController):
+        self.app = app
+        self.controller = controller
+
+    async def __call__(self, scope, receive, send):
+        endpoint_class = self.controller.classify(scope['method'], scope['path']) if scope['type'] == 'http' else None
+        if endpoint_class is None:
+            await self.app(scope, receive, send)
+            return
+
+        limiter = self.controller.limiters[endpoint_class]
+        try:
+            await limiter.acquire()
+        except Overloaded as e:
+            response = JSONResponse(
+                {'detail': f"Server busy ({e.reason}), retry later", 'endpoint_class': endpoint_class},
+                status_code=503,
+                headers={'Retry-After': str(e.retry_after)}
+            )
+            await response(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            limiter.release(time.perf_counter() - started)
@@ -0,0 +1,98 @@
+"""
+Cache Keys
+==========
+
+Structural cache keys for recommendation results.
+
+A request key packs the quantized preference vector, watch history and
+strategy into one small bytes object, built once per request. Per-movie
+keys pair it with the movie id (or, for ad-hoc payloads without one, the
+movie's scored fields), so batch lookups never re-serialize or re-hash the
+preferences.
+
+Features:
+- Fixed-order preference vector over the 19 UserPreferences genres
+- 0.1-step quantization (one byte per genre)
+- Bytes request prefix whose hash Python caches after first use
+"""
+
+import struct
+from typing import Any, Dict, Hashable, Optional, Tuple
+
+# UserPreferences genres in a fixed order ("scifi" is an alias of "sci_fi")
+PREFERENCE_FIELDS = (
+    'action', 'comedy', 'romance', 'thriller', 'drama', 'horror', 'sci_fi',
+    'fantasy', 'adventure', 'crime', 'mystery', 'western', 'war', 'animation',
+    'documentary', 'biography', 'history', 'music', 'sport'
+)
+
+# Preferences are quantized to 0.1 steps on the 0-10 scale
+PREFERENCE_STEPS = 10
+DEFAULT_PREFERENCE = 5.0
+
+_HISTORY_STRUCT = struct.Struct('<BBI')
+
+
+def _quantize(value: Any) -> int:
+    try:
+        value = float(value)
+    except (TypeError, ValueError):
+        value = DEFAULT_PREFERENCE
+    return max(0, min(10 * PREFERENCE_STEPS, int(round(value * PREFERENCE_STEPS))))
+
+
+def preference_vector_key(user_preferences: Optional[Dict[str, Any]]) -> bytes:
+    """Pack the preference vector as one byte per genre."""
+    prefs = user_preferences or {}
+    values = []
+    for field in PREFERENCE_FIELDS:
+        value = prefs.get(field)
+        if value is None and field == 'sci_fi':
+            value = prefs.get('scifi')
+        values.append(_quantize(DEFAULT_PREFERENCE if value is None else value))
+    return bytes(values)
+
+
+def watch_history_key(watch_history: Optional[Dict[str, Any]]) -> bytes:
+    """Pack liked/disliked ratios (percent) and watch count."""
+    if not watch_history:
+        return b''
+    return _HISTORY_STRUCT.pack(
+        max(0, min(100, int(round(float(watch_history.get('liked_ratio', 0) or 0) * 100)))),
+        max(0, min(100, int(round(float(watch_history.get('disliked_ratio', 0) or 0) * 100)))),
+        max(0, int(watch_history.get('watch_count', 0) or 0))
+    )
+
+
+def request_key(user_preferences: Optional[Dict[str, Any]], watch_history: Optional[Dict[str, Any]] = None,
+                strategy: str = '') -> bytes:
+    """Key prefix shared by every movie of one request."""
+    history = watch_history_key(watch_history)
+    return preference_vector_key(user_preferences) + bytes([len(history)]) + history + strategy.encode('utf-8')
+
+
+def movie_key(movie: Dict[str, Any]) -> Hashable:
+    """
+    Identity of a movie: its id, or for ad-hoc movie payloads (no id) every
+    field that is scored: title, year, sorted genres and popularity.
+    """
+    movie_id = movie.get('id')
+    if movie_id is not None:
+        try:
+            return int(movie_id)
+        except (TypeError, ValueError):
+            pass
+    genres = movie.get('genres') or []
+    if isinstance(genres, str):
+        genres = genres.split('|')
+    return (
+        str(movie.get('title', '')),
+        str(movie.get('year', '')),
+        tuple(sorted(str(genre).lower() for genre in genres)),
+        str(movie.get('popularity', ''))
+    )
+
+
+def recommendation_key(prefix: bytes, movie: Dict[str, Any]) -> Tuple[bytes, Hashable]:
+    """Cache key for one movie under a request prefix."""
+    return (prefix, movie_key(movie))
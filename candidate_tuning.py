@@ -0,0 +1,366 @@
+"""
+Candidate Tuning
+================
+
+Closed-loop tuning of the enhanced pipeline's cheap stage: how large the
+candidate pool is, how many pre-filtered candidates are scored and how
+early scoring stops. Each request-size tier carries one scale on the
+default budgets, adjusted online from the measured latency and from the
+recall of served rankings against exact full-catalog shadow runs, so the
+latency / quality tradeoff follows the actual load and hardware.
+
+Features:
+- Request-size tiers (up to 50, up to 200, larger) with one candidate
+  scale each; scale 1.0 is the original fixed budgets
+- Per-stage latency (pre-filter, scoring, total) per tier over a control
+  window
+- Recall@K of served rankings against exact rankings (every pre-filtered
+  candidate of the full catalog scored), from shadow runs of sampled
+  requests, off the request path and at most one at a time
+- One control step per window and tier: shrink the scale while p95 is over
+  target, grow it while the window's recall is under target, hold
+  otherwise (a window without shadow runs never grows it); the scale stays
+  within [MIN_SCALE, MAX_SCALE]
+- Settings, measurements and recent adjustments for the admin endpoint;
+  targets and scales can be overridden and the loop frozen
+- Overrides are written to a JSON file every worker process re-reads (at
+  most once a second), so one admin call reaches all workers of a
+  prefork / multi-worker server; measurements and control steps stay per
+  worker. Overrides persist until changed or the file is deleted
+
+Configuration (environment):
+    CANDIDATE_TUNING=false              fixed budgets, no shadow runs
+    TUNING_TARGET_P95_MS=800            p95 of the scoring time per request
+    TUNING_TARGET_RECALL=0.9            recall@K of served vs exact top K
+    TUNING_INTERVAL_S=30                seconds between control steps
+    TUNING_MIN_SAMPLES=20               requests a tier needs for a step
+    TUNING_SHADOW_INTERVAL_S=20         seconds between shadow runs
+    TUNING_OVERRIDES_PATH=cache/candidate_tuning.json
+                                        admin overrides shared by the workers
+"""
+
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from typing import Any, Dict, List, Optional, Sequence
+
+from streaming_stats import RingBuffer, StreamingHistogram
+
+logger = logging.getLogger(__name__)
+
+# (tier, largest num_recommendations in it or None); the enhanced pipeline's budget tiers
+TIERS = (('small', 50), ('medium', 200), ('large', None))
+STAGES = ('prefilter_ms', 'scoring_ms', 'total_ms')
+
+SCALE_UP = 1.25
+SCALE_DOWN = 0.8
+MIN_SCALE = 0.25
+MAX_SCALE = 8.0
+
+# Seconds between checks of the shared overrides file
+OVERRIDES_CHECK_INTERVAL_S = 1.0
+DEFAULT_OVERRIDES_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'cache', 'candidate_tuning.json')
+
+
+def recall_at_k(served_ids: Sequence[int], exact_ids: Sequence[int], k: int) -> Optional[float]:
+    """Share of the exact top ``k`` found in the served top ``k`` (None without an exact ranking)."""
+    exact = list(exact_ids)[:k]
+    if not exact:
+        return None
+    return len(set(list(served_ids)[:k]) & set(exact)) / len(exact)
+
+
+class TierState:
+    """Scale and control-window measurements of one request-size tier."""
+
+    def __init__(self, name: str, max_size: Optional[int]):
+        self.name = name
+        self.max_size = max_size
+        self.scale = 1.0
+        self.requests = 0
+        self.shadow_runs = 0
+        self.adjustments = 0
+        self.last_recall: Optional[float] = None
+        self.last_p95_ms: Optional[float] = None
+        self.reset_window()
+
+    def reset_window(self) -> None:
+        self.latency = {stage: StreamingHistogram() for stage in STAGES}
+        self.recall_sum = 0.0
+        self.recall_count = 0
+
+    @property
+    def window_recall(self) -> Optional[float]:
+        return self.recall_sum / self.recall_count if self.recall_count else None
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            'max_num_recommendations': self.max_size,
+            'scale': round(self.scale, 4),
+            'requests': self.requests,
+            'shadow_runs': self.shadow_runs,
+            'adjustments': self.adjustments,
+            'last_p95_ms': round(self.last_p95_ms, 2) if self.last_p95_ms is not None else None,
+            'last_recall': round(self.last_recall, 4) if self.last_recall is not None else None,
+            'window': {
+                'samples': len(self.latency['total_ms']),
+                'recall': round(self.window_recall, 4) if self.window_recall is not None else None,
+                'recall_samples': self.recall_count,
+                **{stage: {k: round(v, 2) for k, v in histogram.summary((50, 95)).items()}
+                   for stage, histogram in self.latency.items()}
+            }
+        }
+
+
+class CandidateTuner:
+    """Per-tier candidate scales driven by latency and shadow-run recall."""
+
+    def __init__(self, target_p95_ms: float = 800.0, target_recall: float = 0.9, interval_s: float = 30.0,
+                 min_samples: int = 20, shadow_interval_s: float = 20.0, enabled: bool = True,
+                 overrides_path: Optional[str] = None):
+        self.target_p95_ms = target_p95_ms
+        self.target_recall = target_recall
+        self.interval_s = interval_s
+        self.min_samples = max(1, min_samples)
+        self.shadow_interval_s = shadow_interval_s
+        self.enabled = enabled
+        self.tiers = {name: TierState(name, max_size) for name, max_size in TIERS}
+        self.history = RingBuffer(50)
+        self._lock = threading.Lock()
+        self._last_step = time.time()
+        self._last_shadow = 0.0
+        self._shadow_running = False
+        self.overrides_path = overrides_path
+        self._overrides_stamp: Optional[tuple] = None
+        self._overrides_version: Optional[int] = None  # Version of the overrides file applied here
+        self._overrides_checked = 0.0
+        self.sync_overrides(force=True)
+
+    @classmethod
+    def from_env(cls) -> 'CandidateTuner':
+        return cls(
+            target_p95_ms=float(os.getenv('TUNING_TARGET_P95_MS', '800')),
+            target_recall=float(os.getenv('TUNING_TARGET_RECALL', '0.9')),
+            interval_s=float(os.getenv('TUNING_INTERVAL_S', '30')),
+            min_samples=int(os.getenv('TUNING_MIN_SAMPLES', '20')),
+            shadow_interval_s=float(os.getenv('TUNING_SHADOW_INTERVAL_S', '20')),
+            enabled=os.getenv('CANDIDATE_TUNING', 'true').lower() == 'true',
+            overrides_path=os.getenv('TUNING_OVERRIDES_PATH', DEFAULT_OVERRIDES_PATH)
+        )
+
+    def tier(self, num_recommendations: int) -> TierState:
+        for name, max_size in TIERS:
+            if max_size is None or num_recommendations <= max_size:
+                return self.tiers[name]
+        return self.tiers[TIERS[-1][0]]
+
+    def candidate_scale(self, num_recommendations: int) -> float:
+        """Scale on the default candidate budgets for a request of this size."""
+        self.sync_overrides()
+        return self.tier(num_recommendations).scale
+
+    def record(self, num_recommendations: int, stats: Dict[str, float]) -> None:
+        """Stage timings of one scored request (keys from STAGES); may run a control step."""
+        tier = self.tier(num_recommendations)
+        with self._lock:
+            tier.requests += 1
+            for stage in STAGES:
+                if stage in stats:
+                    tier.latency[stage].record(stats[stage])
+        if self.enabled and time.time() - self._last_step >= self.interval_s:
+            self.step()
+
+    def start_shadow(self) -> bool:
+        """Whether a shadow run is due; True claims it (finish with record_shadow)."""
+        with self._lock:
+            now = time.time()
+            if not self.enabled or self._shadow_running or now - self._last_shadow < self.shadow_interval_s:
+                return False
+            self._shadow_running = True
+            self._last_shadow = now
+            return True
+
+    def record_shadow(self, num_recommendations: int, recall: Optional[float]) -> None:
+        """Result of a shadow run (None when it failed or had nothing to compare)."""
+        tier = self.tier(num_recommendations)
+        with self._lock:
+            self._shadow_running = False
+            if recall is None:
+                return
+            tier.shadow_runs += 1
+            tier.recall_sum += recall
+            tier.recall_count += 1
+            tier.last_recall = recall
+
+    def step(self) -> List[Dict[str, Any]]:
+        """One control step over the tiers with enough samples; returns the adjustments made."""
+        adjustments = []
+        with self._lock:
+            self._last_step = time.time()
+            for tier in self.tiers.values():
+                if len(tier.latency['total_ms']) < self.min_samples:
+                    continue
+                p95 = tier.latency['total_ms'].quantile(95)
+                # Only this window's shadow runs: an old recall would keep growing the scale without new evidence
+                recall = tier.window_recall
+                tier.last_p95_ms = p95
+                tier.reset_window()
+
+                # Latency is the SLO: it wins when both targets are missed
+                if p95 > self.target_p95_ms:
+                    scale, reason = tier.scale * SCALE_DOWN, f"p95 {p95:.0f}ms over {self.target_p95_ms:.0f}ms"
+                elif recall is not None and recall < self.target_recall:
+                    scale, reason = tier.scale * SCALE_UP, f"recall {recall:.3f} under {self.target_recall:.3f}"
+                else:
+                    continue
+                scale = min(MAX_SCALE, max(MIN_SCALE, scale))
+                if scale == tier.scale:
+                    continue
+                adjustment = {
+                    'time': round(self._last_step, 3),
+                    'tier': tier.name,
+                    'scale_from': round(tier.scale, 4),
+                    'scale_to': round(scale, 4),
+                    'reason': reason
+                }
+                tier.scale = scale
+                tier.adjustments += 1
+                self.history.append(adjustment)
+                adjustments.append(adjustment)
+        for adjustment in adjustments:
+            logger.info(f"🎛️ Candidate scale of {adjustment['tier']} requests {adjustment['scale_from']} -> "
+                        f"{adjustment['scale_to']} ({adjustment['reason']})")
+        return adjustments
+
+    def update(self, enabled: Optional[bool] = None, target_p95_ms: Optional[float] = None,
+               target_recall: Optional[float] = None, scales: Optional[Dict[str, float]] = None) -> None:
+        """
+        Admin overrides; ``scales`` (tier -> scale) are clamped to [MIN_SCALE, MAX_SCALE].
+        With an overrides file they are merged into it for the other workers.
+        """
+        unknown = set(scales or {}) - set(self.tiers)
+        if unknown:
+            raise KeyError(f"Unknown tier(s) {', '.join(sorted(unknown))} (expected {', '.join(self.tiers)})")
+        overrides = {'enabled': enabled, 'target_p95_ms': target_p95_ms, 'target_recall': target_recall,
+                     'scales': scales or {}}
+        if self.overrides_path:
+            self._write_overrides(overrides)
+        self._apply(overrides)
+        logger.info(f"🎛️ Candidate tuning updated: enabled={self.enabled}, target p95 {self.target_p95_ms:.0f}ms, "
+                    f"target recall {self.target_recall:.3f}, scales {self.scales()}")
+
+    def _apply(self, overrides: Dict[str, Any]) -> None:
+        with self._lock:
+            if overrides.get('enabled') is not None:
+                self.enabled = bool(overrides['enabled'])
+            if overrides.get('target_p95_ms') is not None:
+                self.target_p95_ms = float(overrides['target_p95_ms'])
+            if overrides.get('target_recall') is not None:
+                self.target_recall = float(overrides['target_recall'])
+            for name, scale in (overrides.get('scales') or {}).items():
+                if name in self.tiers:
+                    self.tiers[name].scale = min(MAX_SCALE, max(MIN_SCALE, float(scale)))
+                    self.tiers[name].reset_window()
+
+    def _file_stamp(self) -> Optional[tuple]:
+        try:
+            stat = os.stat(self.overrides_path)
+        except OSError:
+            return None
+        return stat.st_mtime_ns, stat.st_size, stat.st_ino
+
+    def _read_overrides(self) -> Optional[Dict[str, Any]]:
+        try:
+            with open(self.overrides_path, 'r') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            logger.warning(f"⚠️ Ignoring unreadable tuning overrides {self.overrides_path}: {e}")
+            return None
+
+    def _write_overrides(self, overrides: Dict[str, Any]) -> None:
+        """
+        Add ``overrides`` to the shared file (atomic replace): the accumulated
+        overrides, for workers starting later, and this update, for the
+        running ones.
+        """
+        current = self._read_overrides() or {}
+        last = {key: value for key, value in overrides.items() if value is not None and value != {}}
+        accumulated = dict(current.get('overrides', {}))
+        accumulated.update({key: value for key, value in last.items() if key != 'scales'})
+        accumulated['scales'] = {**accumulated.get('scales', {}), **last.get('scales', {})}
+        version = int(current.get('version', 0)) + 1
+        shared = {
+            'version': version,
+            'overrides': accumulated,
+            'last': last,
+            'updated_at': time.time(),
+            'updated_by_pid': os.getpid()
+        }
+
+        directory = os.path.dirname(os.path.abspath(self.overrides_path))
+        try:
+            os.makedirs(directory, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(prefix='.candidate_tuning.', dir=directory)
+            with os.fdopen(fd, 'w') as f:
+                json.dump(shared, f)
+            os.replace(tmp_path, self.overrides_path)
+        except OSError as e:
+            logger.warning(f"⚠️ Could not share tuning overrides via {self.overrides_path}: {e} (this worker only)")
+            return
+        with self._lock:
+            self._overrides_stamp = self._file_stamp()
+            self._overrides_version = version
+
+    def sync_overrides(self, force: bool = False) -> None:
+        """Apply overrides another worker wrote since the last check (checked at most once a second)."""
+        if not self.overrides_path:
+            return
+        now = time.monotonic()
+        if not force and now - self._overrides_checked < OVERRIDES_CHECK_INTERVAL_S:
+            return
+        self._overrides_checked = now
+        stamp = self._file_stamp()
+        if stamp is None or stamp == self._overrides_stamp:
+            return
+        shared = self._read_overrides()
+        if shared is None:
+            return
+        self._overrides_stamp = stamp
+        version = shared.get('version')
+        if version == self._overrides_version:
+            return
+        # The next update only, so values this worker tuned since stay; everything after a gap or at startup
+        if self._overrides_version is not None and version == self._overrides_version + 1:
+            overrides = shared.get('last', {})
+        else:
+            overrides = shared.get('overrides', {})
+        self._overrides_version = version
+        self._apply(overrides)
+        logger.info(f"🎛️ Candidate tuning overrides applied from {self.overrides_path}: scales {self.scales()}")
+
+    def scales(self) -> Dict[str, float]:
+        return {name: round(tier.scale, 4) for name, tier in self.tiers.items()}
+
+    def get_stats(self) -> Dict[str, Any]:
+        self.sync_overrides(force=True)
+        with self._lock:
+            return {
+                # Measurements, control steps and tuned scales are this worker's; overrides reach every worker
+                'worker_pid': os.getpid(),
+                'overrides_path': self.overrides_path,
+                'enabled': self.enabled,
+                'target_p95_ms': self.target_p95_ms,
+                'target_recall': self.target_recall,
+                'interval_s': self.interval_s,
+                'min_samples': self.min_samples,
+                'shadow_interval_s': self.shadow_interval_s,
+                'scale_bounds': [MIN_SCALE, MAX_SCALE],
+                'next_step_in_s': round(max(0.0, self._last_step + self.interval_s - time.time()), 1),
+                'tiers': {name: tier.as_dict() for name, tier in self.tiers.items()},
+                'recent_adjustments': self.history.latest()
+            }
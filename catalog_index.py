@@ -0,0 +1,414 @@
+"""
+Catalog Bitmap Index
+====================
+
+Columnar, bitmap-backed view of the movie catalog used for browsing,
+filtering and facet counting.
+
+Features:
+- Packed genre, decade and rating-bucket bitmaps (1 bit per movie)
+- Filter compilation to vectorized masks and bitmap ANDs
+- Facet counts via popcount over packed bitmaps
+- Precomputed sort orders for catalog browsing
+- Watched-movie exclusion bitsets
+"""
+
+import logging
+import re
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Number of set bits for every byte value, used to popcount packed bitmaps
+_POPCOUNT_TABLE = np.array([bin(i).count('1') for i in range(256)], dtype=np.uint16)
+
+# Whole-point rating buckets on the 10-point scale ("7-8" holds 7.0 <= rating < 8.0)
+RATING_BUCKETS = [(low, low + 1) for low in range(0, 10)]
+
+SORT_FIELDS = ('popularity', 'rating', 'year', 'title')
+
+# "Toy Story (1995)" -> "Toy Story" when matching watched titles
+_YEAR_SUFFIX = re.compile(r'\s*\(\d{4}\)\s*$')
+
+
+def _to_int(value, default: int = 0) -> int:
+    """Convert catalog values such as '1995' to int."""
+    try:
+        return int(float(value)) if value not in (None, '', 'N/A') else default
+    except (ValueError, TypeError):
+        return default
+
+
+def _to_float(value, default: float = 0.0) -> float:
+    """Convert catalog values to float."""
+    try:
+        return float(value) if value not in (None, '', 'N/A') else default
+    except (ValueError, TypeError):
+        return default
+
+
+def _genre_key(genre: Any) -> str:
+    """Normalized genre key; both catalog backends group and match genres by it."""
+    return str(genre).strip().lower()
+
+
+def _movie_genres(movie: Dict[str, Any]) -> Dict[str, str]:
+    """Genre key -> display name of one movie's genres (first spelling wins)."""
+    genres = movie.get('genres', [])
+    if isinstance(genres, str):
+        genres = [genres]
+    elif not isinstance(genres, list):
+        return {}
+    names: Dict[str, str] = {}
+    for genre in genres:
+        names.setdefault(_genre_key(genre), str(genre).strip())
+    return names
+
+
+def popcount(bitmap: np.ndarray) -> int:
+    """Count the set bits of a packed bitmap."""
+    return int(_POPCOUNT_TABLE[bitmap].sum())
+
+
+def popcount_rows(bitmaps: np.ndarray) -> np.ndarray:
+    """Count the set bits of every row of a stacked (rows x bytes) bitmap matrix."""
+    return _POPCOUNT_TABLE[bitmaps].sum(axis=1)
+
+
+class CatalogIndex:
+    """Bitmap index over the in-memory movie catalog."""
+
+    def __init__(self, movies: List[Dict[str, Any]]):
+        self.movies = movies
+        self.size = len(movies)
+
+        # Columnar copies of the fields used for filtering and sorting
+        self.ids = np.array([_to_int(m.get('id'), i) for i, m in enumerate(movies)], dtype=np.int64)
+        self.years = np.array([_to_int(m.get('year')) for m in movies], dtype=np.int32)
+        self.ratings = np.array([_to_float(m.get('rating')) for m in movies], dtype=np.float32)
+        self.popularity = np.array([_to_float(m.get('popularity')) for m in movies], dtype=np.float32)
+        self.titles_lower = np.array([str(m.get('title', '')).lower() for m in movies], dtype=str)
+
+        self._build_genre_bitmaps()
+        self._build_decade_bitmaps()
+        self._build_rating_bitmaps()
+        self._sort_orders: Dict[str, np.ndarray] = {}
+        # Sort keys and ids in sort order, cached with the order so cursors seek by binary search
+        self._ordered_keys: Dict[str, Optional[np.ndarray]] = {}
+        self._ordered_ids: Dict[str, np.ndarray] = {}
+
+        # Id lookup: rows ordered by movie id for searchsorted
+        self._id_order = np.argsort(self.ids, kind='stable')
+        self._sorted_ids = self.ids[self._id_order]
+        self._title_lookup: Optional[Dict[str, List[int]]] = None
+
+        logger.info(
+            f"✅ Catalog index built: {self.size} movies, {len(self.genres)} genres, "
+            f"{len(self.decades)} decades"
+        )
+
+    # ------------------------------------------------------------------
+    # Construction
+    # ------------------------------------------------------------------
+    def _pack(self, mask: np.ndarray) -> np.ndarray:
+        """Pack a boolean mask over the catalog into a bitmap."""
+        return np.packbits(mask)
+
+    def _stack(self, masks: List[np.ndarray]) -> np.ndarray:
+        """Pack several masks into a (rows x bytes) bitmap matrix."""
+        if not masks:
+            return np.zeros((0, (self.size + 7) // 8), dtype=np.uint8)
+        return np.packbits(np.vstack(masks), axis=1)
+
+    def _build_genre_bitmaps(self):
+        # Spellings that differ only in case or surrounding space are one genre, named by its first spelling
+        genre_rows: Dict[str, List[int]] = {}
+        genre_names: Dict[str, str] = {}
+        for row, movie in enumerate(self.movies):
+            for key, name in _movie_genres(movie).items():
+                genre_names.setdefault(key, name)
+                genre_rows.setdefault(key, []).append(row)
+
+        keys = sorted(genre_rows, key=lambda key: genre_names[key])
+        self.genres = [genre_names[key] for key in keys]
+        self._genre_lookup: Dict[str, int] = {}
+        masks = []
+        for position, key in enumerate(keys):
+            mask = np.zeros(self.size, dtype=bool)
+            mask[genre_rows[key]] = True
+            masks.append(mask)
+            self._genre_lookup[key] = position
+
+        self.genre_masks = np.vstack(masks) if masks else np.zeros((0, self.size), dtype=bool)
+        self.genre_bitmaps = self._stack(masks)
+
+    def _build_decade_bitmaps(self):
+        decades = self.years - (self.years % 10)
+        self.decades = sorted(int(d) for d in np.unique(decades[self.years > 0]))
+        self.decade_bitmaps = self._stack([decades == d for d in self.decades])
+
+    def _build_rating_bitmaps(self):
+        buckets = np.clip(np.floor(self.ratings), 0, len(RATING_BUCKETS) - 1).astype(np.int32)
+        self.rating_bucket_labels = [f"{low}-{high}" for low, high in RATING_BUCKETS]
+        self.rating_bitmaps = self._stack([buckets == b for b in range(len(RATING_BUCKETS))])
+
+    def rows_for_ids(self, ids) -> np.ndarray:
+        """Catalog rows for a sequence of movie ids (-1 where the id is unknown)."""
+        ids = np.asarray(ids, dtype=np.int64)
+        if self.size == 0:
+            return np.full(ids.shape, -1, dtype=np.int64)
+        positions = np.minimum(np.searchsorted(self._sorted_ids, ids), self.size - 1)
+        rows = self._id_order[positions]
+        return np.where(self.ids[rows] == ids, rows, -1)
+
+    def _title_rows(self) -> Dict[str, List[int]]:
+        """Lowercase title (with and without a trailing "(year)") -> catalog rows, built on first use."""
+        if self._title_lookup is None:
+            lookup: Dict[str, List[int]] = {}
+            for row, title in enumerate(self.titles_lower.tolist()):
+                lookup.setdefault(title, []).append(row)
+                stripped = _YEAR_SUFFIX.sub('', title)
+                if stripped != title:
+                    lookup.setdefault(stripped, []).append(row)
+            self._title_lookup = lookup
+        return self._title_lookup
+
+    def watched_bitmap(self, watched: Iterable[Any]) -> np.ndarray:
+        """
+        Resolve watched movies (titles or ids) to a packed bitset over the catalog.
+
+        The bitset holds one bit per catalog row, so a 10k-movie catalog costs
+        about 1.3 KB regardless of how long the watch list is.
+        """
+        mask = np.zeros(self.size, dtype=bool)
+        ids = []
+        title_rows = self._title_rows()
+        for item in watched:
+            key = str(item).strip().lower()
+            if not key:
+                continue
+            if key.isdigit():
+                ids.append(int(key))
+            rows = title_rows.get(key) or title_rows.get(_YEAR_SUFFIX.sub('', key))
+            if rows:
+                mask[rows] = True
+        if ids:
+            rows = self.rows_for_ids(ids)
+            mask[rows[rows >= 0]] = True
+        return self._pack(mask)
+
+    def unpack(self, bitmap: np.ndarray) -> np.ndarray:
+        """Expand a packed catalog bitset back to a boolean mask."""
+        return np.unpackbits(bitmap, count=self.size).astype(bool)
+
+    def included_rows(self, excluded: Optional[np.ndarray] = None, limit: Optional[int] = None) -> np.ndarray:
+        """Catalog rows (in catalog order, optionally only the first ``limit``) not set in an exclusion bitset."""
+        end = self.size if limit is None else min(limit, self.size)
+        if excluded is None:
+            return np.arange(end)
+        return np.flatnonzero(~self.unpack(excluded)[:end])
+
+    # ------------------------------------------------------------------
+    # Filtering
+    # ------------------------------------------------------------------
+    def genre_mask(self, genre: str) -> np.ndarray:
+        """Boolean mask of movies tagged with ``genre`` (case-insensitive)."""
+        position = self._genre_lookup.get(_genre_key(genre))
+        if position is None:
+            return np.zeros(self.size, dtype=bool)
+        return self.genre_masks[position].copy()
+
+    def _filter_masks(self, genre: Optional[str] = None,
+                      year_min: Optional[int] = None, year_max: Optional[int] = None,
+                      rating_min: Optional[float] = None, rating_max: Optional[float] = None,
+                      search: Optional[str] = None) -> Dict[str, Optional[np.ndarray]]:
+        """Compile each filter dimension to a boolean mask (None = unfiltered)."""
+        masks: Dict[str, Optional[np.ndarray]] = {'genre': None, 'year': None, 'rating': None, 'search': None}
+
+        if genre:
+            masks['genre'] = self.genre_mask(genre)
+
+        if year_min is not None or year_max is not None:
+            year_mask = np.ones(self.size, dtype=bool)
+            if year_min is not None:
+                year_mask &= self.years >= year_min
+            if year_max is not None:
+                year_mask &= self.years <= year_max
+            masks['year'] = year_mask
+
+        if rating_min is not None or rating_max is not None:
+            rating_mask = np.ones(self.size, dtype=bool)
+            if rating_min is not None:
+                rating_mask &= self.ratings >= rating_min
+            if rating_max is not None:
+                rating_mask &= self.ratings <= rating_max
+            masks['rating'] = rating_mask
+
+        if search:
+            masks['search'] = np.char.find(self.titles_lower, search.lower()) >= 0
+
+        return masks
+
+    def _combine(self, masks: Dict[str, Optional[np.ndarray]], skip: Optional[str] = None) -> np.ndarray:
+        combined = np.ones(self.size, dtype=bool)
+        for name, mask in masks.items():
+            if mask is not None and name != skip:
+                combined &= mask
+        return combined
+
+    def filter_mask(self, **filters) -> np.ndarray:
+        """Boolean mask of the movies matching all filters."""
+        return self._combine(self._filter_masks(**filters))
+
+    # ------------------------------------------------------------------
+    # Facets
+    # ------------------------------------------------------------------
+    def facet_counts(self, **filters) -> Dict[str, Dict[str, int]]:
+        """
+        Count movies per genre, decade and rating bucket for a filter set.
+
+        Each facet is counted against the other active filters, so selecting
+        a genre still reports how many movies every other genre would yield.
+        """
+        masks = self._filter_masks(**filters)
+
+        genre_base = self._pack(self._combine(masks, skip='genre'))
+        decade_base = self._pack(self._combine(masks, skip='year'))
+        rating_base = self._pack(self._combine(masks, skip='rating'))
+
+        genre_counts = popcount_rows(self.genre_bitmaps & genre_base)
+        decade_counts = popcount_rows(self.decade_bitmaps & decade_base)
+        rating_counts = popcount_rows(self.rating_bitmaps & rating_base)
+
+        return {
+            'genres': {g: int(c) for g, c in zip(self.genres, genre_counts) if c},
+            'decades': {f"{d}s": int(c) for d, c in zip(self.decades, decade_counts) if c},
+            'rating_buckets': {
+                label: int(c) for label, c in zip(self.rating_bucket_labels, rating_counts) if c
+            }
+        }
+
+    def genre_counts(self) -> Dict[str, int]:
+        """Number of movies carrying each genre."""
+        return {g: int(c) for g, c in zip(self.genres, popcount_rows(self.genre_bitmaps))}
+
+    # ------------------------------------------------------------------
+    # Sorting and paging
+    # ------------------------------------------------------------------
+    def _sort_key(self, sort_by: str) -> Optional[np.ndarray]:
+        """Ascending primary sort key for a sort field (descending fields are negated)."""
+        if sort_by == 'popularity':
+            return -self.popularity.astype(np.float64)
+        if sort_by == 'rating':
+            return -self.ratings.astype(np.float64)
+        if sort_by == 'year':
+            return -self.years.astype(np.int64)
+        if sort_by == 'title':
+            return self.titles_lower
+        return None
+
+    def sort_order(self, sort_by: str) -> np.ndarray:
+        """Row order for a sort field (ties broken by movie id), computed once and reused."""
+        if sort_by not in self._sort_orders:
+            key = self._sort_key(sort_by)
+            if key is None:
+                order = np.arange(self.size)
+                self._ordered_keys[sort_by] = None
+            else:
+                order = np.lexsort((self.ids, key))
+                self._ordered_keys[sort_by] = key[order]
+            self._ordered_ids[sort_by] = self.ids[order]
+            self._sort_orders[sort_by] = order
+        return self._sort_orders[sort_by]
+
+    def cursor_key(self, row: int, sort_by: str) -> Any:
+        """JSON-safe sort key of a row, as stored in keyset cursors."""
+        if sort_by == 'popularity':
+            return -float(self.popularity[row])
+        if sort_by == 'rating':
+            return -float(self.ratings[row])
+        if sort_by == 'year':
+            return -int(self.years[row])
+        if sort_by == 'title':
+            return str(self.titles_lower[row])
+        return int(row)  # Unsorted: the position in the order is the row
+
+    def seek(self, sort_by: str, last_key: Any, last_id: int) -> int:
+        """Position in the sort order just after the (sort key, movie id) pair (binary search, any depth)."""
+        self.sort_order(sort_by)
+        sorted_keys = self._ordered_keys[sort_by]
+        if sorted_keys is None:
+            return int(last_key) + 1
+
+        block_start = int(np.searchsorted(sorted_keys, last_key, side='left'))
+        block_end = int(np.searchsorted(sorted_keys, last_key, side='right'))
+        sorted_ids = self._ordered_ids[sort_by][block_start:block_end]  # Ascending within equal keys
+        return block_start + int(np.searchsorted(sorted_ids, last_id, side='right'))
+
+    def _collect(self, mask: np.ndarray, order: np.ndarray, start: int, limit: int) -> np.ndarray:
+        """Walk the sort order from ``start`` in chunks until ``limit`` matching rows are found."""
+        chunk_size = max(limit * 4, 256)
+        collected = []
+        found = 0
+        position = start
+        while found < limit and position < order.size:
+            chunk = order[position:position + chunk_size]
+            matching = chunk[mask[chunk]]
+            collected.append(matching)
+            found += matching.size
+            position += chunk_size
+        if not collected:
+            return np.zeros(0, dtype=order.dtype)
+        return np.concatenate(collected)[:limit]
+
+    def browse(self, page: int = 1, per_page: int = 50, sort_by: str = 'popularity',
+               after: Optional[Tuple[Any, int]] = None, **filters) -> Dict[str, Any]:
+        """
+        Filter, sort and slice one page of the catalog.
+
+        With ``after`` set to a (sort key, movie id) pair the page starts right
+        after that movie (keyset pagination) instead of at ``page``.
+        """
+        mask = self.filter_mask(**filters)
+        order = self.sort_order(sort_by)
+
+        if after is not None:
+            start = self.seek(sort_by, after[0], after[1])
+            # One extra row tells us whether another page exists
+            rows = self._collect(mask, order, start, per_page + 1)
+        else:
+            matching_rows = order[mask[order]]
+            start_idx = (page - 1) * per_page
+            rows = matching_rows[start_idx:start_idx + per_page + 1]
+
+        page_rows = rows[:per_page]
+        last = None
+        if rows.size > per_page and page_rows.size:
+            row = int(page_rows[-1])
+            last = (self.cursor_key(row, sort_by), int(self.ids[row]))
+
+        return {
+            'movies': [self.movies[row] for row in page_rows],
+            'total': int(np.count_nonzero(mask)),
+            'last': last
+        }
+
+
+# Global index instance for use in API
+catalog_index: Optional[CatalogIndex] = None
+
+
+def initialize_catalog_index(movies: List[Dict[str, Any]]) -> CatalogIndex:
+    """Build the global catalog index."""
+    global catalog_index
+    catalog_index = CatalogIndex(movies)
+    return catalog_index
+
+
+def get_catalog_index() -> CatalogIndex:
+    """Get the global catalog index."""
+    if catalog_index is None:
+        raise RuntimeError("Catalog index not initialized. Call initialize_catalog_index first.")
+    return catalog_index
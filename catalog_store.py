@@ -0,0 +1,479 @@
+"""
+SQLite Catalog Store
+====================
+
+Disk-backed alternative to the in-memory CatalogIndex for very large
+catalogs. Serves the same browse / facet / genre queries as indexed SQL.
+
+Features:
+- One-time load of the catalog into a local SQLite database, streamed
+  from the data files so browsing never needs the in-memory catalog
+- FTS5 (trigram) title search with substring semantics
+- Covering indexes for genre+popularity, year and rating queries
+- Keyset (cursor) and offset pagination compiled to SQL
+- Connection pool with queries run in a thread executor
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import queue
+import sqlite3
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from functools import partial
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from catalog_index import RATING_BUCKETS, _genre_key, _movie_genres, _to_float, _to_int
+
+logger = logging.getLogger(__name__)
+
+SCHEMA_VERSION = 2
+# Catalog fingerprints double as CATALOG_VERSION (precomputed results, preference grids):
+# they change with the catalog, not with the database schema
+FINGERPRINT_VERSION = 1
+
+# Rows per INSERT batch while the catalog streams into the database
+LOAD_BATCH_ROWS = 5000
+
+# sort_by -> (column, descending); unknown fields keep catalog order
+_SORT_COLUMNS = {
+    'popularity': ('popularity', True),
+    'rating': ('rating', True),
+    'year': ('year', True),
+    'title': ('title_lower', False),
+}
+_DEFAULT_SORT = ('position', False)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+CREATE TABLE IF NOT EXISTS movies (
+    id INTEGER PRIMARY KEY,
+    position INTEGER NOT NULL,
+    title_lower TEXT NOT NULL,
+    year INTEGER NOT NULL,
+    rating REAL NOT NULL,
+    popularity REAL NOT NULL,
+    data TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS movie_genres (
+    genre_key TEXT NOT NULL,
+    movie_id INTEGER NOT NULL,
+    position INTEGER NOT NULL,
+    title_lower TEXT NOT NULL,
+    year INTEGER NOT NULL,
+    rating REAL NOT NULL,
+    popularity REAL NOT NULL,
+    PRIMARY KEY (genre_key, movie_id)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS genres (
+    genre_key TEXT PRIMARY KEY,
+    name TEXT NOT NULL,
+    movie_count INTEGER NOT NULL
+);
+"""
+
+_INDEXES = """
+CREATE INDEX IF NOT EXISTS idx_movies_popularity ON movies (popularity DESC, id);
+CREATE INDEX IF NOT EXISTS idx_movies_year ON movies (year, popularity, rating, id);
+CREATE INDEX IF NOT EXISTS idx_movies_rating ON movies (rating, popularity, year, id);
+CREATE INDEX IF NOT EXISTS idx_movies_title ON movies (title_lower, id);
+CREATE INDEX IF NOT EXISTS idx_movies_position ON movies (position, id);
+CREATE INDEX IF NOT EXISTS idx_genre_popularity ON movie_genres (genre_key, popularity DESC, movie_id, year, rating);
+CREATE INDEX IF NOT EXISTS idx_genre_year ON movie_genres (genre_key, year, movie_id);
+CREATE INDEX IF NOT EXISTS idx_genre_rating ON movie_genres (genre_key, rating, movie_id);
+"""
+
+
+def _fingerprint(count: int, parts: Iterable[str]) -> str:
+    digest = hashlib.blake2b(digest_size=12)
+    digest.update(f"v{FINGERPRINT_VERSION}:{count}".encode('utf-8'))
+    for part in parts:
+        digest.update(part.encode('utf-8'))
+    return digest.hexdigest()
+
+
+def _fingerprint_part(movie: Dict[str, Any]) -> str:
+    return f"|{movie.get('id')}:{movie.get('title')}"
+
+
+def catalog_fingerprint(movies: List[Dict[str, Any]]) -> str:
+    """Cheap fingerprint of a catalog, used to decide whether the database must be rebuilt."""
+    return _fingerprint(len(movies), (_fingerprint_part(movie) for movie in movies))
+
+
+def source_fingerprint(source_stamp: str) -> str:
+    """Fingerprint of a database built from data files with the given stamp (see shared_arrays.file_stamp)."""
+    return hashlib.blake2b(f"v{SCHEMA_VERSION}:source:{source_stamp}".encode('utf-8'), digest_size=12).hexdigest()
+
+
+class ConnectionPool:
+    """Fixed-size pool of read connections to one SQLite database."""
+
+    def __init__(self, db_path: str, size: int = 4):
+        self.db_path = db_path
+        self.size = size
+        self._open()
+        if hasattr(os, 'register_at_fork'):
+            # SQLite connections must not cross fork(): forked workers open their own
+            os.register_at_fork(after_in_child=self._open)
+
+    def _open(self) -> None:
+        self._connections: "queue.Queue[sqlite3.Connection]" = queue.Queue()
+        for _ in range(self.size):
+            self._connections.put(self._connect())
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        conn.execute("PRAGMA query_only = ON")
+        conn.execute("PRAGMA mmap_size = 268435456")
+        conn.execute("PRAGMA cache_size = -16000")
+        return conn
+
+    @contextmanager
+    def connection(self):
+        conn = self._connections.get()
+        try:
+            yield conn
+        finally:
+            self._connections.put(conn)
+
+    def close(self) -> None:
+        while not self._connections.empty():
+            self._connections.get_nowait().close()
+
+
+class SQLiteCatalogStore:
+    """Catalog browse/search backend on SQLite with FTS5 title search."""
+
+    def __init__(self, db_path: str, pool_size: int = 4):
+        self.db_path = db_path
+        self.pool = ConnectionPool(db_path, pool_size)
+        self.executor = ThreadPoolExecutor(max_workers=pool_size, thread_name_prefix='catalog-sql')
+
+        with self.pool.connection() as conn:
+            meta = dict(conn.execute("SELECT key, value FROM meta").fetchall())
+            self.has_fts = meta.get('fts') == 'trigram'
+            self.size = int(meta.get('movie_count', 0))
+            # catalog_fingerprint() of the movies loaded, so versioned results match the in-memory catalog
+            self.catalog_version = meta.get('catalog_version')
+            rows = conn.execute("SELECT genre_key, name, movie_count FROM genres ORDER BY name").fetchall()
+
+        self._genre_names = {key: name for key, name, _ in rows}
+        self._genre_counts = {name: count for _, name, count in rows}
+        self.genres = [name for _, name, _ in rows]
+
+        logger.info(f"✅ SQLite catalog opened: {self.size} movies, {len(self.genres)} genres (fts={self.has_fts})")
+
+    # ------------------------------------------------------------------
+    # Loading
+    # ------------------------------------------------------------------
+    @classmethod
+    def build(cls, movies: List[Dict[str, Any]], db_path: str, pool_size: int = 4) -> 'SQLiteCatalogStore':
+        """Open the catalog database, (re)loading it only when the catalog changed."""
+        fingerprint = catalog_fingerprint(movies)
+        if not cls._is_current(db_path, fingerprint):
+            cls._load(movies, db_path, fingerprint)
+        return cls(db_path, pool_size)
+
+    @classmethod
+    def build_from_source(cls, load: Callable[[], Iterable[Dict[str, Any]]], source_stamp: str,
+                          db_path: str, pool_size: int = 4) -> 'SQLiteCatalogStore':
+        """
+        Open the catalog database built from data files, streaming ``load()``
+        into it only when the files changed since it was built. Attaching an
+        up-to-date database reads no movies at all.
+        """
+        fingerprint = source_fingerprint(source_stamp)
+        if not cls._is_current(db_path, fingerprint):
+            cls._load(load(), db_path, fingerprint)
+        return cls(db_path, pool_size)
+
+    @staticmethod
+    def _is_current(db_path: str, fingerprint: str) -> bool:
+        if not os.path.exists(db_path):
+            return False
+        try:
+            conn = sqlite3.connect(db_path)
+            try:
+                meta = dict(conn.execute(
+                    "SELECT key, value FROM meta WHERE key IN ('fingerprint', 'schema_version')"
+                ).fetchall())
+            finally:
+                conn.close()
+        except sqlite3.Error:
+            return False
+        return meta.get('fingerprint') == fingerprint and meta.get('schema_version') == str(SCHEMA_VERSION)
+
+    @staticmethod
+    def _load(movies: Iterable[Dict[str, Any]], db_path: str, fingerprint: str) -> None:
+        logger.info(f"📀 Loading catalog into SQLite {db_path}...")
+        os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        tmp_path = f"{db_path}.tmp"
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+        conn = sqlite3.connect(tmp_path)
+        try:
+            conn.execute("PRAGMA journal_mode = OFF")
+            conn.execute("PRAGMA synchronous = OFF")
+            conn.executescript(_SCHEMA)
+
+            # Rows are inserted in batches as they stream in; only ids and fingerprint parts are kept
+            movie_rows = []
+            genre_rows = []
+            genre_names: Dict[str, str] = {}
+            genre_counts: Dict[str, int] = {}
+            seen_ids = set()
+            version_parts: List[str] = []
+            movie_count = 0
+
+            def flush():
+                conn.executemany("INSERT INTO movies VALUES (?, ?, ?, ?, ?, ?, ?)", movie_rows)
+                conn.executemany("INSERT INTO movie_genres VALUES (?, ?, ?, ?, ?, ?, ?)", genre_rows)
+                movie_rows.clear()
+                genre_rows.clear()
+
+            for position, movie in enumerate(movies):
+                version_parts.append(_fingerprint_part(movie))
+                movie_id = _to_int(movie.get('id'), position)
+                if movie_id in seen_ids:
+                    continue
+                seen_ids.add(movie_id)
+                movie_count += 1
+
+                title_lower = str(movie.get('title', '')).lower()
+                year = _to_int(movie.get('year'))
+                rating = _to_float(movie.get('rating'))
+                popularity = _to_float(movie.get('popularity'))
+                movie_rows.append((movie_id, position, title_lower, year, rating, popularity,
+                                   json.dumps(movie, default=str)))
+
+                for key, name in _movie_genres(movie).items():
+                    genre_names.setdefault(key, name)
+                    genre_counts[key] = genre_counts.get(key, 0) + 1
+                    genre_rows.append((key, movie_id, position, title_lower, year, rating, popularity))
+
+                if len(movie_rows) >= LOAD_BATCH_ROWS:
+                    flush()
+            flush()
+
+            conn.executemany(
+                "INSERT INTO genres VALUES (?, ?, ?)",
+                [(key, genre_names[key], count) for key, count in genre_counts.items()]
+            )
+            conn.executescript(_INDEXES)
+
+            fts = 'none'
+            try:
+                conn.execute(
+                    "CREATE VIRTUAL TABLE movies_fts USING fts5("
+                    "title_lower, content='movies', content_rowid='id', tokenize='trigram')"
+                )
+                conn.execute("INSERT INTO movies_fts (movies_fts) VALUES ('rebuild')")
+                fts = 'trigram'
+            except sqlite3.OperationalError as e:
+                logger.warning(f"FTS5 trigram search unavailable, falling back to substring scan: {e}")
+
+            conn.executemany("INSERT INTO meta VALUES (?, ?)", [
+                ('fingerprint', fingerprint),
+                ('schema_version', str(SCHEMA_VERSION)),
+                ('movie_count', str(movie_count)),
+                ('catalog_version', _fingerprint(len(version_parts), version_parts)),
+                ('fts', fts),
+            ])
+            conn.execute("ANALYZE")
+            conn.commit()
+        finally:
+            conn.close()
+
+        os.replace(tmp_path, db_path)
+        logger.info(f"✅ SQLite catalog loaded: {movie_count} movies")
+
+    # ------------------------------------------------------------------
+    # Query compilation
+    # ------------------------------------------------------------------
+    def _compile_where(self, skip: Optional[str] = None, genre: Optional[str] = None,
+                       year_min: Optional[int] = None, year_max: Optional[int] = None,
+                       rating_min: Optional[float] = None, rating_max: Optional[float] = None,
+                       search: Optional[str] = None) -> Tuple[str, str, List[Any]]:
+        """
+        Compile filters to (FROM clause, WHERE clause, params).
+
+        Genre-filtered queries are driven from movie_genres so the
+        (genre, popularity) covering index serves both filter and sort.
+        """
+        clauses: List[str] = []
+        params: List[Any] = []
+
+        if genre and skip != 'genre':
+            source = "movie_genres t"
+            id_column = "t.movie_id"
+            clauses.append("t.genre_key = ?")
+            params.append(_genre_key(genre))
+        else:
+            source = "movies t"
+            id_column = "t.id"
+
+        if skip != 'year':
+            if year_min is not None:
+                clauses.append("t.year >= ?")
+                params.append(year_min)
+            if year_max is not None:
+                clauses.append("t.year <= ?")
+                params.append(year_max)
+
+        if skip != 'rating':
+            if rating_min is not None:
+                clauses.append("t.rating >= ?")
+                params.append(rating_min)
+            if rating_max is not None:
+                clauses.append("t.rating <= ?")
+                params.append(rating_max)
+
+        if search:
+            term = search.lower()
+            if self.has_fts and len(term) >= 3:
+                clauses.append(f"{id_column} IN (SELECT rowid FROM movies_fts WHERE movies_fts MATCH ?)")
+                params.append('"' + term.replace('"', '""') + '"')
+            else:
+                clauses.append("instr(t.title_lower, ?) > 0")
+                params.append(term)
+
+        where = " AND ".join(clauses) if clauses else "1"
+        return source, where, params
+
+    @staticmethod
+    def _id_column(source: str) -> str:
+        return "t.movie_id" if source.startswith("movie_genres") else "t.id"
+
+    # ------------------------------------------------------------------
+    # Queries (blocking; use run() from async code)
+    # ------------------------------------------------------------------
+    def browse(self, page: int = 1, per_page: int = 50, sort_by: str = 'popularity',
+               after: Optional[Tuple[Any, int]] = None, **filters) -> Dict[str, Any]:
+        """Filter, sort and slice one page; same contract as CatalogIndex.browse."""
+        source, where, params = self._compile_where(**filters)
+        id_column = self._id_column(source)
+        column, descending = _SORT_COLUMNS.get(sort_by, _DEFAULT_SORT)
+        direction = "DESC" if descending else "ASC"
+
+        page_where = where
+        page_params = list(params)
+        offset = 0
+        if after is not None:
+            # Cursor keys are ascending, so descending columns store the negated value
+            last_key, last_id = after
+            value = -last_key if descending else last_key
+            comparison = "<" if descending else ">"
+            page_where = f"({where}) AND (t.{column} {comparison} ? OR (t.{column} = ? AND {id_column} > ?))"
+            page_params += [value, value, int(last_id)]
+        else:
+            offset = (page - 1) * per_page
+
+        page_sql = (
+            f"SELECT {id_column}, t.{column} FROM {source} WHERE {page_where} "
+            f"ORDER BY t.{column} {direction}, {id_column} ASC LIMIT ? OFFSET ?"
+        )
+        count_sql = f"SELECT COUNT(*) FROM {source} WHERE {where}"
+
+        with self.pool.connection() as conn:
+            # One extra row tells us whether another page exists
+            keys = conn.execute(page_sql, page_params + [per_page + 1, offset]).fetchall()
+            total = conn.execute(count_sql, params).fetchone()[0]
+            page_keys = keys[:per_page]
+            movies = self._fetch_movies(conn, [movie_id for movie_id, _ in page_keys])
+
+        last = None
+        if len(keys) > per_page and page_keys:
+            last_id, last_value = page_keys[-1]
+            last = (-last_value if descending else last_value, last_id)
+
+        return {'movies': movies, 'total': total, 'last': last}
+
+    @staticmethod
+    def _fetch_movies(conn: sqlite3.Connection, ids: List[int]) -> List[Dict[str, Any]]:
+        if not ids:
+            return []
+        placeholders = ",".join("?" * len(ids))
+        rows = dict(conn.execute(f"SELECT id, data FROM movies WHERE id IN ({placeholders})", ids).fetchall())
+        return [json.loads(rows[movie_id]) for movie_id in ids]
+
+    def facet_counts(self, **filters) -> Dict[str, Dict[str, int]]:
+        """Per-genre, per-decade and per-rating-bucket counts, each against the other filters."""
+        with self.pool.connection() as conn:
+            source, where, params = self._compile_where(skip='genre', **filters)
+            genre_rows = conn.execute(
+                f"SELECT g.genre_key, COUNT(*) FROM {source} JOIN movie_genres g "
+                f"ON g.movie_id = {self._id_column(source)} WHERE {where} GROUP BY g.genre_key",
+                params
+            ).fetchall()
+
+            source, where, params = self._compile_where(skip='year', **filters)
+            decade_rows = conn.execute(
+                f"SELECT t.year - t.year % 10 AS decade, COUNT(*) FROM {source} "
+                f"WHERE ({where}) AND t.year > 0 GROUP BY decade ORDER BY decade",
+                params
+            ).fetchall()
+
+            source, where, params = self._compile_where(skip='rating', **filters)
+            last_bucket = len(RATING_BUCKETS) - 1
+            rating_rows = conn.execute(
+                f"SELECT MIN(MAX(CAST(t.rating AS INTEGER), 0), {last_bucket}) AS bucket, COUNT(*) "
+                f"FROM {source} WHERE {where} GROUP BY bucket ORDER BY bucket",
+                params
+            ).fetchall()
+
+        genre_counts = {self._genre_names.get(key, key): count for key, count in genre_rows if count}
+        return {
+            'genres': {name: genre_counts[name] for name in self.genres if name in genre_counts},
+            'decades': {f"{decade}s": count for decade, count in decade_rows if count},
+            'rating_buckets': {
+                f"{RATING_BUCKETS[bucket][0]}-{RATING_BUCKETS[bucket][1]}": count
+                for bucket, count in rating_rows if count
+            }
+        }
+
+    def genre_counts(self) -> Dict[str, int]:
+        """Number of movies carrying each genre."""
+        return dict(self._genre_counts)
+
+    # ------------------------------------------------------------------
+    # Async helpers
+    # ------------------------------------------------------------------
+    async def run(self, method: str, *args, **kwargs):
+        """Run a blocking query method on the store's thread executor."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, partial(getattr(self, method), *args, **kwargs))
+
+    def close(self) -> None:
+        self.executor.shutdown(wait=False)
+        self.pool.close()
+
+
+# Global store instance for use in API
+catalog_store: Optional[SQLiteCatalogStore] = None
+
+
+def initialize_catalog_store(movies: List[Dict[str, Any]], db_path: str, pool_size: int = 4) -> SQLiteCatalogStore:
+    """Build (if needed) and open the global SQLite catalog store."""
+    global catalog_store
+    catalog_store = SQLiteCatalogStore.build(movies, db_path, pool_size)
+    return catalog_store
+
+
+def initialize_catalog_store_from_source(load: Callable[[], Iterable[Dict[str, Any]]], source_stamp: str,
+                                         db_path: str, pool_size: int = 4) -> SQLiteCatalogStore:
+    """Build (if the data files changed) and open the global SQLite catalog store without an in-memory catalog."""
+    global catalog_store
+    catalog_store = SQLiteCatalogStore.build_from_source(load, source_stamp, db_path, pool_size)
+    return catalog_store
+
+
+def get_catalog_store() -> SQLiteCatalogStore:
+    """Get the global SQLite catalog store."""
+    if catalog_store is None:
+        raise RuntimeError("Catalog store not initialized. Call initialize_catalog_store first.")
+    return catalog_store
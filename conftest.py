@@ -0,0 +1,57 @@
+"""
+Shared pytest fixtures: a synthetic catalog and the API wired to it.
+
+The API module loads the MovieLens catalog from disk; tests swap in a small
+deterministic catalog instead so they run without the dataset or a server.
+"""
+
+import random
+
+import pytest
+
+GENRES = ['Action', 'Comedy', 'Drama', 'Horror', 'Romance', 'Sci-Fi', 'Thriller', 'Adventure', 'Crime', 'Fantasy',
+          'Animation', 'Children', 'Mystery', 'War', 'Documentary', 'Western', 'Musical', 'Film-Noir', 'IMAX']
+
+PREFS = {'action': 8, 'comedy': 4, 'romance': 3, 'thriller': 7, 'sci_fi': 9, 'drama': 5, 'horror': 2}
+
+
+def synthetic_catalog(n: int = 3000, seed: int = 1):
+    """Catalog dicts shaped like fast_complete_loader's movies (ids 1, 4, 7, ...)."""
+    rng = random.Random(seed)
+    movies = []
+    for i in range(n):
+        genres = rng.sample(GENRES, rng.randint(1, 4))
+        movies.append({
+            'id': i * 3 + 1,
+            'title': f"Movie {rng.choice(['Alpha', 'Beta', 'Gamma', 'Star', 'Night'])} {i}",
+            'year': str(rng.randint(1915, 2008)),
+            'genres': genres,
+            'rating': round(rng.uniform(1, 10), 1),
+            'popularity': round(rng.uniform(5, 100), 2),
+            'runtime': 120 if 'Drama' in genres else 105,
+            'poster': 'p', 'description': 'd', 'director': 'x', 'cast': ['a', 'b', 'c']
+        })
+    return movies
+
+
+@pytest.fixture(scope='session')
+def api_module(tmp_path_factory):
+    """The api module serving a 3,000-movie synthetic catalog with the fuzzy engine (no ANN)."""
+    import api
+    from catalog_index import initialize_catalog_index
+    from catalog_store import catalog_fingerprint
+    from models.fuzzy_model import FuzzyMovieRecommender
+
+    api.REAL_MOVIES_DATABASE = synthetic_catalog()
+    api.CATALOG_INDEX = api.CATALOG_BACKEND = initialize_catalog_index(api.REAL_MOVIES_DATABASE)
+    api.CATALOG_VERSION = catalog_fingerprint(api.REAL_MOVIES_DATABASE)
+    api.hybrid_system = None
+    api.fuzzy_system = FuzzyMovieRecommender()
+    api.candidate_tuner.overrides_path = str(tmp_path_factory.mktemp('tuning') / 'candidate_tuning.json')
+    return api
+
+
+@pytest.fixture(scope='session')
+def client(api_module):
+    from fastapi.testclient import TestClient
+    return TestClient(api_module.app)
@@ -6,13 +6,14 @@ Advanced recommendation system with multiple algorithms and real scoring
 """
 
 import numpy as np
-import pandas as pd
 from typing import Dict, List, Tuple, Optional
 import logging
 from datetime import datetime
 import json
 import os
 
+from catalog_index import CatalogIndex
+
 logger = logging.getLogger(__name__)
 
 def safe_float(value, default=0.0):
@@ -38,6 +39,7 @@ class EnhancedRecommendationEngine:
         self.genre_preferences = {}
         self.user_history = []
         self.recommendation_cache = {}
+        self.catalog_index = None
         
         # Load movies database
         self.load_movies_database()
@@ -77,11 +79,30 @@ class EnhancedRecommendationEngine:
             'advanced_similarity': self.advanced_similarity_algorithm
         }
     
-    def content_based_filtering(self, user_prefs: Dict[str, float], num_recommendations: int = 10) -> List[Dict]:
+    def get_catalog_index(self) -> CatalogIndex:
+        """Bitmap index over this engine's movie list, built on first use"""
+        if self.catalog_index is None or self.catalog_index.movies is not self.movies:
+            self.catalog_index = CatalogIndex(self.movies)
+        return self.catalog_index
+    
+    def watched_bitmap(self, watched_movies: Optional[List]) -> Optional[np.ndarray]:
+        """Resolve watched titles/ids to a packed exclusion bitset (None when nothing is watched)"""
+        if not watched_movies:
+            return None
+        return self.get_catalog_index().watched_bitmap(watched_movies)
+    
+    def candidate_movies(self, excluded: Optional[np.ndarray] = None) -> List[Dict]:
+        """Movies not set in the exclusion bitset, so excluded movies are never scored"""
+        if excluded is None:
+            return self.movies
+        return [self.movies[row] for row in self.get_catalog_index().included_rows(excluded).tolist()]
+    
+    def content_based_filtering(self, user_prefs: Dict[str, float], num_recommendations: int = 10,
+                                excluded: Optional[np.ndarray] = None) -> List[Dict]:
         """Advanced content-based filtering with multiple factors"""
         recommendations = []
         
-        for movie in self.movies:
+        for movie in self.candidate_movies(excluded):
             score = self.calculate_content_score(user_prefs, movie)
             
             # Higher threshold - only recommend well-matching movies
@@ -230,11 +251,12 @@ class EnhancedRecommendationEngine:
         else:  # Older than 40 years
             return 0.3
     
-    def popularity_based_filtering(self, user_prefs: Dict[str, float], num_recommendations: int = 10) -> List[Dict]:
+    def popularity_based_filtering(self, user_prefs: Dict[str, float], num_recommendations: int = 10,
+                                   excluded: Optional[np.ndarray] = None) -> List[Dict]:
         """Popularity-based recommendations with user preference weighting"""
         recommendations = []
         
-        for movie in self.movies:
+        for movie in self.candidate_movies(excluded):
             # Base popularity score (ensure numeric)
             popularity = safe_float(movie.get('popularity', 50), 50.0)
             rating = safe_float(movie.get('rating', 7.0), 7.0)
@@ -256,7 +278,8 @@ class EnhancedRecommendationEngine:
         recommendations.sort(key=lambda x: x['prediction_score'], reverse=True)
         return recommendations[:num_recommendations]
     
-    def genre_matching_algorithm(self, user_prefs: Dict[str, float], num_recommendations: int = 10) -> List[Dict]:
+    def genre_matching_algorithm(self, user_prefs: Dict[str, float], num_recommendations: int = 10,
+                                 excluded: Optional[np.ndarray] = None) -> List[Dict]:
         """Pure genre-based matching with sophisticated scoring"""
         recommendations = []
         
@@ -265,9 +288,9 @@ class EnhancedRecommendationEngine:
         disliked_genres = {k: v for k, v in user_prefs.items() if v < 4.0}
         
         if not preferred_genres:
-            return self.popularity_based_filtering(user_prefs, num_recommendations)
+            return self.popularity_based_filtering(user_prefs, num_recommendations, excluded)
         
-        for movie in self.movies:
+        for movie in self.candidate_movies(excluded):
             # Skip movies with disliked genres
             movie_genres = [g.lower().replace('-', '_').replace(' ', '_') for g in movie.get('genres', [])]
             has_disliked = False
@@ -341,13 +364,14 @@ class EnhancedRecommendationEngine:
         
         return total_score / max_possible_score if max_possible_score > 0 else 0.0
     
-    def hybrid_scoring_algorithm(self, user_prefs: Dict[str, float], num_recommendations: int = 10) -> List[Dict]:
+    def hybrid_scoring_algorithm(self, user_prefs: Dict[str, float], num_recommendations: int = 10,
+                                 excluded: Optional[np.ndarray] = None) -> List[Dict]:
         """Hybrid algorithm combining multiple recommendation strategies"""
         
         # Get recommendations from different algorithms
-        content_recs = self.content_based_filtering(user_prefs, num_recommendations * 2)
-        popularity_recs = self.popularity_based_filtering(user_prefs, num_recommendations * 2)
-        genre_recs = self.genre_matching_algorithm(user_prefs, num_recommendations * 2)
+        content_recs = self.content_based_filtering(user_prefs, num_recommendations * 2, excluded)
+        popularity_recs = self.popularity_based_filtering(user_prefs, num_recommendations * 2, excluded)
+        genre_recs = self.genre_matching_algorithm(user_prefs, num_recommendations * 2, excluded)
         
         # Combine and re-score
         all_movies = {}
@@ -393,12 +417,13 @@ class EnhancedRecommendationEngine:
         hybrid_recommendations.sort(key=lambda x: (x['prediction_score'], random.random()), reverse=True)
         return hybrid_recommendations[:num_recommendations]
     
-    def advanced_similarity_algorithm(self, user_prefs: Dict[str, float], num_recommendations: int = 10) -> List[Dict]:
+    def advanced_similarity_algorithm(self, user_prefs: Dict[str, float], num_recommendations: int = 10,
+                                      excluded: Optional[np.ndarray] = None) -> List[Dict]:
         """Advanced similarity-based recommendations using movie features"""
         recommendations = []
         
         # Create feature vectors for movies
-        for movie in self.movies:
+        for movie in self.candidate_movies(excluded):
             feature_vector = self.create_movie_feature_vector(movie)
             user_vector = self.create_user_feature_vector(user_prefs)
             
@@ -510,14 +535,17 @@ class EnhancedRecommendationEngine:
         return sum(confidence_factors) / len(confidence_factors)
     
     def get_recommendations(self, user_prefs: Dict[str, float], algorithm: str = 'hybrid', 
-                          num_recommendations: int = 10) -> List[Dict]:
-        """Get recommendations using specified algorithm"""
+                          num_recommendations: int = 10, watched_movies: Optional[List] = None) -> List[Dict]:
+        """Get recommendations using specified algorithm, excluding watched movies"""
         
         if algorithm not in self.algorithms:
             algorithm = 'hybrid_scoring'  # Default to hybrid
         
+        # Resolved once per request and shared by every algorithm involved
+        excluded = self.watched_bitmap(watched_movies)
+        
         try:
-            recommendations = self.algorithms[algorithm](user_prefs, num_recommendations)
+            recommendations = self.algorithms[algorithm](user_prefs, num_recommendations, excluded)
             
             # Add enhanced explanations
             for rec in recommendations:
@@ -529,7 +557,7 @@ class EnhancedRecommendationEngine:
         except Exception as e:
             logger.error(f"Error generating recommendations with {algorithm}: {e}")
             # Fallback to simple content-based
-            return self.content_based_filtering(user_prefs, num_recommendations)
+            return self.content_based_filtering(user_prefs, num_recommendations, excluded)
     
     def generate_explanation(self, user_prefs: Dict[str, float], movie: Dict) -> str:
         """Generate detailed recommendation explanation"""
@@ -579,17 +607,30 @@ class EnhancedRecommendationEngine:
         
         return " • ".join(explanations)
 
-# Create global instance
-recommendation_engine = EnhancedRecommendationEngine()
+# Global instance, created on first use (it loads its own view of the catalog)
+_recommendation_engine = None
+
+def get_recommendation_engine() -> EnhancedRecommendationEngine:
+    """Get the global recommendation engine, creating it on first use."""
+    global _recommendation_engine
+    if _recommendation_engine is None:
+        _recommendation_engine = EnhancedRecommendationEngine()
+    return _recommendation_engine
+
+def __getattr__(name: str):
+    # Keeps `from enhanced_recommendation_engine import recommendation_engine` working without an import-time load
+    if name == 'recommendation_engine':
+        return get_recommendation_engine()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 def get_enhanced_recommendations(user_prefs: Dict[str, float], algorithm: str = 'hybrid', 
-                               num_recommendations: int = 10) -> List[Dict]:
+                               num_recommendations: int = 10, watched_movies: Optional[List] = None) -> List[Dict]:
     """Main function to get enhanced recommendations"""
-    return recommendation_engine.get_recommendations(user_prefs, algorithm, num_recommendations)
+    return get_recommendation_engine().get_recommendations(user_prefs, algorithm, num_recommendations, watched_movies)
 
 def get_available_algorithms() -> List[str]:
     """Get list of available recommendation algorithms"""
-    return list(recommendation_engine.algorithms.keys())
+    return list(get_recommendation_engine().algorithms.keys())
 
 if __name__ == "__main__":
     # Test the recommendation engine
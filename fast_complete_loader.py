@@ -6,11 +6,17 @@ Uses pre-processed parquet files for instant loading of full 10M dataset
 import os
 import json
 import math
-import pandas as pd
 import numpy as np
-from typing import List, Dict, Any
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
 import logging
 
+from lazy_imports import lazy_import
+from shared_arrays import file_stamp, shared_root_from_env
+from shared_catalog import get_shared_catalog
+
+# Only needed when the database is built from the data files
+pd = lazy_import('pandas')
+
 logger = logging.getLogger(__name__)
 
 class FastCompleteMovieLensLoader:
@@ -42,8 +48,35 @@ class FastCompleteMovieLensLoader:
         else:
             return self._load_from_csv_optimized()
             
+    def source_files(self) -> List[str]:
+        """Data files the database is built from (empty if none is available)."""
+        movies_parquet = os.path.join(self.processed_dir, 'movies_enriched.parquet')
+        if os.path.exists(movies_parquet):
+            sources = [movies_parquet]
+        else:
+            movies_file = os.path.join(self.base_dir, 'data', 'ml-10M100K', 'movies.dat')
+            if not os.path.exists(movies_file):
+                movies_file = os.path.join(self.base_dir, 'data', 'ml-1m', 'movies.dat')
+            if not os.path.exists(movies_file):
+                return []
+            sources = [movies_file, movies_file.replace('movies.dat', 'ratings.dat')]
+        return sources + [os.path.join(self.processed_dir, 'fast_movie_posters.json')]
+        
+    def iter_fast_movie_database(self) -> Iterator[Dict[str, Any]]:
+        """Yield the movies one at a time (parquet) instead of building the whole list"""
+        movies_parquet = os.path.join(self.processed_dir, 'movies_enriched.parquet')
+        
+        if os.path.exists(movies_parquet):
+            return self._iter_parquet_movies()
+        else:
+            return iter(self._load_from_csv_optimized())
+            
     def _load_from_parquet(self) -> List[Dict[str, Any]]:
         """Load from optimized parquet files"""
+        return list(self._iter_parquet_movies())
+        
+    def _iter_parquet_movies(self) -> Iterator[Dict[str, Any]]:
+        """Movie dicts generated row by row from the optimized parquet file"""
         print("📊 Using optimized parquet data...")
         
         movies_parquet = os.path.join(self.processed_dir, 'movies_enriched.parquet')
@@ -51,7 +84,6 @@ class FastCompleteMovieLensLoader:
         
         print(f"✅ Loaded {len(movies_df)} movies from parquet")
         
-        movie_database = []
         poster_urls = self._get_poster_mapping()
         
         print(f"🚀 Generating metadata for {len(movies_df)} movies...")
@@ -113,9 +145,7 @@ class FastCompleteMovieLensLoader:
                 'box_office': box_office,
                 'budget': budget
             }
-            movie_database.append(movie_data)
-            
-        return movie_database
+            yield movie_data
         
     def _load_from_csv_optimized(self) -> List[Dict[str, Any]]:
         """Fallback to CSV with optimizations"""
@@ -385,12 +415,42 @@ class FastCompleteMovieLensLoader:
 _fast_loader = None
 
 def get_fast_complete_database() -> List[Dict[str, Any]]:
-    """Get complete MovieLens database using fast loader"""
+    """
+    Get complete MovieLens database using fast loader.
+    
+    With SHARED_MEMORY_DIR set, the database is loaded by the first worker
+    process and shared read-only with the others (see shared_catalog.py).
+    """
     global _fast_loader
     if _fast_loader is None:
         _fast_loader = FastCompleteMovieLensLoader()
+    
+    shared_root = shared_root_from_env()
+    sources = _fast_loader.source_files()
+    if shared_root and sources:
+        try:
+            return get_shared_catalog(_fast_loader.get_fast_movie_database, shared_root, file_stamp(sources))
+        except Exception as e:
+            logger.warning(f"⚠️ Shared catalog unavailable, loading a private copy: {e}")
     return _fast_loader.get_fast_movie_database()
 
+def get_fast_complete_source() -> Optional[Tuple[str, Callable[[], Iterator[Dict[str, Any]]]]]:
+    """
+    (source stamp, movie iterator factory) of the complete database, or
+    None when no data files are available.
+    
+    Lets a disk-backed store (CATALOG_BACKEND=sqlite) check whether it is
+    current and rebuild itself row by row, without the in-memory list.
+    """
+    global _fast_loader
+    if _fast_loader is None:
+        _fast_loader = FastCompleteMovieLensLoader()
+    
+    sources = _fast_loader.source_files()
+    if not sources:
+        return None
+    return file_stamp(sources), _fast_loader.iter_fast_movie_database
+
 def get_database_stats() -> Dict[str, Any]:
     """Get database statistics"""
     global _fast_loader
@@ -0,0 +1,62 @@
+"""
+Lazy Imports
+============
+
+Module stand-ins that import on first attribute access, so heavy
+dependencies (TensorFlow, scikit-fuzzy, pandas, matplotlib) are only paid
+for by the code paths that use them, not by every process importing the API.
+
+Features:
+- lazy_import('pandas') returns a proxy; the real import runs when an
+  attribute is first read and is recorded as a startup phase
+- Works for submodules (lazy_import('skfuzzy.control'))
+- is_available() checks that a package is installed without importing it
+"""
+
+import importlib
+import importlib.util
+import time
+import types
+from typing import Any
+
+from startup_profile import startup_profiler
+
+
+class LazyModule(types.ModuleType):
+    """Proxy for a module that is imported the first time one of its attributes is used."""
+
+    def __init__(self, name: str):
+        super().__init__(name)
+        self.__dict__['_lazy_target'] = None
+
+    def _load(self) -> types.ModuleType:
+        module = self.__dict__['_lazy_target']
+        if module is None:
+            start = time.time()
+            module = importlib.import_module(self.__name__)
+            startup_profiler.record(f"lazy import {self.__name__}", start)
+            self.__dict__['_lazy_target'] = module
+        return module
+
+    def __getattr__(self, attr: str) -> Any:
+        return getattr(self._load(), attr)
+
+    def __dir__(self):
+        return dir(self._load())
+
+    def __repr__(self) -> str:
+        state = 'loaded' if self.__dict__['_lazy_target'] is not None else 'not loaded'
+        return f"<lazy module '{self.__name__}' ({state})>"
+
+
+def lazy_import(name: str) -> LazyModule:
+    """A proxy for module ``name``, imported on first use."""
+    return LazyModule(name)
+
+
+def is_available(name: str) -> bool:
+    """Whether top-level package ``name`` can be imported (without importing it)."""
+    try:
+        return importlib.util.find_spec(name) is not None
+    except (ImportError, ValueError):
+        return False
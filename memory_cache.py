@@ -0,0 +1,212 @@
+"""
+Memory Cache
+============
+
+Shared in-process LRU cache used by the recommendation caches.
+
+Features:
+- O(1) get/put/evict on an ordered map
+- Lazy TTL expiry (checked on access, stale entries age out through LRU)
+- Entry-count and approximate byte-size budgets
+- Hit/miss/eviction/expiry counters per namespace
+"""
+
+import logging
+import sys
+import threading
+import time
+from collections import OrderedDict, defaultdict
+from typing import Any, Dict, Hashable, Iterable, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+def approximate_size(value: Any) -> int:
+    """
+    Cheap size estimate of a cached value in bytes.
+
+    Containers are measured one level deep, which is what recommendation
+    payloads (flat dicts of numbers and short strings) need.
+    """
+    size = sys.getsizeof(value)
+    if isinstance(value, dict):
+        for k, v in value.items():
+            size += sys.getsizeof(k) + sys.getsizeof(v)
+    elif isinstance(value, (list, tuple, set)):
+        for item in value:
+            size += sys.getsizeof(item)
+    return size
+
+
+class _NamespaceStats:
+    __slots__ = ('hits', 'misses', 'evictions', 'expirations', 'entries', 'bytes')
+
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.entries = 0
+        self.bytes = 0
+
+    def as_dict(self) -> Dict[str, Any]:
+        total = self.hits + self.misses
+        return {
+            'entries': self.entries,
+            'bytes': self.bytes,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'expirations': self.expirations,
+            'hit_rate': round(self.hits / total * 100, 2) if total else 0
+        }
+
+
+class LRUCache:
+    """Thread-safe LRU cache with TTL, entry and byte budgets."""
+
+    def __init__(self, max_entries: Optional[int] = None, max_bytes: Optional[int] = None,
+                 ttl_seconds: Optional[float] = None):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+
+        # (namespace, key) -> [value, expires_at, size]
+        self._entries: "OrderedDict[tuple, list]" = OrderedDict()
+        self._bytes = 0
+        self._stats: Dict[str, _NamespaceStats] = defaultdict(_NamespaceStats)
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: Hashable, namespace: str = 'default', default: Any = None) -> Any:
+        """Get a cached value, or ``default`` on a miss or expired entry."""
+        full_key = (namespace, key)
+        with self._lock:
+            stats = self._stats[namespace]
+            entry = self._entries.get(full_key)
+            if entry is None:
+                stats.misses += 1
+                return default
+            if entry[1] is not None and entry[1] <= time.monotonic():
+                self._remove(full_key)
+                stats.expirations += 1
+                stats.misses += 1
+                return default
+            self._entries.move_to_end(full_key)
+            stats.hits += 1
+            return entry[0]
+
+    def get_many(self, keys: Iterable[Hashable], namespace: str = 'default') -> Dict[Hashable, Any]:
+        """Look up several keys under one lock; the result only holds the hits."""
+        found = {}
+        now = time.monotonic()
+        with self._lock:
+            stats = self._stats[namespace]
+            for key in keys:
+                full_key = (namespace, key)
+                entry = self._entries.get(full_key)
+                if entry is None:
+                    stats.misses += 1
+                    continue
+                if entry[1] is not None and entry[1] <= now:
+                    self._remove(full_key)
+                    stats.expirations += 1
+                    stats.misses += 1
+                    continue
+                self._entries.move_to_end(full_key)
+                stats.hits += 1
+                found[key] = entry[0]
+        return found
+    
+    def put_many(self, items: Iterable[Tuple[Hashable, Any]], namespace: str = 'default') -> None:
+        """Store several values under one lock (default TTL, estimated sizes)."""
+        expires_at = time.monotonic() + self.ttl_seconds if self.ttl_seconds is not None else None
+        sized = [(key, value, approximate_size(value)) for key, value in items]
+        with self._lock:
+            stats = self._stats[namespace]
+            for key, value, size in sized:
+                full_key = (namespace, key)
+                if full_key in self._entries:
+                    self._remove(full_key)
+                self._entries[full_key] = [value, expires_at, size]
+                self._bytes += size
+                stats.entries += 1
+                stats.bytes += size
+            self._evict()
+    
+    def put(self, key: Hashable, value: Any, namespace: str = 'default',
+            ttl_seconds: Optional[float] = None, size: Optional[int] = None) -> None:
+        """Store a value, evicting least recently used entries to stay within budget."""
+        full_key = (namespace, key)
+        ttl = self.ttl_seconds if ttl_seconds is None else ttl_seconds
+        expires_at = time.monotonic() + ttl if ttl is not None else None
+        if size is None:
+            size = approximate_size(value)
+
+        with self._lock:
+            if full_key in self._entries:
+                self._remove(full_key)
+            self._entries[full_key] = [value, expires_at, size]
+            self._bytes += size
+            stats = self._stats[namespace]
+            stats.entries += 1
+            stats.bytes += size
+            self._evict()
+
+    def delete(self, key: Hashable, namespace: str = 'default') -> bool:
+        with self._lock:
+            full_key = (namespace, key)
+            if full_key not in self._entries:
+                return False
+            self._remove(full_key)
+            return True
+
+    def _remove(self, full_key: tuple) -> None:
+        _, _, size = self._entries.pop(full_key)
+        self._bytes -= size
+        stats = self._stats[full_key[0]]
+        stats.entries -= 1
+        stats.bytes -= size
+
+    def _evict(self) -> None:
+        while self._entries and (
+            (self.max_entries is not None and len(self._entries) > self.max_entries) or
+            (self.max_bytes is not None and self._bytes > self.max_bytes)
+        ):
+            full_key, entry = next(iter(self._entries.items()))
+            expired = entry[1] is not None and entry[1] <= time.monotonic()
+            self._remove(full_key)
+            if expired:
+                self._stats[full_key[0]].expirations += 1
+            else:
+                self._stats[full_key[0]].evictions += 1
+
+    def clear(self, namespace: Optional[str] = None) -> None:
+        """Drop all entries (of one namespace if given) and reset their counters."""
+        with self._lock:
+            if namespace is None:
+                self._entries.clear()
+                self._bytes = 0
+                self._stats.clear()
+                return
+            for full_key in [k for k in self._entries if k[0] == namespace]:
+                self._remove(full_key)
+            self._stats.pop(namespace, None)
+
+    def namespace_stats(self, namespace: str) -> Dict[str, Any]:
+        with self._lock:
+            return self._stats[namespace].as_dict()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Overall occupancy plus per-namespace counters."""
+        with self._lock:
+            return {
+                'entries': len(self._entries),
+                'bytes': self._bytes,
+                'max_entries': self.max_entries,
+                'max_bytes': self.max_bytes,
+                'ttl_seconds': self.ttl_seconds,
+                'namespaces': {name: stats.as_dict() for name, stats in self._stats.items()}
+            }
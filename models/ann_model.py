@@ -84,29 +84,32 @@ Total:
 (If year_norm is missing, it’s 18 features.)
 """
 
+from __future__ import annotations
+
 import numpy as np
-import pandas as pd
-import tensorflow as tf
-import keras
-from keras import layers, callbacks, optimizers
-from sklearn.model_selection import train_test_split
-from sklearn.preprocessing import MinMaxScaler, StandardScaler
-from sklearn.metrics import mean_absolute_error, mean_squared_error, r2_score
-import matplotlib.pyplot as plt
-import seaborn as sns
-import joblib
 import os
 import json
 from typing import Dict, List, Tuple, Optional, Any
 import logging
 
+from lazy_imports import lazy_import
+from models.feature_compiler import FeatureCompiler
+
+# Training dependencies, imported on first use so serving never loads them
+pd = lazy_import('pandas')
+tf = lazy_import('tensorflow')
+keras = lazy_import('keras')
+layers = lazy_import('keras.layers')
+callbacks = lazy_import('keras.callbacks')
+optimizers = lazy_import('keras.optimizers')
+sklearn_metrics = lazy_import('sklearn.metrics')
+
 # Set up logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-# Set random seeds for reproducibility
+# Set random seeds for reproducibility (TensorFlow's when a model is built)
 np.random.seed(42)
-tf.random.set_seed(42)
 
 class ANNMoviePredictor:
     """
@@ -125,6 +128,7 @@ class ANNMoviePredictor:
         self.model = None
         self.scaler = None
         self.feature_columns = []
+        self._compiled = None
         self.genres = ['action', 'comedy', 'romance', 'thriller', 'sci_fi', 'drama', 'horror']
         self.history = None
         
@@ -365,6 +369,7 @@ class ANNMoviePredictor:
             Compiled Keras model
         """
         logger.info(f"🏗️ Building ANN model with {input_dim} input features...")
+        tf.random.set_seed(42)
         
         model = keras.Sequential([
             # Input layer
@@ -476,10 +481,10 @@ class ANNMoviePredictor:
         y_pred_scaled = y_pred.flatten() * 5.0
         
         # Calculate metrics
-        mse = mean_squared_error(y_test_scaled, y_pred_scaled)
-        mae = mean_absolute_error(y_test_scaled, y_pred_scaled)
+        mse = sklearn_metrics.mean_squared_error(y_test_scaled, y_pred_scaled)
+        mae = sklearn_metrics.mean_absolute_error(y_test_scaled, y_pred_scaled)
         rmse = np.sqrt(mse)
-        r2 = r2_score(y_test_scaled, y_pred_scaled)
+        r2 = sklearn_metrics.r2_score(y_test_scaled, y_pred_scaled)
         
         metrics = {
             'mse': mse,
@@ -513,35 +518,7 @@ class ANNMoviePredictor:
             raise ValueError("Model not trained yet!")
         
         # Prepare features
-        features = {}
-        
-        # User preferences
-        for genre in self.genres:
-            features[f'{genre}_pref'] = user_preferences.get(genre, 5.0)
-        
-        # Movie genres
-        movie_genres = movie_info.get('genres', [])
-        for genre in self.genres:
-            genre_present = any(g.lower().replace(' ', '_') == genre 
-                              for g in movie_genres)
-            features[f'genre_{genre}'] = 1 if genre_present else 0
-        
-        # Movie metadata
-        features['popularity'] = movie_info.get('popularity', 50) / 100  # Normalize
-        features['year_norm'] = max(0, min(1, (movie_info.get('year', 2010) - 1900) / 130))
-        
-        # Watch history
-        if watch_history:
-            features['liked_ratio'] = watch_history.get('liked_ratio', 0.5)
-            features['disliked_ratio'] = watch_history.get('disliked_ratio', 0.3)
-            features['watch_count_norm'] = min(1, np.log10(watch_history.get('watch_count', 1) + 1) / 2)
-        else:
-            features['liked_ratio'] = 0.5
-            features['disliked_ratio'] = 0.3
-            features['watch_count_norm'] = 0.1
-        
-        # Create feature vector
-        X = np.array([[features[col] for col in self.feature_columns]])
+        X = self._feature_compiler().transform(user_preferences, [movie_info], watch_history)
         
         # Predict (returns 0-1, scale to 0-10)
         prediction = self.model.predict(X, verbose=0)[0][0]
@@ -549,6 +526,12 @@ class ANNMoviePredictor:
         
         return float(rating)
     
+    def _feature_compiler(self) -> FeatureCompiler:
+        """Batch feature extractor for the current feature columns."""
+        if self._compiled is None or self._compiled.feature_names != self.feature_columns:
+            self._compiled = FeatureCompiler(self.feature_columns, genre_matcher='exact')
+        return self._compiled
+    
     def save_model(self, model_name: str = "ann_movie_predictor"):
         """Save the trained model and scaler."""
         if self.model is None:
@@ -590,122 +573,15 @@ class ANNMoviePredictor:
         logger.info(f"📂 Model loaded from {model_file}")
     
     def plot_training_history(self, save_path: Optional[str] = None):
-        """Plot training history."""
-        if self.history is None:
-            logger.warning("No training history available")
-            return
-        
-        fig, (ax1, ax2) = plt.subplots(1, 2, figsize=(12, 4))
-        
-        # Loss plot
-        ax1.plot(self.history.history['loss'], label='Training Loss')
-        ax1.plot(self.history.history['val_loss'], label='Validation Loss')
-        ax1.set_title('Model Loss')
-        ax1.set_xlabel('Epoch')
-        ax1.set_ylabel('Loss (MSE)')
-        ax1.legend()
-        ax1.grid(True)
-        
-        # MAE plot
-        ax1.plot(self.history.history['mae'], label='Training MAE')
-        ax1.plot(self.history.history['val_mae'], label='Validation MAE')
-        ax2.set_title('Model MAE')
-        ax2.set_xlabel('Epoch')
-        ax2.set_ylabel('MAE')
-        ax2.legend()
-        ax2.grid(True)
-        
-        plt.tight_layout()
-        
-        if save_path:
-            plt.savefig(save_path, dpi=300, bbox_inches='tight')
-            logger.info(f"📊 Training plots saved to {save_path}")
-        
-        plt.show()
+        """Plot training history (see models/ann_training.py)."""
+        from models.ann_training import plot_training_history
+        plot_training_history(self.history, save_path)
 
 
 def train_ann_model(csv_path: str, 
                    sample_size: Optional[int] = None,
                    test_size: float = 0.2,
                    model_name: str = "ann_movie_predictor") -> ANNMoviePredictor:
-    """
-    Complete training pipeline for the ANN model.
-    
-    Args:
-        csv_path: Path to preprocessed training data
-        sample_size: Optional limit on training samples
-        test_size: Fraction for test set
-        model_name: Name for saving the model
-        
-    Returns:
-        Trained ANNMoviePredictor instance
-    """
-    logger.info("🎬 Starting ANN Movie Predictor Training Pipeline")
-    logger.info("=" * 60)
-    
-    # Initialize predictor
-    predictor = ANNMoviePredictor()
-    
-    # Prepare data
-    X, y = predictor.prepare_training_data(csv_path, sample_size)
-    
-    # Split data
-    X_train, X_test, y_train, y_test = train_test_split(
-        X, y, test_size=test_size, random_state=42, shuffle=True
-    )
-    
-    logger.info(f"📊 Data split: Train {X_train.shape[0]}, Test {X_test.shape[0]}")
-    
-    # Train model
-    predictor.train(X_train, y_train, epochs=100, batch_size=64)
-    
-    # Evaluate
-    metrics = predictor.evaluate(X_test, y_test)
-    
-    # Save model
-    predictor.save_model(model_name)
-    
-    logger.info("✅ ANN Training Pipeline Completed!")
-    logger.info("=" * 60)
-    
-    return predictor
-
-
-# Example usage and testing
-if __name__ == "__main__":
-    # Test with preprocessed data
-    csv_path = "processed/preprocessed_movielens10M.csv"
-    
-    if os.path.exists(csv_path):
-        # Train model (use sample for quick testing)
-        predictor = train_ann_model(csv_path, sample_size=10000)
-        
-        # Test prediction
-        user_prefs = {
-            'action': 8.5,
-            'comedy': 6.0,
-            'romance': 3.0,
-            'thriller': 7.5,
-            'sci_fi': 8.0,
-            'drama': 5.5,
-            'horror': 2.0
-        }
-        
-        movie_info = {
-            'genres': ['Action', 'Sci-Fi'],
-            'popularity': 85,
-            'year': 2019
-        }
-        
-        watch_history = {
-            'liked_ratio': 0.75,
-            'disliked_ratio': 0.15,
-            'watch_count': 25
-        }
-        
-        prediction = predictor.predict(user_prefs, movie_info, watch_history)
-        print(f"\n🎯 Test Prediction: {prediction:.2f}/10")
-        
-    else:
-        print(f"❌ Training data not found at {csv_path}")
-        print("Please run the data preprocessing script first.")
\ No newline at end of file
+    """Complete training pipeline for the ANN model (see models/ann_training.py)."""
+    from models.ann_training import train_ann_model as run_training
+    return run_training(csv_path, sample_size, test_size, model_name)
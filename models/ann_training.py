@@ -0,0 +1,144 @@
+"""
+ANN Training Pipeline
+=====================
+
+Offline training and plotting for the ANN movie predictor, kept apart from
+models/ann_model.py so serving processes never import matplotlib or the
+training-only scikit-learn helpers.
+
+Usage:
+    python -m models.ann_training
+"""
+
+import logging
+import os
+from typing import Optional
+
+import matplotlib.pyplot as plt
+from sklearn.model_selection import train_test_split
+
+from models.ann_model import ANNMoviePredictor
+
+logger = logging.getLogger(__name__)
+
+
+def plot_training_history(history, save_path: Optional[str] = None):
+    """Plot loss and MAE curves of a Keras training history."""
+    if history is None:
+        logger.warning("No training history available")
+        return
+    
+    fig, (ax1, ax2) = plt.subplots(1, 2, figsize=(12, 4))
+    
+    # Loss plot
+    ax1.plot(history.history['loss'], label='Training Loss')
+    ax1.plot(history.history['val_loss'], label='Validation Loss')
+    ax1.set_title('Model Loss')
+    ax1.set_xlabel('Epoch')
+    ax1.set_ylabel('Loss (MSE)')
+    ax1.legend()
+    ax1.grid(True)
+    
+    # MAE plot
+    ax1.plot(history.history['mae'], label='Training MAE')
+    ax1.plot(history.history['val_mae'], label='Validation MAE')
+    ax2.set_title('Model MAE')
+    ax2.set_xlabel('Epoch')
+    ax2.set_ylabel('MAE')
+    ax2.legend()
+    ax2.grid(True)
+    
+    plt.tight_layout()
+    
+    if save_path:
+        plt.savefig(save_path, dpi=300, bbox_inches='tight')
+        logger.info(f"📊 Training plots saved to {save_path}")
+    
+    plt.show()
+
+
+def train_ann_model(csv_path: str, 
+                   sample_size: Optional[int] = None,
+                   test_size: float = 0.2,
+                   model_name: str = "ann_movie_predictor") -> ANNMoviePredictor:
+    """
+    Complete training pipeline for the ANN model.
+    
+    Args:
+        csv_path: Path to preprocessed training data
+        sample_size: Optional limit on training samples
+        test_size: Fraction for test set
+        model_name: Name for saving the model
+        
+    Returns:
+        Trained ANNMoviePredictor instance
+    """
+    logger.info("🎬 Starting ANN Movie Predictor Training Pipeline")
+    logger.info("=" * 60)
+    
+    # Initialize predictor
+    predictor = ANNMoviePredictor()
+    
+    # Prepare data
+    X, y = predictor.prepare_training_data(csv_path, sample_size)
+    
+    # Split data
+    X_train, X_test, y_train, y_test = train_test_split(
+        X, y, test_size=test_size, random_state=42, shuffle=True
+    )
+    
+    logger.info(f"📊 Data split: Train {X_train.shape[0]}, Test {X_test.shape[0]}")
+    
+    # Train model
+    predictor.train(X_train, y_train, epochs=100, batch_size=64)
+    
+    # Evaluate
+    predictor.evaluate(X_test, y_test)  # Logs MAE, RMSE and R²
+    
+    # Save model
+    predictor.save_model(model_name)
+    
+    logger.info("✅ ANN Training Pipeline Completed!")
+    logger.info("=" * 60)
+    
+    return predictor
+
+
+# Example usage and testing
+if __name__ == "__main__":
+    # Test with preprocessed data
+    csv_path = "processed/preprocessed_movielens10M.csv"
+    
+    if os.path.exists(csv_path):
+        # Train model (use sample for quick testing)
+        predictor = train_ann_model(csv_path, sample_size=10000)
+        
+        # Test prediction
+        user_prefs = {
+            'action': 8.5,
+            'comedy': 6.0,
+            'romance': 3.0,
+            'thriller': 7.5,
+            'sci_fi': 8.0,
+            'drama': 5.5,
+            'horror': 2.0
+        }
+        
+        movie_info = {
+            'genres': ['Action', 'Sci-Fi'],
+            'popularity': 85,
+            'year': 2019
+        }
+        
+        watch_history = {
+            'liked_ratio': 0.75,
+            'disliked_ratio': 0.15,
+            'watch_count': 25
+        }
+        
+        prediction = predictor.predict(user_prefs, movie_info, watch_history)
+        print(f"\n🎯 Test Prediction: {prediction:.2f}/10")
+        
+    else:
+        print(f"❌ Training data not found at {csv_path}")
+        print("Please run the data preprocessing script first.")
\ No newline at end of file
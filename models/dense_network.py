@@ -0,0 +1,146 @@
+"""
+Dense Network Inference
+=======================
+
+NumPy forward pass for the feed-forward rating models, so worker processes
+can score from one shared, read-only copy of the weights (see
+shared_arrays.py) instead of each loading its own Keras / scikit-learn model.
+
+Features:
+- Export from Keras Sequential models: Dense and Activation layers,
+  BatchNormalization folded into a per-feature scale and shift, Dropout and
+  InputLayer dropped (inference only)
+- Export from fitted scikit-learn MLPRegressor models, optionally with their
+  StandardScaler folded in as the first layer
+- Keeps the exported dtype (float32 for Keras, float64 for scikit-learn) so
+  predictions match the original model
+- ``predict(x, verbose=0)`` and ``input_shape`` like a Keras model
+"""
+
+import logging
+import os
+from typing import Any, Callable, Dict, List, Tuple
+
+import numpy as np
+
+from shared_arrays import SharedArrays, file_stamp, publish_once
+
+logger = logging.getLogger(__name__)
+
+
+def _sigmoid(x: np.ndarray) -> np.ndarray:
+    return 1.0 / (1.0 + np.exp(-x))
+
+
+ACTIVATIONS: Dict[str, Callable[[np.ndarray], np.ndarray]] = {
+    'linear': lambda x: x,
+    'identity': lambda x: x,
+    'relu': lambda x: np.maximum(x, 0),
+    'sigmoid': _sigmoid,
+    'logistic': _sigmoid,
+    'tanh': np.tanh
+}
+
+
+class DenseNetwork:
+    """
+    Stack of affine layers (``x @ weight + bias``) and per-feature scale/shift
+    layers, each followed by an activation.
+    """
+
+    def __init__(self, layers: List[Dict[str, Any]], arrays: Dict[str, np.ndarray]):
+        for layer in layers:
+            if layer['activation'] not in ACTIVATIONS:
+                raise ValueError(f"Unsupported activation '{layer['activation']}'")
+        self.layers = layers
+        self.arrays = arrays
+        self._steps = [
+            (layer['type'], arrays[layer['a']], arrays[layer['b']], ACTIVATIONS[layer['activation']])
+            for layer in layers
+        ]
+        first = arrays[layers[0]['a']]
+        self.dtype = first.dtype
+        self.input_shape = (None, first.shape[0])
+
+    @property
+    def nbytes(self) -> int:
+        return sum(array.nbytes for array in self.arrays.values())
+
+    def predict(self, x: np.ndarray, verbose: int = 0) -> np.ndarray:
+        """Outputs of shape (N, n_outputs)."""
+        x = np.asarray(x, dtype=self.dtype)
+        for kind, a, b, activation in self._steps:
+            x = activation(x @ a + b if kind == 'affine' else x * a + b)
+        return x
+
+    @classmethod
+    def _build(cls, steps: List[Tuple[str, np.ndarray, np.ndarray, str]], dtype) -> 'DenseNetwork':
+        layers, arrays = [], {}
+        for i, (kind, a, b, activation) in enumerate(steps):
+            arrays[f"{i}.a"] = np.asarray(a, dtype=dtype)
+            arrays[f"{i}.b"] = np.asarray(b, dtype=dtype)
+            layers.append({'type': kind, 'a': f"{i}.a", 'b': f"{i}.b", 'activation': activation})
+        return cls(layers, arrays)
+
+    @classmethod
+    def from_keras(cls, model) -> 'DenseNetwork':
+        """Export a Keras Sequential model of Dense / BatchNormalization / Dropout / Activation layers."""
+        steps = []
+        for layer in model.layers:
+            kind = type(layer).__name__
+            config = layer.get_config()
+            weights = layer.get_weights()
+            if kind in ('InputLayer', 'Dropout'):
+                continue
+            if kind == 'Dense':
+                kernel = weights[0]
+                bias = weights[1] if config.get('use_bias', True) else np.zeros(kernel.shape[1])
+                steps.append(('affine', kernel, bias, config.get('activation', 'linear')))
+            elif kind == 'BatchNormalization':
+                weights = list(weights)
+                gamma = weights.pop(0) if config.get('scale', True) else 1.0
+                beta = weights.pop(0) if config.get('center', True) else 0.0
+                mean, variance = weights
+                scale = gamma / np.sqrt(variance + config.get('epsilon', 1e-3))
+                steps.append(('scale_shift', scale, beta - mean * scale, 'linear'))
+            elif kind == 'Activation':
+                width = steps[-1][1].shape[-1]
+                steps.append(('scale_shift', np.ones(width), np.zeros(width), config['activation']))
+            else:
+                raise ValueError(f"Cannot export Keras layer type {kind}")
+        return cls._build(steps, np.float32)
+
+    @classmethod
+    def from_sklearn(cls, model, scaler=None) -> 'DenseNetwork':
+        """Export a fitted MLPRegressor, with an optional fitted StandardScaler applied first."""
+        steps = []
+        if scaler is not None:
+            n_features = model.coefs_[0].shape[0]
+            scale = 1.0 / scaler.scale_ if getattr(scaler, 'scale_', None) is not None else np.ones(n_features)
+            mean = scaler.mean_ if getattr(scaler, 'mean_', None) is not None else np.zeros(n_features)
+            steps.append(('scale_shift', scale, -mean * scale, 'linear'))
+        last = len(model.coefs_) - 1
+        for i, (weight, bias) in enumerate(zip(model.coefs_, model.intercepts_)):
+            steps.append(('affine', weight, bias, model.out_activation_ if i == last else model.activation))
+        return cls._build(steps, np.float64)
+
+    def to_bundle(self) -> Tuple[Dict[str, np.ndarray], Dict[str, Any]]:
+        """(arrays, metadata) for SharedArrays.publish."""
+        return self.arrays, {'layers': self.layers}
+
+    @classmethod
+    def from_bundle(cls, bundle: SharedArrays) -> 'DenseNetwork':
+        return cls(bundle.metadata['layers'], bundle.arrays)
+
+
+def load_shared_network(source_path: str, export: Callable[[], DenseNetwork], root: str) -> DenseNetwork:
+    """
+    The network exported from the model file at ``source_path``, shared under
+    ``root``; ``export`` runs in the first process to need it (and again
+    whenever the model file changes).
+    """
+    name = os.path.splitext(os.path.basename(source_path))[0]
+    bundle = publish_once(os.path.join(root, 'ann', name), lambda: export().to_bundle(), file_stamp([source_path]))
+    network = DenseNetwork.from_bundle(bundle)
+    logger.info(f"🔗 Shared ANN weights attached: {name} ({network.nbytes / 1024:.0f}KB)")
+    return network
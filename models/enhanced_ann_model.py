@@ -7,14 +7,16 @@ providing detailed predictions and explanations.
 """
 
 import numpy as np
-import pandas as pd
-import tensorflow as tf
-from tensorflow import keras
-import joblib
-import json
 import os
 from typing import Dict, List, Optional, Tuple
 
+from lazy_imports import lazy_import
+from models.feature_compiler import FeatureCompiler, load_feature_names
+
+# TensorFlow and joblib are imported when a model is first loaded
+keras = lazy_import('tensorflow.keras')
+joblib = lazy_import('joblib')
+
 # Try to import from fast_complete_loader, fallback to other sources
 try:
     from fast_complete_loader import get_fast_complete_database, get_recommendation_explanation
@@ -41,6 +43,7 @@ class EnhancedANNModel:
         self.model = None
         self.scaler = None
         self.feature_columns = None
+        self.feature_compiler = None
         self.is_loaded = False
         
     def load_model(self):
@@ -65,9 +68,12 @@ class EnhancedANNModel:
             # Load features
             feature_path = self.model_path.replace('.keras', '_features.json')
             if os.path.exists(feature_path):
-                with open(feature_path, 'r') as f:
-                    data = json.load(f)
-                    self.feature_columns = data['feature_columns']
+                self.feature_columns = load_feature_names(feature_path)
+                self.feature_compiler = FeatureCompiler(
+                    self.feature_columns,
+                    genre_matcher='normalized',
+                    defaults={'movie_popularity': 80, 'movie_budget': 50000000, 'movie_box_office': 100000000}
+                )
             else:
                 print(f"⚠️ Features not found at {feature_path}")
                 return False
@@ -92,7 +98,7 @@ class EnhancedANNModel:
             features = self._prepare_features(user_preferences, movie)
             
             # Scale features
-            features_scaled = self.scaler.transform([features])
+            features_scaled = self.scaler.transform(features)
             
             # Make prediction
             prediction = self.model.predict(features_scaled, verbose=0)[0][0]
@@ -104,35 +110,23 @@ class EnhancedANNModel:
             print(f"❌ Error predicting rating: {e}")
             return None
     
-    def _prepare_features(self, user_prefs: Dict[str, float], movie: Dict) -> List[float]:
-        """Prepare feature vector for prediction."""
-        features = {}
-        
-        # Movie features
-        features['movie_rating'] = movie.get('rating', 7.0)
-        features['movie_popularity'] = movie.get('popularity', 80)
-        features['movie_year'] = movie.get('year', 2000)
-        features['movie_runtime'] = movie.get('runtime', 120)
-        features['movie_budget'] = movie.get('budget', 50000000)
-        features['movie_box_office'] = movie.get('box_office', 100000000)
-        
-        # User preference features
-        for pref in ['action', 'comedy', 'romance', 'thriller', 'sci_fi', 'drama', 'horror']:
-            features[f'user_{pref}'] = user_prefs.get(pref, 5.0)
-        
-        # Genre features (one-hot encoding)
-        movie_genres = movie.get('genres', [])
-        for genre_key, genre_list in GENRE_MAPPING.items():
-            features[f'movie_genre_{genre_key}'] = int(
-                any(g in movie_genres for g in genre_list)
-            )
-        
-        # Convert to list in correct order
-        feature_vector = []
-        for col in self.feature_columns:
-            feature_vector.append(features.get(col, 0.0))
+    def predict_ratings(self, user_preferences: Dict[str, float], movies: List[Dict]) -> List[Optional[float]]:
+        """Predict ratings for many movies with one feature matrix and one model call."""
+        if not self.is_loaded:
+            if not self.load_model():
+                return [None] * len(movies)
         
-        return feature_vector
+        try:
+            features = self.feature_compiler.transform(user_preferences, movies)
+            predictions = self.model.predict(self.scaler.transform(features), verbose=0)[:, 0]
+            return np.clip(predictions.astype(float), 1.0, 10.0).tolist()
+        except Exception as e:
+            print(f"❌ Error predicting ratings: {e}")
+            return [None] * len(movies)
+    
+    def _prepare_features(self, user_prefs: Dict[str, float], movie: Dict) -> np.ndarray:
+        """Prepare the (1, n_features) feature row for prediction."""
+        return self.feature_compiler.transform(user_prefs, [movie])
     
     def get_top_recommendations(self, user_preferences: Dict[str, float], 
                               num_recommendations: int = 10) -> List[Dict]:
@@ -143,9 +137,8 @@ class EnhancedANNModel:
         
         recommendations = []
         
-        for movie in REAL_MOVIES_DATABASE:
-            # Predict rating
-            predicted_rating = self.predict_rating(user_preferences, movie)
+        predicted_ratings = self.predict_ratings(user_preferences, REAL_MOVIES_DATABASE)
+        for movie, predicted_rating in zip(REAL_MOVIES_DATABASE, predicted_ratings):
             
             if predicted_rating is not None:
                 # Calculate confidence based on genre match
@@ -0,0 +1,293 @@
+"""
+Feature Compiler
+================
+
+Compiles an ANN feature schema (the ordered feature names stored next to a
+model, e.g. ``feature_order`` in ``simple_ann_model_features.json``) into a
+batch extractor that writes straight into a preallocated float32 matrix.
+
+Features:
+- One feature vocabulary for every ANN model (preferences, movie metadata,
+  genre flags, watch history) with a single definition per feature name
+- Column-at-a-time extraction: N rows are built in one pass per feature,
+  without per-row lists or dicts
+- Genre flags memoized per distinct genre list
+- Per-model options: preference mapping, genre matching, defaults, clipping
+
+Feature names:
+- ``user_<genre>`` / ``<genre>_pref``: user preference for the genre
+- ``movie_genre_<genre>`` / ``genre_<genre>``: 0/1 genre flag
+- ``movie_rating``, ``movie_popularity``, ``movie_year``, ``movie_runtime``,
+  ``movie_budget``, ``movie_box_office``: raw movie metadata
+- ``popularity`` (0-1), ``year_norm`` (1900-2030 as 0-1): normalized metadata
+- ``liked_ratio``, ``disliked_ratio``, ``watch_count_norm``: watch history
+"""
+
+import json
+import logging
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Extended genres folded into the 7 core genres the models were trained on
+GENRE_MAPPING = {
+    'fantasy': 'sci_fi', 'adventure': 'action',
+    'crime': 'thriller', 'mystery': 'thriller',
+    'animation': 'comedy', 'western': 'action',
+    'war': 'action', 'documentary': 'drama',
+    'biography': 'drama', 'history': 'drama',
+    'music': 'drama', 'sport': 'drama'
+}
+
+# name -> (movie field, default)
+MOVIE_FIELDS = {
+    'movie_rating': ('rating', 7.0),
+    'movie_popularity': ('popularity', 50.0),
+    'movie_year': ('year', 2000),
+    'movie_runtime': ('runtime', 120),
+    'movie_budget': ('budget', 0),
+    'movie_box_office': ('box_office', 0),
+    'popularity': ('popularity', 50),
+    'year_norm': ('year', 2010)
+}
+
+# name -> value used when there is no watch history
+HISTORY_FIELDS = {
+    'liked_ratio': 0.5,
+    'disliked_ratio': 0.3,
+    'watch_count_norm': 0.1
+}
+
+PREFERENCE_MODES = ('raw', 'mapped')
+GENRE_MATCHERS = ('exact', 'normalized', 'contains', 'extended')
+
+_MAX_GENRE_CACHE = 50000
+
+
+def load_feature_names(path: str) -> List[str]:
+    """Ordered feature names from a model's features JSON (``feature_order`` or ``feature_columns``)."""
+    with open(path, 'r') as f:
+        data = json.load(f)
+    names = data.get('feature_order') or data.get('feature_columns')
+    if not names:
+        raise ValueError(f"No feature_order/feature_columns in {path}")
+    return list(names)
+
+
+def _genre_flags(genres: Any, tokens: Sequence[str], matcher: str, mapping: Dict[str, str]) -> List[float]:
+    """0/1 flag per genre token for one movie's genre list."""
+    if matcher == 'exact':
+        names = [g.lower().replace(' ', '_') for g in genres]
+        return [1.0 if token in names else 0.0 for token in tokens]
+
+    if matcher == 'normalized':
+        names = [g.lower().replace('-', '_').replace(' ', '_') for g in genres]
+        return [1.0 if token in names else 0.0 for token in tokens]
+
+    if matcher == 'contains':
+        names = [g.lower().replace('-', '').replace(' ', '') for g in genres]
+        return [1.0 if any(token in g or g in token for g in names) else 0.0 for token in tokens]
+
+    # 'extended': substring match on the genre text, then extended genres mapped to the core genre
+    genres_str = str(genres).lower()
+    genres_list = [g.lower().replace('-', '_').replace(' ', '_') for g in genres] if isinstance(genres, list) else []
+    flags = []
+    for token in tokens:
+        has_genre = (token in genres_str or
+                     token.replace('_', ' ') in genres_str or
+                     token.replace('_', '-') in genres_str or
+                     token in genres_list)
+        if not has_genre:
+            for ext_genre, core_genre in mapping.items():
+                if core_genre == token:
+                    variations = [
+                        ext_genre, ext_genre.replace('_', ' '), ext_genre.replace('_', '-'),
+                        ext_genre.replace(' ', '_'), ext_genre.replace('-', '_')
+                    ]
+                    if any(var in genres_str for var in variations) or \
+                       any(var in genres_list for var in variations):
+                        has_genre = True
+                        break
+        flags.append(1.0 if has_genre else 0.0)
+    return flags
+
+
+class FeatureCompiler:
+    """
+    Batch feature extractor compiled from an ordered list of feature names.
+
+    ``transform`` fills an (N, n_features) float32 matrix for one user's
+    preferences and watch history against N movies. Unknown feature names
+    are filled with 0.0.
+    """
+
+    def __init__(self, feature_names: Iterable[str], preferences: str = 'raw', genre_matcher: str = 'exact',
+                 defaults: Optional[Dict[str, float]] = None, clip: Optional[Dict[str, Tuple[float, float]]] = None,
+                 genre_mapping: Optional[Dict[str, str]] = None):
+        if preferences not in PREFERENCE_MODES:
+            raise ValueError(f"Unknown preference mode '{preferences}', expected one of {PREFERENCE_MODES}")
+        if genre_matcher not in GENRE_MATCHERS:
+            raise ValueError(f"Unknown genre matcher '{genre_matcher}', expected one of {GENRE_MATCHERS}")
+
+        self.feature_names = list(feature_names)
+        self.preferences = preferences
+        self.genre_matcher = genre_matcher
+        self.defaults = dict(defaults or {})
+        self.clip = dict(clip or {})
+        self.genre_mapping = dict(GENRE_MAPPING if genre_mapping is None else genre_mapping)
+
+        # Compiled columns, grouped by source
+        self._pref_columns: List[Tuple[int, str]] = []
+        self._movie_columns: List[Tuple[int, str, str, Any]] = []
+        self._history_columns: List[Tuple[int, str]] = []
+        self._genre_columns: List[int] = []
+        self._genre_tokens: List[str] = []
+        self._unknown_columns: List[int] = []
+
+        for col, name in enumerate(self.feature_names):
+            if name in MOVIE_FIELDS:
+                field, default = MOVIE_FIELDS[name]
+                self._movie_columns.append((col, name, field, self.defaults.get(name, default)))
+            elif name in HISTORY_FIELDS:
+                self._history_columns.append((col, name))
+            elif name.startswith('movie_genre_') or name.startswith('genre_'):
+                self._genre_columns.append(col)
+                self._genre_tokens.append(name.split('genre_', 1)[1])
+            elif name.startswith('user_'):
+                self._pref_columns.append((col, name[len('user_'):]))
+            elif name.endswith('_pref'):
+                self._pref_columns.append((col, name[:-len('_pref')]))
+            else:
+                self._unknown_columns.append(col)
+
+        if self._unknown_columns:
+            logger.warning(f"⚠️ Unknown ANN features filled with 0: {[self.feature_names[c] for c in self._unknown_columns]}")
+
+        self._genre_cache: Dict[Any, np.ndarray] = {}
+
+    @property
+    def n_features(self) -> int:
+        return len(self.feature_names)
+
+    @classmethod
+    def from_json(cls, path: str, **options) -> 'FeatureCompiler':
+        """Compile the schema stored in a model's features JSON."""
+        with open(path, 'r') as f:
+            data = json.load(f)
+        if 'genre_mapping' in data and 'genre_mapping' not in options:
+            options['genre_mapping'] = data['genre_mapping']
+        return cls(load_feature_names(path), **options)
+
+    def preference_values(self, user_preferences: Dict[str, float]) -> Dict[str, float]:
+        """Preference per genre token, blending extended genres in 'mapped' mode (70% core, 30% extended)."""
+        values = {token: user_preferences.get(token, 5.0) for _, token in self._pref_columns}
+        if self.preferences == 'mapped':
+            for ext_genre, core_genre in self.genre_mapping.items():
+                if ext_genre in user_preferences and core_genre in values:
+                    values[core_genre] = values[core_genre] * 0.7 + user_preferences[ext_genre] * 0.3
+        return values
+
+    def _genre_row(self, genres: Any) -> np.ndarray:
+        try:
+            key = genres if isinstance(genres, str) else tuple(genres)
+            row = self._genre_cache.get(key)
+        except TypeError:
+            key, row = None, None
+        if row is None:
+            row = np.asarray(_genre_flags(genres, self._genre_tokens, self.genre_matcher, self.genre_mapping),
+                             dtype=np.float32)
+            if key is not None:
+                if len(self._genre_cache) >= _MAX_GENRE_CACHE:
+                    self._genre_cache.clear()
+                self._genre_cache[key] = row
+        return row
+
+    def transform(self, user_preferences: Dict[str, float], movies: Sequence[Dict[str, Any]],
+                  watch_history: Optional[Dict[str, float]] = None,
+                  out: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        Build the feature matrix for one user against ``movies``.
+
+        Args:
+            user_preferences: Genre preferences (0-10)
+            movies: Movie metadata dicts
+            watch_history: Optional watch history stats
+            out: Optional preallocated float32 array of shape (N, n_features)
+
+        Returns:
+            Feature matrix of shape (N, n_features)
+        """
+        n = len(movies)
+        if out is None:
+            out = np.empty((n, self.n_features), dtype=np.float32)
+        elif out.shape != (n, self.n_features):
+            raise ValueError(f"Output buffer has shape {out.shape}, expected {(n, self.n_features)}")
+
+        for col in self._unknown_columns:
+            out[:, col] = 0.0
+
+        # Per-user columns are constant over the batch
+        prefs = self.preference_values(user_preferences)
+        for col, token in self._pref_columns:
+            out[:, col] = prefs[token]
+
+        for col, name in self._history_columns:
+            if not watch_history:
+                value = HISTORY_FIELDS[name]
+            elif name == 'watch_count_norm':
+                value = min(1, np.log10(watch_history.get('watch_count', 1) + 1) / 2)
+            else:
+                value = watch_history.get(name, HISTORY_FIELDS[name])
+            out[:, col] = value
+
+        # Movie metadata, one column at a time
+        for col, name, field, default in self._movie_columns:
+            values = np.fromiter((movie.get(field, default) for movie in movies), dtype=np.float64, count=n)
+            if name == 'popularity':
+                values = values / 100
+            elif name == 'year_norm':
+                values = np.clip((values - 1900) / 130, 0, 1)
+            if name in self.clip:
+                values = np.clip(values, *self.clip[name])
+            out[:, col] = values
+
+        if self._genre_columns:
+            out[:, self._genre_columns] = [self._genre_row(movie.get('genres', [])) for movie in movies] if n else 0.0
+
+        return out
+
+    def transform_many(self, preferences_list: Sequence[Dict[str, float]], movies: Sequence[Dict[str, Any]],
+                       watch_history: Optional[Dict[str, float]] = None,
+                       movie_block: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        Feature matrices of many users against the same ``movies``, stacked
+        user by user: shape (users * N, n_features).
+
+        The movie and watch-history columns are built once (or taken from
+        ``movie_block``, a previous ``transform`` of these movies with this
+        watch history) and repeated; only the preference columns differ per user.
+        """
+        if movie_block is None:
+            movie_block = self.transform({}, movies, watch_history)
+        n_users, n = len(preferences_list), movie_block.shape[0]
+        out = np.empty((n_users, n, self.n_features), dtype=np.float32)
+        out[:] = movie_block
+        if self._pref_columns and n_users:
+            columns = [col for col, _ in self._pref_columns]
+            values = [self.preference_values(prefs) for prefs in preferences_list]
+            out[:, :, columns] = np.array([[prefs[token] for _, token in self._pref_columns] for prefs in values],
+                                          dtype=np.float32)[:, None, :]
+        return out.reshape(n_users * n, self.n_features)
+
+    def transform_pairs(self, preferences_list: Sequence[Dict[str, float]], movies: Sequence[Dict[str, Any]],
+                        watch_history: Optional[Dict[str, float]] = None) -> np.ndarray:
+        """Feature rows of (user, movie) pairs: ``preferences_list[i]`` with ``movies[i]``, shape (N, n_features)."""
+        out = self.transform({}, movies, watch_history)
+        if self._pref_columns and len(movies):
+            columns = [col for col, _ in self._pref_columns]
+            values = [self.preference_values(prefs) for prefs in preferences_list]
+            out[:, columns] = np.array([[prefs[token] for _, token in self._pref_columns] for prefs in values],
+                                       dtype=np.float32)
+        return out
@@ -12,11 +12,15 @@ All membership functions use triangular shapes as specified.
 """
 
 import numpy as np
-import skfuzzy as fuzz
-from skfuzzy import control as ctrl
 from typing import Dict, List, Optional, Any
 import logging
 
+from lazy_imports import lazy_import
+
+# scikit-fuzzy is imported when the first control system is built
+fuzz = lazy_import('skfuzzy')
+ctrl = lazy_import('skfuzzy.control')
+
 logger = logging.getLogger(__name__)
 
 
@@ -48,6 +52,9 @@ class FuzzyMovieRecommender:
         self.genres = self.core_genres  # Fuzzy rules still use core genres
         self.all_supported_genres = self.core_genres + list(self.extended_genres.keys())
         
+        # Genre list -> (presence flags, match flags), see recommend_movies
+        self._genre_input_cache = {}
+        
         self._setup_fuzzy_variables()
         self._create_rules()
         self._build_control_system()
@@ -112,6 +119,7 @@ class FuzzyMovieRecommender:
         # A) User Preference vs Genre Rules
         pref_levels = ['very_low', 'low', 'medium', 'high', 'very_high']  
         rec_levels = ['very_low', 'low', 'medium', 'high', 'very_high']
+        self.pref_rule_levels = list(zip(pref_levels, rec_levels))
         
         for genre in self.genres:
             for i, (pref_level, rec_level) in enumerate(zip(pref_levels, rec_levels)):
@@ -134,6 +142,7 @@ class FuzzyMovieRecommender:
             ('low', 'poor', 'very_low')            # Rule 9
         ]
         
+        self.pop_genre_rules = pop_genre_rules
         for pop_level, match_level, rec_level in pop_genre_rules:
             rule = ctrl.Rule(
                 self.popularity[pop_level] & self.genre_match[match_level],
@@ -148,6 +157,7 @@ class FuzzyMovieRecommender:
             ('mixed', 'medium'),        # Mixed sentiment -> Medium
         ]
         
+        self.history_rules = history_rules
         for sentiment, rec_level in history_rules:
             rule = ctrl.Rule(
                 self.watch_sentiment[sentiment],
@@ -199,18 +209,24 @@ class FuzzyMovieRecommender:
         # Map extended genres to core genres for compatibility
         mapped_prefs = self.map_extended_genres(user_preferences)
         
+        return self._weighted_genre_match(user_preferences, self.genre_match_flags(movie_genres))
+    
+    def genre_match_flags(self, movie_genres: List[str]) -> List[bool]:
+        """Which core genres count as matched by a movie's genres."""
         # Normalize genre names
         movie_genres_norm = [g.lower().replace('-', '_').replace(' ', '_') for g in movie_genres]
-        
+        return [genre in movie_genres_norm or any(g in genre for g in movie_genres_norm) for genre in self.genres]
+    
+    def _weighted_genre_match(self, user_preferences: Dict[str, float], match_flags: List[bool]) -> float:
         # Calculate weighted match
         total_weight = 0
         matched_weight = 0
         
-        for genre in self.genres:
+        for genre, matched in zip(self.genres, match_flags):
             pref_value = user_preferences.get(genre, 5.0)  # Default medium preference
             total_weight += pref_value
             
-            if genre in movie_genres_norm or any(g in genre for g in movie_genres_norm):
+            if matched:
                 matched_weight += pref_value
         
         return min(matched_weight / max(total_weight, 1e-6), 1.0)
@@ -235,6 +251,27 @@ class FuzzyMovieRecommender:
         else:
             return 5.0  # Mixed
     
+    def genre_presence_flags(self, movie_genres: List[str]) -> List[int]:
+        """Core-genre presence flags (0/1) for a movie, counting mapped extended genres."""
+        flags = []
+        for genre in self.genres:
+            genre_present = 0
+            
+            # Check direct match with core genre
+            if any(g.lower().replace('-', '_').replace(' ', '_') == genre for g in movie_genres):
+                genre_present = 1
+            else:
+                # Check if any extended genre maps to this core genre
+                for ext_genre, core_genre in self.extended_genres.items():
+                    if core_genre == genre:
+                        ext_genre_norm = ext_genre.replace('_', '').replace('-', '')
+                        if any(ext_genre_norm in g.lower().replace('-', '').replace(' ', '') for g in movie_genres):
+                            genre_present = 1
+                            break
+            
+            flags.append(genre_present)
+        return flags
+    
     def recommend_movie(self, user_preferences: Dict[str, float], movie: Dict, 
                        watch_history: Optional[Dict] = None) -> float:
         """
@@ -264,25 +301,10 @@ class FuzzyMovieRecommender:
             inputs = {}
             
             # User preferences for each core genre (using mapped preferences)
-            for genre in self.genres:
+            presence = self.genre_presence_flags(movie_genres)
+            for genre, genre_present in zip(self.genres, presence):
                 pref_val = mapped_prefs.get(genre, 5.0)
                 inputs[f'{genre}_pref'] = max(0, min(10, pref_val))
-                
-                # Genre presence - check both core and extended genres
-                genre_present = 0
-                
-                # Check direct match with core genre
-                if any(g.lower().replace('-', '_').replace(' ', '_') == genre for g in movie_genres):
-                    genre_present = 1
-                else:
-                    # Check if any extended genre maps to this core genre
-                    for ext_genre, core_genre in self.extended_genres.items():
-                        if core_genre == genre:
-                            ext_genre_norm = ext_genre.replace('_', '').replace('-', '')
-                            if any(ext_genre_norm in g.lower().replace('-', '').replace(' ', '') for g in movie_genres):
-                                genre_present = 1
-                                break
-                
                 inputs[f'{genre}_present'] = genre_present
             
             # Other inputs
@@ -308,6 +330,345 @@ class FuzzyMovieRecommender:
             logger.warning(f"Error in fuzzy recommendation: {e}")
             return 5.0  # Return neutral score on error
 
+    
+    def recommend_movies(self, user_preferences: Dict[str, float], movies: List[Dict],
+                         watch_history: Optional[Dict] = None) -> np.ndarray:
+        """
+        Fuzzy recommendation scores for many movies at once.
+        
+        Evaluates the same Mamdani system as ``recommend_movie`` (fmin AND,
+        fmax accumulation, upsampled-universe centroid) on arrays, so the
+        scores match the per-movie simulator. Preferences and watch history
+        are shared by the batch; genre inputs are computed once per distinct
+        genre list.
+        
+        Returns:
+            Array of recommendation scores (0-10), one per movie
+        """
+        n = len(movies)
+        scores = np.full(n, 5.0)
+        if n == 0:
+            return scores
+        
+        # Per-movie inputs; movies whose inputs the simulator would reject keep the neutral score
+        valid = np.ones(n, dtype=bool)
+        presence = np.zeros((n, len(self.genres)))
+        genre_match = np.zeros(n)
+        popularity = np.zeros(n)
+        match_values = {}
+        for i, movie in enumerate(movies):
+            try:
+                movie_genres = movie.get('genres', [])
+                presence_flags, match_flags = self._genre_inputs(movie_genres)
+                match_val = match_values.get(match_flags)
+                if match_val is None:
+                    match_val = self._weighted_genre_match(user_preferences, match_flags) if match_flags else 0.0
+                    match_values[match_flags] = match_val = max(0, min(1, match_val))
+                presence[i] = presence_flags
+                genre_match[i] = match_val
+                popularity[i] = max(0, min(100, movie.get('popularity', 50.0)))
+            except Exception as e:
+                logger.warning(f"Error in fuzzy recommendation: {e}")
+                valid[i] = False
+        
+        try:
+            mapped_prefs = self.map_extended_genres(user_preferences)
+            sentiment_val = max(0, min(10, self.calculate_watch_sentiment(watch_history or {})))
+            
+            levels = list(self.recommendation.terms)
+            cuts = np.zeros((n, len(levels)))
+            
+            # A) Preference & presence rules
+            for g, genre in enumerate(self.genres):
+                pref_var = self.user_prefs[genre]
+                pref_val = np.clip(max(0, min(10, mapped_prefs.get(genre, 5.0))),
+                                   pref_var.universe.min(), pref_var.universe.max())
+                for pref_level, rec_level in self.pref_rule_levels:
+                    mu = fuzz.interp_membership(pref_var.universe, pref_var[pref_level].mf, pref_val)
+                    r = levels.index(rec_level)
+                    np.fmax(cuts[:, r], np.fmin(mu, presence[:, g]), out=cuts[:, r])
+            
+            # B) Popularity & genre match rules
+            pop_mu = {term: np.interp(popularity, self.popularity.universe, self.popularity[term].mf)
+                      for term in self.popularity.terms}
+            match_mu = {term: np.interp(genre_match, self.genre_match.universe, self.genre_match[term].mf)
+                        for term in self.genre_match.terms}
+            for pop_level, match_level, rec_level in self.pop_genre_rules:
+                r = levels.index(rec_level)
+                np.fmax(cuts[:, r], np.fmin(pop_mu[pop_level], match_mu[match_level]), out=cuts[:, r])
+            
+            # C) Watch history rules (same sentiment for the whole batch)
+            for sentiment, rec_level in self.history_rules:
+                mu = fuzz.interp_membership(self.watch_sentiment.universe, self.watch_sentiment[sentiment].mf, sentiment_val)
+                r = levels.index(rec_level)
+                np.fmax(cuts[:, r], mu, out=cuts[:, r])
+            
+            centroids = self._batch_centroid(cuts, [self.recommendation[level].mf for level in levels])
+            
+            # No rule fired: skfuzzy cannot defuzzify these rows
+            valid &= cuts.max(axis=1) > 0
+            scores[valid] = np.clip(centroids[valid], 0, 10)
+        except Exception as e:
+            logger.warning(f"Error in fuzzy recommendation: {e}")
+            scores[:] = 5.0  # Neutral scores on error
+        return scores
+    
+    def movie_inputs(self, movies: List[Dict]) -> Dict[str, np.ndarray]:
+        """
+        Preference-independent inputs of many movies (genre presence and match
+        flags, popularity memberships), computed once and shared by every
+        user of ``recommend_matrix``. Movies with identical inputs share one
+        row; ``movie_rows`` maps each movie to its row.
+        """
+        rows = {}
+        movie_rows = np.zeros(len(movies), dtype=np.int64)
+        valid, has_genres, presence, match_flags, popularity = [], [], [], [], []
+        for i, movie in enumerate(movies):
+            try:
+                presence_flags, flags = self._genre_inputs(movie.get('genres', []))
+                key = (tuple(presence_flags), flags, max(0, min(100, movie.get('popularity', 50.0))))
+            except Exception as e:
+                logger.warning(f"Error in fuzzy recommendation: {e}")
+                key = None  # Scored neutral
+            row = rows.get(key)
+            if row is None:
+                row = rows[key] = len(valid)
+                valid.append(key is not None)
+                has_genres.append(bool(key and key[1]))
+                presence.append(key[0] if key else [0] * len(self.genres))
+                match_flags.append(key[1] if key and key[1] else [0] * len(self.genres))
+                popularity.append(key[2] if key else 0.0)
+            movie_rows[i] = row
+        
+        popularity = np.asarray(popularity, dtype=float)
+        return {
+            'movie_rows': movie_rows,
+            'valid': np.asarray(valid, dtype=bool),
+            'has_genres': np.asarray(has_genres, dtype=bool),
+            'presence': np.asarray(presence, dtype=float).reshape(len(valid), len(self.genres)),
+            'match_flags': np.asarray(match_flags, dtype=float).reshape(len(valid), len(self.genres)),
+            'popularity_mu': {term: np.interp(popularity, self.popularity.universe, self.popularity[term].mf)
+                              for term in self.popularity.terms}
+        }
+    
+    def genre_match_matrix(self, preferences_list: List[Dict[str, float]],
+                           movie_inputs: Dict[str, np.ndarray]) -> np.ndarray:
+        """(users, movies) genre match (0-1), as ``calculate_genre_match`` per pair."""
+        return self._row_genre_match(preferences_list, movie_inputs)[:, movie_inputs['movie_rows']]
+    
+    def _row_genre_match(self, preferences_list: List[Dict[str, float]],
+                         movie_inputs: Dict[str, np.ndarray]) -> np.ndarray:
+        """Genre match of every user with every distinct row of ``movie_inputs``."""
+        prefs = np.array([[p.get(genre, 5.0) for genre in self.genres] for p in preferences_list], dtype=float)
+        prefs = prefs.reshape(len(preferences_list), len(self.genres))
+        matched = prefs @ movie_inputs['match_flags'].T
+        match = np.minimum(matched / np.fmax(prefs.sum(axis=1, keepdims=True), 1e-6), 1.0)
+        match[:, ~movie_inputs['has_genres']] = 0.0
+        return np.clip(match, 0, 1)
+    
+    def recommend_matrix(self, preferences_list: List[Dict[str, float]], movies: Optional[List[Dict]] = None,
+                         watch_history: Optional[Dict] = None,
+                         movie_inputs: Optional[Dict[str, np.ndarray]] = None,
+                         max_rows: int = 65536) -> np.ndarray:
+        """
+        Fuzzy scores of many users against many movies.
+        
+        The rules of ``recommend_movies`` evaluated on (users, movies) arrays:
+        the movie inputs are computed once (or passed in from
+        ``movie_inputs``) and movies with identical inputs are scored once,
+        the preference memberships are computed once per user, and the
+        genre match of all pairs is one matrix product. Users are processed
+        in blocks of at most ``max_rows`` (user, movie) rows.
+        
+        Returns:
+            Array of recommendation scores (0-10) of shape (users, movies)
+        """
+        inputs = movie_inputs if movie_inputs is not None else self.movie_inputs(movies or [])
+        n_users, n_movies = len(preferences_list), len(inputs['valid'])
+        scores = np.full((n_users, n_movies), 5.0)
+        if n_users == 0 or n_movies == 0:
+            return scores[:, inputs['movie_rows']]
+        
+        levels = list(self.recommendation.terms)
+        term_mfs = [self.recommendation[level].mf for level in levels]
+        match = self._row_genre_match(preferences_list, inputs)
+        mapped = np.array([[max(0, min(10, mapped_prefs.get(genre, 5.0))) for genre in self.genres]
+                           for mapped_prefs in map(self.map_extended_genres, preferences_list)], dtype=float)
+        
+        history_cuts = self._history_cuts(watch_history, levels)
+        
+        block_users = max(1, max_rows // n_movies)
+        for start in range(0, n_users, block_users):
+            block = slice(start, min(start + block_users, n_users))
+            try:
+                cuts = np.empty((block.stop - block.start, n_movies, len(levels)))
+                cuts[:] = history_cuts
+        
+                # A) Preference & presence rules
+                for g, genre in enumerate(self.genres):
+                    pref_var = self.user_prefs[genre]
+                    pref_vals = np.clip(mapped[block, g], pref_var.universe.min(), pref_var.universe.max())
+                    for pref_level, rec_level in self.pref_rule_levels:
+                        mu = np.interp(pref_vals, pref_var.universe, pref_var[pref_level].mf)
+                        r = levels.index(rec_level)
+                        np.fmax(cuts[:, :, r], np.fmin(mu[:, None], inputs['presence'][None, :, g]), out=cuts[:, :, r])
+        
+                # B) Popularity & genre match rules
+                match_mu = {term: np.interp(match[block], self.genre_match.universe, self.genre_match[term].mf)
+                            for term in self.genre_match.terms}
+                for pop_level, match_level, rec_level in self.pop_genre_rules:
+                    r = levels.index(rec_level)
+                    np.fmax(cuts[:, :, r], np.fmin(inputs['popularity_mu'][pop_level][None, :], match_mu[match_level]),
+                            out=cuts[:, :, r])
+        
+                centroids = self._unique_centroids(cuts.reshape(-1, len(levels)), term_mfs).reshape(cuts.shape[:2])
+        
+                # No rule fired: skfuzzy cannot defuzzify these pairs
+                valid = inputs['valid'][None, :] & (cuts.max(axis=2) > 0)
+                scores[block] = np.where(valid, np.clip(centroids, 0, 10), 5.0)
+            except Exception as e:
+                logger.warning(f"Error in fuzzy recommendation: {e}")
+                scores[block] = 5.0  # Neutral scores on error
+        return scores[:, inputs['movie_rows']]
+    
+    def genre_match_pairs(self, preferences_list: List[Dict[str, float]],
+                          movie_inputs: Dict[str, np.ndarray]) -> np.ndarray:
+        """Genre match (0-1) of (user, movie) pairs, as ``calculate_genre_match`` per pair."""
+        rows = movie_inputs['movie_rows']
+        prefs = np.array([[p.get(genre, 5.0) for genre in self.genres] for p in preferences_list], dtype=float)
+        prefs = prefs.reshape(len(preferences_list), len(self.genres))
+        matched = (prefs * movie_inputs['match_flags'][rows]).sum(axis=1)
+        match = np.minimum(matched / np.fmax(prefs.sum(axis=1), 1e-6), 1.0)
+        return np.clip(np.where(movie_inputs['has_genres'][rows], match, 0.0), 0, 1)
+    
+    def recommend_pairs(self, preferences_list: List[Dict[str, float]], movies: Optional[List[Dict]] = None,
+                        watch_history: Optional[Dict] = None,
+                        movie_inputs: Optional[Dict[str, np.ndarray]] = None) -> np.ndarray:
+        """
+        Fuzzy scores of (user, movie) pairs: ``preferences_list[i]`` with
+        ``movies[i]``, evaluated like ``recommend_movies`` on arrays over
+        all pairs at once (``movie_inputs``: the movies' ``movie_inputs``,
+        when already built).
+        
+        Returns:
+            Array of recommendation scores (0-10), one per pair
+        """
+        inputs = movie_inputs if movie_inputs is not None else self.movie_inputs(movies or [])
+        rows = inputs['movie_rows']
+        n = len(rows)
+        scores = np.full(n, 5.0)
+        if n == 0:
+            return scores
+        
+        try:
+            levels = list(self.recommendation.terms)
+            match = self.genre_match_pairs(preferences_list, inputs)
+            mapped = np.array([[max(0, min(10, mapped_prefs.get(genre, 5.0))) for genre in self.genres]
+                               for mapped_prefs in map(self.map_extended_genres, preferences_list)], dtype=float)
+            
+            cuts = np.empty((n, len(levels)))
+            cuts[:] = self._history_cuts(watch_history, levels)
+            
+            # A) Preference & presence rules
+            presence = inputs['presence'][rows]
+            for g, genre in enumerate(self.genres):
+                pref_var = self.user_prefs[genre]
+                pref_vals = np.clip(mapped[:, g], pref_var.universe.min(), pref_var.universe.max())
+                for pref_level, rec_level in self.pref_rule_levels:
+                    mu = np.interp(pref_vals, pref_var.universe, pref_var[pref_level].mf)
+                    r = levels.index(rec_level)
+                    np.fmax(cuts[:, r], np.fmin(mu, presence[:, g]), out=cuts[:, r])
+            
+            # B) Popularity & genre match rules
+            match_mu = {term: np.interp(match, self.genre_match.universe, self.genre_match[term].mf)
+                        for term in self.genre_match.terms}
+            for pop_level, match_level, rec_level in self.pop_genre_rules:
+                r = levels.index(rec_level)
+                np.fmax(cuts[:, r], np.fmin(inputs['popularity_mu'][pop_level][rows], match_mu[match_level]), out=cuts[:, r])
+            
+            centroids = self._unique_centroids(cuts, [self.recommendation[level].mf for level in levels])
+            valid = inputs['valid'][rows] & (cuts.max(axis=1) > 0)
+            scores[valid] = np.clip(centroids[valid], 0, 10)
+        except Exception as e:
+            logger.warning(f"Error in fuzzy recommendation: {e}")
+            scores[:] = 5.0  # Neutral scores on error
+        return scores
+    
+    def _history_cuts(self, watch_history: Optional[Dict], levels: List[str]) -> np.ndarray:
+        """C) Watch history rules: the cut per output level, the same for every pair."""
+        sentiment_val = max(0, min(10, self.calculate_watch_sentiment(watch_history or {})))
+        cuts = np.zeros(len(levels))
+        for sentiment, rec_level in self.history_rules:
+            mu = fuzz.interp_membership(self.watch_sentiment.universe, self.watch_sentiment[sentiment].mf, sentiment_val)
+            r = levels.index(rec_level)
+            cuts[r] = max(cuts[r], mu)
+        return cuts
+    
+    def _unique_centroids(self, cuts: np.ndarray, term_mfs: List[np.ndarray]) -> np.ndarray:
+        """Centroid per row of ``cuts``, computed once per distinct row (pairs often share their cuts)."""
+        unique_cuts, inverse = np.unique(cuts, axis=0, return_inverse=True)
+        return self._batch_centroid(unique_cuts, term_mfs)[inverse.reshape(-1)]
+    
+    def _genre_inputs(self, movie_genres: List[str]):
+        """Preference-independent genre inputs of a movie, memoized per genre list."""
+        key = tuple(movie_genres)
+        inputs = self._genre_input_cache.get(key)
+        if inputs is None:
+            # Empty genre lists have no match flags (genre match is 0)
+            match_flags = tuple(self.genre_match_flags(movie_genres)) if movie_genres else ()
+            inputs = (self.genre_presence_flags(movie_genres), match_flags)
+            if len(self._genre_input_cache) >= 50000:
+                self._genre_input_cache.clear()
+            self._genre_input_cache[key] = inputs
+        return inputs
+    
+    def _batch_centroid(self, cuts: np.ndarray, term_mfs: List[np.ndarray]) -> np.ndarray:
+        """
+        Row-wise centroid of the clipped output terms, reproducing skfuzzy's
+        upsampled universe (term/cut crossing points) and segment areas.
+        """
+        universe = self.recommendation.universe.astype(float)
+        n = cuts.shape[0]
+        
+        # Crossing points of each term with its cut; non-crossings are padded
+        # with a universe point (zero-width segments contribute nothing)
+        points = [np.broadcast_to(universe, (n, universe.size))]
+        dx = universe[1:] - universe[:-1]
+        for t, mf in enumerate(term_mfs):
+            y = cuts[:, t:t + 1]
+            above = np.where(y == 0, mf > y, mf >= y)
+            crosses = above[:, 1:] != above[:, :-1]
+            dmf = mf[1:] - mf[:-1]
+            with np.errstate(divide='ignore', invalid='ignore'):
+                crossing = universe[:-1] + (y - mf[:-1]) * dx / dmf
+            points.append(np.where(crosses, crossing, universe[0]))
+        x = np.sort(np.concatenate(points, axis=1), axis=1)
+        
+        mfx = np.zeros_like(x)
+        for t, mf in enumerate(term_mfs):
+            np.maximum(mfx, np.minimum(cuts[:, t:t + 1], np.interp(x, universe, mf)), out=mfx)
+        
+        x1, x2 = x[:, :-1], x[:, 1:]
+        y1, y2 = mfx[:, :-1], mfx[:, 1:]
+        width = x2 - x1
+        with np.errstate(divide='ignore', invalid='ignore'):
+            moment = np.select(
+                [y1 == y2, y1 == 0.0, y2 == 0.0],
+                [0.5 * (x1 + x2), 2.0 / 3.0 * width + x1, 1.0 / 3.0 * width + x1],
+                (2.0 / 3.0 * width * (y2 + 0.5 * y1)) / (y1 + y2) + x1
+            )
+            area = np.select(
+                [y1 == y2, y1 == 0.0, y2 == 0.0],
+                [width * y1, 0.5 * width * y2, 0.5 * width * y1],
+                0.5 * width * (y1 + y2)
+            )
+        used = ~(((y1 == 0.0) & (y2 == 0.0)) | (width == 0))
+        
+        # Sequential sums, like skfuzzy's loop
+        sum_moment_area = np.cumsum(np.where(used, moment * area, 0.0), axis=1)[:, -1]
+        sum_area = np.cumsum(np.where(used, area, 0.0), axis=1)[:, -1]
+        return sum_moment_area / np.fmax(sum_area, np.finfo(float).eps)
+
 
 def recommend_with_fuzzy(engine: FuzzyMovieRecommender, user_preferences: Dict[str, float], 
                         movie: Dict, watch_history: Optional[Dict] = None, 
@@ -15,85 +15,151 @@ Features:
 import numpy as np
 from typing import Dict, List, Optional, Any, Tuple
 from models.fuzzy_model import FuzzyMovieRecommender, recommend_with_fuzzy
+from models.feature_compiler import FeatureCompiler, load_feature_names
 from models.ann_model import ANNMoviePredictor
+from models.dense_network import DenseNetwork, load_shared_network
+from shared_arrays import shared_root_from_env
 import logging
+import multiprocessing
 import os
+from concurrent.futures import ProcessPoolExecutor
 
 logger = logging.getLogger(__name__)
 
+
+def _export_keras_bundle(model_path: str) -> Tuple[Dict[str, np.ndarray], Dict[str, Any]]:
+    """Load a Keras model and export it as a DenseNetwork bundle (runs in a throwaway process)."""
+    import tensorflow as tf
+    return DenseNetwork.from_keras(tf.keras.models.load_model(model_path)).to_bundle()
+
+
+def export_keras_network_in_subprocess(model_path: str) -> DenseNetwork:
+    """
+    DenseNetwork export of a Keras model, with TensorFlow loaded in a spawned
+    process that exits afterwards, so its runtime threads never exist in the
+    caller (which may fork later).
+    """
+    with ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context('spawn')) as pool:
+        arrays, metadata = pool.submit(_export_keras_bundle, model_path).result()
+    return DenseNetwork(metadata['layers'], arrays)
+
+
 class HybridRecommendationSystem:
     """
     Complete hybrid system combining fuzzy logic and ANN predictions.
     """
     
-    def __init__(self, ann_model_name: str = "models/simple_ann_model"):
+    def __init__(self, ann_model_name: str = "models/simple_ann_model", load_ann: bool = True):
         """
         Initialize the hybrid system.
         
         Args:
             ann_model_name: Name of the saved ANN model to load
+            load_ann: Load the ANN model now; otherwise the system scores
+                fuzzy-only until load_ann_model() is called
         """
         self.fuzzy_engine = FuzzyMovieRecommender()
         self.ann_predictor = ANNMoviePredictor()
         
-        # Try to load ANN model and scaler
+        # ANN state; ann_pending is set until a deferred load_ann_model() has finished
         self.ann_available = False
+        self.ann_pending = not load_ann
         self.ann_model = None
         self.ann_scaler = None
+        self.ann_model_path = None
+        self._feature_compiler = None
         
+        if load_ann:
+            self.load_ann_model()
+        
+        # Combination strategies
+        self.combination_strategies = {
+            'weighted_average': self._weighted_average,
+            'fuzzy_dominant': self._fuzzy_dominant,
+            'ann_dominant': self._ann_dominant,
+            'confidence_weighted': self._confidence_weighted,
+            'adaptive': self._adaptive_combination
+        }
+    
+    def load_ann_model(self, warm_up_preferences: Optional[Dict[str, float]] = None,
+                       warm_up_movies: Optional[List[Dict[str, Any]]] = None, fork_safe: bool = False) -> bool:
+        """
+        Load the saved ANN model (simple model first, then enhanced) and switch
+        to hybrid scoring.
+        
+        ``ann_available`` is set last, after the optional warm-up predict on
+        ``warm_up_movies``, so concurrent requests keep scoring fuzzy-only
+        until the model is loaded and warm. With ``fork_safe`` (a process
+        that forks workers later) TensorFlow is never loaded here: only the
+        shared NumPy export is attached, and without SHARED_MEMORY_DIR the
+        model stays unloaded for the forked workers to load.
+        
+        Returns:
+            Whether an ANN model is now available
+        """
         try:
             # Get absolute path to models directory
             current_dir = os.path.dirname(os.path.abspath(__file__))
             models_dir = current_dir  # We're already in models directory
             
-            # Try loading simple ANN model first
-            model_path = os.path.join(models_dir, "simple_ann_model.keras")
-            scaler_path = os.path.join(models_dir, "simple_ann_model_scaler.joblib")
+            # Try loading simple ANN model first, then the enhanced model
+            for name in ("simple_ann_model", "enhanced_ann_model"):
+                model_path = os.path.join(models_dir, f"{name}.keras")
+                scaler_path = os.path.join(models_dir, f"{name}_scaler.joblib")
+                if os.path.exists(model_path):
+                    break
+            else:
+                logger.warning("⚠️ ANN model not found. Using fuzzy-only predictions.")
+                return False
             
-            if os.path.exists(model_path):
-                import tensorflow as tf
-                import joblib
-                
-                # Load model
-                self.ann_model = tf.keras.models.load_model(model_path)
-                
-                # Load scaler if available (for enhanced model)
-                if os.path.exists(scaler_path):
-                    self.ann_scaler = joblib.load(scaler_path)
-                    logger.info(f"✅ Enhanced ANN model and scaler loaded from {model_path}")
-                else:
-                    logger.info(f"✅ ANN model loaded (no scaler) from {model_path}")
-                
-                self.ann_available = True
+            import joblib
+            
+            # Load model
+            self.ann_model = self._load_ann_network(model_path, fork_safe)
+            self.ann_model_path = model_path
+            self._feature_compiler = None
+            
+            # Load scaler if available (for enhanced model)
+            if os.path.exists(scaler_path):
+                self.ann_scaler = joblib.load(scaler_path)
+                logger.info(f"✅ Enhanced ANN model and scaler loaded from {model_path}")
             else:
-                # Try enhanced model
-                model_path = os.path.join(models_dir, "enhanced_ann_model.keras")
-                scaler_path = os.path.join(models_dir, "enhanced_ann_model_scaler.joblib")
-                if os.path.exists(model_path):
-                    import tensorflow as tf
-                    import joblib
-                    
-                    self.ann_model = tf.keras.models.load_model(model_path)
-                    if os.path.exists(scaler_path):
-                        self.ann_scaler = joblib.load(scaler_path)
-                        logger.info(f"✅ Enhanced ANN model and scaler loaded from {model_path}")
-                    else:
-                        logger.info(f"✅ Enhanced ANN model loaded (no scaler) from {model_path}")
-                    self.ann_available = True
-                else:
-                    logger.warning("⚠️ ANN model not found. Using fuzzy-only predictions.")
+                logger.info(f"✅ ANN model loaded (no scaler) from {model_path}")
+            
+            # First predict pays for graph tracing / allocation; do it before serving
+            if warm_up_movies:
+                self._predict_ann(warm_up_preferences or {}, warm_up_movies)
+            
+            self.ann_available = True
         except Exception as e:
             self.ann_available = False
             logger.warning(f"⚠️ ANN model loading failed: {e}. Using fuzzy-only predictions.")
-        
-        # Combination strategies
-        self.combination_strategies = {
-            'weighted_average': self._weighted_average,
-            'fuzzy_dominant': self._fuzzy_dominant,
-            'ann_dominant': self._ann_dominant,
-            'confidence_weighted': self._confidence_weighted,
-            'adaptive': self._adaptive_combination
-        }
+        finally:
+            self.ann_pending = False
+        return self.ann_available
+    
+    @staticmethod
+    def _load_ann_network(model_path: str, fork_safe: bool = False):
+        """
+        The Keras model at ``model_path``, or with SHARED_MEMORY_DIR set its
+        exported NumPy network, whose weights every worker shares read-only
+        (``fork_safe``: exported in a throwaway process, never a Keras model).
+        """
+        def load_keras():
+            import tensorflow as tf
+            return tf.keras.models.load_model(model_path)
+        
+        shared_root = shared_root_from_env()
+        if shared_root:
+            export = (lambda: export_keras_network_in_subprocess(model_path)) if fork_safe else \
+                (lambda: DenseNetwork.from_keras(load_keras()))
+            try:
+                return load_shared_network(model_path, export, shared_root)
+            except Exception as e:
+                logger.warning(f"⚠️ Shared ANN weights unavailable, loading a private model: {e}")
+        if fork_safe:
+            raise RuntimeError("TensorFlow is not fork-safe; the Keras model is loaded by the forked workers")
+        return load_keras()
     
     def _weighted_average(self, fuzzy_score: float, ann_score: float, 
                          context: Dict[str, Any]) -> float:
@@ -177,96 +243,43 @@ class HybridRecommendationSystem:
         """Calculate genre match score for context."""
         return self.fuzzy_engine.calculate_genre_match(user_preferences, movie_genres)
     
-    def _prepare_ann_features(self, user_preferences: Dict[str, float],
-                             movie_info: Dict[str, Any],
-                             watch_history: Optional[Dict[str, float]] = None) -> np.ndarray:
-        """Prepare features for ANN model prediction with extended genre support.
-        
-        Enhanced model expects 20 features:
-        - movie_rating, movie_popularity, movie_year, movie_runtime, movie_budget, movie_box_office (6)
-        - user_action, user_comedy, user_romance, user_thriller, user_sci_fi, user_drama, user_horror (7)
-        - movie_genre_action, movie_genre_comedy, movie_genre_romance, movie_genre_thriller, 
-          movie_genre_sci_fi, movie_genre_drama, movie_genre_horror (7)
-        Total: 20 features
-        
-        Simple model expects 19 features (same but without movie_box_office)
-        
-        Extended Genre Mapping for ANN Compatibility:
-        Maps 12 additional frontend genres to 7 core ANN genres for seamless operation.
+    # Feature order used when the model has no features JSON next to it
+    DEFAULT_ANN_FEATURES = [
+        'movie_rating', 'movie_popularity', 'movie_year', 'movie_runtime', 'movie_budget',
+        'user_action', 'user_comedy', 'user_romance', 'user_thriller', 'user_sci_fi', 'user_drama', 'user_horror',
+        'movie_genre_action', 'movie_genre_comedy', 'movie_genre_romance', 'movie_genre_thriller',
+        'movie_genre_sci_fi', 'movie_genre_drama', 'movie_genre_horror'
+    ]
+    
+    def _ann_feature_compiler(self) -> FeatureCompiler:
         """
-        features = []
-        
-        # Extended genre mapping for ANN compatibility
-        extended_to_core_mapping = {
-            'fantasy': 'sci_fi',        'adventure': 'action',
-            'crime': 'thriller',        'mystery': 'thriller',
-            'animation': 'comedy',      'western': 'action',
-            'war': 'action',           'documentary': 'drama',
-            'biography': 'drama',       'history': 'drama',
-            'music': 'drama',          'sport': 'drama'
-        }
+        Feature extractor for the loaded ANN model, compiled once.
         
-        # Movie features (6 for enhanced, 5 for simple)
-        features.append(movie_info.get('rating', 7.0))  # movie_rating
-        features.append(movie_info.get('popularity', 50.0))  # movie_popularity
-        features.append(movie_info.get('year', 2000))  # movie_year
-        features.append(movie_info.get('runtime', 120))  # movie_runtime
-        features.append(movie_info.get('budget', 0))  # movie_budget
-        
-        # Check if we're using enhanced model (20 features) or simple (19 features)
-        if hasattr(self.ann_model, 'input_shape') and self.ann_model.input_shape[1] == 20:
-            features.append(movie_info.get('box_office', 0))  # movie_box_office (enhanced only)
-        
-        # Core genres that ANN was trained on
-        core_genres = ['action', 'comedy', 'romance', 'thriller', 'sci_fi', 'drama', 'horror']
-        
-        # Map extended genres to core genres for user preferences
-        mapped_preferences = {}
-        for genre in core_genres:
-            # Start with direct preference
-            mapped_preferences[genre] = user_preferences.get(genre, 5.0)
-        
-        # Add contributions from extended genres (blended approach)
-        for ext_genre, core_genre in extended_to_core_mapping.items():
-            if ext_genre in user_preferences:
-                ext_pref = user_preferences[ext_genre]
-                # Blend extended preference with core (70% original, 30% extended)
-                current_pref = mapped_preferences.get(core_genre, 5.0)
-                mapped_preferences[core_genre] = current_pref * 0.7 + ext_pref * 0.3
-        
-        # User preferences (7 features) - use mapped preferences
-        for genre in core_genres:
-            features.append(mapped_preferences.get(genre, 5.0))
-        
-        # Movie genres (7 features, one-hot encoding with extended genre support)
-        movie_genres_str = str(movie_info.get('genres', '')).lower()
-        movie_genres_list = [g.lower().replace('-', '_').replace(' ', '_') for g in movie_info.get('genres', [])] if isinstance(movie_info.get('genres', []), list) else []
-        
-        for genre in core_genres:
-            has_genre = False
+        Uses the feature order saved with the model (``*_features.json``).
+        Models with 20 inputs additionally take movie_box_office after
+        movie_budget. User preferences blend extended genres into the core
+        genres (70% core, 30% extended) and genre flags recognize extended
+        genres, so the 12 additional frontend genres work with the 7-genre model.
+        """
+        if self._feature_compiler is None:
+            feature_names = list(self.DEFAULT_ANN_FEATURES)
+            if self.ann_model_path:
+                features_path = self.ann_model_path.replace('.keras', '_features.json')
+                if os.path.exists(features_path):
+                    feature_names = load_feature_names(features_path)
             
-            # Check direct core genre match
-            if (genre in movie_genres_str or 
-                genre.replace('_', ' ') in movie_genres_str or
-                genre.replace('_', '-') in movie_genres_str or
-                genre in movie_genres_list):
-                has_genre = True
-            else:
-                # Check extended genre mappings
-                for ext_genre, core_genre in extended_to_core_mapping.items():
-                    if core_genre == genre:
-                        ext_genre_variations = [
-                            ext_genre, ext_genre.replace('_', ' '), ext_genre.replace('_', '-'),
-                            ext_genre.replace(' ', '_'), ext_genre.replace('-', '_')
-                        ]
-                        if any(var in movie_genres_str for var in ext_genre_variations) or \
-                           any(var in movie_genres_list for var in ext_genre_variations):
-                            has_genre = True
-                            break
+            if (hasattr(self.ann_model, 'input_shape') and self.ann_model.input_shape[1] == 20
+                    and 'movie_box_office' not in feature_names):
+                feature_names.insert(feature_names.index('movie_budget') + 1, 'movie_box_office')
             
-            features.append(1.0 if has_genre else 0.0)
-        
-        return np.array([features], dtype=np.float32)
+            self._feature_compiler = FeatureCompiler(feature_names, preferences='mapped', genre_matcher='extended')
+        return self._feature_compiler
+    
+    def _prepare_ann_features(self, user_preferences: Dict[str, float],
+                             movie_info: Dict[str, Any],
+                             watch_history: Optional[Dict[str, float]] = None) -> np.ndarray:
+        """Prepare the (1, n_features) ANN input for one movie."""
+        return self._ann_feature_compiler().transform(user_preferences, [movie_info], watch_history)
     
     def recommend(self, user_preferences: Dict[str, float],
                  movie_info: Dict[str, Any],
@@ -354,6 +367,227 @@ class HybridRecommendationSystem:
         
         return result
     
+    def _predict_ann(self, user_preferences: Dict[str, float], movies: List[Dict[str, Any]],
+                     watch_history: Optional[Dict[str, float]] = None) -> np.ndarray:
+        """ANN scores (0-10) of many movies: one feature matrix, one predict call."""
+        return self._ann_scores(self._ann_feature_compiler().transform(user_preferences, movies, watch_history))
+    
+    def _ann_scores(self, features: np.ndarray) -> np.ndarray:
+        """ANN scores (0-10) of a feature matrix."""
+        if self.ann_scaler is not None:
+            features = self.ann_scaler.transform(features)
+        ann_scores = np.asarray(self.ann_model.predict(features, verbose=0), dtype=np.float64)[:, 0]
+        if self.ann_scaler is not None:
+            ann_scores = ann_scores * 10.0  # Scale from 0-1 to 0-10
+        return np.clip(ann_scores, 0, 10)
+    
+    def recommend_many(self, user_preferences: Dict[str, float],
+                       movies: List[Dict[str, Any]],
+                       watch_history: Optional[Dict[str, float]] = None,
+                       combination_strategy: str = 'adaptive') -> List[Dict[str, Any]]:
+        """
+        Hybrid recommendations for many movies of one user.
+        
+        Same results as calling ``recommend`` per movie, but fuzzy scores come
+        from one vectorized evaluation and the ANN runs one predict call on
+        the stacked feature matrix.
+        
+        Args:
+            user_preferences: User genre preferences (0-10)
+            movies: Movie metadata dicts
+            watch_history: Optional watch history stats
+            combination_strategy: Strategy for combining scores
+            
+        Returns:
+            List of result dicts (same shape as ``recommend``), in input order
+        """
+        fuzzy_scores = self.fuzzy_engine.recommend_movies(user_preferences, movies, watch_history)
+        
+        results = []
+        for movie_info, fuzzy_score in zip(movies, fuzzy_scores.tolist()):
+            fuzzy_score = round(fuzzy_score, 2)
+            results.append({
+                'fuzzy_score': fuzzy_score,
+                'movie_info': movie_info,
+                'combination_strategy': combination_strategy,
+                'explanation': f"Fuzzy logic score: {fuzzy_score:.2f}"
+            })
+        
+        if not (self.ann_available and self.ann_model):
+            for result in results:
+                result['hybrid_score'] = result['fuzzy_score']
+                result['explanation'] += " (ANN not available, using fuzzy only)"
+            return results
+        
+        try:
+            ann_scores = self._predict_ann(user_preferences, movies, watch_history)
+        except Exception as e:
+            logger.warning(f"ANN prediction failed: {e}")
+            for result in results:
+                result['hybrid_score'] = result['fuzzy_score']
+                result['explanation'] += " (ANN failed, using fuzzy only)"
+            return results
+        
+        combine = self.combination_strategies.get(combination_strategy, self._weighted_average)
+        for result, movie_info, ann_score in zip(results, movies, ann_scores.tolist()):
+            fuzzy_score = result['fuzzy_score']
+            try:
+                context = {
+                    'watch_history': watch_history or {},
+                    'genre_match': self.calculate_genre_match(
+                        user_preferences, movie_info.get('genres', [])
+                    ),
+                    'fuzzy_weight': 0.6  # Default weight
+                }
+                hybrid_score = combine(fuzzy_score, ann_score, context)
+            except Exception as e:
+                logger.warning(f"ANN prediction failed: {e}")
+                result['hybrid_score'] = fuzzy_score
+                result['explanation'] += " (ANN failed, using fuzzy only)"
+                continue
+            
+            result['ann_score'] = round(ann_score, 2)
+            result['hybrid_score'] = round(hybrid_score, 2)
+            result['explanation'] += f", ANN score: {ann_score:.2f} → Hybrid ({combination_strategy}): {hybrid_score:.2f}"
+        
+        return results
+    
+    # (user, movie) rows per ANN predict call of recommend_matrix
+    ANN_MATRIX_ROWS = 65536
+    
+    def movie_features(self, movies: List[Dict[str, Any]],
+                       watch_history: Optional[Dict[str, float]] = None) -> Tuple[Dict[str, np.ndarray], Optional[np.ndarray]]:
+        """
+        Movie inputs ``recommend_matrix`` can reuse for the same movies: the
+        fuzzy engine's movie inputs and the ANN's movie feature block (None
+        while no ANN is loaded).
+        """
+        ann_block = None
+        if self.ann_available and self.ann_model:
+            ann_block = self._ann_feature_compiler().transform({}, movies, watch_history)
+        return self.fuzzy_engine.movie_inputs(movies), ann_block
+    
+    def recommend_matrix(self, preferences_list: List[Dict[str, float]],
+                         movies: List[Dict[str, Any]],
+                         watch_history: Optional[Dict[str, float]] = None,
+                         combination_strategy: str = 'adaptive',
+                         fuzzy_inputs: Optional[Dict[str, np.ndarray]] = None,
+                         ann_movie_block: Optional[np.ndarray] = None) -> Dict[str, np.ndarray]:
+        """
+        Hybrid scores of many users against the same movies.
+        
+        ``recommend_many`` for every user at once: fuzzy scores from the
+        engine's matrix evaluation, ANN scores from the stacked
+        (users x movies) feature matrix, whose movie columns are built once,
+        and the combination strategy applied to whole arrays.
+        
+        Args:
+            preferences_list: Genre preferences (0-10) per user
+            movies: Movie metadata dicts, shared by all users
+            watch_history: Optional watch history stats, shared by all users
+            combination_strategy: Strategy for combining scores
+            fuzzy_inputs, ann_movie_block: Output of ``movie_features`` for
+                these movies, to skip rebuilding it
+            
+        Returns:
+            (users, movies) arrays 'fuzzy_score', 'ann_score' (NaN without an
+            ANN) and 'hybrid_score', rounded like ``recommend_many``
+        """
+        if fuzzy_inputs is None:
+            fuzzy_inputs = self.fuzzy_engine.movie_inputs(movies)
+        fuzzy_scores = np.round(self.fuzzy_engine.recommend_matrix(
+            preferences_list, watch_history=watch_history, movie_inputs=fuzzy_inputs), 2)
+        scores = {
+            'fuzzy_score': fuzzy_scores,
+            'ann_score': np.full(fuzzy_scores.shape, np.nan),
+            'hybrid_score': fuzzy_scores
+        }
+        if not (self.ann_available and self.ann_model) or fuzzy_scores.size == 0:
+            return scores
+        
+        try:
+            compiler = self._ann_feature_compiler()
+            if ann_movie_block is None:
+                ann_movie_block = compiler.transform({}, movies, watch_history)
+            ann_scores = np.empty(fuzzy_scores.shape)
+            users_per_call = max(1, self.ANN_MATRIX_ROWS // fuzzy_scores.shape[1])
+            for start in range(0, len(preferences_list), users_per_call):
+                users = preferences_list[start:start + users_per_call]
+                features = compiler.transform_many(users, movies, watch_history, ann_movie_block)
+                ann_scores[start:start + len(users)] = self._ann_scores(features).reshape(len(users), -1)
+            genre_match = self.fuzzy_engine.genre_match_matrix(preferences_list, fuzzy_inputs)
+            hybrid_scores = self._combine_arrays(fuzzy_scores, ann_scores, genre_match,
+                                                 watch_history or {}, combination_strategy)
+        except Exception as e:
+            logger.warning(f"ANN prediction failed: {e}")
+            return scores
+        
+        scores['ann_score'] = np.round(ann_scores, 2)
+        scores['hybrid_score'] = np.round(hybrid_scores, 2)
+        return scores
+    
+    def recommend_pairs(self, preferences_list: List[Dict[str, float]],
+                        movies: List[Dict[str, Any]],
+                        watch_history: Optional[Dict[str, float]] = None,
+                        combination_strategy: str = 'adaptive') -> Dict[str, np.ndarray]:
+        """
+        Hybrid scores of (user, movie) pairs: ``preferences_list[i]`` with
+        ``movies[i]``, with one vectorized fuzzy evaluation and one ANN
+        predict for all pairs.
+        
+        Returns:
+            Arrays 'fuzzy_score', 'ann_score' (NaN without an ANN) and
+            'hybrid_score', one value per pair, rounded like ``recommend_many``
+        """
+        fuzzy_inputs = self.fuzzy_engine.movie_inputs(movies)
+        fuzzy_scores = np.round(self.fuzzy_engine.recommend_pairs(
+            preferences_list, watch_history=watch_history, movie_inputs=fuzzy_inputs), 2)
+        scores = {
+            'fuzzy_score': fuzzy_scores,
+            'ann_score': np.full(fuzzy_scores.shape, np.nan),
+            'hybrid_score': fuzzy_scores
+        }
+        if not (self.ann_available and self.ann_model) or fuzzy_scores.size == 0:
+            return scores
+        
+        try:
+            ann_scores = self._ann_scores(self._ann_feature_compiler().transform_pairs(preferences_list, movies, watch_history))
+            genre_match = self.fuzzy_engine.genre_match_pairs(preferences_list, fuzzy_inputs)
+            hybrid_scores = self._combine_arrays(fuzzy_scores, ann_scores, genre_match,
+                                                 watch_history or {}, combination_strategy)
+        except Exception as e:
+            logger.warning(f"ANN prediction failed: {e}")
+            return scores
+        
+        scores['ann_score'] = np.round(ann_scores, 2)
+        scores['hybrid_score'] = np.round(hybrid_scores, 2)
+        return scores
+    
+    def _combine_arrays(self, fuzzy: np.ndarray, ann: np.ndarray, genre_match: np.ndarray,
+                        watch_history: Dict[str, float], combination_strategy: str) -> np.ndarray:
+        """The combination strategies on arrays of scores (same arithmetic as the per-movie methods)."""
+        if combination_strategy == 'fuzzy_dominant':
+            return fuzzy * 0.7 + ann * 0.3
+        if combination_strategy == 'ann_dominant':
+            return fuzzy * 0.3 + ann * 0.7
+        if combination_strategy not in ('confidence_weighted', 'adaptive'):
+            return fuzzy * 0.6 + ann * 0.4  # weighted_average with the default fuzzy weight
+        
+        watch_count = watch_history.get('watch_count', 0)
+        fuzzy_weight, ann_weight = (0.3, 0.7) if watch_count > 50 else (0.7, 0.3) if watch_count < 10 else (0.5, 0.5)
+        strong, poor = genre_match > 0.8, genre_match < 0.3
+        fuzzy_weights = np.where(strong, fuzzy_weight + 0.1, np.where(poor, fuzzy_weight - 0.1, fuzzy_weight))
+        ann_weights = np.where(strong, ann_weight - 0.1, np.where(poor, ann_weight + 0.1, ann_weight))
+        total_weight = fuzzy_weights + ann_weights
+        confidence_weighted = fuzzy * (fuzzy_weights / total_weight) + ann * (ann_weights / total_weight)
+        if combination_strategy == 'confidence_weighted':
+            return confidence_weighted
+        
+        agreement = 1 - (np.abs(fuzzy - ann) / 10)
+        return np.select([agreement > 0.8, agreement < 0.4],
+                         [(fuzzy + ann) / 2, confidence_weighted],
+                         fuzzy * 0.6 + ann * 0.4)
+    
     def batch_recommend(self, recommendations_list: List[Dict],
                        combination_strategy: str = 'adaptive') -> List[Dict]:
         """
@@ -4,16 +4,21 @@ Performance Metrics Tracking System
 
 This module provides real-time metrics tracking for the recommendation system,
 including latency, accuracy, and component performance statistics.
+
+Latencies and scores are kept in streaming histograms (O(1) record,
+percentiles accurate over any number of requests); only the most recent
+requests are kept verbatim, in a fixed-size ring buffer.
 """
 
 import time
 import logging
 from typing import Dict, List, Optional, Tuple
 from dataclasses import dataclass, asdict
-from collections import deque
 from threading import Lock
 import json
 
+from streaming_stats import RingBuffer, StreamingHistogram
+
 logger = logging.getLogger(__name__)
 
 
@@ -41,118 +46,91 @@ class MetricsCollector:
         Initialize metrics collector.
         
         Args:
-            max_history: Maximum number of metrics to keep in memory
+            max_history: Number of recent requests kept verbatim (for get_recent_metrics)
         """
         self.max_history = max_history
-        self.metrics: deque = deque(maxlen=max_history)
+        self.metrics = RingBuffer(max_history)
         self.lock = Lock()
-        self._fuzzy_times: deque = deque(maxlen=max_history)
-        self._ann_times: deque = deque(maxlen=max_history)
-        self._hybrid_times: deque = deque(maxlen=max_history)
+        self._total_times = StreamingHistogram()
+        self._fuzzy_times = StreamingHistogram()
+        self._ann_times = StreamingHistogram()
+        self._fuzzy_scores = StreamingHistogram()
+        self._hybrid_scores = StreamingHistogram()
+        self._confidences = StreamingHistogram()
+        self._strategies: Dict[str, int] = {}
         self._start_time = time.time()
     
     def record_request(self, metrics: RequestMetrics) -> None:
         """Record a single request's metrics."""
         with self.lock:
             self.metrics.append(metrics)
-            self._fuzzy_times.append(metrics.fuzzy_time_ms)
+            self._total_times.record(metrics.total_time_ms)
+            self._fuzzy_times.record(metrics.fuzzy_time_ms)
             if metrics.ann_available:
-                self._ann_times.append(metrics.ann_time_ms)
-            self._hybrid_times.append(metrics.total_time_ms)
+                self._ann_times.record(metrics.ann_time_ms)
+            self._fuzzy_scores.record(metrics.fuzzy_score)
+            self._hybrid_scores.record(metrics.hybrid_score)
+            self._confidences.record(metrics.confidence)
+            self._strategies[metrics.strategy] = self._strategies.get(metrics.strategy, 0) + 1
     
     def get_performance_summary(self) -> Dict:
-        """Get current performance metrics summary."""
+        """Get current performance metrics summary (all requests since start or reset)."""
         with self.lock:
-            if not self.metrics:
+            request_count = self._total_times.count
+            if not request_count:
                 return self._get_empty_summary()
             
-            # Extract timing data
-            total_times = [m.total_time_ms for m in self.metrics]
-            fuzzy_times = [m.fuzzy_time_ms for m in self.metrics]
-            ann_times = [m.ann_time_ms for m in self.metrics if m.ann_available]
-            
-            # Extract scores
-            fuzzy_scores = [m.fuzzy_score for m in self.metrics]
-            hybrid_scores = [m.hybrid_score for m in self.metrics]
-            confidences = [m.confidence for m in self.metrics]
+            uptime = time.time() - self._start_time
+            fuzzy = self._fuzzy_times
+            ann = self._ann_times
             
             return {
-                "request_count": len(self.metrics),
-                "uptime_seconds": time.time() - self._start_time,
+                "request_count": request_count,
+                "uptime_seconds": uptime,
                 "performance": {
-                    "total_latency_ms": {
-                        "avg": sum(total_times) / len(total_times),
-                        "min": min(total_times),
-                        "max": max(total_times),
-                        "p95": self._percentile(total_times, 95),
-                        "p99": self._percentile(total_times, 99)
-                    },
+                    "total_latency_ms": self._total_times.summary((50, 95, 99)),
                     "fuzzy_latency_ms": {
-                        "avg": sum(fuzzy_times) / len(fuzzy_times) if fuzzy_times else 0,
-                        "min": min(fuzzy_times) if fuzzy_times else 0,
-                        "max": max(fuzzy_times) if fuzzy_times else 0
+                        "avg": fuzzy.mean,
+                        "min": fuzzy.min if fuzzy.count else 0,
+                        "max": fuzzy.max if fuzzy.count else 0
                     },
                     "ann_latency_ms": {
-                        "avg": sum(ann_times) / len(ann_times) if ann_times else 0,
-                        "min": min(ann_times) if ann_times else 0,
-                        "max": max(ann_times) if ann_times else 0,
-                        "calls": len(ann_times)
+                        "avg": ann.mean,
+                        "min": ann.min if ann.count else 0,
+                        "max": ann.max if ann.count else 0,
+                        "calls": ann.count
                     }
                 },
                 "scores": {
-                    "fuzzy": {
-                        "avg": sum(fuzzy_scores) / len(fuzzy_scores),
-                        "min": min(fuzzy_scores),
-                        "max": max(fuzzy_scores)
-                    },
-                    "hybrid": {
-                        "avg": sum(hybrid_scores) / len(hybrid_scores),
-                        "min": min(hybrid_scores),
-                        "max": max(hybrid_scores)
-                    },
-                    "confidence": {
-                        "avg": sum(confidences) / len(confidences),
-                        "min": min(confidences),
-                        "max": max(confidences)
-                    }
+                    "fuzzy": self._fuzzy_scores.summary(()),
+                    "hybrid": self._hybrid_scores.summary(()),
+                    "confidence": self._confidences.summary(())
                 },
                 "throughput": {
-                    "requests_per_second": len(self.metrics) / max(1, time.time() - self._start_time)
+                    "requests_per_second": request_count / max(1, uptime)
                 }
             }
     
     def get_recent_metrics(self, count: int = 10) -> List[Dict]:
         """Get the most recent N metrics."""
         with self.lock:
-            recent = list(self.metrics)[-count:]
-            return [asdict(m) for m in recent]
+            return [asdict(m) for m in self.metrics.latest(count)]
     
     def get_strategy_stats(self) -> Dict[str, int]:
         """Get statistics about combination strategies used."""
         with self.lock:
-            strategies = {}
-            for m in self.metrics:
-                strategies[m.strategy] = strategies.get(m.strategy, 0) + 1
-            return strategies
+            return dict(self._strategies)
     
     def reset_metrics(self) -> None:
         """Reset all collected metrics."""
         with self.lock:
             self.metrics.clear()
-            self._fuzzy_times.clear()
-            self._ann_times.clear()
-            self._hybrid_times.clear()
+            for histogram in (self._total_times, self._fuzzy_times, self._ann_times,
+                              self._fuzzy_scores, self._hybrid_scores, self._confidences):
+                histogram.clear()
+            self._strategies.clear()
             self._start_time = time.time()
     
-    @staticmethod
-    def _percentile(data: List[float], percentile: int) -> float:
-        """Calculate percentile from list of values."""
-        if not data:
-            return 0.0
-        sorted_data = sorted(data)
-        index = int((percentile / 100) * len(sorted_data))
-        return sorted_data[min(index, len(sorted_data) - 1)]
-    
     @staticmethod
     def _get_empty_summary() -> Dict:
         """Get empty summary template."""
@@ -160,7 +138,7 @@ class MetricsCollector:
             "request_count": 0,
             "uptime_seconds": 0,
             "performance": {
-                "total_latency_ms": {"avg": 0, "min": 0, "max": 0, "p95": 0, "p99": 0},
+                "total_latency_ms": {"avg": 0, "min": 0, "max": 0, "p50": 0, "p95": 0, "p99": 0},
                 "fuzzy_latency_ms": {"avg": 0, "min": 0, "max": 0},
                 "ann_latency_ms": {"avg": 0, "min": 0, "max": 0, "calls": 0}
             },
@@ -0,0 +1,223 @@
+"""
+Cursor Pagination
+=================
+
+Opaque cursor tokens for keyset pagination of catalog browsing and
+server-side ranked recommendation lists.
+
+Features:
+- URL-safe cursor tokens encoding the last sort key and movie id
+- Filter fingerprints so a cursor cannot be replayed against other filters
+- Ranked result sessions (int32 ids, TTL, memory-capped LRU) so "load more"
+  slices a stored ranking instead of rescoring
+- Pinned sessions (no TTL, never evicted) for precomputed rankings
+- Deferred stores for rankings computed in worker processes
+"""
+
+import base64
+import hashlib
+import json
+import logging
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Dict, Optional, Sequence, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+class CursorError(ValueError):
+    """Raised when a cursor token is malformed or does not match the request."""
+
+
+def encode_cursor(payload: Dict[str, Any]) -> str:
+    """Encode a cursor payload as an opaque URL-safe token."""
+    raw = json.dumps(payload, separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+
+def decode_cursor(token: str) -> Dict[str, Any]:
+    """Decode a cursor token produced by encode_cursor."""
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+    except Exception as exc:
+        raise CursorError(f"Malformed cursor: {exc}")
+    if not isinstance(payload, dict):
+        raise CursorError("Malformed cursor")
+    return payload
+
+
+def filter_fingerprint(filters: Dict[str, Any]) -> str:
+    """Short stable fingerprint of a filter set."""
+    canonical = json.dumps(sorted((k, v) for k, v in filters.items() if v is not None), default=str)
+    return hashlib.blake2b(canonical.encode('utf-8'), digest_size=6).hexdigest()
+
+
+@dataclass
+class RankedSession:
+    """A stored ranking: movie ids in rank order plus their score columns."""
+    ids: np.ndarray
+    scores: np.ndarray
+    context: Dict[str, Any] = field(default_factory=dict)
+    expires_at: float = 0.0
+
+    def __len__(self) -> int:
+        return int(self.ids.size)
+
+    @property
+    def nbytes(self) -> int:
+        # Arrays plus a rough allowance for the context dict and bookkeeping
+        return int(self.ids.nbytes + self.scores.nbytes) + 512
+
+    def page(self, offset: int, limit: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Ids and score rows for one page of the ranking."""
+        return self.ids[offset:offset + limit], self.scores[offset:offset + limit]
+
+
+class RankedResultStore:
+    """
+    Server-side store of ranked recommendation lists addressed by handle.
+
+    Rankings are kept as compact int32 id / float32 score arrays. Sessions
+    expire after ``ttl_seconds`` and the least recently used ones are evicted
+    once the store exceeds ``max_bytes``. Pinned sessions are kept outside
+    the TTL/LRU budget until unpinned.
+    """
+
+    def __init__(self, max_bytes: int = 64 * 1024 * 1024, ttl_seconds: float = 900.0):
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self._sessions: "OrderedDict[str, RankedSession]" = OrderedDict()
+        self._pinned: Dict[str, RankedSession] = {}
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+        self.stats = {
+            'stored': 0,
+            'hits': 0,
+            'misses': 0,
+            'expired': 0,
+            'evicted': 0
+        }
+
+    def put(self, ids: Sequence[int], scores: Sequence[Sequence[float]],
+            context: Optional[Dict[str, Any]] = None, handle: Optional[str] = None) -> str:
+        """Store a ranking (ids in rank order, one score row per id) and return its handle (new unless given)."""
+        session = RankedSession(
+            ids=np.asarray(ids, dtype=np.int32),
+            scores=np.asarray(scores, dtype=np.float32).reshape(len(ids), -1),
+            context=context or {},
+            expires_at=time.monotonic() + self.ttl_seconds
+        )
+        handle = handle or uuid.uuid4().hex
+
+        with self._lock:
+            if handle in self._sessions:
+                self._remove_locked(handle)
+            self._sessions[handle] = session
+            self._bytes += session.nbytes
+            self.stats['stored'] += 1
+            self._evict_locked()
+        return handle
+
+    def get(self, handle: str) -> Optional[RankedSession]:
+        """Get a stored ranking, or None if it expired or was evicted."""
+        with self._lock:
+            session = self._pinned.get(handle)
+            if session is not None:
+                self.stats['hits'] += 1
+                return session
+            session = self._sessions.get(handle)
+            if session is None:
+                self.stats['misses'] += 1
+                return None
+            if session.expires_at <= time.monotonic():
+                self._remove_locked(handle)
+                self.stats['expired'] += 1
+                self.stats['misses'] += 1
+                return None
+            self._sessions.move_to_end(handle)
+            self.stats['hits'] += 1
+            return session
+
+    def pin(self, handle: str) -> bool:
+        """Keep a stored ranking until unpinned (no TTL, not counted against max_bytes)."""
+        with self._lock:
+            session = self._sessions.get(handle)
+            if session is None:
+                return handle in self._pinned
+            self._remove_locked(handle)
+            session.expires_at = float('inf')
+            self._pinned[handle] = session
+            return True
+
+    def unpin(self, handle: str) -> None:
+        """Drop a pinned ranking."""
+        with self._lock:
+            self._pinned.pop(handle, None)
+
+    def _remove_locked(self, handle: str) -> None:
+        session = self._sessions.pop(handle)
+        self._bytes -= session.nbytes
+
+    def _evict_locked(self) -> None:
+        # Expired sessions are dropped lazily from the LRU head (the rest on get or by the byte budget)
+        now = time.monotonic()
+        while len(self._sessions) > 1:
+            handle, session = next(iter(self._sessions.items()))
+            if session.expires_at > now:
+                break
+            self._remove_locked(handle)
+            self.stats['expired'] += 1
+
+        # Least recently used first, but never drop the session just stored
+        while self._bytes > self.max_bytes and len(self._sessions) > 1:
+            handle, session = next(iter(self._sessions.items()))
+            self._remove_locked(handle)
+            self.stats['expired' if session.expires_at <= now else 'evicted'] += 1
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                **self.stats,
+                'sessions': len(self._sessions),
+                'memory_bytes': self._bytes,
+                'pinned_sessions': len(self._pinned),
+                'pinned_bytes': sum(session.nbytes for session in self._pinned.values()),
+                'max_bytes': self.max_bytes,
+                'ttl_seconds': self.ttl_seconds
+            }
+
+    def clear(self) -> None:
+        with self._lock:
+            self._sessions.clear()
+            self._pinned.clear()
+            self._bytes = 0
+
+
+class DeferredRankingStore:
+    """
+    Stand-in for RankedResultStore where the real store lives in another process.
+
+    ``put`` hands out the handle immediately and records the ranking; the
+    owner of the real store installs ``rankings`` under the same handles.
+    """
+
+    def __init__(self):
+        self.rankings = []
+
+    def put(self, ids: Sequence[int], scores: Sequence[Sequence[float]],
+            context: Optional[Dict[str, Any]] = None) -> str:
+        handle = uuid.uuid4().hex
+        self.rankings.append((handle, np.asarray(ids, dtype=np.int32),
+                              np.asarray(scores, dtype=np.float32).reshape(len(ids), -1), context or {}))
+        return handle
+
+    def install(self, store: RankedResultStore) -> None:
+        for handle, ids, scores, context in self.rankings:
+            store.put(ids, scores, context, handle=handle)
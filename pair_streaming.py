@@ -0,0 +1,222 @@
+"""
+Pair Streaming
+==============
+
+Scoring of (user, movie) pairs over one streaming HTTP exchange: NDJSON
+pair lines are read from the request body as they arrive, scored in
+fixed-size vectorized chunks, and the results are written back as NDJSON
+while the upload continues, so millions of pairs need neither a huge
+request body nor a huge response body.
+
+Features:
+- Request body parsed line by line; the server holds at most one chunk of
+  lines (pairs and error lines alike), one partial line and one chunk of
+  output
+- Flow control end to end: the next piece of the body is only read after
+  the previous chunk's results were handed to the server, which waits for
+  the client to read them, so a client that stops reading its results
+  stalls its own upload (TCP backpressure) instead of filling memory
+- Bad lines get an error line (with their line number) and the stream
+  goes on; a failed chunk gets an error line per pair
+- A summary line (pairs, errors, chunks, pairs per second) ends the stream
+- Client disconnect stops scoring
+- Streams, pairs and pairs per second overall and per stream
+
+The response drives ``receive`` itself: a StreamingResponse would listen
+for the disconnect on the same channel and swallow the body.
+"""
+
+import json
+import logging
+import threading
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from starlette.responses import Response
+
+from streaming_stats import StreamingHistogram
+
+logger = logging.getLogger(__name__)
+
+NDJSON_MEDIA_TYPE = 'application/x-ndjson'
+
+
+class PairStreamError(ValueError):
+    """A pair line that cannot be scored; the message goes back on the line's error line."""
+
+
+class NDJSONPairStreamResponse(Response):
+    """
+    ASGI response that scores the request body's NDJSON pair lines as it streams them.
+
+    ``parse_pair(obj)`` turns one decoded line into a pair (raising
+    PairStreamError, ValueError, TypeError or KeyError for a bad line);
+    ``score_chunk(pairs)`` scores up to ``chunk_size`` pairs off the event
+    loop and returns one result dict per pair; ``on_finish(summary)`` gets
+    the summary once the stream ends.
+    """
+
+    media_type = NDJSON_MEDIA_TYPE
+
+    def __init__(self, parse_pair: Callable[[Dict[str, Any]], Any],
+                 score_chunk: Callable[[List[Any]], Awaitable[List[Dict[str, Any]]]],
+                 chunk_size: int = 512, max_line_bytes: int = 65536,
+                 on_finish: Optional[Callable[[Dict[str, Any]], None]] = None):
+        # No body attribute: headers without a Content-Length, like a StreamingResponse
+        self.status_code = 200
+        self.background = None
+        self.init_headers()
+        self.parse_pair = parse_pair
+        self.score_chunk = score_chunk
+        self.chunk_size = max(1, chunk_size)
+        self.max_line_bytes = max_line_bytes
+        self.on_finish = on_finish
+
+        self.lines = 0
+        self.pairs = 0
+        self.errors = 0
+        self.chunks = 0
+        self.disconnected = False
+        self._pending: List[Tuple[int, Any, Optional[Dict[str, Any]]]] = []  # (line number, pair, error line)
+
+    def _parse_line(self, line: bytes) -> None:
+        self.lines += 1
+        line = line.strip()
+        if not line:
+            return
+        obj = None
+        try:
+            obj = json.loads(line)
+            if not isinstance(obj, dict):
+                raise PairStreamError("expected a JSON object")
+            self._pending.append((self.lines, self.parse_pair(obj), None))
+        except (PairStreamError, ValueError, TypeError, KeyError) as e:
+            error = {'id': obj.get('id')} if isinstance(obj, dict) else {}
+            error['error'] = str(e) or e.__class__.__name__
+            self._pending.append((self.lines, None, error))
+
+    def _too_long(self) -> None:
+        self.lines += 1
+        self._pending.append((self.lines, None, {'error': f"line longer than {self.max_line_bytes} bytes"}))
+
+    async def _flush(self, send) -> None:
+        """Score the pending pairs and send their result lines, in input order."""
+        if not self._pending:
+            return
+        pending, self._pending = self._pending, []
+        pairs = [pair for _, pair, error in pending if error is None]
+        results: List[Optional[Dict[str, Any]]] = []
+        failure = None
+        if pairs:
+            try:
+                results = list(await self.score_chunk(pairs))
+                self.chunks += 1
+            except Exception as e:
+                logger.warning(f"⚠️ Pair chunk failed: {e}")
+                failure = {'error': f"scoring failed: {e}"}
+
+        out = []
+        scored = iter(results)
+        for line, _, error in pending:
+            if error is None and failure is None:
+                out.append({'line': line, **next(scored)})
+                self.pairs += 1
+            else:
+                out.append({'line': line, **(error or failure)})
+                self.errors += 1
+        await send({'type': 'http.response.body',
+                    'body': ''.join(json.dumps(item) + '\n' for item in out).encode(), 'more_body': True})
+
+    async def __call__(self, scope, receive, send) -> None:
+        start = time.perf_counter()
+        await send({'type': 'http.response.start', 'status': 200, 'headers': self.raw_headers})
+
+        buffer = bytearray()
+        skipping = False  # Inside a line longer than max_line_bytes
+        more_body = True
+        while more_body:
+            message = await receive()
+            if message['type'] == 'http.disconnect':
+                self.disconnected = True
+                break
+            buffer += message.get('body', b'')
+            more_body = message.get('more_body', False)
+
+            while True:
+                end = buffer.find(b'\n')
+                if end < 0:
+                    break
+                if skipping:
+                    skipping = False
+                elif end > self.max_line_bytes:
+                    self._too_long()
+                else:
+                    self._parse_line(bytes(buffer[:end]))
+                del buffer[:end + 1]
+                if len(self._pending) >= self.chunk_size:  # Error lines count too: a bad upload stays bounded
+                    await self._flush(send)
+
+            if len(buffer) > self.max_line_bytes and not skipping:
+                self._too_long()
+                skipping = True
+            if skipping:
+                buffer.clear()
+
+        if not self.disconnected:
+            if buffer and not skipping:
+                self._parse_line(bytes(buffer))  # Last line without a newline
+            await self._flush(send)
+
+        elapsed = time.perf_counter() - start
+        summary = {
+            'lines': self.lines,
+            'pairs': self.pairs,
+            'errors': self.errors,
+            'chunks': self.chunks,
+            'chunk_size': self.chunk_size,
+            'elapsed_ms': round(elapsed * 1000, 2),
+            'pairs_per_second': round(self.pairs / elapsed, 1) if elapsed > 0 else None,
+            'disconnected': self.disconnected
+        }
+        if self.on_finish is not None:
+            self.on_finish(summary)
+        if self.disconnected:
+            logger.info(f"🔌 Pair stream client disconnected after {self.pairs:,} pairs")
+            return
+        await send({'type': 'http.response.body', 'body': (json.dumps({'summary': summary}) + '\n').encode(),
+                    'more_body': False})
+
+
+class PairStreamStats:
+    """Finished pair streams, their pairs and their rate."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.streams = 0
+        self.disconnected = 0
+        self.pairs = 0
+        self.errors = 0
+        self.seconds = 0.0
+        self.pairs_per_second = StreamingHistogram()
+
+    def record(self, summary: Dict[str, Any]) -> None:
+        """Record the summary of one finished stream."""
+        with self._lock:
+            self.streams += 1
+            self.disconnected += int(summary['disconnected'])
+            self.pairs += summary['pairs']
+            self.errors += summary['errors']
+            self.seconds += summary['elapsed_ms'] / 1000
+            if summary['pairs_per_second'] is not None:
+                self.pairs_per_second.record(summary['pairs_per_second'])
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                'streams': self.streams,
+                'disconnected': self.disconnected,
+                'pairs': self.pairs,
+                'errors': self.errors,
+                'overall_pairs_per_second': round(self.pairs / self.seconds, 1) if self.seconds else None,
+                'pairs_per_second': {k: round(v, 1) for k, v in self.pairs_per_second.summary((50, 95)).items()}
+            }
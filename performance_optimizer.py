@@ -14,197 +14,184 @@ Features:
 """
 
 import time
-import hashlib
-import json
 import asyncio
+import threading
 from typing import Dict, List, Optional, Tuple, Any
 import numpy as np
 from functools import lru_cache
 from collections import defaultdict
 import logging
 
+from cache_keys import recommendation_key, request_key
+from models.feature_compiler import FeatureCompiler
+from memory_cache import LRUCache
+from shared_cache import tiered
+from streaming_stats import StreamingHistogram
+
 # Set up logging
 logger = logging.getLogger(__name__)
 
 class PerformanceCache:
     """In-memory cache for recommendation results."""
     
-    def __init__(self, max_size: int = 1000, ttl_seconds: int = 3600):
+    NAMESPACE = 'predictions'
+    
+    def __init__(self, max_size: int = 1000, ttl_seconds: int = 3600, max_bytes: Optional[int] = 64 * 1024 * 1024,
+                 shared_backend=None):
         self.max_size = max_size
         self.ttl_seconds = ttl_seconds
-        self.cache = {}
-        self.timestamps = {}
-        self.hit_count = 0
-        self.miss_count = 0
+        self.max_bytes = max_bytes
+        # In-process LRU, backed by the cross-worker tier when one is configured
+        self.cache = tiered(LRUCache(max_entries=max_size, max_bytes=max_bytes, ttl_seconds=ttl_seconds), shared_backend)
     
-    def _generate_key(self, user_preferences: Dict, movie: Dict, watch_history: Optional[Dict] = None) -> str:
-        """Generate a unique cache key for the recommendation request."""
-        # Create a hashable representation
-        key_data = {
-            'prefs': sorted(user_preferences.items()) if user_preferences else [],
-            'movie': (movie.get('title', ''), tuple(sorted(movie.get('genres', [])))),
-            'history': tuple(sorted(watch_history.items())) if watch_history else ()
-        }
-        
-        key_string = json.dumps(key_data, sort_keys=True)
-        return hashlib.md5(key_string.encode()).hexdigest()
+    def request_key(self, user_preferences: Dict, watch_history: Optional[Dict] = None,
+                    strategy: str = 'adaptive') -> bytes:
+        """Key prefix for a request; build once and reuse for every movie of a batch."""
+        return request_key(user_preferences, watch_history, strategy)
     
-    def get(self, user_preferences: Dict, movie: Dict, watch_history: Optional[Dict] = None) -> Optional[Dict]:
-        """Get cached recommendation result."""
-        key = self._generate_key(user_preferences, movie, watch_history)
-        
-        if key in self.cache:
-            # Check if cache entry is still valid
-            if time.time() - self.timestamps[key] < self.ttl_seconds:
-                self.hit_count += 1
-                return self.cache[key]
-            else:
-                # Remove expired entry
-                del self.cache[key]
-                del self.timestamps[key]
-        
-        self.miss_count += 1
-        return None
+    @property
+    def hit_count(self) -> int:
+        return self.cache.namespace_stats(self.NAMESPACE)['hits']
     
-    def put(self, user_preferences: Dict, movie: Dict, result: Dict, watch_history: Optional[Dict] = None):
-        """Store recommendation result in cache."""
-        key = self._generate_key(user_preferences, movie, watch_history)
-        
-        # Remove oldest entries if cache is full
-        if len(self.cache) >= self.max_size:
-            oldest_key = min(self.timestamps.keys(), key=lambda k: self.timestamps[k])
-            del self.cache[oldest_key]
-            del self.timestamps[oldest_key]
-        
-        self.cache[key] = result
-        self.timestamps[key] = time.time()
+    @property
+    def miss_count(self) -> int:
+        return self.cache.namespace_stats(self.NAMESPACE)['misses']
+    
+    def get(self, user_preferences: Dict, movie: Dict, watch_history: Optional[Dict] = None,
+            strategy: str = 'adaptive', prefix: Optional[bytes] = None) -> Optional[Dict]:
+        """Get cached recommendation result (expired entries count as misses)."""
+        if prefix is None:
+            prefix = self.request_key(user_preferences, watch_history, strategy)
+        return self.cache.get(recommendation_key(prefix, movie), self.NAMESPACE)
+    
+    def put(self, user_preferences: Dict, movie: Dict, result: Dict, watch_history: Optional[Dict] = None,
+            strategy: str = 'adaptive', prefix: Optional[bytes] = None):
+        """Store recommendation result in cache, evicting least recently used entries."""
+        if prefix is None:
+            prefix = self.request_key(user_preferences, watch_history, strategy)
+        self.cache.put(recommendation_key(prefix, movie), result, self.NAMESPACE)
+    
+    def get_many(self, keys: List[Tuple]) -> Dict[Tuple, Dict]:
+        """Multi-get by ``recommendation_key`` keys; the result only holds the hits."""
+        return self.cache.get_many(keys, self.NAMESPACE)
+    
+    def put_many(self, items: List[Tuple[Tuple, Dict]]):
+        """Store several (``recommendation_key``, result) pairs at once."""
+        self.cache.put_many(items, self.NAMESPACE)
     
     def get_stats(self) -> Dict:
         """Get cache performance statistics."""
-        total_requests = self.hit_count + self.miss_count
-        hit_rate = (self.hit_count / total_requests) * 100 if total_requests > 0 else 0
+        stats = self.cache.namespace_stats(self.NAMESPACE)
         
-        return {
-            'size': len(self.cache),
+        result = {
+            'size': stats['entries'],
             'max_size': self.max_size,
-            'hit_count': self.hit_count,
-            'miss_count': self.miss_count,
-            'hit_rate': round(hit_rate, 2),
+            'memory_bytes': stats['bytes'],
+            'max_bytes': self.max_bytes,
+            'hit_count': stats['hits'],
+            'miss_count': stats['misses'],
+            'eviction_count': stats['evictions'],
+            'expired_count': stats['expirations'],
+            'hit_rate': stats['hit_rate'],
             'ttl_seconds': self.ttl_seconds
         }
+        shared = self.cache.get_stats().get('shared')
+        if shared:
+            result['shared'] = shared
+        return result
     
     def clear(self):
         """Clear all cache entries."""
         self.cache.clear()
-        self.timestamps.clear()
-        self.hit_count = 0
-        self.miss_count = 0
 
 class BatchPreprocessor:
     """Optimized batch preprocessing for multiple movie recommendations."""
     
     def __init__(self):
         self.genres = ['action', 'comedy', 'romance', 'thriller', 'sci_fi', 'drama', 'horror']
+        # Same feature order and normalization as ANNMoviePredictor
+        self.feature_names = (
+            [f'{genre}_pref' for genre in self.genres] +
+            [f'genre_{genre}' for genre in self.genres] +
+            ['popularity', 'year_norm', 'liked_ratio', 'disliked_ratio', 'watch_count_norm']
+        )
+        self.compiler = FeatureCompiler(self.feature_names, genre_matcher='exact')
     
     def prepare_batch_features(self, user_preferences: Dict, movies: List[Dict], 
-                              watch_history: Optional[Dict] = None) -> np.ndarray:
-        """Prepare features for batch ANN prediction."""
-        batch_features = []
-        
-        for movie in movies:
-            features = self._prepare_single_features(user_preferences, movie, watch_history)
-            batch_features.append(features)
-        
-        return np.array(batch_features)
+                              watch_history: Optional[Dict] = None,
+                              out: Optional[np.ndarray] = None) -> np.ndarray:
+        """Prepare features for batch ANN prediction (optionally into a preallocated float32 buffer)."""
+        return self.compiler.transform(user_preferences, movies, watch_history, out=out)
     
     def _prepare_single_features(self, user_preferences: Dict, movie: Dict, 
                                 watch_history: Optional[Dict] = None) -> List[float]:
-        """Prepare features for a single movie (optimized version)."""
-        features = []
-        
-        # User preferences (7 features) - pre-sorted for consistency
-        for genre in self.genres:
-            features.append(user_preferences.get(genre, 5.0))
-        
-        # Movie genres (7 features) - optimized lookup
-        movie_genres = set(g.lower().replace(' ', '_') for g in movie.get('genres', []))
-        for genre in self.genres:
-            features.append(1.0 if genre in movie_genres else 0.0)
-        
-        # Other features (5 features)
-        features.extend([
-            movie.get('popularity', 50) / 100,
-            (movie.get('year', 2000) - 1900) / 130,
-            min(1.0, np.log10(watch_history.get('watch_count', 1) + 1) / 2) if watch_history else 0.1,
-            watch_history.get('liked_ratio', 0.5) if watch_history else 0.5,
-            watch_history.get('disliked_ratio', 0.3) if watch_history else 0.3
-        ])
-        
-        return features
+        """Prepare features for a single movie."""
+        return self.compiler.transform(user_preferences, [movie], watch_history)[0].tolist()
 
 class PerformanceMonitor:
-    """Monitor and track system performance metrics."""
+    """Monitor and track system performance metrics (streaming, constant memory)."""
     
     def __init__(self):
-        self.request_times = []
-        self.fuzzy_times = []
-        self.ann_times = []
+        self.request_times = StreamingHistogram()
+        self.fuzzy_times = StreamingHistogram()
+        self.ann_times = StreamingHistogram()
         self.total_requests = 0
         self.error_count = 0
         self.start_time = time.time()
+        self._lock = threading.Lock()
     
     def record_request(self, total_time: float, fuzzy_time: float = 0, 
                       ann_time: float = 0, error: bool = False):
         """Record performance metrics for a request."""
-        self.total_requests += 1
-        
-        if error:
-            self.error_count += 1
-            return
-        
-        self.request_times.append(total_time)
-        self.fuzzy_times.append(fuzzy_time)
-        self.ann_times.append(ann_time)
-        
-        # Keep only last 1000 entries to prevent memory issues
-        if len(self.request_times) > 1000:
-            self.request_times = self.request_times[-1000:]
-            self.fuzzy_times = self.fuzzy_times[-1000:]
-            self.ann_times = self.ann_times[-1000:]
+        with self._lock:
+            self.total_requests += 1
+            
+            if error:
+                self.error_count += 1
+                return
+            
+            self.request_times.record(total_time)
+            self.fuzzy_times.record(fuzzy_time)
+            self.ann_times.record(ann_time)
     
     def get_stats(self) -> Dict:
         """Get comprehensive performance statistics."""
-        if not self.request_times:
+        uptime = time.time() - self.start_time
+        with self._lock:
+            if not self.request_times.count:
+                return {
+                    'avg_response_time': 0,
+                    'min_response_time': 0,
+                    'max_response_time': 0,
+                    'total_requests': self.total_requests,
+                    'error_rate': 0,
+                    'uptime_hours': round(uptime / 3600, 2)
+                }
+            
+            p50, p95, p99 = self.request_times.quantiles((50, 95, 99))
             return {
-                'avg_response_time': 0,
-                'min_response_time': 0,
-                'max_response_time': 0,
+                'avg_response_time': round(self.request_times.mean, 2),
+                'min_response_time': round(self.request_times.min, 2),
+                'max_response_time': round(self.request_times.max, 2),
+                'p50_response_time': round(p50, 2),
+                'p95_response_time': round(p95, 2),
+                'p99_response_time': round(p99, 2),
+                'avg_fuzzy_time': round(self.fuzzy_times.mean, 2),
+                'avg_ann_time': round(self.ann_times.mean, 2),
                 'total_requests': self.total_requests,
-                'error_rate': 0,
-                'uptime_hours': round((time.time() - self.start_time) / 3600, 2)
+                'successful_requests': self.request_times.count,
+                'error_count': self.error_count,
+                'error_rate': round((self.error_count / self.total_requests) * 100, 2) if self.total_requests > 0 else 0,
+                'uptime_hours': round(uptime / 3600, 2),
+                'requests_per_minute': round(self.total_requests / (uptime / 60), 2) if uptime > 0 else 0
             }
-        
-        return {
-            'avg_response_time': round(np.mean(self.request_times), 2),
-            'min_response_time': round(np.min(self.request_times), 2),
-            'max_response_time': round(np.max(self.request_times), 2),
-            'p95_response_time': round(np.percentile(self.request_times, 95), 2),
-            'avg_fuzzy_time': round(np.mean(self.fuzzy_times), 2) if self.fuzzy_times else 0,
-            'avg_ann_time': round(np.mean(self.ann_times), 2) if self.ann_times else 0,
-            'total_requests': self.total_requests,
-            'successful_requests': len(self.request_times),
-            'error_count': self.error_count,
-            'error_rate': round((self.error_count / self.total_requests) * 100, 2) if self.total_requests > 0 else 0,
-            'uptime_hours': round((time.time() - self.start_time) / 3600, 2),
-            'requests_per_minute': round((self.total_requests / ((time.time() - self.start_time) / 60)), 2) if (time.time() - self.start_time) > 0 else 0
-        }
 
 class OptimizedHybridSystem:
     """Performance-optimized version of the hybrid recommendation system."""
     
-    def __init__(self, hybrid_system, cache_size: int = 1000, cache_ttl: int = 3600):
+    def __init__(self, hybrid_system, cache_size: int = 1000, cache_ttl: int = 3600, shared_backend=None):
         self.hybrid_system = hybrid_system
-        self.cache = PerformanceCache(cache_size, cache_ttl)
+        self.cache = PerformanceCache(cache_size, cache_ttl, shared_backend=shared_backend)
         self.batch_processor = BatchPreprocessor()
         self.monitor = PerformanceMonitor()
         
@@ -216,6 +203,10 @@ class OptimizedHybridSystem:
             'ann_dominant': self._ann_dominant_strategy
         }
     
+    def _cacheable(self) -> bool:
+        """Fuzzy-only results scored while the ANN is still loading are served but not cached."""
+        return not getattr(self.hybrid_system, 'ann_pending', False)
+    
     def get_recommendation(self, user_preferences: Dict, movie: Dict, 
                           watch_history: Optional[Dict] = None, 
                           strategy: str = 'adaptive') -> Dict:
@@ -224,12 +215,12 @@ class OptimizedHybridSystem:
         
         try:
             # Check cache first
-            cached_result = self.cache.get(user_preferences, movie, watch_history)
+            prefix = self.cache.request_key(user_preferences, watch_history, strategy)
+            cached_result = self.cache.get(user_preferences, movie, prefix=prefix)
             if cached_result is not None:
-                cached_result['from_cache'] = True
-                cached_result['processing_time_ms'] = round((time.time() - start_time) * 1000, 2)
                 self.monitor.record_request(time.time() - start_time)
-                return cached_result
+                return dict(cached_result, from_cache=True,
+                            processing_time_ms=round((time.time() - start_time) * 1000, 2))
             
             # Get fresh recommendation
             result = self._get_fresh_recommendation(
@@ -237,9 +228,10 @@ class OptimizedHybridSystem:
             )
             
             # Cache the result
-            cache_result = result.copy()
-            cache_result.pop('processing_time_ms', None)  # Don't cache timing info
-            self.cache.put(user_preferences, movie, cache_result, watch_history)
+            if self._cacheable():
+                cache_result = result.copy()
+                cache_result.pop('processing_time_ms', None)  # Don't cache timing info
+                self.cache.put(user_preferences, movie, cache_result, prefix=prefix)
             
             # Record performance
             total_time = time.time() - start_time
@@ -261,47 +253,36 @@ class OptimizedHybridSystem:
         start_time = time.time()
         
         try:
-            # Check cache for each movie
-            results = []
-            uncached_movies = []
-            uncached_indices = []
-            
-            for i, movie in enumerate(movies):
-                cached_result = self.cache.get(user_preferences, movie, watch_history)
-                if cached_result is not None:
-                    cached_result['from_cache'] = True
-                    results.append(cached_result)
-                else:
-                    results.append(None)  # Placeholder
-                    uncached_movies.append(movie)
-                    uncached_indices.append(i)
+            # One multi-get for the whole batch (request key built once)
+            prefix = self.cache.request_key(user_preferences, watch_history, strategy)
+            keys = [recommendation_key(prefix, movie) for movie in movies]
+            cached = self.cache.get_many(keys)
             
-            # Process uncached movies in batch
-            if uncached_movies:
+            # Score all misses (each distinct movie once) in one batch call
+            uncached = {}
+            for key, movie in zip(keys, movies):
+                if key not in cached and key not in uncached:
+                    uncached[key] = movie
+            fresh = {}
+            if uncached:
                 batch_results = self._get_batch_fresh_recommendations(
-                    user_preferences, uncached_movies, watch_history, strategy
+                    user_preferences, list(uncached.values()), watch_history, strategy
                 )
-                
-                # Fill in results and cache them
-                for idx, result in zip(uncached_indices, batch_results):
-                    results[idx] = result
-                    result['from_cache'] = False
-                    
-                    # Cache the result
-                    cache_result = result.copy()
-                    cache_result.pop('processing_time_ms', None)
-                    self.cache.put(user_preferences, uncached_movies[uncached_indices.index(idx)], 
-                                 cache_result, watch_history)
+                fresh = dict(zip(uncached, batch_results))
+                if self._cacheable():
+                    self.cache.put_many(list(fresh.items()))
             
-            # Add timing info
-            total_time = time.time() - start_time
-            for result in results:
-                if result:
-                    result['batch_processing_time_ms'] = round(total_time * 1000, 2)
+            # Return copies so cached entries are never mutated
+            total_ms = round((time.time() - start_time) * 1000, 2)
+            results = [
+                dict(cached[key], from_cache=True, batch_processing_time_ms=total_ms) if key in cached
+                else dict(fresh[key], from_cache=False, batch_processing_time_ms=total_ms)
+                for key in keys
+            ]
             
-            self.monitor.record_request(total_time)
+            self.monitor.record_request(time.time() - start_time)
             
-            return [r for r in results if r is not None]
+            return results
             
         except Exception as e:
             self.monitor.record_request(time.time() - start_time, error=True)
@@ -310,17 +291,29 @@ class OptimizedHybridSystem:
     def _get_fresh_recommendation(self, user_preferences: Dict, movie: Dict, 
                                  watch_history: Optional[Dict], strategy: str) -> Dict:
         """Get a fresh recommendation (not from cache)."""
-        return self.hybrid_system.recommend(user_preferences, movie, watch_history, strategy)
+        result = self.hybrid_system.recommend(user_preferences, movie, watch_history, strategy)
+        return self._add_response_fields(result, movie, strategy)
     
     def _get_batch_fresh_recommendations(self, user_preferences: Dict, movies: List[Dict], 
                                         watch_history: Optional[Dict], strategy: str) -> List[Dict]:
-        """Get batch fresh recommendations with optimized processing."""
-        # For now, use the existing method but could be further optimized with batch ANN prediction
-        results = []
-        for movie in movies:
-            result = self.hybrid_system.recommend(user_preferences, movie, watch_history, strategy)
-            results.append(result)
-        return results
+        """Score several movies with one vectorized fuzzy pass and one ANN predict call."""
+        recommend_many = getattr(self.hybrid_system, 'recommend_many', None)
+        if recommend_many is not None:
+            results = recommend_many(user_preferences, movies, watch_history, strategy)
+        else:
+            results = [self.hybrid_system.recommend(user_preferences, movie, watch_history, strategy)
+                       for movie in movies]
+        return [self._add_response_fields(result, movie, strategy) for result, movie in zip(results, movies)]
+    
+    def _add_response_fields(self, result: Dict, movie: Dict, strategy: str) -> Dict:
+        """Fields the API responses read besides the raw scores."""
+        ann_score = result.get('ann_score')
+        result['movie_title'] = movie.get('title', 'Unknown')
+        result['strategy'] = strategy
+        result['ann_score'] = ann_score
+        result['agreement'] = (round(1 - abs(result['fuzzy_score'] - ann_score) / 10, 3)
+                               if ann_score is not None else None)
+        return result
     
     def _adaptive_strategy(self, fuzzy_score: float, ann_score: float, 
                           watch_history: Optional[Dict]) -> float:
@@ -369,10 +362,10 @@ class OptimizedHybridSystem:
 # Global instance for use in API
 optimized_system = None
 
-def initialize_optimized_system(hybrid_system, cache_size: int = 1000, cache_ttl: int = 3600):
+def initialize_optimized_system(hybrid_system, cache_size: int = 1000, cache_ttl: int = 3600, shared_backend=None):
     """Initialize the global optimized system."""
     global optimized_system
-    optimized_system = OptimizedHybridSystem(hybrid_system, cache_size, cache_ttl)
+    optimized_system = OptimizedHybridSystem(hybrid_system, cache_size, cache_ttl, shared_backend)
     logger.info(f"✅ Performance optimization initialized (cache: {cache_size}, ttl: {cache_ttl}s)")
     return optimized_system
 
@@ -0,0 +1,147 @@
+"""
+Precomputed Profiles
+====================
+
+Warm responses for the preference profiles most traffic sends: the neutral
+profile (every slider at its default) and single-genre "high" profiles
+(one genre raised, every other slider neutral).
+
+Features:
+- Profiles enumerated over the 19 UserPreferences genres
+- Responses stored under the same keys live requests are looked up by
+- Each set is tagged with the catalog version it was scored against and
+  replaced as a whole; a lookup for another version misses
+- Built on a background thread; requests fall through to live scoring
+  until the set is ready
+"""
+
+import logging
+import threading
+import time
+from typing import Any, Callable, Dict, Hashable, Iterable, List, Optional, Sequence, Tuple
+
+from cache_keys import DEFAULT_PREFERENCE, PREFERENCE_FIELDS
+
+logger = logging.getLogger(__name__)
+
+# Slider values treated as "high" (the enhanced pipeline's top-genre threshold is 7)
+DEFAULT_HIGH_VALUES = (7.0, 8.0, 9.0, 10.0)
+
+
+def profile_preferences(high_values: Sequence[float] = DEFAULT_HIGH_VALUES,
+                        genres: Sequence[str] = PREFERENCE_FIELDS) -> List[Tuple[str, Dict[str, float]]]:
+    """
+    (name, preferences) for the neutral profile and every single-genre-high profile.
+
+    Preferences only list the raised genre; everything else is left to the
+    request model's defaults.
+    """
+    profiles = [('neutral', {})]
+    for genre in genres:
+        for value in high_values:
+            if value == DEFAULT_PREFERENCE:
+                continue
+            prefs = {genre: float(value)}
+            if genre == 'sci_fi':
+                prefs['scifi'] = float(value)  # UserPreferences resolves sci_fi from its scifi alias
+            profiles.append((f"{genre}={value:g}", prefs))
+    return profiles
+
+
+class PrecomputedResponses:
+    """Responses for fixed request keys, valid for one catalog version."""
+
+    def __init__(self):
+        # (version, responses), swapped as one reference so readers never see a mixed set
+        self._current: Tuple[Optional[str], Dict[Hashable, Any]] = (None, {})
+        self._build_lock = threading.Lock()
+        self.stats = {
+            'hits': 0,
+            'misses': 0,
+            'builds': 0,
+            'build_errors': 0,
+            'last_build_ms': 0.0
+        }
+
+    @property
+    def version(self) -> Optional[str]:
+        return self._current[0]
+
+    def __len__(self) -> int:
+        return len(self._current[1])
+
+    def get(self, key: Hashable, version: str) -> Optional[Any]:
+        """The precomputed response for ``key``, or None if absent or built for another catalog version."""
+        current_version, responses = self._current
+        response = responses.get(key) if current_version == version else None
+        if response is None:
+            self.stats['misses'] += 1
+        else:
+            self.stats['hits'] += 1
+        return response
+
+    def build(self, version: str, jobs: Iterable[Tuple[Hashable, Callable[[], Any]]],
+              on_replace: Optional[Callable[[Dict[Hashable, Any]], None]] = None) -> int:
+        """
+        Run every job and install the results as the set for ``version``.
+
+        Jobs returning None (or raising) are left out, so those requests keep
+        going to live scoring. ``on_replace`` receives the replaced set, e.g.
+        to release resources its responses hold.
+
+        Returns:
+            Number of responses installed
+        """
+        with self._build_lock:
+            if self._current[0] == version:
+                return len(self._current[1])
+
+            start = time.time()
+            responses: Dict[Hashable, Any] = {}
+            for key, job in jobs:
+                try:
+                    response = job()
+                except Exception as e:
+                    logger.warning(f"⚠️ Precomputing response {key!r} failed: {e}")
+                    self.stats['build_errors'] += 1
+                    continue
+                if response is not None:
+                    responses[key] = response
+
+            replaced = self._current[1]
+            self._current = (version, responses)
+            self.stats['builds'] += 1
+            self.stats['last_build_ms'] = round((time.time() - start) * 1000, 2)
+
+        if on_replace is not None and replaced:
+            on_replace(replaced)
+        logger.info(f"✅ Precomputed {len(responses)} profile responses in {self.stats['last_build_ms']:.0f}ms "
+                    f"(catalog {version})")
+        return len(responses)
+
+    def build_in_background(self, version: str, jobs: Callable[[], Iterable[Tuple[Hashable, Callable[[], Any]]]],
+                            on_replace: Optional[Callable[[Dict[Hashable, Any]], None]] = None) -> threading.Thread:
+        """Run ``build`` on a daemon thread; ``jobs`` is called there to produce the job list."""
+        def run():
+            try:
+                self.build(version, jobs(), on_replace)
+            except Exception as e:
+                logger.error(f"❌ Precomputing profile responses failed: {e}")
+
+        thread = threading.Thread(target=run, name='precompute-profiles', daemon=True)
+        thread.start()
+        return thread
+
+    def clear(self) -> None:
+        with self._build_lock:
+            self._current = (None, {})
+
+    def get_stats(self) -> Dict[str, Any]:
+        version, responses = self._current
+        lookups = self.stats['hits'] + self.stats['misses']
+        return {
+            **self.stats,
+            'version': version,
+            'responses': len(responses),
+            'hit_rate': round(self.stats['hits'] / lookups * 100, 2) if lookups else 0
+        }
@@ -0,0 +1,411 @@
+"""
+Preference Grid
+===============
+
+Materialized top-K recommendations over a quantized preference grid.
+
+Only the 7 core genres drive the fuzzy rules and the ANN inputs (extended
+genres are blended into them at 30%), so a grid with a few levels per core
+genre covers the whole preference space: 3 levels give 2,187 cells,
+4 give 16,384 and 5 give 78,125.
+
+Features:
+- Offline build job, parallel across cells (multiprocessing), writing the
+  top-K movie ids and scores of every cell into memory-mapped .npy arrays
+- Constant-time serving: snap preferences to the nearest cell, slice its list
+- Optional exact re-rank of a cell's candidates for the actual preferences
+- Approximation error measured at build time (recall@k and score regret
+  against full catalog scoring) and per request (distance to the cell centre)
+- Tagged with the catalog version it was built from
+
+Usage:
+    python preference_grid.py build --levels 3 --top-k 100 --workers 8
+    python preference_grid.py info
+"""
+
+import argparse
+import json
+import logging
+import multiprocessing
+import os
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from models.feature_compiler import GENRE_MAPPING
+from scoring_inputs import prepare_enhanced_movie_info
+
+logger = logging.getLogger(__name__)
+
+# Grid axes, in the fuzzy engine's core genre order
+CORE_GENRES = ('action', 'comedy', 'romance', 'thriller', 'sci_fi', 'drama', 'horror')
+
+# Watch history the enhanced recommendation pipeline scores with
+DEFAULT_WATCH_HISTORY = {'liked_ratio': 0.6, 'disliked_ratio': 0.2, 'watch_count': 25}
+
+# Score columns stored per grid entry
+SCORE_COLUMNS = ('hybrid_score', 'fuzzy_score', 'ann_score')
+
+METADATA_FILE = 'grid.json'
+IDS_FILE = 'ids.npy'
+SCORES_FILE = 'scores.npy'
+
+DEFAULT_GRID_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'processed', 'preference_grid')
+
+
+def core_preferences(user_preferences: Dict[str, Any]) -> np.ndarray:
+    """Effective core-genre preferences: extended genres blended in at 30%, as the fuzzy rules see them."""
+    values = {}
+    for genre in CORE_GENRES:
+        value = user_preferences.get(genre)
+        if value is None and genre == 'sci_fi':
+            value = user_preferences.get('scifi')
+        values[genre] = 5.0 if value is None else float(value)
+    for extended_genre, core_genre in GENRE_MAPPING.items():
+        value = user_preferences.get(extended_genre)
+        if value is not None:
+            values[core_genre] = values[core_genre] * 0.7 + float(value) * 0.3
+    return np.clip(np.array([values[genre] for genre in CORE_GENRES]), 0.0, 10.0)
+
+
+def level_values(levels: int) -> np.ndarray:
+    """Preference value of each grid level (evenly spaced over 0-10)."""
+    return np.linspace(0.0, 10.0, levels)
+
+
+def nearest_levels(core_values: np.ndarray, levels: int) -> np.ndarray:
+    return np.rint(core_values / 10.0 * (levels - 1)).astype(np.int64)
+
+
+def cell_index(level_indices: np.ndarray, levels: int) -> int:
+    """Mixed-radix cell number of per-genre level indices (first genre varies fastest)."""
+    return int(np.dot(level_indices, levels ** np.arange(len(CORE_GENRES))))
+
+
+def cell_preferences(cell: int, levels: int) -> Dict[str, float]:
+    """Core-genre preferences at the centre of a cell."""
+    values = level_values(levels)
+    prefs = {}
+    for genre in CORE_GENRES:
+        cell, level = divmod(cell, levels)
+        prefs[genre] = float(values[level])
+    return prefs
+
+
+def top_k_rows(scores: np.ndarray, k: int) -> np.ndarray:
+    """Rows of the k highest scores, best first (ties broken by row)."""
+    k = min(k, scores.size)
+    rows = np.argpartition(-scores, k - 1)[:k] if k < scores.size else np.arange(scores.size)
+    return rows[np.lexsort((rows, -scores[rows]))]
+
+
+class CatalogScorer:
+    """Hybrid (or fuzzy-only) scores of many movies for one preference vector."""
+
+    def __init__(self, system):
+        self.system = system
+        self.name = 'hybrid' if hasattr(system, 'recommend_many') else 'fuzzy'
+
+    def score(self, user_preferences: Dict[str, float], movie_infos: Sequence[Dict[str, Any]],
+              watch_history: Optional[Dict[str, float]] = DEFAULT_WATCH_HISTORY) -> np.ndarray:
+        """(N, 3) array of hybrid / fuzzy / ANN scores (ANN is NaN when unavailable)."""
+        scores = np.full((len(movie_infos), len(SCORE_COLUMNS)), np.nan)
+        if not len(movie_infos):
+            return scores
+        if self.name == 'hybrid':
+            results = self.system.recommend_many(user_preferences, list(movie_infos), watch_history, 'adaptive')
+            for column, name in enumerate(SCORE_COLUMNS):
+                scores[:, column] = [result.get(name, np.nan) for result in results]
+        else:
+            fuzzy_scores = self.system.recommend_movies(user_preferences, list(movie_infos), watch_history)
+            scores[:, 0] = fuzzy_scores
+            scores[:, 1] = fuzzy_scores
+        return scores
+
+
+def create_scorer(kind: str = 'auto') -> CatalogScorer:
+    """Scorer over the hybrid system ('hybrid'), the fuzzy engine ('fuzzy'), or the best available ('auto')."""
+    if kind in ('auto', 'hybrid'):
+        try:
+            from models.hybrid_system import FinalHybridSystem
+            return CatalogScorer(FinalHybridSystem())
+        except Exception as e:
+            if kind == 'hybrid':
+                raise
+            logger.warning(f"⚠️ Hybrid system unavailable, building grid with fuzzy scores: {e}")
+    from models.fuzzy_model import FuzzyMovieRecommender
+    return CatalogScorer(FuzzyMovieRecommender())
+
+
+@dataclass
+class GridLookup:
+    """Nearest-cell result for one preference vector."""
+    cell: int
+    ids: np.ndarray
+    scores: np.ndarray
+    quantization_error: float  # Largest per-genre distance to the cell centre (0-10 scale)
+
+
+class PreferenceGrid:
+    """Memory-mapped top-K table over the preference grid (read-only serving side)."""
+
+    def __init__(self, path: str, ids: np.ndarray, scores: np.ndarray, metadata: Dict[str, Any]):
+        self.path = path
+        self.ids = ids
+        self.scores = scores
+        self.metadata = metadata
+        self.levels = int(metadata['levels'])
+        self.top_k = int(metadata['top_k'])
+        self._level_values = level_values(self.levels)
+        self.stats = {'lookups': 0}
+
+    @classmethod
+    def load(cls, path: str = DEFAULT_GRID_PATH, catalog_version: Optional[str] = None) -> 'PreferenceGrid':
+        """Open a built grid; raises ValueError if it was built for another catalog version."""
+        with open(os.path.join(path, METADATA_FILE), 'r') as f:
+            metadata = json.load(f)
+        if catalog_version is not None and metadata.get('catalog_version') != catalog_version:
+            raise ValueError(f"Preference grid was built for catalog {metadata.get('catalog_version')}, "
+                             f"current catalog is {catalog_version}")
+        ids = np.load(os.path.join(path, IDS_FILE), mmap_mode='r')
+        scores = np.load(os.path.join(path, SCORES_FILE), mmap_mode='r')
+        return cls(path, ids, scores, metadata)
+
+    @property
+    def n_cells(self) -> int:
+        return int(self.ids.shape[0])
+
+    def nearest_cell(self, user_preferences: Dict[str, Any]) -> Tuple[int, float]:
+        """(cell, quantization error) for a preference vector."""
+        core = core_preferences(user_preferences)
+        indices = nearest_levels(core, self.levels)
+        error = float(np.max(np.abs(core - self._level_values[indices])))
+        return cell_index(indices, self.levels), error
+
+    def lookup(self, user_preferences: Dict[str, Any], k: Optional[int] = None) -> GridLookup:
+        """The nearest cell's top-k ids and stored scores (at most top_k)."""
+        self.stats['lookups'] += 1
+        cell, error = self.nearest_cell(user_preferences)
+        k = self.top_k if k is None else min(k, self.top_k)
+        ids = np.asarray(self.ids[cell, :k])
+        scores = np.asarray(self.scores[cell, :k])
+        valid = ids >= 0
+        return GridLookup(cell=cell, ids=ids[valid], scores=scores[valid], quantization_error=round(error, 3))
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            **self.stats,
+            'path': self.path,
+            'levels': self.levels,
+            'cells': self.n_cells,
+            'top_k': self.top_k,
+            'scorer': self.metadata.get('scorer'),
+            'catalog_version': self.metadata.get('catalog_version'),
+            'approximation': self.metadata.get('approximation')
+        }
+
+
+# ----------------------------------------------------------------------
+# Offline build
+# ----------------------------------------------------------------------
+_worker: Dict[str, Any] = {}
+
+
+def _init_worker(movie_infos: List[Dict[str, Any]], catalog_ids: np.ndarray, path: str,
+                 levels: int, top_k: int, scorer_kind: str) -> None:
+    logging.getLogger().setLevel(logging.WARNING)
+    _worker.update(
+        movie_infos=movie_infos,
+        catalog_ids=catalog_ids,
+        ids=np.load(os.path.join(path, IDS_FILE), mmap_mode='r+'),
+        scores=np.load(os.path.join(path, SCORES_FILE), mmap_mode='r+'),
+        levels=levels,
+        top_k=top_k,
+        scorer=create_scorer(scorer_kind)
+    )
+
+
+def _build_cells(cells: range) -> Tuple[int, str]:
+    """Score the catalog for each cell centre and write its top-K into the shared arrays."""
+    scorer = _worker['scorer']
+    top_k = _worker['top_k']
+    for cell in cells:
+        scores = scorer.score(cell_preferences(cell, _worker['levels']), _worker['movie_infos'])
+        rows = top_k_rows(scores[:, 0], top_k)
+        _worker['ids'][cell, :rows.size] = _worker['catalog_ids'][rows]
+        _worker['scores'][cell, :rows.size] = scores[rows]
+    _worker['ids'].flush()
+    _worker['scores'].flush()
+    return len(cells), scorer.name
+
+
+def evaluate_grid(grid: PreferenceGrid, movie_infos: List[Dict[str, Any]], catalog_ids: np.ndarray,
+                  scorer: CatalogScorer, probes: int = 100, k: int = 10, seed: int = 0) -> Dict[str, Any]:
+    """
+    Approximation error of grid serving against full catalog scoring.
+
+    Draws random core-genre preference vectors and compares the exact top-k
+    with the nearest cell's list as stored and after an exact re-rank of the
+    cell's candidates.
+
+    Returns:
+        recall@k (mean and 10th percentile), mean/max score regret (exact
+        score of the ideal top-k minus that of the served top-k, averaged
+        over the k items) and the mean quantization error
+    """
+    rng = np.random.default_rng(seed)
+    row_of = {int(movie_id): row for row, movie_id in enumerate(catalog_ids.tolist())}
+    recall = {'cell': [], 'reranked': []}
+    regret = {'cell': [], 'reranked': []}
+    quantization = []
+
+    for _ in range(probes):
+        prefs = {genre: float(value) for genre, value in zip(CORE_GENRES, rng.uniform(0, 10, len(CORE_GENRES)))}
+        exact = scorer.score(prefs, movie_infos)[:, 0]
+        ideal = top_k_rows(exact, k)
+        ideal_score = float(exact[ideal].mean())
+
+        found = grid.lookup(prefs)
+        quantization.append(found.quantization_error)
+        candidates = np.array([row_of[movie_id] for movie_id in found.ids.tolist()], dtype=np.int64)
+        served = {
+            'cell': candidates[:k],
+            'reranked': candidates[top_k_rows(exact[candidates], k)]
+        }
+        for mode, rows in served.items():
+            recall[mode].append(len(set(rows.tolist()) & set(ideal.tolist())) / len(ideal))
+            regret[mode].append(ideal_score - float(exact[rows].mean()) if rows.size else ideal_score)
+
+    return {
+        'probes': probes,
+        'k': k,
+        **{f'recall_at_k_{mode}': round(float(np.mean(values)), 4) for mode, values in recall.items()},
+        **{f'recall_at_k_{mode}_p10': round(float(np.percentile(values, 10)), 4) for mode, values in recall.items()},
+        **{f'score_regret_{mode}': round(float(np.mean(values)), 4) for mode, values in regret.items()},
+        **{f'score_regret_{mode}_max': round(float(np.max(values)), 4) for mode, values in regret.items()},
+        'mean_quantization_error': round(float(np.mean(quantization)), 4)
+    }
+
+
+def build_grid(movies: List[Dict[str, Any]], path: str = DEFAULT_GRID_PATH, levels: int = 3, top_k: int = 100,
+               workers: Optional[int] = None, scorer_kind: str = 'auto', catalog_version: Optional[str] = None,
+               probes: int = 100, chunk_size: int = 16) -> Dict[str, Any]:
+    """
+    Materialize the top-K of every grid cell for a catalog.
+
+    Cells are scored in ``workers`` processes that write straight into the
+    memory-mapped output arrays; the metadata (including the measured
+    approximation error) is written last, so a partially built grid is never
+    loadable.
+
+    Returns:
+        The grid metadata
+    """
+    if levels < 2:
+        raise ValueError("A preference grid needs at least 2 levels per genre")
+    start = time.time()
+    n_cells = levels ** len(CORE_GENRES)
+    workers = max(1, workers or os.cpu_count() or 1)
+    os.makedirs(path, exist_ok=True)
+    metadata_path = os.path.join(path, METADATA_FILE)
+    if os.path.exists(metadata_path):
+        os.remove(metadata_path)
+
+    movie_infos = [prepare_enhanced_movie_info(movie) for movie in movies]
+    catalog_ids = np.array([int(movie.get('id', row)) for row, movie in enumerate(movies)], dtype=np.int32)
+
+    ids = np.lib.format.open_memmap(os.path.join(path, IDS_FILE), mode='w+', dtype=np.int32,
+                                    shape=(n_cells, top_k))
+    ids[:] = -1
+    scores = np.lib.format.open_memmap(os.path.join(path, SCORES_FILE), mode='w+', dtype=np.float32,
+                                       shape=(n_cells, top_k, len(SCORE_COLUMNS)))
+    scores[:] = np.nan
+    ids.flush()
+    scores.flush()
+    del ids, scores
+
+    logger.info(f"🔄 Building preference grid: {n_cells} cells x top-{top_k} over {len(movies)} movies, "
+                f"{workers} worker(s)")
+    chunks = [range(first, min(first + chunk_size, n_cells)) for first in range(0, n_cells, chunk_size)]
+    init_args = (movie_infos, catalog_ids, path, levels, top_k, scorer_kind)
+    done = 0
+    scorer_names = set()
+    if workers == 1:
+        _init_worker(*init_args)
+        results = map(_build_cells, chunks)
+    else:
+        pool = multiprocessing.Pool(workers, initializer=_init_worker, initargs=init_args)
+        results = pool.imap_unordered(_build_cells, chunks)
+    try:
+        for count, scorer_name in results:
+            done += count
+            scorer_names.add(scorer_name)
+            if done % max(1, n_cells // 10) < count:
+                logger.info(f"   {done}/{n_cells} cells ({time.time() - start:.0f}s)")
+    finally:
+        if workers > 1:
+            pool.close()
+            pool.join()
+        _worker.clear()
+
+    metadata = {
+        'levels': levels,
+        'level_values': level_values(levels).tolist(),
+        'genres': list(CORE_GENRES),
+        'cells': n_cells,
+        'top_k': top_k,
+        'score_columns': list(SCORE_COLUMNS),
+        'scorer': '/'.join(sorted(scorer_names)),
+        'watch_history': DEFAULT_WATCH_HISTORY,
+        'catalog_version': catalog_version,
+        'catalog_size': len(movies),
+        'built_at': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'build_seconds': round(time.time() - start, 1)
+    }
+
+    if probes:
+        grid = PreferenceGrid(path, np.load(os.path.join(path, IDS_FILE), mmap_mode='r'),
+                              np.load(os.path.join(path, SCORES_FILE), mmap_mode='r'), metadata)
+        metadata['approximation'] = evaluate_grid(grid, movie_infos, catalog_ids, create_scorer(scorer_kind),
+                                                  probes=probes, k=min(10, top_k))
+
+    with open(metadata_path, 'w') as f:
+        json.dump(metadata, f, indent=2)
+    logger.info(f"✅ Preference grid written to {path} in {time.time() - start:.0f}s "
+                f"(approximation: {metadata.get('approximation')})")
+    return metadata
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Build or inspect the materialized preference grid")
+    subcommands = parser.add_subparsers(dest='command', required=True)
+
+    build = subcommands.add_parser('build', help="Materialize top-K lists for every grid cell")
+    build.add_argument('--path', default=DEFAULT_GRID_PATH)
+    build.add_argument('--levels', type=int, default=3, help="Levels per core genre (cells = levels ** 7)")
+    build.add_argument('--top-k', type=int, default=100)
+    build.add_argument('--workers', type=int, default=None, help="Worker processes (default: CPU count)")
+    build.add_argument('--scorer', choices=('auto', 'hybrid', 'fuzzy'), default='auto')
+    build.add_argument('--probes', type=int, default=100, help="Random profiles used to measure the approximation error")
+
+    info = subcommands.add_parser('info', help="Show a built grid's metadata")
+    info.add_argument('--path', default=DEFAULT_GRID_PATH)
+
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO)
+
+    if args.command == 'info':
+        print(json.dumps(PreferenceGrid.load(args.path).metadata, indent=2))
+        return
+
+    from catalog_store import catalog_fingerprint
+    from fast_complete_loader import get_fast_complete_database
+    movies = get_fast_complete_database()
+    build_grid(movies, args.path, levels=args.levels, top_k=args.top_k, workers=args.workers,
+               scorer_kind=args.scorer, catalog_version=catalog_fingerprint(movies), probes=args.probes)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,246 @@
+"""
+Preforked Server
+================
+
+Production launcher: loads the catalog, the fuzzy control system and the
+model weights once in a master process, freezes the heap, then forks
+workers that serve ``api:app`` from one shared listening socket.
+
+Features:
+- Everything loaded before the fork is shared copy-on-write; gc.freeze()
+  moves it to the permanent generation so the workers' garbage collections
+  never touch (and copy) those pages
+- TensorFlow never runs in the master (it is not fork-safe): with
+  SHARED_MEMORY_DIR the model's NumPy export is produced in a throwaway
+  process and shared; otherwise each worker loads Keras after the fork
+- Profile responses are precomputed in the master and shared the same way
+- Dead workers are forked again from the master; SIGTERM / SIGINT stop all
+- Shared vs private memory per worker (from /proc/<pid>/smaps_rollup),
+  logged periodically and reported by /performance-metrics
+
+Usage:
+    python prefork_server.py --workers 4 --host 0.0.0.0 --port 3000
+"""
+
+import argparse
+import gc
+import logging
+import os
+import signal
+import socket
+import sys
+import time
+from typing import Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# smaps_rollup fields (kB) -> report keys (MB)
+_SMAPS_FIELDS = {
+    'Rss': 'rss_mb',
+    'Pss': 'pss_mb',
+    'Shared_Clean': 'shared_clean_mb',
+    'Shared_Dirty': 'shared_dirty_mb',
+    'Private_Clean': 'private_clean_mb',
+    'Private_Dirty': 'private_dirty_mb',
+    'Swap': 'swap_mb'
+}
+
+
+def process_memory(pid: int) -> Dict[str, float]:
+    """
+    Resident memory of a process split into shared and private pages (MB).
+
+    Linux only (empty elsewhere). ``shared_mb`` is mapped by at least one
+    other process (the master's copy-on-write heap, shared mappings);
+    ``private_mb`` is this process's own, including pages it has written.
+    """
+    try:
+        with open(f"/proc/{pid}/smaps_rollup", 'r') as f:
+            lines = f.readlines()
+    except OSError:
+        return {}
+
+    report = {}
+    for line in lines:
+        parts = line.split()
+        if len(parts) >= 2 and parts[0].rstrip(':') in _SMAPS_FIELDS:
+            report[_SMAPS_FIELDS[parts[0].rstrip(':')]] = round(int(parts[1]) / 1024, 1)
+    report['shared_mb'] = round(report.get('shared_clean_mb', 0) + report.get('shared_dirty_mb', 0), 1)
+    report['private_mb'] = round(report.get('private_clean_mb', 0) + report.get('private_dirty_mb', 0), 1)
+    return report
+
+
+def load_application(precompute: bool = True):
+    """Import the app and load everything the workers share (runs in the master)."""
+    import api
+    api.load_catalog()
+    api.initialize_recommendation_systems(load_ann=False)
+    api.load_ann_models(fork_safe=True)
+    # With the Keras model left to the workers, they precompute once it is warm
+    keras_deferred = api.hybrid_system is not None and not api.hybrid_system.ann_available
+    if precompute and not keras_deferred:
+        api.start_precomputing_profiles(background=False)
+    return api
+
+
+class PreforkServer:
+    """Master process forking ``workers`` uvicorn servers over one listening socket."""
+
+    def __init__(self, app, host: str = '127.0.0.1', port: int = 3000, workers: int = 2,
+                 log_level: str = 'info', report_interval: float = 60.0):
+        self.app = app
+        self.host = host
+        self.port = port
+        self.worker_count = max(1, workers)
+        self.log_level = log_level
+        self.report_interval = report_interval
+        self.socket: Optional[socket.socket] = None
+        self.workers: Dict[int, int] = {}  # pid -> slot
+        self.restarts = 0
+        self._stopping = False
+
+    def _bind(self) -> socket.socket:
+        sock = socket.create_server((self.host, self.port), backlog=2048)
+        sock.set_inheritable(True)
+        return sock
+
+    def _spawn(self, slot: int) -> None:
+        pid = os.fork()
+        if pid == 0:
+            code = 0
+            try:
+                self._serve()
+            except BaseException:
+                logger.exception(f"❌ Worker {slot} crashed")
+                code = 1
+            finally:
+                os._exit(code)
+        self.workers[pid] = slot
+        logger.info(f"👷 Worker {slot} started (pid {pid})")
+
+    def _serve(self) -> None:
+        """Worker body: a uvicorn server on the inherited socket."""
+        import uvicorn
+        signal.signal(signal.SIGTERM, signal.SIG_DFL)
+        signal.signal(signal.SIGINT, signal.SIG_DFL)
+        gc.enable()
+        config = uvicorn.Config(self.app, log_level=self.log_level, lifespan='on')
+        uvicorn.Server(config).run(sockets=[self.socket])
+
+    def memory_report(self) -> Dict[str, Dict[str, float]]:
+        """process_memory() of the master and every worker."""
+        report = {f"master ({os.getpid()})": process_memory(os.getpid())}
+        for pid, slot in sorted(self.workers.items(), key=lambda item: item[1]):
+            report[f"worker {slot} ({pid})"] = process_memory(pid)
+        return report
+
+    def log_memory(self) -> None:
+        for name, memory in self.memory_report().items():
+            if memory:
+                logger.info(f"📊 {name}: rss {memory['rss_mb']:.0f}MB = shared {memory['shared_mb']:.0f}MB "
+                            f"+ private {memory['private_mb']:.0f}MB (pss {memory.get('pss_mb', 0):.0f}MB)")
+
+    def _handle_stop(self, signum, frame) -> None:
+        self._stopping = True
+
+    def _reap(self) -> List[int]:
+        """Slots of workers that exited since the last call."""
+        exited = []
+        while self.workers:
+            try:
+                pid, status = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                break
+            if pid == 0:
+                break
+            slot = self.workers.pop(pid, None)
+            if slot is not None:
+                if not self._stopping:
+                    logger.warning(f"⚠️ Worker {slot} (pid {pid}) exited with status {os.waitstatus_to_exitcode(status)}")
+                exited.append(slot)
+        return exited
+
+    def _stop_workers(self, timeout: float = 30.0) -> None:
+        for pid in list(self.workers):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+        deadline = time.time() + timeout
+        while self.workers and time.time() < deadline:
+            self._reap()
+            time.sleep(0.1)
+        for pid in list(self.workers):
+            logger.warning(f"⚠️ Worker pid {pid} did not stop in {timeout:.0f}s, killing it")
+            try:
+                os.kill(pid, signal.SIGKILL)
+            except ProcessLookupError:
+                pass
+        self._reap()
+
+    def run(self) -> None:
+        self.socket = self._bind()
+        logger.info(f"🚀 Prefork master {os.getpid()} listening on {self.host}:{self.port} "
+                    f"with {self.worker_count} workers")
+
+        # Freeze everything loaded so far: workers' collections skip it and leave its pages shared
+        gc.collect()
+        gc.freeze()
+        gc.enable()
+        logger.info(f"🧊 Froze {gc.get_freeze_count():,} objects before forking")
+
+        for slot in range(self.worker_count):
+            self._spawn(slot)
+
+        signal.signal(signal.SIGTERM, self._handle_stop)
+        signal.signal(signal.SIGINT, self._handle_stop)
+        next_report = time.time() + min(self.report_interval, 15.0)
+        try:
+            while not self._stopping:
+                for slot in self._reap():
+                    if not self._stopping:
+                        time.sleep(1.0)  # Avoid a tight restart loop on a worker failing at startup
+                        self.restarts += 1
+                        self._spawn(slot)
+                if self.report_interval > 0 and time.time() >= next_report:
+                    self.log_memory()
+                    next_report = time.time() + self.report_interval
+                time.sleep(0.2)
+        finally:
+            logger.info("🛑 Stopping workers...")
+            self._stop_workers()
+            self.socket.close()
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Serve api:app from preforked workers sharing one loaded heap")
+    parser.add_argument('--host', default=os.getenv('HOST', '127.0.0.1'))
+    parser.add_argument('--port', type=int, default=int(os.getenv('PORT', '3000')))
+    parser.add_argument('--workers', type=int, default=int(os.getenv('WEB_CONCURRENCY', str(os.cpu_count() or 1))))
+    parser.add_argument('--log-level', default='info')
+    parser.add_argument('--report-interval', type=float, default=60.0,
+                        help="Seconds between per-worker memory reports (0 disables)")
+    parser.add_argument('--no-precompute', action='store_true', help="Skip precomputing profile responses in the master")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=getattr(logging, args.log_level.upper(), logging.INFO))
+
+    if not hasattr(os, 'fork'):
+        import uvicorn
+        logger.warning("⚠️ fork() is not available on this platform, serving from a single process")
+        uvicorn.run("api:app", host=args.host, port=args.port, log_level=args.log_level)
+        return 0
+
+    # Workers are the parallelism here; a scoring process pool per worker would oversubscribe the cores
+    os.environ.setdefault('SCORING_PROCESS_WORKERS', '0')
+
+    # No collections while loading: objects stay where they were allocated until frozen
+    gc.disable()
+    api = load_application(precompute=not args.no_precompute)
+
+    PreforkServer(api.app, args.host, args.port, args.workers, args.log_level, args.report_interval).run()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,135 @@
+"""
+Readiness
+=========
+
+Liveness and readiness kept apart: the process answers /health as soon as
+it listens, while /ready reports whether the components serving traffic
+are loaded and warm, so deploys only route requests to warm processes.
+
+Features:
+- One state per component: pending -> loading -> warming -> ready, or
+  unavailable (not installed / not configured) and failed (with the error)
+- Required components must be ready; awaited components must have finished
+  loading one way or the other (the ANN: ready, or fuzzy-only for good)
+- Per-component state, detail, error and timings for the /ready response
+"""
+
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Optional
+
+from startup_profile import startup_profiler
+
+logger = logging.getLogger(__name__)
+
+PENDING = 'pending'
+LOADING = 'loading'
+WARMING = 'warming'
+READY = 'ready'
+UNAVAILABLE = 'unavailable'
+FAILED = 'failed'
+
+# States a component does not leave by itself
+SETTLED_STATES = (READY, UNAVAILABLE, FAILED)
+
+
+class _Component:
+    def __init__(self, name: str, required: bool, awaited: bool):
+        self.name = name
+        self.required = required
+        self.awaited = awaited or required
+        self.state = PENDING
+        self.detail: Optional[str] = None
+        self.error: Optional[str] = None
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+
+    def as_dict(self) -> Dict[str, Any]:
+        end = self.finished_at or time.time()
+        return {
+            'state': self.state,
+            'required': self.required,
+            'awaited': self.awaited,
+            'detail': self.detail,
+            'error': self.error,
+            'duration_ms': round((end - self.started_at) * 1000, 1) if self.started_at else None
+        }
+
+
+class ReadinessTracker:
+    """Load state of the components a process needs before it takes traffic."""
+
+    def __init__(self):
+        self._components: Dict[str, _Component] = {}
+        self._lock = threading.Lock()
+        self._ready_since: Optional[float] = None
+
+    def register(self, name: str, required: bool = True, awaited: bool = True) -> None:
+        """
+        Track a component. ``required``: must be ready for the process to be
+        ready; ``awaited``: must have settled (ready, unavailable or failed).
+        """
+        with self._lock:
+            self._components[name] = _Component(name, required, awaited)
+
+    def set_state(self, name: str, state: str, detail: Optional[str] = None, error: Optional[str] = None) -> None:
+        with self._lock:
+            component = self._components[name]
+            if component.started_at is None and state != PENDING:
+                component.started_at = time.time()
+            component.state = state
+            component.detail = detail
+            component.error = error
+            if state in SETTLED_STATES:
+                component.finished_at = time.time()
+        self.ready  # Records when the process first became ready
+        if state == FAILED:
+            logger.error(f"❌ {name} failed: {error}")
+        elif state in SETTLED_STATES:
+            logger.info(f"{'✅' if state == READY else '⚠️'} {name}: {state}" + (f" ({detail})" if detail else ""))
+
+    def state(self, name: str) -> Optional[str]:
+        component = self._components.get(name)
+        return component.state if component else None
+
+    def is_ready(self, name: str) -> bool:
+        return self.state(name) == READY
+
+    @contextmanager
+    def loading(self, name: str):
+        """
+        Track one loading step: ``loading`` while the block runs, ``failed``
+        if it raises (the error is logged, not re-raised: the process keeps
+        serving with what it has). The block may settle the state itself
+        (e.g. UNAVAILABLE); otherwise the component is ready when it ends.
+        """
+        self.set_state(name, LOADING)
+        try:
+            yield
+        except Exception as e:
+            self.set_state(name, FAILED, error=str(e))
+        if self.state(name) not in SETTLED_STATES:
+            self.set_state(name, READY)
+
+    @property
+    def ready(self) -> bool:
+        with self._lock:
+            components = list(self._components.values())
+        ready = all(c.state == READY for c in components if c.required) and \
+            all(c.state in SETTLED_STATES for c in components if c.awaited)
+        if ready and self._ready_since is None:
+            self._ready_since = time.time()
+            logger.info(f"🟢 Ready for traffic after {self._ready_since - startup_profiler.started_at:.2f}s")
+        return ready
+
+    def report(self) -> Dict[str, Any]:
+        ready = self.ready
+        with self._lock:
+            components = {name: component.as_dict() for name, component in self._components.items()}
+        return {
+            'ready': ready,
+            'ready_after_s': round(self._ready_since - startup_profiler.started_at, 3) if self._ready_since else None,
+            'components': components
+        }
@@ -0,0 +1,237 @@
+"""
+Scoring Executor
+================
+
+Runs CPU-bound request work off the asyncio event loop, so health checks and
+static files stay responsive behind long scoring requests.
+
+Features:
+- Optional process pool for heavy scoring: workers load the catalog and
+  models once (pool initializer) and score requests in parallel on separate
+  cores; each worker holds its own copy of the catalog and models, so it is
+  opt-in (SCORING_PROCESS_WORKERS)
+- Thread pool for short blocking tasks (single-movie scoring, catalog queries)
+- Queue metrics per pool: submitted / in flight / queued / completed /
+  failed, plus queue-wait and run-time percentiles
+- A broken process pool is rebuilt and the failed call retried on a thread
+"""
+
+import asyncio
+import logging
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from functools import partial
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from streaming_stats import StreamingHistogram
+
+logger = logging.getLogger(__name__)
+
+
+def default_process_workers() -> int:
+    """One scoring process per spare core (leaving one for the event loop), at most 4."""
+    return max(0, min(4, (os.cpu_count() or 1) - 1))
+
+
+def process_workers_from_env() -> int:
+    """
+    Scoring processes from SCORING_PROCESS_WORKERS: 0 (no process pool,
+    heavy scoring on threads) unless set; "auto" is default_process_workers().
+    """
+    value = os.getenv('SCORING_PROCESS_WORKERS', '0').strip().lower()
+    return default_process_workers() if value == 'auto' else max(0, int(value))
+
+
+def _timed_call(func: Callable, *args, **kwargs) -> Tuple[Any, float, float]:
+    """Run ``func`` and report when it started and finished (wall clock, comparable across processes)."""
+    started_at = time.time()
+    result = func(*args, **kwargs)
+    return result, started_at, time.time()
+
+
+def _ping() -> int:
+    return os.getpid()
+
+
+class _PoolStats:
+    """Queue counters and latency sketches of one pool."""
+
+    def __init__(self, workers: int):
+        self.workers = workers
+        self._lock = threading.Lock()
+        self.submitted = 0
+        self.completed = 0
+        self.failed = 0
+        self.cancelled = 0
+        self.max_in_flight = 0
+        self.queue_wait_ms = StreamingHistogram()
+        self.run_ms = StreamingHistogram()
+
+    @property
+    def in_flight(self) -> int:
+        return self.submitted - self.completed - self.failed - self.cancelled
+
+    def submit(self) -> None:
+        with self._lock:
+            self.submitted += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+
+    def complete(self, wait_seconds: float, run_seconds: float) -> None:
+        with self._lock:
+            self.completed += 1
+            self.queue_wait_ms.record(max(0.0, wait_seconds) * 1000)
+            self.run_ms.record(max(0.0, run_seconds) * 1000)
+
+    def fail(self, cancelled: bool = False) -> None:
+        with self._lock:
+            if cancelled:
+                self.cancelled += 1
+            else:
+                self.failed += 1
+
+    def as_dict(self) -> Dict[str, Any]:
+        with self._lock:
+            in_flight = self.in_flight
+            return {
+                'workers': self.workers,
+                'submitted': self.submitted,
+                'completed': self.completed,
+                'failed': self.failed,
+                'cancelled': self.cancelled,
+                'in_flight': in_flight,
+                'queued': max(0, in_flight - self.workers),
+                'max_in_flight': self.max_in_flight,
+                'queue_wait_ms': {k: round(v, 2) for k, v in self.queue_wait_ms.summary((50, 95, 99)).items()},
+                'run_ms': {k: round(v, 2) for k, v in self.run_ms.summary((50, 95, 99)).items()}
+            }
+
+
+class ScoringExecutor:
+    """
+    Process pool for heavy scoring plus a thread pool for short blocking tasks.
+
+    Process-pool functions, their arguments and results must be picklable;
+    ``initializer`` runs once in every worker process (load the catalog and
+    models there). With ``process_workers=0`` process work runs on the
+    thread pool instead.
+    """
+
+    def __init__(self, process_workers: int = 0, thread_workers: int = 8,
+                 initializer: Optional[Callable] = None, initargs: Tuple = (),
+                 start_method: str = 'spawn'):
+        self.process_workers = max(0, process_workers)
+        self.thread_workers = max(1, thread_workers)
+        self.start_method = start_method
+        self._initializer = initializer
+        self._initargs = initargs
+        self._pool_lock = threading.Lock()
+
+        self.threads = ThreadPoolExecutor(max_workers=self.thread_workers, thread_name_prefix='scoring-thread')
+        self.processes = self._new_process_pool() if self.process_workers else None
+        self._stats = {
+            'process': _PoolStats(self.process_workers),
+            'thread': _PoolStats(self.thread_workers)
+        }
+        self.stats = {
+            'process_pool_restarts': 0,
+            'process_fallbacks': 0
+        }
+        logger.info(f"✅ Scoring executor: {self.process_workers} process worker(s) ({start_method}), "
+                    f"{self.thread_workers} thread worker(s)")
+
+    def _new_process_pool(self) -> ProcessPoolExecutor:
+        return ProcessPoolExecutor(
+            max_workers=self.process_workers,
+            mp_context=multiprocessing.get_context(self.start_method),
+            initializer=self._initializer,
+            initargs=self._initargs
+        )
+
+    def _restart_process_pool(self, broken: ProcessPoolExecutor) -> None:
+        with self._pool_lock:
+            if self.processes is not broken:
+                return  # Already replaced by a concurrent caller
+            broken.shutdown(wait=False, cancel_futures=True)
+            self.processes = self._new_process_pool()
+            self.stats['process_pool_restarts'] += 1
+
+    async def _run(self, kind: str, pool, func: Callable, args: Tuple, kwargs: Dict) -> Any:
+        stats = self._stats[kind]
+        submitted_at = time.time()
+        stats.submit()
+        loop = asyncio.get_running_loop()
+        try:
+            result, started_at, finished_at = await loop.run_in_executor(pool, partial(_timed_call, func, *args, **kwargs))
+        except asyncio.CancelledError:
+            stats.fail(cancelled=True)
+            raise
+        except BaseException:
+            stats.fail()
+            raise
+        stats.complete(started_at - submitted_at, finished_at - started_at)
+        return result
+
+    async def run_in_thread(self, func: Callable, *args, **kwargs) -> Any:
+        """Run a short blocking call on the thread pool."""
+        return await self._run('thread', self.threads, func, args, kwargs)
+
+    async def run_in_process(self, func: Callable, *args, **kwargs) -> Any:
+        """Run a CPU-bound call on the process pool (on the thread pool if there is none)."""
+        pool = self.processes
+        if pool is None:
+            return await self.run_in_thread(func, *args, **kwargs)
+        try:
+            return await self._run('process', pool, func, args, kwargs)
+        except BrokenProcessPool as e:
+            logger.error(f"❌ Scoring process pool broke ({e}), restarting it; running this call on a thread")
+            self._restart_process_pool(pool)
+            self.stats['process_fallbacks'] += 1
+            return await self.run_in_thread(func, *args, **kwargs)
+
+    def warm(self) -> List[Future]:
+        """Start every worker process now instead of on the first request."""
+        if self.processes is None:
+            return []
+        return [self.processes.submit(_ping) for _ in range(self.process_workers)]
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            **self.stats,
+            'start_method': self.start_method,
+            'process_pool': self._stats['process'].as_dict() if self.processes is not None else None,
+            'thread_pool': self._stats['thread'].as_dict()
+        }
+
+    def shutdown(self) -> None:
+        self.threads.shutdown(wait=False, cancel_futures=True)
+        if self.processes is not None:
+            self.processes.shutdown(wait=False, cancel_futures=True)
+
+
+# Global executor instance for use in API
+scoring_executor: Optional[ScoringExecutor] = None
+
+
+def initialize_scoring_executor(process_workers: Optional[int] = None, thread_workers: int = 8,
+                                initializer: Optional[Callable] = None, initargs: Tuple = (),
+                                start_method: str = 'spawn') -> ScoringExecutor:
+    """Initialize the global scoring executor."""
+    global scoring_executor
+    if scoring_executor is not None:
+        scoring_executor.shutdown()
+    scoring_executor = ScoringExecutor(
+        process_workers_from_env() if process_workers is None else process_workers,
+        thread_workers, initializer, initargs, start_method
+    )
+    return scoring_executor
+
+
+def get_scoring_executor() -> ScoringExecutor:
+    """Get the global scoring executor."""
+    if scoring_executor is None:
+        raise RuntimeError("Scoring executor not initialized. Call initialize_scoring_executor() first.")
+    return scoring_executor
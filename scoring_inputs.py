@@ -0,0 +1,48 @@
+"""
+Scoring Inputs
+==============
+
+Conversion of catalog movies into the ``movie_info`` dicts the fuzzy, ANN
+and hybrid scorers expect. Shared by the API and offline jobs so both score
+exactly the same inputs.
+
+Features:
+- Tolerant numeric parsing of catalog fields ('$55M', 'N/A', None)
+- Clamping to the ranges the models were trained on
+"""
+
+from typing import Dict
+
+
+def safe_float_conversion(value, default=0.0):
+    """Safely convert values like '$55M' to float"""
+    if not value or value == 'N/A':
+        return default
+    if isinstance(value, str):
+        # Remove $ and M, convert to million if needed
+        cleaned = value.replace('$', '').replace('M', '').replace(',', '')
+        try:
+            result = float(cleaned)
+            if 'M' in value:
+                result *= 1000000
+            return result
+        except ValueError:
+            return default
+    try:
+        return float(value)
+    except (ValueError, TypeError):
+        return default
+
+
+def prepare_enhanced_movie_info(movie: Dict) -> Dict:
+    """Build the clamped movie_info dict the scoring systems expect from a catalog movie."""
+    return {
+        'title': str(movie.get('title', 'Unknown')),
+        'genres': movie.get('genres', []) if isinstance(movie.get('genres'), list) else [],
+        'rating': max(1.0, min(10.0, safe_float_conversion(movie.get('rating'), 7.0))),
+        'popularity': max(1.0, min(100.0, safe_float_conversion(movie.get('popularity'), 50.0))),
+        'year': max(1900, min(2030, int(movie.get('year', 2000)) if movie.get('year') else 2000)),
+        'runtime': max(30, min(300, int(movie.get('runtime', 120)) if movie.get('runtime') else 120)),
+        'budget': max(0, safe_float_conversion(movie.get('budget'), 0)),
+        'box_office': max(0, safe_float_conversion(movie.get('box_office'), 0))
+    }
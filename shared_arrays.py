@@ -0,0 +1,182 @@
+"""
+Shared Arrays
+=============
+
+Read-only NumPy arrays shared by every worker process: one process publishes
+a bundle of arrays to a directory, the others memory-map it, so the data is
+held once in the page cache instead of once per worker.
+
+Features:
+- A bundle is a directory of .npy files plus a manifest.json (array names
+  and free-form metadata); under /dev/shm it lives in shared memory
+- Workers attach with np.load(mmap_mode='r'): zero-copy, read-only views
+- Atomic publish (write a temporary directory, then rename) under a file
+  lock, so the first of N workers builds a bundle and the rest attach
+- Bundles record the source they were built from and are rebuilt when the
+  source changes
+"""
+
+import json
+import logging
+import os
+import shutil
+import tempfile
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterable, Optional, Tuple
+
+import numpy as np
+
+try:
+    import fcntl
+except ImportError:  # Windows: publishing stays atomic, concurrent builders may just duplicate work
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_FILE = 'manifest.json'
+
+# Default root for SHARED_MEMORY_DIR=auto: tmpfs-backed shared memory where available
+DEFAULT_SHARED_ROOT = ('/dev/shm/movie-recommendation' if os.path.isdir('/dev/shm')
+                       else os.path.join(tempfile.gettempdir(), 'movie-recommendation-shared'))
+
+
+def shared_root_from_env() -> Optional[str]:
+    """Bundle root from SHARED_MEMORY_DIR ('auto' for the default root), or None when sharing is off."""
+    root = os.getenv('SHARED_MEMORY_DIR', '').strip()
+    if not root:
+        return None
+    return DEFAULT_SHARED_ROOT if root.lower() == 'auto' else root
+
+
+def file_stamp(paths: Iterable[str]) -> str:
+    """Source stamp (path, size, mtime) of the files a bundle is built from."""
+    parts = []
+    for path in paths:
+        try:
+            stat = os.stat(path)
+            parts.append(f"{os.path.abspath(path)}:{stat.st_size}:{stat.st_mtime_ns}")
+        except OSError:
+            parts.append(f"{os.path.abspath(path)}:missing")
+    return '|'.join(parts)
+
+
+class SharedArrays:
+    """A published bundle of named, read-only arrays."""
+
+    def __init__(self, path: str, arrays: Dict[str, np.ndarray], metadata: Dict[str, Any]):
+        self.path = path
+        self.arrays = arrays
+        self.metadata = metadata
+
+    def __getitem__(self, name: str) -> np.ndarray:
+        return self.arrays[name]
+
+    def __contains__(self, name: str) -> bool:
+        return name in self.arrays
+
+    @property
+    def nbytes(self) -> int:
+        return sum(array.nbytes for array in self.arrays.values())
+
+    @classmethod
+    def attach(cls, path: str) -> 'SharedArrays':
+        """Map a published bundle (FileNotFoundError if there is none)."""
+        with open(os.path.join(path, MANIFEST_FILE), 'r') as f:
+            manifest = json.load(f)
+        arrays = {}
+        for name, filename in manifest['arrays'].items():
+            file_path = os.path.join(path, filename)
+            try:
+                array = np.load(file_path, mmap_mode='r', allow_pickle=False)
+            except ValueError:
+                array = np.load(file_path, allow_pickle=False)  # Empty arrays cannot be mapped
+                array.setflags(write=False)
+            arrays[name] = np.asarray(array)  # Plain ndarray view over the mapping
+        return cls(path, arrays, manifest.get('metadata', {}))
+
+    @classmethod
+    def publish(cls, path: str, arrays: Dict[str, np.ndarray], metadata: Optional[Dict[str, Any]] = None) -> 'SharedArrays':
+        """Write a bundle and atomically replace whatever was published at ``path``."""
+        parent = os.path.dirname(os.path.abspath(path))
+        os.makedirs(parent, exist_ok=True)
+        staging = tempfile.mkdtemp(prefix=f".{os.path.basename(path)}.", dir=parent)
+        try:
+            files = {}
+            for i, (name, array) in enumerate(arrays.items()):
+                files[name] = f"{i:04d}.npy"
+                np.save(os.path.join(staging, files[name]), np.ascontiguousarray(array), allow_pickle=False)
+            # Manifest last: a bundle without one is never attached
+            with open(os.path.join(staging, MANIFEST_FILE), 'w') as f:
+                json.dump({'arrays': files, 'metadata': metadata or {}}, f)
+
+            # Processes still mapping the old files keep them until they unmap
+            retired = None
+            if os.path.exists(path):
+                retired = tempfile.mkdtemp(prefix=f".{os.path.basename(path)}.retired.", dir=parent)
+                os.rmdir(retired)
+                os.rename(path, retired)
+            os.rename(staging, path)
+        except BaseException:
+            shutil.rmtree(staging, ignore_errors=True)
+            raise
+        if retired:
+            shutil.rmtree(retired, ignore_errors=True)
+
+        bundle = cls.attach(path)
+        logger.info(f"✅ Published {len(arrays)} shared arrays ({bundle.nbytes / 1024 / 1024:.1f}MB) to {path}")
+        return bundle
+
+
+@contextmanager
+def _publish_lock(path: str):
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(f"{path}.lock", 'a') as lock_file:
+        if fcntl is not None:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+
+
+def publish_once(path: str, build: Callable[[], Tuple[Dict[str, np.ndarray], Dict[str, Any]]],
+                 source: Optional[str] = None) -> SharedArrays:
+    """
+    Attach to the bundle at ``path``, building and publishing it first if it
+    is missing or was built from another ``source``.
+
+    ``build`` returns (arrays, metadata) and runs in at most one process at a
+    time; processes waiting on the lock attach to its result.
+    """
+    def attach_current() -> Optional[SharedArrays]:
+        try:
+            bundle = SharedArrays.attach(path)
+        except (FileNotFoundError, NotADirectoryError):
+            return None
+        return bundle if source is None or bundle.metadata.get('source') == source else None
+
+    bundle = attach_current()
+    if bundle is not None:
+        return bundle
+    with _publish_lock(path):
+        bundle = attach_current()
+        if bundle is not None:
+            return bundle
+        arrays, metadata = build()
+        return SharedArrays.publish(path, arrays, {**metadata, 'source': source})
+
+
+def shared_bundle_stats(root: str) -> Dict[str, Any]:
+    """Published bundles under ``root`` and their sizes."""
+    bundles = {}
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames[:] = [d for d in dirnames if not d.startswith('.')]
+        if MANIFEST_FILE in filenames:
+            size = sum(os.path.getsize(os.path.join(dirpath, f)) for f in filenames)
+            bundles[os.path.relpath(dirpath, root)] = round(size / 1024 / 1024, 3)
+    return {
+        'root': root,
+        'bundles_mb': bundles,
+        'total_mb': round(sum(bundles.values()), 3)
+    }
@@ -0,0 +1,364 @@
+"""
+Shared Cache Tier
+=================
+
+Second cache tier shared by all worker processes on a host (SQLite) or
+across hosts (Redis protocol), sitting behind the in-process LRU.
+
+Features:
+- SQLite (WAL) on-disk backend, safe for concurrent worker processes
+- Optional Redis-protocol backend (redis-py or any compatible client)
+- Read-through: L1 misses are filled from the shared tier
+- Write-behind: shared-tier writes are batched on a background thread,
+  through a bounded queue (writes are dropped, not queued, while the
+  shared tier is slow or down); forked workers start their own writer
+- Short Redis socket timeouts, so a stalled server costs a cache miss
+  rather than a blocked request
+- JSON serialization of result payloads (numpy scalars included)
+"""
+
+import json
+import logging
+import os
+import queue
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Hashable, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from memory_cache import LRUCache
+
+logger = logging.getLogger(__name__)
+
+
+def _json_default(value: Any):
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def serialize(value: Any) -> bytes:
+    """Serialize a cached payload for the shared tier."""
+    return json.dumps(value, separators=(',', ':'), default=_json_default).encode('utf-8')
+
+
+def deserialize(data: bytes) -> Any:
+    return json.loads(data)
+
+
+def encode_key(namespace: str, key: Hashable) -> bytes:
+    """
+    Process-independent byte key for the shared tier.
+
+    Cache keys are tuples of bytes, ints and strings, whose repr() is stable
+    across processes (unlike hash()).
+    """
+    return namespace.encode('utf-8') + b'\x00' + repr(key).encode('utf-8')
+
+
+class SQLiteCacheBackend:
+    """Shared cache tier in a local SQLite file (one connection per thread, WAL mode)."""
+
+    name = 'sqlite'
+
+    def __init__(self, path: str, ttl_seconds: Optional[float] = 3600):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self._local = threading.local()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        if hasattr(os, 'register_at_fork'):
+            # SQLite connections must not cross fork(): forked workers open their own
+            os.register_at_fork(after_in_child=self._forget_connections)
+
+        conn = self._connection()
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS cache ("
+            "key BLOB PRIMARY KEY, value BLOB NOT NULL, expires_at REAL) WITHOUT ROWID"
+        )
+        conn.commit()
+
+    def _forget_connections(self) -> None:
+        self._local = threading.local()
+
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5.0, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode = WAL")
+            conn.execute("PRAGMA synchronous = NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def get_many(self, keys: List[bytes]) -> Dict[bytes, bytes]:
+        if not keys:
+            return {}
+        conn = self._connection()
+        now = time.time()
+        found: Dict[bytes, bytes] = {}
+        # Stay under SQLite's host-parameter limit
+        for start in range(0, len(keys), 500):
+            chunk = keys[start:start + 500]
+            placeholders = ",".join("?" * len(chunk))
+            rows = conn.execute(
+                f"SELECT key, value FROM cache WHERE key IN ({placeholders}) "
+                f"AND (expires_at IS NULL OR expires_at > ?)",
+                chunk + [now]
+            ).fetchall()
+            found.update(rows)
+        return found
+
+    def set_many(self, items: List[Tuple[bytes, bytes]]) -> None:
+        if not items:
+            return
+        expires_at = time.time() + self.ttl_seconds if self.ttl_seconds is not None else None
+        conn = self._connection()
+        with conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO cache (key, value, expires_at) VALUES (?, ?, ?)",
+                [(key, value, expires_at) for key, value in items]
+            )
+
+    def purge_expired(self) -> int:
+        conn = self._connection()
+        with conn:
+            return conn.execute("DELETE FROM cache WHERE expires_at <= ?", (time.time(),)).rowcount
+
+    def clear(self) -> None:
+        conn = self._connection()
+        with conn:
+            conn.execute("DELETE FROM cache")
+
+    def size(self) -> int:
+        return self._connection().execute("SELECT COUNT(*) FROM cache").fetchone()[0]
+
+
+class RedisCacheBackend:
+    """
+    Shared cache tier on any Redis-protocol server.
+
+    ``client`` may be any object with redis-py's ``mget`` and ``pipeline``
+    (e.g. a local stand-in in tests); otherwise one is created from ``url``.
+    """
+
+    name = 'redis'
+
+    def __init__(self, url: str = 'redis://localhost:6379/0', ttl_seconds: Optional[float] = 3600,
+                 prefix: bytes = b'movierec:', client: Any = None, socket_timeout: float = 0.25):
+        if client is None:
+            try:
+                import redis
+            except ImportError:
+                raise ImportError("Redis cache backend requires the 'redis' package (pip install redis)")
+            # Reads run on request threads: a stalled server must fail fast (a miss), not block them
+            client = redis.Redis.from_url(url, socket_timeout=socket_timeout, socket_connect_timeout=socket_timeout)
+        self.client = client
+        self.ttl_seconds = ttl_seconds
+        self.prefix = prefix
+
+    def get_many(self, keys: List[bytes]) -> Dict[bytes, bytes]:
+        if not keys:
+            return {}
+        values = self.client.mget([self.prefix + key for key in keys])
+        return {key: value for key, value in zip(keys, values) if value is not None}
+
+    def set_many(self, items: List[Tuple[bytes, bytes]]) -> None:
+        if not items:
+            return
+        pipe = self.client.pipeline()
+        ttl = int(self.ttl_seconds) if self.ttl_seconds is not None else None
+        for key, value in items:
+            pipe.set(self.prefix + key, value, ex=ttl)
+        pipe.execute()
+
+    def clear(self) -> None:
+        keys = list(self.client.scan_iter(match=self.prefix + b'*'))
+        if keys:
+            self.client.delete(*keys)
+
+    def size(self) -> int:
+        return sum(1 for _ in self.client.scan_iter(match=self.prefix + b'*'))
+
+
+class TieredCache:
+    """
+    In-process LRU (L1) in front of a shared backend (L2).
+
+    Drop-in for LRUCache: L1 misses read through to L2 and populate L1;
+    puts land in L1 immediately and are written to L2 by a background
+    writer in batches. At most ``max_pending`` writes wait for the writer;
+    later ones are dropped (L2 is a cache, losing a write only costs a miss).
+    """
+
+    def __init__(self, l1: LRUCache, backend, flush_interval: float = 0.05, max_batch: int = 512,
+                 max_pending: int = 10000):
+        self.l1 = l1
+        self.backend = backend
+        self.flush_interval = flush_interval
+        self.max_batch = max_batch
+        self.max_pending = max_pending
+
+        self._stats_lock = threading.Lock()
+        self.stats = {
+            'l2_hits': 0,
+            'l2_misses': 0,
+            'l2_writes': 0,
+            'l2_dropped': 0,
+            'l2_errors': 0
+        }
+
+        self._start_writer()
+        if hasattr(os, 'register_at_fork'):
+            # Threads do not survive fork(): forked workers need their own queue and writer
+            os.register_at_fork(after_in_child=self._start_writer)
+
+    def _start_writer(self) -> None:
+        self._pending: "queue.Queue[Tuple[bytes, bytes]]" = queue.Queue(maxsize=self.max_pending)
+        self._writer = threading.Thread(target=self._write_loop, args=(self._pending,),
+                                        name='shared-cache-writer', daemon=True)
+        self._writer.start()
+
+    # LRUCache-compatible attributes
+    @property
+    def max_entries(self):
+        return self.l1.max_entries
+
+    @property
+    def max_bytes(self):
+        return self.l1.max_bytes
+
+    @property
+    def ttl_seconds(self):
+        return self.l1.ttl_seconds
+
+    def __len__(self) -> int:
+        return len(self.l1)
+
+    def _count(self, name: str, amount: int = 1) -> None:
+        with self._stats_lock:
+            self.stats[name] += amount
+
+    def get(self, key: Hashable, namespace: str = 'default', default: Any = None) -> Any:
+        value = self.l1.get(key, namespace)
+        if value is not None:
+            return value
+        return self._read_through([key], namespace).get(key, default)
+
+    def get_many(self, keys: Iterable[Hashable], namespace: str = 'default') -> Dict[Hashable, Any]:
+        """Look up several keys: L1 first, then one round trip to L2 for the rest."""
+        keys = list(keys)
+        found = self.l1.get_many(keys, namespace)
+        missing = [key for key in keys if key not in found]
+        if missing:
+            found.update(self._read_through(missing, namespace))
+        return found
+
+    def _read_through(self, keys: List[Hashable], namespace: str) -> Dict[Hashable, Any]:
+        """Fetch L1 misses from L2 and populate L1 with what was found."""
+        encoded = {encode_key(namespace, key): key for key in keys}
+        try:
+            rows = self.backend.get_many(list(encoded))
+        except Exception as e:
+            logger.warning(f"Shared cache read failed: {e}")
+            self._count('l2_errors')
+            return {}
+
+        found: Dict[Hashable, Any] = {}
+        for encoded_key, data in rows.items():
+            key = encoded[encoded_key]
+            value = deserialize(data)
+            found[key] = value
+            self.l1.put(key, value, namespace)
+        self._count('l2_hits', len(rows))
+        self._count('l2_misses', len(keys) - len(rows))
+        return found
+
+    def put(self, key: Hashable, value: Any, namespace: str = 'default',
+            ttl_seconds: Optional[float] = None, size: Optional[int] = None) -> None:
+        self.l1.put(key, value, namespace, ttl_seconds=ttl_seconds, size=size)
+        self._queue_write(namespace, key, value)
+
+    def put_many(self, items: Iterable[Tuple[Hashable, Any]], namespace: str = 'default') -> None:
+        items = list(items)
+        self.l1.put_many(items, namespace)
+        for key, value in items:
+            self._queue_write(namespace, key, value)
+
+    def _queue_write(self, namespace: str, key: Hashable, value: Any) -> None:
+        try:
+            self._pending.put_nowait((encode_key(namespace, key), serialize(value)))
+        except TypeError as e:
+            logger.debug(f"Not writing unserializable value to shared cache: {e}")
+        except queue.Full:
+            self._count('l2_dropped')
+
+    def _write_loop(self, pending: "queue.Queue[Tuple[bytes, bytes]]") -> None:
+        while True:
+            batch = [pending.get()]
+            deadline = time.monotonic() + self.flush_interval
+            while len(batch) < self.max_batch:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(pending.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            try:
+                self.backend.set_many(batch)
+                self._count('l2_writes', len(batch))
+            except Exception as e:
+                logger.warning(f"Shared cache write failed ({len(batch)} entries): {e}")
+                self._count('l2_errors')
+            finally:
+                for _ in batch:
+                    pending.task_done()
+
+    def flush(self) -> None:
+        """Block until all queued writes have reached the shared tier."""
+        self._pending.join()
+
+    def delete(self, key: Hashable, namespace: str = 'default') -> bool:
+        return self.l1.delete(key, namespace)
+
+    def clear(self, namespace: Optional[str] = None) -> None:
+        """Clear the local tier (the shared tier is left to other workers and its TTL)."""
+        self.l1.clear(namespace)
+
+    def namespace_stats(self, namespace: str) -> Dict[str, Any]:
+        return self.l1.namespace_stats(namespace)
+
+    def get_stats(self) -> Dict[str, Any]:
+        stats = self.l1.get_stats()
+        with self._stats_lock:
+            stats['shared'] = {
+                'backend': self.backend.name,
+                'pending_writes': self._pending.qsize(),
+                **self.stats
+            }
+        return stats
+
+
+def create_shared_backend(kind: Optional[str] = None, ttl_seconds: Optional[float] = 3600):
+    """
+    Build the shared cache backend selected by ``kind`` or SHARED_CACHE_BACKEND
+    ("none", "sqlite" or "redis"); returns None when disabled or unavailable.
+    """
+    kind = (kind or os.getenv('SHARED_CACHE_BACKEND', 'none')).lower()
+    try:
+        if kind == 'sqlite':
+            path = os.getenv('SHARED_CACHE_PATH', os.path.join(os.path.dirname(__file__), 'cache', 'shared_cache.sqlite3'))
+            return SQLiteCacheBackend(path, ttl_seconds)
+        if kind == 'redis':
+            return RedisCacheBackend(os.getenv('REDIS_URL', 'redis://localhost:6379/0'), ttl_seconds)
+    except Exception as e:
+        logger.warning(f"Shared cache backend '{kind}' unavailable, using in-process cache only: {e}")
+    return None
+
+
+def tiered(l1: LRUCache, backend) -> Any:
+    """Wrap an LRU in a TieredCache when a shared backend is configured."""
+    return TieredCache(l1, backend) if backend is not None else l1
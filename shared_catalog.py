@@ -0,0 +1,254 @@
+"""
+Shared Catalog
+==============
+
+Columnar encoding of the list-of-dicts movie catalog, published once with
+shared_arrays.py and read by every worker process through read-only views.
+
+Features:
+- Each field becomes columns: int64 / float64 numbers, UTF-8 blobs with
+  offsets for strings, flattened items for string lists, JSON text for
+  anything else, plus a presence mask when some movies lack the field
+- SharedCatalog: a read-only sequence of movie dicts over the columns,
+  decoding rows on access (iteration and take() decode in bulk) with a
+  bounded cache of recently used rows
+- get_shared_catalog(): attach to the published catalog, or load, encode
+  and publish it for the other workers
+"""
+
+import json
+import logging
+import os
+from collections.abc import Sequence
+from functools import lru_cache
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from shared_arrays import SharedArrays, publish_once
+
+logger = logging.getLogger(__name__)
+
+# Rows decoded together while iterating
+CHUNK_ROWS = 1024
+
+_MISSING = object()
+_MISSING_DEFAULTS = {'int': 0, 'float': 0.0, 'str': '', 'str_list': [], 'json': None}
+
+
+def _field_kind(values: List[Any]) -> str:
+    """Column type storing every value of a field without changing its Python type."""
+    if values and all(isinstance(v, (int, np.integer)) and not isinstance(v, (bool, np.bool_)) for v in values):
+        return 'int'
+    if values and all(isinstance(v, (float, np.floating)) for v in values):
+        return 'float'
+    if values and all(isinstance(v, str) for v in values):
+        return 'str'
+    if values and all(isinstance(v, list) and all(isinstance(item, str) for item in v) for v in values):
+        return 'str_list'
+    return 'json'
+
+
+def _encode_strings(strings: List[str]) -> Tuple[np.ndarray, np.ndarray]:
+    """UTF-8 blob and (n + 1) byte offsets."""
+    encoded = [s.encode('utf-8') for s in strings]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    np.cumsum([len(b) for b in encoded], out=offsets[1:])
+    return np.frombuffer(b''.join(encoded), dtype=np.uint8).copy(), offsets
+
+
+def encode_catalog(movies: List[Dict[str, Any]]) -> Tuple[Dict[str, np.ndarray], Dict[str, Any]]:
+    """Columns (arrays) and field layout (metadata) for a catalog."""
+    fields: Dict[str, None] = {}
+    for movie in movies:
+        fields.update(dict.fromkeys(movie))
+
+    arrays: Dict[str, np.ndarray] = {}
+    layout: List[Dict[str, Any]] = []
+    for field in fields:
+        raw = [movie.get(field, _MISSING) for movie in movies]
+        present = [value is not _MISSING for value in raw]
+        kind = _field_kind([value for value in raw if value is not _MISSING])
+        values = [value if value is not _MISSING else _MISSING_DEFAULTS[kind] for value in raw]
+        prefix = f"{field}."
+
+        if kind == 'int':
+            try:
+                arrays[prefix + 'values'] = np.array(values, dtype=np.int64)
+            except OverflowError:
+                kind = 'json'
+        elif kind == 'float':
+            arrays[prefix + 'values'] = np.array(values, dtype=np.float64)
+        elif kind == 'str':
+            arrays[prefix + 'data'], arrays[prefix + 'offsets'] = _encode_strings(values)
+        elif kind == 'str_list':
+            item_offsets = np.zeros(len(values) + 1, dtype=np.int64)
+            np.cumsum([len(v) for v in values], out=item_offsets[1:])
+            arrays[prefix + 'items'] = item_offsets
+            arrays[prefix + 'data'], arrays[prefix + 'offsets'] = _encode_strings([item for v in values for item in v])
+        if kind == 'json':
+            arrays[prefix + 'data'], arrays[prefix + 'offsets'] = _encode_strings(
+                [json.dumps(value.item() if isinstance(value, np.generic) else value) for value in values]
+            )
+
+        if not all(present):
+            arrays[prefix + 'present'] = np.array(present, dtype=bool)
+        layout.append({'name': field, 'kind': kind, 'sparse': not all(present)})
+
+    return arrays, {'rows': len(movies), 'fields': layout}
+
+
+class _StringColumn:
+    """Strings stored as a UTF-8 blob plus offsets."""
+
+    def __init__(self, data: np.ndarray, offsets: np.ndarray):
+        self.buffer = memoryview(data) if data.size else memoryview(b'')
+        self.offsets = offsets
+
+    def get(self, i: int) -> str:
+        return str(self.buffer[int(self.offsets[i]):int(self.offsets[i + 1])], 'utf-8')
+
+    def range(self, start: int, stop: int) -> List[str]:
+        offsets = self.offsets[start:stop + 1].tolist()
+        buffer = self.buffer
+        return [str(buffer[a:b], 'utf-8') for a, b in zip(offsets, offsets[1:])]
+
+    def take(self, rows: np.ndarray) -> List[str]:
+        buffer = self.buffer
+        return [str(buffer[a:b], 'utf-8')
+                for a, b in zip(self.offsets[rows].tolist(), self.offsets[rows + 1].tolist())]
+
+
+class _Field:
+    """Decoder for one catalog field."""
+
+    def __init__(self, bundle: SharedArrays, spec: Dict[str, Any]):
+        self.name = spec['name']
+        self.kind = spec['kind']
+        prefix = f"{self.name}."
+        self.present = bundle[prefix + 'present'] if spec['sparse'] else None
+        self.values = bundle[prefix + 'values'] if self.kind in ('int', 'float') else None
+        self.strings = _StringColumn(bundle[prefix + 'data'], bundle[prefix + 'offsets']) \
+            if self.kind in ('str', 'str_list', 'json') else None
+        self.items = bundle[prefix + 'items'] if self.kind == 'str_list' else None
+
+    def get(self, i: int) -> Any:
+        if self.values is not None:
+            return self.values[i].item()
+        if self.kind == 'str':
+            return self.strings.get(i)
+        if self.kind == 'str_list':
+            return self.strings.range(int(self.items[i]), int(self.items[i + 1]))
+        return json.loads(self.strings.get(i))
+
+    def take(self, rows: np.ndarray) -> List[Any]:
+        if self.values is not None:
+            return self.values[rows].tolist()
+        if self.kind == 'str':
+            return self.strings.take(rows)
+        if self.kind == 'str_list':
+            # Decode every item of the requested rows in one pass, then split per row
+            starts = self.items[rows]
+            lengths = self.items[rows + 1] - starts
+            bounds = np.zeros(len(rows) + 1, dtype=np.int64)
+            np.cumsum(lengths, out=bounds[1:])
+            flat = self.strings.take(np.repeat(starts - bounds[:-1], lengths) + np.arange(bounds[-1]))
+            bounds = bounds.tolist()
+            return [flat[a:b] for a, b in zip(bounds, bounds[1:])]
+        return [json.loads(s) for s in self.strings.take(rows)]
+
+
+class SharedCatalog(Sequence):
+    """
+    Read-only sequence of movie dicts backed by shared columns.
+
+    Rows are decoded on access; the ``cache_rows`` most recently indexed
+    rows are kept decoded. As with the plain list, treat the dicts as
+    read-only.
+    """
+
+    def __init__(self, bundle: SharedArrays, cache_rows: int = 2048):
+        self.bundle = bundle
+        self.rows = int(bundle.metadata['rows'])
+        self.version = bundle.metadata.get('catalog_version')
+        self._fields = [_Field(bundle, spec) for spec in bundle.metadata['fields']]
+        self._row = lru_cache(maxsize=cache_rows)(self._decode_row) if cache_rows > 0 else self._decode_row
+
+    def __len__(self) -> int:
+        return self.rows
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return self.take(np.arange(self.rows)[index])
+        i = int(index)
+        if i < 0:
+            i += self.rows
+        if not 0 <= i < self.rows:
+            raise IndexError('catalog index out of range')
+        return self._row(i)
+
+    def _decode_row(self, i: int) -> Dict[str, Any]:
+        return {field.name: field.get(i) for field in self._fields
+                if field.present is None or field.present[i]}
+
+    def take(self, rows) -> List[Dict[str, Any]]:
+        """Movies at ``rows``, decoded column by column."""
+        rows = np.asarray(rows, dtype=np.int64)
+        if rows.size and (rows.min() < 0 or rows.max() >= self.rows):
+            raise IndexError('catalog index out of range')
+        movies: List[Dict[str, Any]] = [{} for _ in range(len(rows))]
+        for field in self._fields:
+            name = field.name
+            values = field.take(rows)
+            if field.present is None:
+                for movie, value in zip(movies, values):
+                    movie[name] = value
+            else:
+                for movie, value, present in zip(movies, values, field.present[rows].tolist()):
+                    if present:
+                        movie[name] = value
+        return movies
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        for start in range(0, self.rows, CHUNK_ROWS):
+            yield from self.take(np.arange(start, min(self.rows, start + CHUNK_ROWS)))
+
+    def column(self, field: str) -> np.ndarray:
+        """Raw values of a numeric field (read-only)."""
+        for f in self._fields:
+            if f.name == field and f.values is not None:
+                return f.values
+        raise KeyError(f"No numeric column '{field}'")
+
+    @property
+    def nbytes(self) -> int:
+        return self.bundle.nbytes
+
+
+# Catalogs attached by this process, so every loader call shares one view
+_attached: Dict[str, SharedCatalog] = {}
+
+
+def get_shared_catalog(load: Callable[[], List[Dict[str, Any]]], root: str,
+                       source: Optional[str] = None) -> SharedCatalog:
+    """
+    The shared catalog under ``root``; the first process to get here runs
+    ``load`` and publishes the result for the others.
+    """
+    path = os.path.join(root, 'catalog')
+
+    def build():
+        from catalog_store import catalog_fingerprint
+        movies = load()
+        arrays, metadata = encode_catalog(movies)
+        metadata['catalog_version'] = catalog_fingerprint(movies)
+        return arrays, metadata
+
+    catalog = _attached.get(path)
+    if catalog is not None and catalog.bundle.metadata.get('source') == source:
+        return catalog
+    catalog = SharedCatalog(publish_once(path, build, source),
+                            cache_rows=int(os.getenv('SHARED_CATALOG_CACHE_ROWS', '2048')))
+    _attached[path] = catalog
+    logger.info(f"🔗 Shared catalog attached: {len(catalog)} movies, {catalog.nbytes / 1024 / 1024:.1f}MB ({path})")
+    return catalog
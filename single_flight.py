@@ -0,0 +1,69 @@
+"""
+Single-Flight Request Coalescing
+================================
+
+Collapses identical concurrent requests into one computation: the first
+caller for a key computes, duplicates that arrive while it is in flight
+await the same future.
+
+Features:
+- Keyed by canonical request keys (see cache_keys)
+- Errors propagate to every waiter; nothing is cached after completion
+- A caller disconnecting does not cancel the shared computation
+- Leader / coalesced / error counters for metrics export
+"""
+
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, Dict, Hashable
+
+logger = logging.getLogger(__name__)
+
+
+class SingleFlight:
+    """Coalesce concurrent calls that share a key (one event loop)."""
+
+    def __init__(self, name: str = 'default'):
+        self.name = name
+        self._inflight: Dict[Hashable, asyncio.Task] = {}
+        self._waiters: Dict[Hashable, int] = {}
+        self.stats = {
+            'calls': 0,
+            'executions': 0,
+            'coalesced': 0,
+            'errors': 0,
+            'max_waiters': 0
+        }
+
+    async def do(self, key: Hashable, func: Callable[[], Awaitable[Any]]) -> Any:
+        """Return ``await func()``, sharing one execution among concurrent callers with the same key."""
+        self.stats['calls'] += 1
+
+        task = self._inflight.get(key)
+        if task is not None:
+            self.stats['coalesced'] += 1
+            self._waiters[key] += 1
+            self.stats['max_waiters'] = max(self.stats['max_waiters'], self._waiters[key])
+        else:
+            # Run as its own task so a disconnecting first caller doesn't cancel the others
+            task = asyncio.ensure_future(func())
+            self._inflight[key] = task
+            self._waiters[key] = 1
+            self.stats['executions'] += 1
+            task.add_done_callback(lambda done, key=key: self._finish(key, done))
+
+        return await asyncio.shield(task)
+
+    def _finish(self, key: Hashable, task: asyncio.Task) -> None:
+        self._inflight.pop(key, None)
+        self._waiters.pop(key, None)
+        if not task.cancelled() and task.exception() is not None:
+            self.stats['errors'] += 1
+
+    def get_stats(self) -> Dict[str, Any]:
+        calls = self.stats['calls']
+        return {
+            **self.stats,
+            'in_flight': len(self._inflight),
+            'coalesced_rate': round(self.stats['coalesced'] / calls * 100, 2) if calls else 0
+        }
@@ -0,0 +1,200 @@
+"""
+Startup Profile
+===============
+
+Where API process startup goes, and how long the process takes to answer
+its first request.
+
+Features:
+- Named phase timers (imports, catalog load, index build, fuzzy build,
+  model load, lazy imports), kept in order with their offset from process
+  start
+- Process start read from /proc (falls back to this module's import time),
+  so time-to-first-request includes interpreter start-up and imports
+- Time-to-first-request recorded once, by the API's first real response
+- CLI: runs the API import and system initialization under
+  ``python -X importtime`` and prints the slowest packages next to the
+  phase timers
+
+Usage:
+    python startup_profile.py --top 20
+"""
+
+import argparse
+import json
+import logging
+import os
+import subprocess
+import sys
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from typing import Any, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+_MODULE_LOADED_AT = time.time()
+
+
+def process_start_time() -> float:
+    """Wall-clock time the current process started (Linux /proc; this module's import time elsewhere)."""
+    try:
+        with open('/proc/self/stat', 'r') as f:
+            fields = f.read().rsplit(')', 1)[1].split()
+        with open('/proc/uptime', 'r') as f:
+            uptime = float(f.read().split()[0])
+        started_ticks = int(fields[19])  # Field 22 (starttime), counted from field 3 after the command name
+        age = uptime - started_ticks / os.sysconf('SC_CLK_TCK')
+        return time.time() - max(0.0, age)
+    except (OSError, ValueError, IndexError, AttributeError):
+        return _MODULE_LOADED_AT
+
+
+class StartupProfiler:
+    """Phase timers and time-to-first-request of one process."""
+
+    def __init__(self, started_at: Optional[float] = None):
+        self.started_at = process_start_time() if started_at is None else started_at
+        self.phases: List[Dict[str, Any]] = []
+        self.time_to_first_request_s: Optional[float] = None
+        self.first_request_path: Optional[str] = None
+        self._lock = threading.Lock()
+
+    def record(self, name: str, start: float, end: Optional[float] = None) -> None:
+        """Record a phase that ran from ``start`` to ``end`` (now by default), as time.time() values."""
+        end = time.time() if end is None else end
+        with self._lock:
+            self.phases.append({
+                'phase': name,
+                'start_s': round(start - self.started_at, 3),
+                'duration_ms': round((end - start) * 1000, 1)
+            })
+
+    @contextmanager
+    def phase(self, name: str):
+        start = time.time()
+        try:
+            yield
+        finally:
+            self.record(name, start)
+
+    def mark_first_request(self, path: str = '') -> bool:
+        """Record time-to-first-request; True only for the first call."""
+        with self._lock:
+            if self.time_to_first_request_s is not None:
+                return False
+            self.time_to_first_request_s = round(time.time() - self.started_at, 3)
+            self.first_request_path = path
+        logger.info(f"⏱️ Time to first request: {self.time_to_first_request_s:.2f}s ({path})")
+        return True
+
+    def report(self) -> Dict[str, Any]:
+        with self._lock:
+            phases = list(self.phases)
+        return {
+            'pid': os.getpid(),
+            'uptime_s': round(time.time() - self.started_at, 3),
+            'time_to_first_request_s': self.time_to_first_request_s,
+            'first_request_path': self.first_request_path,
+            'phases': phases,
+            'phases_total_ms': round(sum(p['duration_ms'] for p in phases), 1)
+        }
+
+
+# Global profiler, created with this module so phases can be recorded from the first import
+startup_profiler = StartupProfiler()
+
+
+def get_startup_profiler() -> StartupProfiler:
+    """Get the process's startup profiler."""
+    return startup_profiler
+
+
+# --- CLI: -X importtime breakdown ------------------------------------------
+
+_CHILD_CODE = (
+    "import json, startup_profile, api\n"
+    "api.load_catalog()\n"
+    "api.initialize_recommendation_systems()\n"
+    "print('STARTUP_PROFILE ' + json.dumps(startup_profile.startup_profiler.report()))\n"
+)
+
+
+def parse_importtime(stderr: str) -> List[Tuple[str, int, int, int]]:
+    """(module, self_us, cumulative_us, depth) for every ``-X importtime`` line."""
+    imports = []
+    for line in stderr.splitlines():
+        if not line.startswith('import time:'):
+            continue
+        parts = line[len('import time:'):].split('|')
+        if len(parts) != 3 or not parts[0].strip().isdigit():
+            continue  # Header line
+        name = parts[2][1:]
+        depth = (len(name) - len(name.lstrip(' '))) // 2
+        imports.append((name.strip(), int(parts[0]), int(parts[1]), depth))
+    return imports
+
+
+def importtime_summary(imports: List[Tuple[str, int, int, int]], top: int = 20) -> Dict[str, List[Tuple[str, float]]]:
+    """Self time per top-level package and the slowest individual imports (cumulative), in ms."""
+    by_package: Dict[str, int] = defaultdict(int)
+    for name, self_us, _, _ in imports:
+        by_package[name.split('.')[0]] += self_us
+    packages = sorted(by_package.items(), key=lambda item: item[1], reverse=True)[:top]
+    slowest = sorted(imports, key=lambda item: item[2], reverse=True)[:top]
+    return {
+        'packages': [(name, us / 1000) for name, us in packages],
+        'imports': [(name, cumulative / 1000) for name, _, cumulative, _ in slowest]
+    }
+
+
+def profile_startup(top: int = 20) -> Dict[str, Any]:
+    """Import the API and initialize its systems in a fresh interpreter under -X importtime."""
+    project_root = os.path.dirname(os.path.abspath(__file__))
+    start = time.time()
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', _CHILD_CODE],
+        cwd=project_root, capture_output=True, text=True, env={**os.environ, 'PYTHONPATH': project_root}
+    )
+    wall_s = time.time() - start
+    if result.returncode != 0:
+        raise RuntimeError(f"API startup failed:\n{result.stderr[-4000:]}")
+
+    profile = {}
+    for line in result.stdout.splitlines():
+        if line.startswith('STARTUP_PROFILE '):
+            profile = json.loads(line[len('STARTUP_PROFILE '):])
+    return {
+        'wall_s': round(wall_s, 3),
+        'imports': importtime_summary(parse_importtime(result.stderr), top),
+        'startup': profile
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Profile API start-up: import times and startup phases")
+    parser.add_argument('--top', type=int, default=20, help="Packages / imports to list")
+    parser.add_argument('--json', action='store_true', help="Print the raw report as JSON")
+    args = parser.parse_args(argv)
+
+    report = profile_startup(args.top)
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return 0
+
+    print(f"⏱️ API import + system initialization: {report['wall_s']:.2f}s wall")
+    print("\n📦 Import self time by top-level package:")
+    for name, ms in report['imports']['packages']:
+        print(f"  {ms:10.1f} ms  {name}")
+    print("\n🐢 Slowest imports (cumulative):")
+    for name, ms in report['imports']['imports']:
+        print(f"  {ms:10.1f} ms  {name}")
+    print("\n🚀 Startup phases:")
+    for phase in report['startup'].get('phases', []):
+        print(f"  {phase['duration_ms']:10.1f} ms  {phase['phase']}  (at {phase['start_s']:.2f}s)")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
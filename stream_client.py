@@ -0,0 +1,110 @@
+"""
+Pair Stream Client
+==================
+
+Command-line client of POST /recommend/pairs/stream: streams NDJSON
+(user, movie) pairs from a file or stdin to the server and writes the
+scored NDJSON lines as they come back, so inputs far larger than memory
+can be scored from a shell.
+
+Features:
+- Chunked upload from a reader thread while the main thread reads the
+  results: the two directions run concurrently, as the server answers a
+  chunk before it reads the next one (reading only after the upload would
+  deadlock once the socket buffers fill)
+- Flow control from the socket: the upload blocks while the server is
+  behind, nothing is queued in the client
+- Result lines to stdout or a file, the summary line to stderr
+
+Usage:
+    python stream_client.py pairs.ndjson -o scores.ndjson
+    cat pairs.ndjson | python stream_client.py --url http://localhost:8000 --strategy adaptive
+"""
+
+import argparse
+import http.client
+import json
+import sys
+import threading
+from typing import BinaryIO, Dict, List, Optional
+from urllib.parse import urlencode, urlsplit
+
+STREAM_PATH = '/recommend/pairs/stream'
+
+
+def _upload(connection: http.client.HTTPConnection, source: BinaryIO, block_bytes: int, errors: List[Exception]) -> None:
+    """Send ``source`` as chunked transfer encoding, whole lines per chunk, then the last chunk."""
+    try:
+        while True:
+            block = source.read(block_bytes)
+            if not block:
+                break
+            block += source.readline()  # Finish the current line
+            connection.send(b'%x\r\n%s\r\n' % (len(block), block))
+        connection.send(b'0\r\n\r\n')
+    except OSError as e:  # The server closed the stream (error response or shutdown)
+        errors.append(e)
+
+
+def stream_pairs(url: str, source: BinaryIO, output: BinaryIO, strategy: str = 'adaptive',
+                 block_bytes: int = 65536, timeout: Optional[float] = None) -> Optional[Dict]:
+    """Stream ``source``'s pair lines to the server, write result lines to ``output``; returns the summary."""
+    parts = urlsplit(url)
+    connection_class = http.client.HTTPSConnection if parts.scheme == 'https' else http.client.HTTPConnection
+    connection = connection_class(parts.netloc, timeout=timeout)
+    connection.putrequest('POST', f"{parts.path.rstrip('/')}{STREAM_PATH}?{urlencode({'strategy': strategy})}")
+    connection.putheader('Content-Type', 'application/x-ndjson')
+    connection.putheader('Transfer-Encoding', 'chunked')
+    connection.endheaders()
+
+    upload_errors: List[Exception] = []
+    uploader = threading.Thread(target=_upload, args=(connection, source, block_bytes, upload_errors),
+                                name='pair-upload', daemon=True)
+    uploader.start()
+
+    response = connection.getresponse()
+    if response.status != 200:
+        raise RuntimeError(f"Server answered {response.status}: {response.read().decode(errors='replace')}")
+    summary = None
+    for line in response:
+        if line.startswith(b'{"summary"'):
+            summary = json.loads(line)['summary']
+            continue
+        output.write(line)
+    output.flush()
+    uploader.join()
+    connection.close()
+    if summary is None and upload_errors:
+        raise RuntimeError(f"Upload failed: {upload_errors[0]}")
+    return summary
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Score NDJSON (user, movie) pairs against a running API server")
+    parser.add_argument('input', nargs='?', default='-', help="NDJSON pair file (default: stdin)")
+    parser.add_argument('-o', '--output', default='-', help="Result file (default: stdout)")
+    parser.add_argument('--url', default='http://localhost:8000')
+    parser.add_argument('--strategy', default='adaptive',
+                        choices=('adaptive', 'confidence_weighted', 'fuzzy_dominant', 'ann_dominant'))
+    parser.add_argument('--block-bytes', type=int, default=65536, help="Upload chunk size (rounded up to whole lines)")
+    parser.add_argument('--timeout', type=float, default=None, help="Socket timeout in seconds")
+    args = parser.parse_args(argv)
+
+    source = sys.stdin.buffer if args.input == '-' else open(args.input, 'rb')
+    output = sys.stdout.buffer if args.output == '-' else open(args.output, 'wb')
+    try:
+        summary = stream_pairs(args.url, source, output, args.strategy, args.block_bytes, args.timeout)
+    finally:
+        if source is not sys.stdin.buffer:
+            source.close()
+        if output is not sys.stdout.buffer:
+            output.close()
+    if summary is None:
+        sys.exit("Stream ended without a summary (server disconnected)")
+    print(json.dumps(summary), file=sys.stderr)
+    if summary['errors']:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,181 @@
+"""
+Streaming Statistics
+====================
+
+Constant-memory latency and score tracking for the metrics collectors.
+
+Features:
+- Log-linear (HDR-style) histogram: O(1) record, mergeable, bounded relative error
+- Exact count / mean / min / max alongside the sketched percentiles
+- Percentile lookups walk per-octave totals, then one octave's buckets
+- Fixed-size ring buffer for the most recent raw samples
+"""
+
+import math
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+
+
+class StreamingHistogram:
+    """
+    Streaming quantile sketch over non-negative values.
+
+    Each power-of-two range (octave) is split into ``2 ** sub_bucket_bits``
+    linear sub-buckets, so a reported percentile is within
+    ``2 ** -(sub_bucket_bits + 1)`` (0.4% with the default 7 bits) of the true
+    sample value, independent of how many values were recorded. Buckets cover
+    2**min_exponent .. 2**max_exponent (values outside are clamped into the
+    edge buckets); values <= 0 share a zero bucket. Per-octave totals make a
+    percentile lookup walk one octave list plus one octave's sub-buckets.
+    """
+
+    def __init__(self, sub_bucket_bits: int = 7, min_exponent: int = -16, max_exponent: int = 32):
+        self.sub_bucket_bits = sub_bucket_bits
+        self.min_exponent = min_exponent
+        self.max_exponent = max_exponent
+        self._sub_buckets = 1 << sub_bucket_bits
+        self._octaves = max_exponent - min_exponent
+        self._counts = [0] * (self._octaves * self._sub_buckets)
+        self._octave_counts = [0] * self._octaves
+        self._zero_count = 0
+        self.count = 0
+        self.total = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def __len__(self) -> int:
+        return self.count
+
+    def record(self, value: float) -> None:
+        value = float(value)
+        self.count += 1
+        self.total += value
+        if value < self.min:
+            self.min = value
+        if value > self.max:
+            self.max = value
+
+        if value <= 0:
+            self._zero_count += 1
+            return
+        mantissa, exponent = math.frexp(value)  # value = mantissa * 2**exponent, mantissa in [0.5, 1)
+        octave = exponent - self.min_exponent - 1
+        if octave < 0:
+            octave, mantissa = 0, 0.5
+        elif octave >= self._octaves:
+            octave, mantissa = self._octaves - 1, 0.9999999
+        self._counts[(octave << self.sub_bucket_bits) + int((mantissa - 0.5) * 2 * self._sub_buckets)] += 1
+        self._octave_counts[octave] += 1
+
+    def merge(self, other: 'StreamingHistogram') -> None:
+        """Add another histogram's samples (same bucket layout)."""
+        if (other.sub_bucket_bits, other.min_exponent, other.max_exponent) != \
+                (self.sub_bucket_bits, self.min_exponent, self.max_exponent):
+            raise ValueError("Cannot merge histograms with different bucket layouts")
+        self._counts = [a + b for a, b in zip(self._counts, other._counts)]
+        self._octave_counts = [a + b for a, b in zip(self._octave_counts, other._octave_counts)]
+        self._zero_count += other._zero_count
+        self.count += other.count
+        self.total += other.total
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+
+    def clear(self) -> None:
+        self._counts = [0] * len(self._counts)
+        self._octave_counts = [0] * self._octaves
+        self._zero_count = 0
+        self.count = 0
+        self.total = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+
+    @property
+    def mean(self) -> float:
+        return self.total / self.count if self.count else 0.0
+
+    def _bucket_value(self, octave: int, sub: int) -> float:
+        """Midpoint of a bucket, clamped to the exact extremes."""
+        value = math.ldexp(0.5 + (sub + 0.5) / (2 * self._sub_buckets), octave + self.min_exponent + 1)
+        return min(max(value, self.min), self.max)
+
+    def quantiles(self, percentiles: Sequence[float]) -> List[float]:
+        """Values at the given percentiles (0-100), nearest-rank on the buckets."""
+        if not self.count:
+            return [0.0 for _ in percentiles]
+
+        results = [0.0] * len(percentiles)
+        last = self.count - 1
+        targets = sorted((min(int(p / 100 * self.count), last), slot) for slot, p in enumerate(percentiles))
+
+        # One ascending pass: octaves first, then the sub-buckets of the octave holding each rank
+        seen = self._zero_count  # samples below the current octave
+        octave = 0
+        for rank, slot in targets:
+            if rank == 0:
+                results[slot] = self.min
+                continue
+            if rank == last:
+                results[slot] = self.max
+                continue
+            if rank < self._zero_count:
+                continue  # zero bucket: 0.0
+            while rank >= seen + self._octave_counts[octave]:
+                seen += self._octave_counts[octave]
+                octave += 1
+            within = rank - seen
+            base = octave << self.sub_bucket_bits
+            for sub in range(self._sub_buckets):
+                within -= self._counts[base + sub]
+                if within < 0:
+                    results[slot] = self._bucket_value(octave, sub)
+                    break
+        return results
+
+    def quantile(self, percentile: float) -> float:
+        return self.quantiles([percentile])[0]
+
+    def summary(self, percentiles: Iterable[float] = (50, 95, 99)) -> Dict[str, float]:
+        """avg/min/max plus p<N> keys for the requested percentiles."""
+        percentiles = list(percentiles)
+        if not self.count:
+            return {'avg': 0, 'min': 0, 'max': 0, **{f'p{p}': 0 for p in percentiles}}
+        values = self.quantiles(percentiles)
+        return {
+            'avg': self.mean,
+            'min': self.min,
+            'max': self.max,
+            **{f'p{p}': value for p, value in zip(percentiles, values)}
+        }
+
+
+class RingBuffer:
+    """Fixed-capacity buffer of the most recent items (O(1) append, no resizing)."""
+
+    def __init__(self, capacity: int):
+        if capacity <= 0:
+            raise ValueError("capacity must be positive")
+        self.capacity = capacity
+        self._items: List[Any] = [None] * capacity
+        self._next = 0
+        self._size = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    def append(self, item: Any) -> None:
+        self._items[self._next] = item
+        self._next = (self._next + 1) % self.capacity
+        if self._size < self.capacity:
+            self._size += 1
+
+    def latest(self, count: Optional[int] = None) -> List[Any]:
+        """The most recent ``count`` items (all by default), oldest first."""
+        count = self._size if count is None else max(0, min(count, self._size))
+        start = (self._next - count) % self.capacity
+        if start + count <= self.capacity:
+            return self._items[start:start + count]
+        return self._items[start:] + self._items[:self._next]
+
+    def clear(self) -> None:
+        self._items = [None] * self.capacity
+        self._next = 0
+        self._size = 0
@@ -0,0 +1,196 @@
+#!/usr/bin/env python3
+"""
+Tests for load shedding per endpoint class (admission_control.py)
+Run with: python -m pytest -q test_admission_control.py
+"""
+
+import asyncio
+
+import pytest
+
+from admission_control import AdmissionController, AdmissionControlMiddleware, EndpointClassLimiter, Overloaded
+
+
+def test_requests_are_classified_by_method_and_path():
+    controller = AdmissionController()
+    assert controller.classify('POST', '/recommend/enhanced') == 'heavy_scoring'
+    assert controller.classify('GET', '/recommend/enhanced/results/abc') == 'light_scoring'
+    assert controller.classify('POST', '/recommend') == 'light_scoring'
+    assert controller.classify('POST', '/recommend/bulk') == 'streaming'
+    assert controller.classify('POST', '/recommend/pairs/stream') == 'streaming'
+    assert controller.classify('GET', '/movies/browse') == 'browse'
+    assert controller.classify('GET', '/health') is None
+    assert controller.classify('GET', '/ready') is None
+
+
+def test_limits_come_from_the_environment(monkeypatch):
+    monkeypatch.setenv('ADMISSION_BROWSE_CONCURRENCY', '3')
+    monkeypatch.setenv('ADMISSION_BROWSE_SLO_MS', '250')
+    controller = AdmissionController.from_env(heavy_concurrency=2)
+    assert controller.limiters['browse'].concurrency == 3
+    assert controller.limiters['browse'].slo_s == 0.25
+    assert controller.limiters['heavy_scoring'].concurrency == 2
+
+
+def test_waiters_get_released_slots_in_order():
+    async def scenario():
+        limiter = EndpointClassLimiter('heavy', concurrency=1, max_queue=4, slo_ms=5000)
+        await limiter.acquire()
+        order = []
+
+        async def wait(i):
+            await limiter.acquire()
+            order.append(i)
+
+        waiters = [asyncio.ensure_future(wait(i)) for i in range(3)]
+        await asyncio.sleep(0)
+        assert limiter.queued == 3 and limiter.in_flight == 1
+        for _ in range(3):
+            limiter.release(0.01)
+            await asyncio.sleep(0)
+        await asyncio.gather(*waiters)
+        limiter.release(0.01)
+        return order, limiter
+
+    order, limiter = asyncio.run(scenario())
+    assert order == [0, 1, 2]
+    assert limiter.in_flight == 0
+    assert limiter.get_stats()['admitted'] == 4
+
+
+def test_full_queue_and_slow_class_are_rejected_on_arrival():
+    async def scenario():
+        limiter = EndpointClassLimiter('heavy', concurrency=1, max_queue=0, slo_ms=5000)
+        await limiter.acquire()
+        with pytest.raises(Overloaded, match='queue full'):
+            await limiter.acquire()
+
+        slow = EndpointClassLimiter('heavy', concurrency=1, max_queue=4, slo_ms=100)
+        await slow.acquire()
+        slow.release(0.5)  # Each request holds the slot for 500ms
+        await slow.acquire()
+        with pytest.raises(Overloaded, match='estimated queue wait') as rejected:
+            await slow.acquire()
+        return limiter, slow, rejected.value
+
+    limiter, slow, overloaded = asyncio.run(scenario())
+    assert limiter.get_stats()['rejected_queue_full'] == 1
+    assert overloaded.retry_after == 1  # Whole seconds for the Retry-After header
+    assert slow.queued == 0
+
+
+def test_wait_past_the_slo_is_rejected_and_frees_its_place():
+    async def scenario():
+        limiter = EndpointClassLimiter('heavy', concurrency=1, max_queue=4, slo_ms=20)
+        await limiter.acquire()
+        with pytest.raises(Overloaded, match='queue wait over'):
+            await limiter.acquire()
+        limiter.release(None)
+        return limiter
+
+    limiter = asyncio.run(scenario())
+    stats = limiter.get_stats()
+    assert stats['timed_out'] == 1
+    assert stats['in_flight'] == 0 and stats['queued'] == 0
+
+
+def test_cancelled_waiter_does_not_leak_a_slot():
+    async def scenario():
+        limiter = EndpointClassLimiter('heavy', concurrency=1, max_queue=4, slo_ms=5000)
+        await limiter.acquire()
+        waiter = asyncio.ensure_future(limiter.acquire())
+        await asyncio.sleep(0)
+        waiter.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiter
+        limiter.release(None)
+        return limiter
+
+    assert asyncio.run(scenario()).in_flight == 0
+
+
+def test_middleware_sheds_a_saturated_class_without_blocking_others():
+    limits = {'heavy_scoring': (1, 0, 1000.0), 'browse': (4, 4, 1000.0)}
+    controller = AdmissionController(limits)
+    release = asyncio.Event()
+
+    async def app(scope, receive, send):
+        if scope['path'] == '/recommend/enhanced':
+            await release.wait()
+        await send({'type': 'http.response.start', 'status': 200, 'headers': []})
+        await send({'type': 'http.response.body', 'body': b'ok'})
+
+    middleware = AdmissionControlMiddleware(app, controller)
+
+    async def call(method, path):
+        messages = []
+
+        async def receive():
+            return {'type': 'http.request', 'body': b''}
+
+        async def send(message):
+            messages.append(message)
+
+        await middleware({'type': 'http', 'method': method, 'path': path, 'headers': []}, receive, send)
+        start = messages[0]
+        return start['status'], dict(start['headers'])
+
+    async def scenario():
+        running = asyncio.ensure_future(call('POST', '/recommend/enhanced'))
+        await asyncio.sleep(0)
+        shed = await call('POST', '/recommend/enhanced')
+        browse = await call('GET', '/movies/browse')
+        probe = await call('GET', '/health')
+        release.set()
+        return shed, browse, probe, await running
+
+    shed, browse, probe, first = asyncio.run(scenario())
+    assert shed[0] == 503 and b'retry-after' in shed[1]
+    assert browse[0] == 200 and probe[0] == 200 and first[0] == 200
+    assert controller.limiters['heavy_scoring'].in_flight == 0
+    assert controller.get_stats()['heavy_scoring']['rejected'] == 1
+
+
+def test_long_stream_does_not_shed_short_scoring_requests():
+    limits = {'heavy_scoring': (1, 4, 100.0), 'streaming': (1, 4, 1000.0)}
+    controller = AdmissionController(limits)
+    release = asyncio.Event()
+
+    async def app(scope, receive, send):
+        if scope['path'] == '/recommend/pairs/stream':
+            await asyncio.sleep(0.3)  # A long NDJSON stream
+        elif scope['query_string'] == b'hold':
+            await release.wait()
+        await send({'type': 'http.response.start', 'status': 200, 'headers': []})
+        await send({'type': 'http.response.body', 'body': b'ok'})
+
+    middleware = AdmissionControlMiddleware(app, controller)
+
+    async def call(path, query=b''):
+        statuses = []
+
+        async def receive():
+            return {'type': 'http.request', 'body': b''}
+
+        async def send(message):
+            if message['type'] == 'http.response.start':
+                statuses.append(message['status'])
+
+        await middleware({'type': 'http', 'method': 'POST', 'path': path, 'query_string': query, 'headers': []},
+                         receive, send)
+        return statuses[0]
+
+    async def scenario():
+        assert await call('/recommend/pairs/stream') == 200
+        assert await call('/recommend/enhanced') == 200
+        held = asyncio.ensure_future(call('/recommend/enhanced', b'hold'))
+        await asyncio.sleep(0)
+        queued = asyncio.ensure_future(call('/recommend/enhanced'))  # Waits behind the held request
+        await asyncio.sleep(0.01)
+        release.set()
+        return await held, await queued
+
+    assert asyncio.run(scenario()) == (200, 200)
+    stats = controller.get_stats()
+    assert stats['heavy_scoring']['rejected'] == 0
+    assert stats['streaming']['service_time_ewma_ms'] >= 300
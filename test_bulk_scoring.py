@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+Tests for users x movies bulk scoring (bulk_scoring.py, /recommend/bulk)
+Run with: python -m pytest -q test_bulk_scoring.py
+"""
+
+import json
+
+import numpy as np
+import pytest
+
+from bulk_scoring import MatrixCatalogScorer
+from conftest import PREFS, synthetic_catalog
+from models.dense_network import DenseNetwork
+from preference_grid import DEFAULT_WATCH_HISTORY
+from scoring_inputs import prepare_enhanced_movie_info
+
+MOVIES = [prepare_enhanced_movie_info(movie) for movie in synthetic_catalog(120, seed=5)]
+USERS = [{'action': 8, 'scifi': 2, 'drama': 6.5}, {'horror': 9, 'comedy': 1}, {}, {'romance': 10, 'mystery': 7}]
+
+
+def hybrid_with_ann():
+    """A hybrid system whose ANN is a small dense network (no TensorFlow needed)."""
+    from models.hybrid_system import HybridRecommendationSystem
+    hybrid = HybridRecommendationSystem(load_ann=False)
+    hybrid.ann_pending = False
+    rng = np.random.default_rng(3)
+    width = len(hybrid.DEFAULT_ANN_FEATURES)
+    hybrid.ann_model = DenseNetwork._build([('affine', rng.normal(scale=0.3, size=(width, 8)), rng.normal(size=8), 'relu'),
+                                            ('affine', rng.normal(scale=0.3, size=(8, 1)), [5.0], 'linear')], np.float32)
+    hybrid.ann_available = True
+    return hybrid
+
+
+@pytest.mark.parametrize('with_ann', [False, True])
+def test_matrix_scores_equal_one_user_at_a_time(with_ann):
+    from models.hybrid_system import HybridRecommendationSystem
+    if with_ann:
+        hybrid = hybrid_with_ann()
+    else:
+        hybrid = HybridRecommendationSystem(load_ann=False)
+        hybrid.ann_pending = False
+    matrix = hybrid.recommend_matrix(USERS, MOVIES, DEFAULT_WATCH_HISTORY)
+    for user, prefs in enumerate(USERS):
+        single = hybrid.recommend_many(prefs, MOVIES, DEFAULT_WATCH_HISTORY)
+        for name in ('fuzzy_score', 'hybrid_score'):
+            # Rounded to 2 decimals on both sides: float noise may flip the last digit
+            np.testing.assert_allclose(matrix[name][user], [r[name] for r in single], atol=0.0100001)
+        if with_ann:
+            np.testing.assert_allclose(matrix['ann_score'][user], [r['ann_score'] for r in single], atol=0.0100001)
+        else:
+            assert np.isnan(matrix['ann_score']).all()
+
+
+def test_fuzzy_scorer_top_k_matches_per_user_ranking():
+    from models.fuzzy_model import FuzzyMovieRecommender
+    fuzzy = FuzzyMovieRecommender()
+    scorer = MatrixCatalogScorer(fuzzy, MOVIES)
+    assert scorer.name == 'fuzzy'
+    excluded = [None, np.array([0, 1, 2]), None, np.arange(len(MOVIES))]
+    results = scorer.top_k(USERS, 5, excluded)
+
+    assert len(results[3][0]) == 0  # Everything excluded
+    for prefs, banned, (rows, scores) in zip(USERS[:3], excluded, results):
+        expected = np.asarray(fuzzy.recommend_movies(prefs, MOVIES, DEFAULT_WATCH_HISTORY), dtype=float)
+        if banned is not None:
+            expected[banned] = -np.inf
+        np.testing.assert_allclose(scores[:, 0], np.sort(expected)[::-1][:5], atol=1e-9)
+        np.testing.assert_allclose(expected[rows], scores[:, 0], atol=1e-9)
+
+
+def test_bulk_endpoint_streams_one_line_per_user_and_a_summary(api_module, client, monkeypatch):
+    monkeypatch.setattr(api_module, 'BULK_USER_BLOCK', 2)
+    watched = [str(movie['id']) for movie in api_module.REAL_MOVIES_DATABASE[:50]]
+    users = [{'user_id': 'a', 'user_preferences': PREFS},
+             {'user_id': 'b', 'user_preferences': PREFS, 'watched_movies': watched},
+             {'user_preferences': {'horror': 9}}]
+    response = client.post('/recommend/bulk', json={'users': users, 'num_recommendations': 7})
+    assert response.status_code == 200
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert [line.get('index') for line in lines[:-1]] == [0, 1, 2]
+    assert [line['user_id'] for line in lines[:-1]] == ['a', 'b', None]
+    summary = lines[-1]['summary']
+    assert summary['users'] == 3 and summary['movies'] == len(api_module.REAL_MOVIES_DATABASE)
+
+    scorer = api_module.get_bulk_scorer()
+    prefs = api_module.clean_enhanced_preferences(api_module.UserPreferences(**PREFS).dict())
+    rows, _ = scorer.top_k([prefs], 7)[0]
+    assert [r['id'] for r in lines[0]['recommendations']] == [int(api_module.CATALOG_INDEX.ids[row]) for row in rows]
+    assert len(lines[1]['recommendations']) == 7
+    assert not {str(r['id']) for r in lines[1]['recommendations']} & set(watched)
+
+
+def test_bulk_endpoint_limits_users(client, api_module, monkeypatch):
+    monkeypatch.setattr(api_module, 'BULK_MAX_USERS', 1)
+    users = [{'user_preferences': PREFS}] * 2
+    assert client.post('/recommend/bulk', json={'users': users}).status_code == 413
+    assert client.post('/recommend/bulk', json={'users': []}).status_code == 422
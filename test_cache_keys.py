@@ -0,0 +1,50 @@
+#!/usr/bin/env python3
+"""
+Tests for the structural cache keys (cache_keys.py)
+Run with: python -m pytest -q test_cache_keys.py
+"""
+
+from cache_keys import movie_key, preference_vector_key, recommendation_key, request_key
+from performance_optimizer import PerformanceCache
+
+PREFS = {'action': 8, 'comedy': 4, 'romance': 3, 'thriller': 7, 'sci_fi': 9, 'drama': 5, 'horror': 2}
+
+
+def test_preference_key_quantizes_to_tenths():
+    assert preference_vector_key(PREFS) == preference_vector_key({**PREFS, 'action': 8.04})
+    assert preference_vector_key(PREFS) != preference_vector_key({**PREFS, 'action': 8.1})
+
+
+def test_scifi_alias_and_defaults():
+    assert preference_vector_key({'sci_fi': 9}) == preference_vector_key({'scifi': 9})
+    assert preference_vector_key({}) == preference_vector_key({'action': 5.0})
+
+
+def test_request_key_covers_history_and_strategy():
+    base = request_key(PREFS, None, 'adaptive')
+    assert base != request_key(PREFS, {'liked_ratio': 0.6, 'disliked_ratio': 0.2, 'watch_count': 25}, 'adaptive')
+    assert base != request_key(PREFS, None, 'fuzzy_dominant')
+
+
+def test_catalog_movies_are_keyed_by_id():
+    assert movie_key({'id': '42', 'title': 'A', 'genres': ['Drama']}) == movie_key({'id': 42, 'title': 'B'})
+
+
+def test_adhoc_movies_with_different_genres_or_popularity_do_not_collide():
+    horror = {'title': 'X', 'year': 2000, 'genres': ['Horror'], 'popularity': 50}
+    comedy = {'title': 'X', 'year': 2000, 'genres': ['Comedy'], 'popularity': 50}
+    popular = {'title': 'X', 'year': 2000, 'genres': ['Horror'], 'popularity': 90}
+    assert len({movie_key(horror), movie_key(comedy), movie_key(popular)}) == 3
+    assert movie_key(horror) == movie_key({**horror, 'genres': ['horror']})
+    assert movie_key({**horror, 'genres': ['Horror', 'Comedy']}) == movie_key({**horror, 'genres': ['Comedy', 'Horror']})
+
+
+def test_performance_cache_does_not_serve_another_payloads_score():
+    cache = PerformanceCache(max_size=10)
+    horror = {'title': 'X', 'year': 2000, 'genres': ['Horror'], 'popularity': 50}
+    comedy = {'title': 'X', 'year': 2000, 'genres': ['Comedy'], 'popularity': 50}
+    cache.put(PREFS, horror, {'hybrid_score': 9.0})
+    assert cache.get(PREFS, comedy) is None
+    assert cache.get(PREFS, dict(horror)) == {'hybrid_score': 9.0}
+    prefix = request_key(PREFS, None, 'adaptive')
+    assert recommendation_key(prefix, horror) != recommendation_key(prefix, comedy)
@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+Tests for closed-loop candidate tuning (candidate_tuning.py, /admin/tuning)
+Run with: python -m pytest -q test_candidate_tuning.py
+"""
+
+import os
+
+import pytest
+
+from candidate_tuning import MAX_SCALE, MIN_SCALE, SCALE_DOWN, SCALE_UP, CandidateTuner, recall_at_k
+
+
+def make_tuner(**kwargs):
+    return CandidateTuner(interval_s=3600, min_samples=5, **kwargs)
+
+
+def fill_window(tuner, total_ms, size=10, samples=5):
+    for _ in range(samples):
+        tuner.record(size, {'prefilter_ms': 1.0, 'scoring_ms': total_ms - 1, 'total_ms': total_ms})
+
+
+def test_recall_at_k():
+    assert recall_at_k([1, 2, 3], [3, 4, 1], 3) == pytest.approx(2 / 3)
+    assert recall_at_k([1, 2], [], 2) is None
+
+
+def test_slow_tier_shrinks_and_latency_wins_over_recall():
+    tuner = make_tuner(target_p95_ms=100)
+    fill_window(tuner, 500)
+    tuner.record_shadow(10, 0.5)
+    [adjustment] = tuner.step()
+    assert adjustment['tier'] == 'small' and tuner.tiers['small'].scale == pytest.approx(SCALE_DOWN)
+    assert tuner.tiers['medium'].scale == 1.0  # No samples, no step
+
+
+def test_low_recall_grows_only_with_new_shadow_runs():
+    tuner = make_tuner(target_p95_ms=1000, target_recall=0.9)
+    fill_window(tuner, 50)
+    tuner.record_shadow(10, 0.5)
+    assert len(tuner.step()) == 1
+    assert tuner.tiers['small'].scale == pytest.approx(SCALE_UP)
+
+    # A fast window without a shadow run holds the scale: the old recall is no new evidence
+    fill_window(tuner, 50)
+    assert tuner.step() == []
+    assert tuner.tiers['small'].scale == pytest.approx(SCALE_UP)
+    assert tuner.tiers['small'].last_recall == 0.5
+
+
+def test_scales_stay_in_bounds():
+    tuner = make_tuner()
+    tuner.update(scales={'small': 100, 'large': 0.0})
+    assert tuner.scales()['small'] == MAX_SCALE and tuner.scales()['large'] == MIN_SCALE
+    with pytest.raises(KeyError):
+        tuner.update(scales={'huge': 2})
+
+
+def test_admin_writes_are_refused_without_a_configured_token(client, monkeypatch):
+    monkeypatch.delenv('ADMIN_TOKEN', raising=False)
+    assert client.get('/admin/tuning').status_code == 200
+    assert client.post('/admin/tuning', json={'enabled': False}).status_code == 403
+    assert client.post('/admin/tuning', json={'enabled': False},
+                       headers={'X-Admin-Token': 'anything'}).status_code == 403
+
+
+def test_admin_token_guards_reads_and_writes(client, api_module, monkeypatch):
+    monkeypatch.setenv('ADMIN_TOKEN', 'secret')
+    assert client.get('/admin/tuning').status_code == 403
+    assert client.post('/admin/tuning', json={'target_recall': 0.8},
+                       headers={'X-Admin-Token': 'wrong'}).status_code == 403
+    previous = api_module.candidate_tuner.target_recall
+    try:
+        response = client.post('/admin/tuning', json={'target_recall': 0.8}, headers={'X-Admin-Token': 'secret'})
+        assert response.status_code == 200 and response.json()['target_recall'] == 0.8
+        assert client.post('/admin/tuning', json={'scales': {'huge': 2}},
+                           headers={'X-Admin-Token': 'secret'}).status_code == 400
+    finally:
+        api_module.candidate_tuner.update(target_recall=previous)
+
+
+def test_overrides_reach_other_workers_without_undoing_their_tuning(tmp_path):
+    path = str(tmp_path / 'candidate_tuning.json')
+    first = CandidateTuner(overrides_path=path)
+    second = CandidateTuner(overrides_path=path)
+    first.update(scales={'small': 2.0})
+    second.sync_overrides(force=True)
+    assert second.scales()['small'] == 2.0
+
+    second.tiers['medium'].scale = 0.5  # Tuned by the second worker's own control loop
+    first.update(target_recall=0.7)
+    second.sync_overrides(force=True)
+    assert second.target_recall == 0.7 and second.scales()['medium'] == 0.5
+
+    late = CandidateTuner(overrides_path=path)  # A worker started after the overrides
+    assert late.scales()['small'] == 2.0 and late.target_recall == 0.7
+    assert late.get_stats()['worker_pid'] == os.getpid()
+
+
+def test_admin_token_is_compared_in_constant_time(client, monkeypatch):
+    import api
+    compared = []
+    compare_digest = api.hmac.compare_digest
+    monkeypatch.setattr(api.hmac, 'compare_digest', lambda a, b: compared.append(1) or compare_digest(a, b))
+    monkeypatch.setenv('ADMIN_TOKEN', 'secret')
+    assert client.get('/admin/tuning', headers={'X-Admin-Token': 'secret'}).status_code == 200
+    assert compared
@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+Tests for the bitmap catalog index (catalog_index.py)
+Run with: python -m pytest -q test_catalog_index.py
+"""
+
+import pytest
+
+from catalog_index import CatalogIndex
+from conftest import synthetic_catalog
+
+MOVIES = synthetic_catalog(500, seed=7)
+
+
+@pytest.fixture(scope='module')
+def index():
+    return CatalogIndex(MOVIES)
+
+
+def matches(movie, genre=None, year_min=None, year_max=None, rating_min=None, rating_max=None, search=None):
+    year = int(movie['year'])
+    return ((genre is None or genre.lower() in [g.lower() for g in movie['genres']])
+            and (year_min is None or year >= year_min) and (year_max is None or year <= year_max)
+            and (rating_min is None or movie['rating'] >= rating_min)
+            and (rating_max is None or movie['rating'] <= rating_max)
+            and (search is None or search.lower() in movie['title'].lower()))
+
+
+@pytest.mark.parametrize('filters', [
+    {},
+    {'genre': 'drama'},
+    {'genre': 'Horror', 'year_min': 1960, 'year_max': 1999},
+    {'rating_min': 6.5, 'search': 'star'},
+])
+def test_facets_count_each_dimension_against_the_other_filters(index, filters):
+    facets = index.facet_counts(**filters)
+
+    others = {k: v for k, v in filters.items() if k != 'genre'}
+    expected_genres = {}
+    for movie in MOVIES:
+        if matches(movie, **others):
+            for genre in movie['genres']:
+                expected_genres[genre] = expected_genres.get(genre, 0) + 1
+    assert facets['genres'] == expected_genres
+
+    others = {k: v for k, v in filters.items() if k not in ('year_min', 'year_max')}
+    expected_decades = {}
+    for movie in MOVIES:
+        if matches(movie, **others):
+            decade = f"{int(movie['year']) // 10 * 10}s"
+            expected_decades[decade] = expected_decades.get(decade, 0) + 1
+    assert facets['decades'] == expected_decades
+
+    others = {k: v for k, v in filters.items() if k not in ('rating_min', 'rating_max')}
+    assert sum(facets['rating_buckets'].values()) == sum(matches(m, **others) for m in MOVIES)
+
+
+def test_filter_mask_and_genre_counts(index):
+    mask = index.filter_mask(genre='comedy', rating_max=5)
+    assert mask.tolist() == [matches(m, genre='comedy', rating_max=5) for m in MOVIES]
+    assert index.genre_counts()['Comedy'] == sum('Comedy' in m['genres'] for m in MOVIES)
+
+
+def test_rows_for_ids(index):
+    assert index.rows_for_ids([MOVIES[10]['id'], 2, MOVIES[0]['id']]).tolist() == [10, -1, 0]
+
+
+def test_browse_endpoint_reports_facets(client, api_module):
+    response = client.get('/movies/browse', params={'genre': 'Drama', 'per_page': 5, 'facets': 'true'})
+    assert response.status_code == 200
+    data = response.json()
+    assert data['facets'] == api_module.CATALOG_INDEX.facet_counts(genre='Drama')
+    assert data['pagination']['total_movies'] == data['facets']['genres']['Drama']
+
+
+def test_watched_titles_and_ids_resolve_to_a_compact_bitset(index):
+    watched = [MOVIES[3]['title'].upper(), f"{MOVIES[8]['title']} (1999)", str(MOVIES[20]['id']), '2', 'No Such Movie', '']
+    bitmap = index.watched_bitmap(watched)
+    assert bitmap.nbytes == (len(MOVIES) + 7) // 8
+    assert set(index.unpack(bitmap).nonzero()[0].tolist()) == {3, 8, 20}
+    rows = index.included_rows(bitmap, limit=25).tolist()
+    assert rows == [row for row in range(25) if row not in (3, 8, 20)]
+    assert index.included_rows(None, limit=4).tolist() == [0, 1, 2, 3]
+
+
+def test_watched_movies_never_come_back_from_enhanced(client, api_module):
+    from conftest import PREFS
+    first = client.post('/recommend/enhanced', json={'user_preferences': PREFS, 'num_recommendations': 10}).json()
+    watched = [r['title'] for r in first['recommendations'][:5]]
+    again = client.post('/recommend/enhanced', json={'user_preferences': PREFS, 'num_recommendations': 10,
+                                                      'watched_movies': watched}).json()
+    titles = [r['title'] for r in again['recommendations']]
+    assert len(titles) == 10 and not set(titles) & set(watched)
@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+Tests for the catalog load in the startup path (api.load_catalog)
+Run with: python -m pytest -q test_catalog_loading.py
+
+Each test imports the API in a fresh interpreter: the session fixtures
+share one api module whose catalog is already injected.
+"""
+
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).parent
+
+
+def run_python(code: str) -> dict:
+    result = subprocess.run([sys.executable, '-c', code], cwd=ROOT, capture_output=True, text=True, timeout=120)
+    assert result.returncode == 0, result.stderr[-2000:]
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def test_importing_the_api_loads_no_catalog():
+    report = run_python(
+        "import json, sys, api\n"
+        "print(json.dumps({'pandas': 'pandas' in sys.modules, 'movies': len(api.REAL_MOVIES_DATABASE),\n"
+        "                  'catalog': api.readiness.state('catalog')}))\n"
+    )
+    assert report == {'pandas': False, 'movies': 0, 'catalog': 'pending'}
+
+
+def test_load_catalog_builds_the_derived_state_once():
+    report = run_python(
+        "import json, api\n"
+        "from conftest import synthetic_catalog\n"
+        "reads = []\n"
+        "def read():\n"
+        "    reads.append(1)\n"
+        "    return synthetic_catalog(200), {'total_movies': 200, 'movies_with_posters': 200}\n"
+        "api._read_catalog = read\n"
+        "empty_version = api.CATALOG_VERSION\n"
+        "api.load_catalog()\n"
+        "movies = api.REAL_MOVIES_DATABASE\n"
+        "api.load_catalog()\n"
+        "print(json.dumps({'reads': len(reads), 'same_list': movies is api.REAL_MOVIES_DATABASE,\n"
+        "                  'movies': len(api.REAL_MOVIES_DATABASE), 'indexed': len(api.CATALOG_INDEX.ids),\n"
+        "                  'backend': api.CATALOG_BACKEND is api.CATALOG_INDEX,\n"
+        "                  'new_version': api.CATALOG_VERSION != empty_version,\n"
+        "                  'catalog': api.readiness.state('catalog')}))\n"
+    )
+    assert report == {'reads': 1, 'same_list': True, 'movies': 200, 'indexed': 200, 'backend': True,
+                      'new_version': True, 'catalog': 'ready'}
+
+
+def test_shared_catalog_is_served_without_a_private_copy(tmp_path):
+    report = run_python(
+        "import json, api\n"
+        "from conftest import synthetic_catalog\n"
+        "from shared_catalog import SharedCatalog, get_shared_catalog\n"
+        f"shared = get_shared_catalog(lambda: synthetic_catalog(200), {str(tmp_path)!r})\n"
+        "api._read_catalog = lambda: (shared, {'total_movies': 200, 'movies_with_posters': 200})\n"
+        "api.load_catalog()\n"
+        "print(json.dumps({'shared': isinstance(api.REAL_MOVIES_DATABASE, SharedCatalog),\n"
+        "                  'same': api.REAL_MOVIES_DATABASE is shared, 'indexed': len(api.CATALOG_INDEX.ids),\n"
+        "                  'title': api.REAL_MOVIES_DATABASE[5]['title'] == synthetic_catalog(200)[5]['title']}))\n"
+    )
+    assert report == {'shared': True, 'same': True, 'indexed': 200, 'title': True}
+
+
+def test_sqlite_backend_browses_without_the_in_memory_catalog(tmp_path):
+    report = run_python(
+        "import json, os, api, fast_complete_loader\n"
+        "from catalog_store import catalog_fingerprint\n"
+        "from conftest import synthetic_catalog\n"
+        "from fastapi.testclient import TestClient\n"
+        "os.environ['CATALOG_BACKEND'] = 'sqlite'\n"
+        f"os.environ['CATALOG_DB_PATH'] = {str(tmp_path / 'catalog.sqlite3')!r}\n"
+        "reads = []\n"
+        "def read():\n"
+        "    reads.append(1)\n"
+        "    return synthetic_catalog(200), {'total_movies': 200, 'movies_with_posters': 200}\n"
+        "api._read_catalog = read\n"
+        "fast_complete_loader.get_fast_complete_source = lambda: ('stamp', lambda: iter(synthetic_catalog(200)))\n"
+        "api.load_catalog()\n"
+        "client = TestClient(api.app)\n"
+        "browse = client.get('/movies/browse', params={'genre': 'drama', 'per_page': 5}).json()\n"
+        "genres = client.get('/genres').json()\n"
+        "report = {'reads': len(reads), 'movies': len(api.REAL_MOVIES_DATABASE), 'indexed': api.CATALOG_INDEX.size,\n"
+        "          'sqlite': api.CATALOG_BACKEND is api.CATALOG_STORE, 'browsed': len(browse['movies']),\n"
+        "          'genres': genres['total'] > 0, 'catalog': api.readiness.state('catalog'),\n"
+        "          'version': api.CATALOG_VERSION == catalog_fingerprint(synthetic_catalog(200))}\n"
+        "api.load_scoring_catalog()\n"
+        "report.update(scoring_reads=len(reads), scoring_movies=len(api.REAL_MOVIES_DATABASE),\n"
+        "              same_version=api.CATALOG_VERSION == catalog_fingerprint(synthetic_catalog(200)))\n"
+        "print(json.dumps(report))\n"
+    )
+    assert report == {'reads': 0, 'movies': 0, 'indexed': 0, 'sqlite': True, 'browsed': 5, 'genres': True,
+                      'catalog': 'ready', 'version': True,
+                      'scoring_reads': 1, 'scoring_movies': 200, 'same_version': True}
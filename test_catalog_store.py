@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+Tests for the SQLite FTS5 catalog backend (catalog_store.py)
+Run with: python -m pytest -q test_catalog_store.py
+
+The store serves the same contract as the in-memory CatalogIndex, so every
+query is checked against the index over the same catalog.
+"""
+
+import asyncio
+
+import pytest
+
+from catalog_index import CatalogIndex
+from catalog_store import SQLiteCatalogStore, catalog_fingerprint, source_fingerprint
+from conftest import synthetic_catalog
+
+MOVIES = synthetic_catalog(400, seed=11)
+
+FILTERS = [
+    {},
+    {'genre': 'thriller'},
+    {'genre': 'Drama', 'year_min': 1950, 'rating_min': 4.55},
+    {'search': 'star'},        # FTS5 trigram
+    {'search': 'ma', 'year_max': 1990},  # Too short for trigrams: substring scan
+]
+
+
+@pytest.fixture(scope='module')
+def backends(tmp_path_factory):
+    store = SQLiteCatalogStore.build(MOVIES, str(tmp_path_factory.mktemp('catalog') / 'catalog.sqlite3'), pool_size=2)
+    yield store, CatalogIndex(MOVIES)
+    store.close()
+
+
+def walk(backend, sort_by, **filters):
+    ids, after = [], None
+    while True:
+        result = backend.browse(per_page=23, sort_by=sort_by, after=after, **filters)
+        ids += [m['id'] for m in result['movies']]
+        if result['last'] is None:
+            return ids, result['total']
+        after = result['last']
+
+
+@pytest.mark.parametrize('filters', FILTERS)
+@pytest.mark.parametrize('sort_by', ['popularity', 'rating', 'year', 'title'])
+def test_keyset_walk_matches_the_memory_index(backends, filters, sort_by):
+    store, index = backends
+    assert walk(store, sort_by, **filters) == walk(index, sort_by, **filters)
+
+
+@pytest.mark.parametrize('filters', FILTERS)
+def test_offset_pages_and_facets_match_the_memory_index(backends, filters):
+    store, index = backends
+    page = store.browse(page=2, per_page=10, **filters)
+    expected = index.browse(page=2, per_page=10, **filters)
+    assert [m['id'] for m in page['movies']] == [m['id'] for m in expected['movies']]
+    assert page['movies'][:1] == expected['movies'][:1]
+    assert store.facet_counts(**filters) == index.facet_counts(**filters)
+
+
+def test_genre_counts_and_async_queries(backends):
+    store, index = backends
+    assert store.has_fts
+    assert store.genre_counts() == index.genre_counts()
+    result = asyncio.run(store.run('browse', per_page=5, genre='comedy'))
+    assert result['total'] == index.browse(genre='comedy')['total']
+
+
+def test_database_is_reloaded_only_when_the_catalog_changes(tmp_path):
+    path = str(tmp_path / 'catalog.sqlite3')
+    SQLiteCatalogStore.build(MOVIES[:50], path).close()
+    assert SQLiteCatalogStore._is_current(path, catalog_fingerprint(MOVIES[:50]))
+    assert not SQLiteCatalogStore._is_current(path, catalog_fingerprint(MOVIES[:51]))
+    store = SQLiteCatalogStore.build(MOVIES[:51], path)
+    assert store.size == 51
+    store.close()
+
+
+def mixed_case_catalog():
+    """Genres spelled several ways ('Drama', 'drama', ' DRAMA') across the catalog."""
+    movies = synthetic_catalog(300, seed=4)
+    spellings = [str, str.lower, lambda genre: f" {genre.upper()}"]
+    for i, movie in enumerate(movies):
+        movie['genres'] = [spellings[(i + j) % 3](genre) for j, genre in enumerate(movie['genres'])]
+    return movies
+
+
+@pytest.mark.parametrize('genre', ['Drama', 'DRAMA', ' sci-fi ', 'Film-Noir'])
+def test_backends_normalize_genres_the_same_way(tmp_path, genre):
+    movies = mixed_case_catalog()
+    store = SQLiteCatalogStore.build(movies, str(tmp_path / 'catalog.sqlite3'), pool_size=1)
+    index = CatalogIndex(movies)
+    try:
+        assert store.genres == index.genres
+        assert store.genre_counts() == index.genre_counts()
+        assert len(index.genres) == len({g.strip().lower() for m in movies for g in m['genres']})
+        for sort_by in ('popularity', 'title'):
+            assert walk(store, sort_by, genre=genre) == walk(index, sort_by, genre=genre)
+        assert walk(index, 'popularity', genre=genre)[1] > 0
+        filters = {'genre': genre, 'year_min': 1960, 'search': 'a'}
+        assert store.facet_counts(**filters) == index.facet_counts(**filters)
+    finally:
+        store.close()
+
+
+def test_store_streams_from_its_source_and_reattaches_without_reading_it(tmp_path):
+    path = str(tmp_path / 'catalog.sqlite3')
+    reads = []
+
+    def load():
+        reads.append(1)
+        return iter(MOVIES)
+
+    store = SQLiteCatalogStore.build_from_source(load, 'movies.parquet:1', path, pool_size=1)
+    assert store.size == len(MOVIES)
+    assert store.catalog_version == catalog_fingerprint(MOVIES)
+    store.close()
+
+    store = SQLiteCatalogStore.build_from_source(load, 'movies.parquet:1', path, pool_size=1)
+    assert reads == [1] and store.size == len(MOVIES)
+    store.close()
+    assert not SQLiteCatalogStore._is_current(path, source_fingerprint('movies.parquet:2'))
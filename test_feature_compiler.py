@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+Tests for the schema-driven ANN feature compiler (models/feature_compiler.py)
+Run with: python -m pytest -q test_feature_compiler.py
+"""
+
+import numpy as np
+import pytest
+
+from conftest import synthetic_catalog
+from models.feature_compiler import FeatureCompiler
+from scoring_inputs import prepare_enhanced_movie_info
+
+CORE = ['action', 'comedy', 'drama', 'horror', 'romance', 'scifi', 'thriller']
+SKLEARN_FEATURES = ([f"{g}_pref" for g in CORE] + ['movie_rating', 'movie_year', 'movie_popularity', 'movie_runtime']
+                    + [f"genre_{g}" for g in CORE])
+MOVIES = [prepare_enhanced_movie_info(movie) for movie in synthetic_catalog(300, seed=9)]
+USERS = [{'action': 8, 'scifi': 2, 'drama': 6.5}, {}, {g: i + 1.5 for i, g in enumerate(CORE)}]
+
+
+def sklearn_reference_row(user_prefs, movie_info):
+    """The per-row builder the scikit-learn model was trained with."""
+    features = [user_prefs.get(genre, 5.0) for genre in CORE]
+    features += [
+        movie_info.get('rating', 7.0),
+        min(max(movie_info.get('year', 2000), 1900), 2025),
+        min(max(movie_info.get('popularity', 50), 0), 100),
+        min(max(movie_info.get('runtime', 120), 60), 300)
+    ]
+    movie_genres = [g.lower().replace('-', '').replace(' ', '') for g in movie_info.get('genres', [])]
+    features += [1.0 if any(g in mg or mg in g for mg in movie_genres) else 0.0 for g in CORE]
+    return features
+
+
+def sklearn_compiler():
+    return FeatureCompiler(SKLEARN_FEATURES, genre_matcher='contains',
+                           clip={'movie_year': (1900, 2025), 'movie_popularity': (0, 100), 'movie_runtime': (60, 300)})
+
+
+@pytest.mark.parametrize('user', USERS)
+def test_batch_matrix_equals_the_per_row_builder(user):
+    movies = MOVIES + [{'title': 'Bare', 'genres': ['Sci-Fi', 'Film-Noir']}, {'title': 'Old', 'year': 1850, 'runtime': 30}]
+    expected = np.array([sklearn_reference_row(user, movie) for movie in movies], dtype=np.float32)
+    np.testing.assert_array_equal(sklearn_compiler().transform(user, movies), expected)
+
+
+def test_many_users_and_pairs_match_single_user_transforms():
+    compiler = sklearn_compiler()
+    stacked = compiler.transform_many(USERS, MOVIES[:50])
+    np.testing.assert_array_equal(stacked, np.vstack([compiler.transform(u, MOVIES[:50]) for u in USERS]))
+
+    users = [USERS[i % len(USERS)] for i in range(40)]
+    pairs = compiler.transform_pairs(users, MOVIES[:40])
+    expected = np.vstack([compiler.transform(u, [m]) for u, m in zip(users, MOVIES[:40])])
+    np.testing.assert_array_equal(pairs, expected)
+
+
+def test_history_columns_normalization_and_unknown_names():
+    compiler = FeatureCompiler(['user_action', 'liked_ratio', 'watch_count_norm', 'popularity', 'year_norm', 'mystery'])
+    movie = {'popularity': 80, 'year': 1965}
+    default = compiler.transform({'action': 9}, [movie])[0]
+    np.testing.assert_allclose(default, [9, 0.5, 0.1, 0.8, 0.5, 0], rtol=1e-6)
+    history = compiler.transform({}, [movie], {'liked_ratio': 0.9, 'watch_count': 99})[0]
+    np.testing.assert_allclose(history[:3], [5.0, 0.9, 1.0], rtol=1e-6)
+
+
+def test_mapped_preferences_blend_extended_genres():
+    compiler = FeatureCompiler(['user_action', 'user_thriller'], preferences='mapped')
+    row = compiler.transform({'action': 10, 'adventure': 0, 'thriller': 4}, [{}])[0]
+    np.testing.assert_allclose(row, [7.0, 4.0])
+
+
+def test_output_buffer_and_options_are_validated():
+    compiler = sklearn_compiler()
+    out = np.empty((3, compiler.n_features), dtype=np.float32)
+    assert compiler.transform({}, MOVIES[:3], out=out) is out
+    with pytest.raises(ValueError):
+        compiler.transform({}, MOVIES[:2], out=out)
+    with pytest.raises(ValueError):
+        FeatureCompiler(SKLEARN_FEATURES, genre_matcher='fuzzy')
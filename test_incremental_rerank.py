@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+"""
+Tests for incremental re-ranks from a base result handle (/recommend/enhanced with base_handle)
+Run with: python -m pytest -q test_incremental_rerank.py
+"""
+
+import pytest
+
+from conftest import PREFS
+
+BASE_PREFS = dict(PREFS, western=5)
+
+
+def full_ranking(api, prefs, watched=(), num_recommendations=10):
+    request = api.EnhancedRecommendationRequest(user_preferences=api.UserPreferences(**prefs),
+                                                num_recommendations=num_recommendations, watched_movies=list(watched))
+    return [rec.id for rec in api.compute_enhanced_recommendations(request).recommendations]
+
+
+def rerank(client, base, delta, watched=()):
+    return client.post('/recommend/enhanced', json={
+        'user_preferences': BASE_PREFS, 'num_recommendations': 10, 'base_handle': base['result_handle'],
+        'preference_delta': delta, 'watched_movies': list(watched)
+    }).json()
+
+
+@pytest.fixture
+def base(client):
+    response = client.post('/recommend/enhanced', json={'user_preferences': BASE_PREFS, 'num_recommendations': 10})
+    assert response.status_code == 200
+    return response.json()
+
+
+@pytest.mark.parametrize('delta', [{'western': 6}, {'western': 8}, {'thriller': 9}, {'comedy': 5}])
+def test_incremental_ranking_matches_the_full_pipeline(api_module, client, base, delta):
+    response = rerank(client, base, delta)
+    assert response['rescored_movies'] is not None
+    ids = [rec['id'] for rec in response['recommendations']]
+    assert ids == full_ranking(api_module, {**BASE_PREFS, **delta})
+
+
+def test_rescoring_stays_within_the_full_pipelines_buffer(api_module, client, base):
+    response = rerank(client, base, {'western': 6})
+    buffer_target = 10 * api_module.enhanced_buffer_multiplier(10)
+    assert 0 < response['rescored_movies'] <= buffer_target
+    assert response['rescored_movies'] < api_module.enhanced_max_candidates(10, len(api_module.REAL_MOVIES_DATABASE))
+
+
+def test_newly_watched_movies_are_excluded(api_module, client, base):
+    watched = [str(rec['id']) for rec in base['recommendations'][:2]]
+    response = rerank(client, base, {'western': 6}, watched)
+    ids = [rec['id'] for rec in response['recommendations']]
+    assert not set(map(int, watched)) & set(ids)
+    assert ids == full_ranking(api_module, {**BASE_PREFS, 'western': 6}, watched)
+
+
+def test_watched_only_change_drops_the_movie(client, base):
+    watched = str(base['recommendations'][0]['id'])
+    response = rerank(client, base, {}, [watched])
+    assert int(watched) not in [rec['id'] for rec in response['recommendations']]
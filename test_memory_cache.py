@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+"""
+Tests for the shared LRU+TTL cache (memory_cache.py)
+Run with: python -m pytest -q test_memory_cache.py
+"""
+
+import memory_cache
+from memory_cache import LRUCache
+
+
+def test_least_recently_used_entry_is_evicted_first():
+    cache = LRUCache(max_entries=3)
+    for key in 'abc':
+        cache.put(key, key.upper())
+    assert cache.get('a') == 'A'
+    cache.put('d', 'D')
+    assert cache.get('b') is None
+    assert [cache.get(k) for k in 'acd'] == ['A', 'C', 'D']
+    assert cache.namespace_stats('default')['evictions'] == 1
+
+
+def test_byte_budget_is_enforced_with_given_sizes():
+    cache = LRUCache(max_bytes=1000)
+    for i in range(10):
+        cache.put(i, 'x', size=300)
+    stats = cache.get_stats()
+    assert stats['bytes'] <= 1000 and stats['entries'] == 3
+    assert [cache.get(i) for i in (6, 7, 8, 9)] == [None, 'x', 'x', 'x']
+    cache.put(7, 'y', size=50)  # Replacing an entry releases its old size
+    assert cache.get_stats()['bytes'] == 650
+
+
+def test_entries_expire_after_their_ttl(monkeypatch):
+    clock = [100.0]
+    monkeypatch.setattr(memory_cache.time, 'monotonic', lambda: clock[0])
+    cache = LRUCache(ttl_seconds=10)
+    cache.put('a', 1)
+    cache.put('b', 2, ttl_seconds=60)
+    clock[0] += 11
+    assert cache.get('a') is None and cache.get('b') == 2
+    assert cache.get_many(['a', 'b']) == {'b': 2}
+    stats = cache.namespace_stats('default')
+    assert stats['expirations'] == 1 and stats['entries'] == 1
+
+
+def test_namespaces_share_the_budget_but_count_separately():
+    cache = LRUCache(max_entries=4)
+    cache.put_many([(i, i) for i in range(3)], 'predictions')
+    cache.put('k', 'v', 'explanations')
+    assert cache.get_many(range(4), 'predictions') == {0: 0, 1: 1, 2: 2}
+    assert cache.get('k', 'predictions') is None and cache.get('k', 'explanations') == 'v'
+    cache.clear('predictions')
+    assert len(cache) == 1
+    stats = cache.get_stats()['namespaces']
+    assert 'predictions' not in stats and stats['explanations']['hits'] == 1
@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+"""
+Tests for cursor pagination and ranked result sessions (pagination.py)
+Run with: python -m pytest -q test_pagination.py
+"""
+
+import pytest
+
+from catalog_index import CatalogIndex
+from conftest import synthetic_catalog
+from pagination import CursorError, decode_cursor, encode_cursor, filter_fingerprint
+
+
+def test_cursor_round_trip_and_malformed_tokens():
+    payload = {'k': -87.5, 'id': 42, 'p': 3, 'f': 'abc'}
+    token = encode_cursor(payload)
+    assert '=' not in token and decode_cursor(token) == payload
+    for bad in ('not-base64!', encode_cursor([1, 2])[:-2] + 'xx', ''):
+        with pytest.raises(CursorError):
+            decode_cursor(bad)
+
+
+def test_filter_fingerprint_ignores_unset_filters_and_order():
+    assert filter_fingerprint({'genre': 'Drama', 'search': None, 'sort_by': 'year'}) == \
+        filter_fingerprint({'sort_by': 'year', 'genre': 'Drama'})
+    assert filter_fingerprint({'genre': 'Drama'}) != filter_fingerprint({'genre': 'Comedy'})
+
+
+@pytest.mark.parametrize('sort_by', ['popularity', 'rating', 'year', 'title', 'unsorted'])
+def test_keyset_pages_match_offset_pages(sort_by):
+    movies = synthetic_catalog(300, seed=3)
+    for movie in movies[::3]:
+        movie['popularity'] = 50.0  # Ties are broken by movie id
+    index = CatalogIndex(movies)
+
+    offset_ids = []
+    page = 1
+    while True:
+        result = index.browse(page=page, per_page=17, sort_by=sort_by, genre='drama')
+        offset_ids += [m['id'] for m in result['movies']]
+        if result['last'] is None:
+            break
+        page += 1
+
+    keyset_ids = []
+    after = None
+    while True:
+        result = index.browse(per_page=17, sort_by=sort_by, after=after, genre='drama')
+        keyset_ids += [m['id'] for m in result['movies']]
+        if result['last'] is None:
+            break
+        after = result['last']
+
+    assert keyset_ids == offset_ids
+    assert len(keyset_ids) == result['total'] == sum('Drama' in m['genres'] for m in movies)
+
+
+@pytest.mark.parametrize('sort_by', ['popularity', 'title'])
+def test_seek_binary_searches_the_cached_sort_keys(sort_by, monkeypatch):
+    index = CatalogIndex(synthetic_catalog(300, seed=3))
+    order = index.sort_order(sort_by)
+
+    def rebuilt(_):
+        raise AssertionError("sort key rebuilt for a cursor")
+
+    monkeypatch.setattr(index, '_sort_key', rebuilt)
+    for position in (0, 150, 298):
+        row = int(order[position])
+        assert index.seek(sort_by, index.cursor_key(row, sort_by), int(index.ids[row])) == position + 1
+
+
+def test_browse_endpoint_walks_cursors_and_rejects_foreign_ones(client):
+    params = {'genre': 'Comedy', 'sort_by': 'rating', 'per_page': 40}
+    first = client.get('/movies/browse', params=params).json()
+    seen = [m['id'] for m in first['movies']]
+    cursor = first['pagination']['next_cursor']
+    while cursor:
+        data = client.get('/movies/browse', params={**params, 'cursor': cursor}).json()
+        seen += [m['id'] for m in data['movies']]
+        cursor = data['pagination']['next_cursor']
+    assert len(seen) == len(set(seen)) == first['pagination']['total_movies']
+
+    foreign = client.get('/movies/browse', params={**params, 'cursor': first['pagination']['next_cursor'],
+                                                    'genre': 'Horror'})
+    assert foreign.status_code == 400
+
+
+def test_enhanced_cursor_pages_through_the_stored_ranking(client):
+    from conftest import PREFS
+    first = client.post('/recommend/enhanced', json={'user_preferences': PREFS, 'num_recommendations': 10}).json()
+    assert first['next_cursor'] and first['total_ranked'] > 10
+    second = client.post('/recommend/enhanced', json={'user_preferences': PREFS, 'num_recommendations': 10,
+                                                       'cursor': first['next_cursor']}).json()
+    by_handle = client.get(f"/recommend/enhanced/results/{first['result_handle']}",
+                           params={'offset': 10, 'limit': 10}).json()
+    titles = [r['title'] for r in second['recommendations']]
+    assert titles == [r['title'] for r in by_handle['recommendations']]
+    assert not set(titles) & {r['title'] for r in first['recommendations']}
+
+
+def test_ranked_sessions_are_compact_and_sliced():
+    from pagination import RankedResultStore
+    store = RankedResultStore()
+    handle = store.put([5, 9, 2], [[7.5, 6.0, 8.0], [7.0, 6.5, 7.5], [6.0, 6.0, 6.0]], {'n': 3})
+    session = store.get(handle)
+    assert session.ids.dtype.name == 'int32' and session.scores.dtype.name == 'float32'
+    ids, scores = session.page(1, 5)
+    assert ids.tolist() == [9, 2] and scores.shape == (2, 3)
+    assert session.context == {'n': 3}
+
+
+def test_ranked_sessions_expire_and_evict_least_recently_used(monkeypatch):
+    import pagination
+    clock = [1000.0]
+    monkeypatch.setattr(pagination.time, 'monotonic', lambda: clock[0])
+    store = pagination.RankedResultStore(max_bytes=3 * (400 * 4 * 4 + 512), ttl_seconds=60)
+    ids, scores = list(range(400)), [[1.0, 2.0, 3.0]] * 400
+    a, b, c = (store.put(ids, scores) for _ in range(3))
+    store.get(a)  # b is now the least recently used
+    d = store.put(ids, scores)
+    assert store.get(b) is None and store.get(a) is not None and store.get(d) is not None
+    assert store.get_stats()['evicted'] == 1
+
+    clock[0] += 61
+    assert store.get(c) is None
+    assert store.get_stats()['expired'] >= 1
+
+
+def test_put_expires_lazily_from_the_lru_head(monkeypatch):
+    import pagination
+    clock = [0.0]
+    monkeypatch.setattr(pagination.time, 'monotonic', lambda: clock[0])
+    store = pagination.RankedResultStore(ttl_seconds=10)
+    old = [store.put([i], [[1.0]]) for i in range(3)]
+    clock[0] += 5
+    fresh = store.put([9], [[1.0]])
+    store.get(old[2])  # Recently used but still expiring first
+    clock[0] += 6
+    store.put([10], [[1.0]])
+    # The head's expired sessions are dropped; the one moved behind the fresh session waits for its get
+    assert store.get_stats()['sessions'] == 3 and store.get_stats()['expired'] == 2
+    assert store.get(old[2]) is None and store.get(fresh) is not None
+
+
+def test_pinned_sessions_outlive_ttl_and_budget(monkeypatch):
+    import pagination
+    clock = [0.0]
+    monkeypatch.setattr(pagination.time, 'monotonic', lambda: clock[0])
+    store = pagination.RankedResultStore(max_bytes=1, ttl_seconds=1)
+    pinned = store.put([1, 2], [[1.0], [2.0]])
+    assert store.pin(pinned)
+    store.put([3], [[3.0]])
+    store.put([4], [[4.0]])
+    clock[0] += 10
+    assert store.get(pinned).ids.tolist() == [1, 2]
+    store.unpin(pinned)
+    assert store.get(pinned) is None
+
+
+def test_deferred_rankings_install_under_their_handles():
+    from pagination import DeferredRankingStore, RankedResultStore
+    deferred = DeferredRankingStore()
+    handle = deferred.put([3, 1], [[9.0], [8.0]], {'k': 1})
+    store = RankedResultStore()
+    deferred.install(store)
+    assert store.get(handle).ids.tolist() == [3, 1] and store.get(handle).context == {'k': 1}
+
+
+def test_expired_handle_answers_410(client):
+    assert client.get('/recommend/enhanced/results/0123456789abcdef').status_code == 410
@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+Tests for NDJSON pair streaming (pair_streaming.py, /recommend/pairs/stream)
+Run with: python -m pytest -q test_pair_streaming.py
+"""
+
+import asyncio
+import json
+
+import numpy as np
+
+from conftest import PREFS
+from pair_streaming import NDJSONPairStreamResponse, PairStreamError
+
+
+def parse_pair(obj):
+    if 'x' not in obj:
+        raise PairStreamError("missing x")
+    return obj['x']
+
+
+async def double(pairs):
+    return [{'score': x * 2} for x in pairs]
+
+
+def run_stream(response, body_pieces, disconnect_after=None):
+    """Drive the response over fake ASGI channels; returns the lines of each body message sent."""
+    messages = [{'type': 'http.request', 'body': piece, 'more_body': i < len(body_pieces) - 1}
+                for i, piece in enumerate(body_pieces)]
+    if disconnect_after is not None:
+        messages = messages[:disconnect_after] + [{'type': 'http.disconnect'}]
+    incoming = iter(messages)
+    sent = []
+
+    async def receive():
+        return next(incoming)
+
+    async def send(message):
+        if message['type'] == 'http.response.body':
+            sent.append([json.loads(line) for line in message['body'].decode().splitlines()])
+
+    asyncio.run(response({'type': 'http'}, receive, send))
+    return sent
+
+
+def test_results_keep_input_order_with_error_lines():
+    body = b'{"x": 1}\nnot json\n{"y": 2}\n[1]\n\n{"x": 3}'
+    sent = run_stream(NDJSONPairStreamResponse(parse_pair, double, chunk_size=2), [body])
+    lines = [line for message in sent for line in message]
+    assert lines[:4] == [{'line': 1, 'score': 2}, {'line': 2, 'error': lines[1]['error']},
+                         {'line': 3, 'id': None, 'error': 'missing x'}, {'line': 4, 'error': 'expected a JSON object'}]
+    assert lines[4] == {'line': 6, 'score': 6}
+    assert lines[-1]['summary']['pairs'] == 2 and lines[-1]['summary']['errors'] == 3
+
+
+def test_a_stream_of_bad_lines_is_flushed_chunk_by_chunk():
+    body = b'garbage\n' * 50000
+    pieces = [body[i:i + 8192] for i in range(0, len(body), 8192)]
+    sent = run_stream(NDJSONPairStreamResponse(parse_pair, double, chunk_size=4), pieces)
+    assert max(len(message) for message in sent[:-1]) <= 4
+    assert len(sent) == 50000 // 4 + 1
+    assert sent[-1][0]['summary']['errors'] == 50000
+
+
+def test_long_lines_are_skipped_with_an_error():
+    body = b'{"x": 1}\n' + b'{"x": "' + b'a' * 500 + b'"}\n{"x": 2}\n'
+    sent = run_stream(NDJSONPairStreamResponse(parse_pair, double, max_line_bytes=100), [body[:300], body[300:]])
+    lines = [line for message in sent for line in message]
+    assert [line.get('score') for line in lines[:3]] == [2, None, 4]
+    assert 'longer than 100 bytes' in lines[1]['error']
+
+
+def test_failed_chunk_gets_an_error_line_per_pair():
+    async def broken(pairs):
+        raise RuntimeError("boom")
+
+    sent = run_stream(NDJSONPairStreamResponse(parse_pair, broken), [b'{"x": 1}\n{"x": 2}\n'])
+    assert [line['error'] for line in sent[0]] == ['scoring failed: boom'] * 2
+
+
+def test_disconnect_stops_without_a_summary():
+    summaries = []
+    response = NDJSONPairStreamResponse(parse_pair, double, chunk_size=1, on_finish=summaries.append)
+    sent = run_stream(response, [b'{"x": 1}\n', b'{"x": 2}\n', b'{"x": 3}\n'], disconnect_after=1)
+    assert sent == [[{'line': 1, 'score': 2}]]
+    assert summaries[0]['disconnected'] is True
+
+
+def test_endpoint_scores_catalog_pairs_like_recommend_movies(client, api_module):
+    movies = api_module.REAL_MOVIES_DATABASE[:5]
+    body = ''.join(json.dumps({'id': i, 'user_preferences': PREFS, 'movie_id': movie['id']}) + '\n'
+                   for i, movie in enumerate(movies))
+    body += json.dumps({'id': 'bad', 'user_preferences': PREFS, 'movie_id': 2}) + '\n'
+    response = client.post('/recommend/pairs/stream', content=body)
+    assert response.status_code == 200
+    lines = [json.loads(line) for line in response.text.splitlines()]
+
+    infos = [api_module.prepare_enhanced_movie_info(movie) for movie in movies]
+    user_prefs = api_module.UserPreferences(**PREFS).dict(exclude_none=True)
+    expected = np.round(api_module.fuzzy_system.recommend_movies(user_prefs, infos), 2)
+    assert [line['hybrid_score'] for line in lines[:5]] == expected.tolist()
+    assert lines[5] == {'line': 6, 'id': 'bad', 'error': 'Unknown movie_id 2'}
+    assert lines[6]['summary']['pairs'] == 5
@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+Tests for batch-native scoring in OptimizedHybridSystem (performance_optimizer.py)
+Run with: python -m pytest -q test_performance_optimizer.py
+"""
+
+import pytest
+
+from conftest import PREFS, synthetic_catalog
+from performance_optimizer import OptimizedHybridSystem
+from scoring_inputs import prepare_enhanced_movie_info
+
+MOVIES = [prepare_enhanced_movie_info(movie) for movie in synthetic_catalog(40, seed=5)]
+TIMING_FIELDS = ('from_cache', 'processing_time_ms', 'batch_processing_time_ms')
+
+
+class CountingSystem:
+    """Hybrid system stand-in recording how it was called."""
+
+    def __init__(self, batch=True):
+        self.ann_pending = False
+        self.single_calls = 0
+        self.batches = []
+        if not batch:
+            self.recommend_many = None
+
+    def recommend(self, user_preferences, movie, watch_history=None, strategy='adaptive'):
+        self.single_calls += 1
+        return {'fuzzy_score': float(len(movie['genres'])), 'ann_score': None, 'hybrid_score': movie['rating']}
+
+    def recommend_many(self, user_preferences, movies, watch_history=None, strategy='adaptive'):
+        self.batches.append(len(movies))
+        return [self.recommend(user_preferences, movie, watch_history, strategy) for movie in movies]
+
+
+def strip(result):
+    return {k: v for k, v in result.items() if k not in TIMING_FIELDS}
+
+
+def test_batch_scores_distinct_misses_in_one_call_then_serves_from_cache():
+    system = CountingSystem()
+    optimized = OptimizedHybridSystem(system)
+    batch = MOVIES[:10] + MOVIES[:5]  # Duplicates are scored once
+    first = optimized.get_batch_recommendations(PREFS, batch)
+    assert system.batches == [10]
+    assert [r['from_cache'] for r in first] == [False] * 15
+    assert first[0]['movie_title'] == MOVIES[0]['title'] and first[0]['agreement'] is None
+
+    second = optimized.get_batch_recommendations(PREFS, MOVIES[5:15])
+    assert system.batches == [10, 5]
+    assert [r['from_cache'] for r in second] == [True] * 5 + [False] * 5
+    assert [strip(r) for r in second[:5]] == [strip(r) for r in first[5:10]]
+
+
+def test_single_and_batch_paths_share_the_cache():
+    optimized = OptimizedHybridSystem(CountingSystem())
+    single = optimized.get_recommendation(PREFS, MOVIES[0], strategy='fuzzy_dominant')
+    [batched] = optimized.get_batch_recommendations(PREFS, [MOVIES[0]], strategy='fuzzy_dominant')
+    assert batched['from_cache'] and strip(batched) == strip(single)
+    [other] = optimized.get_batch_recommendations(PREFS, [MOVIES[0]], strategy='adaptive')
+    assert not other['from_cache']
+
+
+def test_systems_without_recommend_many_are_scored_per_movie():
+    system = CountingSystem(batch=False)
+    results = OptimizedHybridSystem(system).get_batch_recommendations(PREFS, MOVIES[:4])
+    assert system.single_calls == 4 and len(results) == 4
+
+
+def test_results_scored_while_the_ann_loads_are_not_cached():
+    system = CountingSystem()
+    system.ann_pending = True
+    optimized = OptimizedHybridSystem(system)
+    optimized.get_batch_recommendations(PREFS, MOVIES[:3])
+    optimized.get_batch_recommendations(PREFS, MOVIES[:3])
+    assert system.batches == [3, 3]
+
+
+def test_fuzzy_only_hybrid_batch_matches_single_recommendations():
+    from models.hybrid_system import HybridRecommendationSystem
+    hybrid = HybridRecommendationSystem(load_ann=False)
+    hybrid.ann_pending = False
+    batch = hybrid.recommend_many(PREFS, MOVIES[:12])
+    for movie, result in zip(MOVIES[:12], batch):
+        single = hybrid.recommend(PREFS, movie)
+        assert result['hybrid_score'] == pytest.approx(single['hybrid_score'], abs=1e-6)
+        assert result['fuzzy_score'] == pytest.approx(single['fuzzy_score'], abs=1e-6)
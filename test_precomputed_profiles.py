@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+Tests for precomputed profile responses (precomputed_profiles.py)
+Run with: python -m pytest -q test_precomputed_profiles.py
+"""
+
+import pytest
+
+from cache_keys import PREFERENCE_FIELDS
+from precomputed_profiles import PrecomputedResponses, profile_preferences
+
+
+def test_neutral_and_single_genre_high_profiles():
+    profiles = dict(profile_preferences((5.0, 8.0, 10.0)))
+    assert len(profiles) == 1 + 2 * len(PREFERENCE_FIELDS)  # The default value is not "high"
+    assert profiles['neutral'] == {}
+    assert profiles['action=8'] == {'action': 8.0}
+    assert profiles['sci_fi=10'] == {'sci_fi': 10.0, 'scifi': 10.0}
+
+
+def test_sets_are_valid_for_one_catalog_version():
+    store = PrecomputedResponses()
+    replaced = []
+
+    def broken():
+        raise RuntimeError("boom")
+
+    assert store.build('v1', [('a', lambda: 'A'), ('b', lambda: None), ('c', broken)]) == 1
+    assert store.get('a', 'v1') == 'A' and store.get('b', 'v1') is None and store.get('a', 'v2') is None
+    assert store.build('v1', [('a', lambda: 'other')]) == 1  # Already built for v1
+    assert store.get('a', 'v1') == 'A'
+
+    store.build('v2', [('a', lambda: 'A2')], on_replace=replaced.append)
+    assert replaced == [{'a': 'A'}] and store.get('a', 'v2') == 'A2' and store.get('a', 'v1') is None
+    stats = store.get_stats()
+    assert stats['build_errors'] == 1 and stats['builds'] == 2 and stats['version'] == 'v2'
+
+
+def test_background_build_installs_the_set():
+    store = PrecomputedResponses()
+    store.build_in_background('v1', lambda: [('k', lambda: 42)]).join(10)
+    assert store.get('k', 'v1') == 42
+
+
+@pytest.fixture
+def precomputed(api_module, monkeypatch):
+    monkeypatch.setattr(api_module, 'PRECOMPUTED_PAGE_SIZES', (10,))
+    monkeypatch.setattr(api_module, 'DEFAULT_HIGH_VALUES', (9.0,))
+    api_module.start_precomputing_profiles(background=False)
+    yield api_module.precomputed_responses
+    api_module._release_precomputed(api_module.precomputed_responses._current[1])
+    api_module.precomputed_responses.clear()
+
+
+@pytest.mark.parametrize('prefs', [{}, {'horror': 9}, {'sci_fi': 9}])
+def test_profile_requests_are_served_from_the_precomputed_set(client, api_module, precomputed, prefs):
+    assert len(precomputed) == 1 + len(PREFERENCE_FIELDS)
+    hits = precomputed.stats['hits']
+    served = client.post('/recommend/enhanced', json={'user_preferences': prefs, 'num_recommendations': 10}).json()
+    assert precomputed.stats['hits'] == hits + 1
+
+    request = api_module.EnhancedRecommendationRequest(user_preferences=prefs, num_recommendations=10)
+    live = api_module.compute_enhanced_recommendations(request)
+    assert [r['title'] for r in served['recommendations']] == [r.title for r in live.recommendations]
+    assert [r['hybrid_score'] for r in served['recommendations']] == [r.hybrid_score for r in live.recommendations]
+
+    # The ranking behind the precomputed next_cursor stays pinned
+    assert api_module.ranked_result_store.get(served['result_handle']) is not None
+
+
+def test_requests_with_watched_movies_are_scored_live(client, precomputed):
+    hits = precomputed.stats['hits']
+    client.post('/recommend/enhanced', json={'user_preferences': {}, 'num_recommendations': 10,
+                                             'watched_movies': ['Movie Alpha 1']})
+    assert precomputed.stats['hits'] == hits
@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+Tests for the materialized preference grid (preference_grid.py, /recommend/grid)
+Run with: python -m pytest -q test_preference_grid.py
+"""
+
+import numpy as np
+import pytest
+
+from conftest import PREFS, synthetic_catalog
+from models.fuzzy_model import FuzzyMovieRecommender
+from preference_grid import (CORE_GENRES, CatalogScorer, PreferenceGrid, build_grid, cell_index, cell_preferences,
+                             core_preferences, nearest_levels, top_k_rows)
+from scoring_inputs import prepare_enhanced_movie_info
+
+MOVIES = synthetic_catalog(200, seed=2)
+
+
+@pytest.fixture(scope='module')
+def grid_path(tmp_path_factory):
+    path = str(tmp_path_factory.mktemp('grid'))
+    build_grid(MOVIES, path, levels=2, top_k=20, workers=1, scorer_kind='fuzzy', catalog_version='v1', probes=5)
+    return path
+
+
+def test_cells_round_trip_through_their_centres():
+    for cell in (0, 1, 77, 3 ** 7 - 1):
+        centre = cell_preferences(cell, 3)
+        assert cell_index(nearest_levels(core_preferences(centre), 3), 3) == cell
+
+
+def test_extended_genres_blend_into_their_core_genre():
+    core = dict(zip(CORE_GENRES, core_preferences({'action': 10, 'adventure': 0, 'scifi': 8})))
+    assert core['action'] == pytest.approx(7.0) and core['sci_fi'] == 8.0 and core['drama'] == 5.0
+
+
+def test_top_k_rows_orders_by_score_then_row():
+    assert top_k_rows(np.array([1.0, 3.0, 3.0, 2.0, 0.5]), 3).tolist() == [1, 2, 3]
+    assert top_k_rows(np.array([2.0, 1.0]), 5).tolist() == [0, 1]
+
+
+def test_cell_lists_are_the_exact_top_k_at_the_cell_centre(grid_path):
+    grid = PreferenceGrid.load(grid_path, 'v1')
+    assert grid.n_cells == 2 ** 7 and grid.metadata['approximation']['probes'] == 5
+    infos = [prepare_enhanced_movie_info(movie) for movie in MOVIES]
+    ids = np.array([movie['id'] for movie in MOVIES])
+    scorer = CatalogScorer(FuzzyMovieRecommender())
+    for cell in (0, 5, 127):
+        prefs = cell_preferences(cell, 2)
+        found = grid.lookup(prefs, k=10)
+        exact = scorer.score(prefs, infos)
+        rows = top_k_rows(exact[:, 0], 10)
+        assert found.cell == cell and found.quantization_error == 0
+        # Same top-10 scores (tied movies may swap places), stored with each movie's exact score
+        np.testing.assert_allclose(found.scores[:, 0], exact[rows, 0], rtol=1e-5)
+        found_rows = [int(np.flatnonzero(ids == movie_id)[0]) for movie_id in found.ids.tolist()]
+        np.testing.assert_allclose(found.scores[:, 0], exact[found_rows, 0], rtol=1e-5)
+
+
+def test_grid_built_for_another_catalog_is_refused(grid_path):
+    with pytest.raises(ValueError):
+        PreferenceGrid.load(grid_path, 'v2')
+
+
+def test_grid_endpoint_serves_and_reranks_the_nearest_cell(client, api_module, grid_path, monkeypatch):
+    assert client.post('/recommend/grid', json={'user_preferences': PREFS}).status_code == 503
+
+    # A grid over the served catalog's first 200 movies
+    path = grid_path + '-served'
+    build_grid(api_module.REAL_MOVIES_DATABASE[:200], path, levels=2, top_k=20, workers=1, scorer_kind='fuzzy',
+               probes=0)
+    grid = PreferenceGrid.load(path)
+    monkeypatch.setattr(api_module, 'PREFERENCE_GRID', grid)
+
+    data = client.post('/recommend/grid', json={'user_preferences': PREFS, 'num_recommendations': 5}).json()
+    user_prefs = api_module.UserPreferences(**PREFS).dict()
+    cell, _ = grid.nearest_cell(user_prefs)
+    assert data['cell'] == cell and not data['reranked']
+    expected = [api_module.REAL_MOVIES_DATABASE[row]['title']
+                for row in api_module.CATALOG_INDEX.rows_for_ids(grid.lookup(user_prefs, 5).ids).tolist()]
+    assert [r['title'] for r in data['recommendations']] == expected
+
+    reranked = client.post('/recommend/grid', json={'user_preferences': PREFS, 'num_recommendations': 5,
+                                                    'rerank': True}).json()
+    scores = [r['hybrid_score'] for r in reranked['recommendations']]
+    assert reranked['reranked'] and len(scores) == 5 and scores == sorted(scores, reverse=True)
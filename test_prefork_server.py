@@ -0,0 +1,30 @@
+#!/usr/bin/env python3
+"""
+Tests for the prefork launcher's fork safety (prefork_server.py)
+Run with: python -m pytest -q test_prefork_server.py
+"""
+
+import os
+import sys
+
+import pytest
+
+from models.hybrid_system import HybridRecommendationSystem
+from prefork_server import process_memory
+
+
+def test_fork_safe_load_never_imports_tensorflow(tmp_path, monkeypatch):
+    monkeypatch.delenv('SHARED_MEMORY_DIR', raising=False)
+    model_path = tmp_path / 'simple_ann_model.keras'
+    model_path.write_bytes(b'')
+    with pytest.raises(RuntimeError, match="fork-safe"):
+        HybridRecommendationSystem._load_ann_network(str(model_path), fork_safe=True)
+    assert 'tensorflow' not in sys.modules
+
+
+@pytest.mark.skipif(not os.path.exists('/proc/self/smaps_rollup'), reason="needs /proc/<pid>/smaps_rollup")
+def test_process_memory_splits_shared_and_private():
+    report = process_memory(os.getpid())
+    assert report['rss_mb'] > 0
+    assert report['private_mb'] > 0
+    assert process_memory(2 ** 22 + 1) == {}
@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+Tests for the readiness tracker and probes (readiness.py)
+Run with: python -m pytest -q test_readiness.py
+"""
+
+from readiness import FAILED, LOADING, READY, UNAVAILABLE, ReadinessTracker
+
+
+def tracker(wait_for_ann: bool = True) -> ReadinessTracker:
+    readiness = ReadinessTracker()
+    readiness.register("catalog")
+    readiness.register("ann", required=False, awaited=wait_for_ann)
+    readiness.register("scoring_workers", required=False, awaited=False)
+    return readiness
+
+
+def test_ready_needs_required_ready_and_awaited_settled():
+    readiness = tracker()
+    assert not readiness.ready
+    readiness.set_state("catalog", READY)
+    assert not readiness.ready  # The ANN has not settled yet
+    readiness.set_state("ann", UNAVAILABLE, detail="fuzzy-only scoring")
+    assert readiness.ready
+    report = readiness.report()
+    assert report['ready'] and report['ready_after_s'] is not None
+    assert report['components']['scoring_workers']['state'] == 'pending'
+
+
+def test_optional_components_are_not_awaited_unless_asked():
+    readiness = tracker(wait_for_ann=False)
+    readiness.set_state("catalog", READY)
+    assert readiness.ready
+
+
+def test_failed_required_component_keeps_the_process_unready():
+    readiness = tracker()
+    readiness.set_state("ann", READY)
+    with readiness.loading("catalog"):
+        assert readiness.state("catalog") == LOADING
+        raise RuntimeError("no database")
+    assert readiness.state("catalog") == FAILED
+    assert readiness.report()['components']['catalog']['error'] == "no database"
+    assert not readiness.ready
+
+
+def test_loading_block_ends_ready_unless_it_settles_itself():
+    readiness = tracker()
+    with readiness.loading("catalog"):
+        pass
+    with readiness.loading("ann"):
+        readiness.set_state("ann", UNAVAILABLE)
+    assert readiness.state("catalog") == READY
+    assert readiness.state("ann") == UNAVAILABLE
+    assert readiness.report()['components']['catalog']['duration_ms'] is not None
+
+
+def test_ready_probe_is_503_until_ready_while_health_answers(api_module, client, monkeypatch):
+    readiness = tracker()
+    monkeypatch.setattr(api_module, 'readiness', readiness)
+
+    assert client.get('/health').status_code == 200
+    response = client.get('/ready')
+    assert response.status_code == 503
+    assert response.json()['components']['catalog']['state'] == 'pending'
+
+    readiness.set_state("catalog", READY)
+    readiness.set_state("ann", UNAVAILABLE)
+    response = client.get('/ready')
+    assert response.status_code == 200
+    assert response.json()['scoring_mode'] == 'fuzzy-only'
@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+"""
+Tests for the scoring executor (scoring_executor.py)
+Run with: python -m pytest -q test_scoring_executor.py
+"""
+
+import asyncio
+
+import pytest
+
+from scoring_executor import ScoringExecutor, default_process_workers, process_workers_from_env
+
+
+def square(x):
+    return x * x
+
+
+def test_process_pool_is_opt_in(monkeypatch):
+    monkeypatch.delenv('SCORING_PROCESS_WORKERS', raising=False)
+    assert process_workers_from_env() == 0
+    monkeypatch.setenv('SCORING_PROCESS_WORKERS', '3')
+    assert process_workers_from_env() == 3
+    monkeypatch.setenv('SCORING_PROCESS_WORKERS', 'auto')
+    assert process_workers_from_env() == default_process_workers()
+
+
+def test_thread_calls_run_off_the_loop_and_are_counted():
+    executor = ScoringExecutor(0, thread_workers=2)
+    try:
+        async def run():
+            return await asyncio.gather(*(executor.run_in_thread(square, i) for i in range(10)))
+        assert asyncio.run(run()) == [i * i for i in range(10)]
+        stats = executor.get_stats()['thread_pool']
+        assert stats['completed'] == 10 and stats['failed'] == 0 and stats['in_flight'] == 0
+    finally:
+        executor.shutdown()
+
+
+def test_without_workers_process_calls_fall_back_to_threads():
+    executor = ScoringExecutor(0, thread_workers=1)
+    try:
+        assert asyncio.run(executor.run_in_process(square, 7)) == 49
+    finally:
+        executor.shutdown()
+
+
+def test_failures_propagate_and_are_counted():
+    executor = ScoringExecutor(0, thread_workers=1)
+    try:
+        with pytest.raises(ZeroDivisionError):
+            asyncio.run(executor.run_in_thread(lambda: 1 / 0))
+        assert executor.get_stats()['thread_pool']['failed'] == 1
+    finally:
+        executor.shutdown()
+
+
+def test_process_pool_runs_calls_in_another_process():
+    import os
+    executor = ScoringExecutor(1, thread_workers=1)
+    try:
+        assert asyncio.run(executor.run_in_process(os.getpid)) != os.getpid()
+        assert executor.get_stats()['process_pool']['completed'] == 1
+    finally:
+        executor.shutdown()
@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+Tests for the shared read-only arrays (shared_arrays.py, shared_catalog.py, models/dense_network.py)
+Run with: python -m pytest -q test_shared_arrays.py
+"""
+
+import numpy as np
+import pytest
+
+from conftest import synthetic_catalog
+from models.dense_network import DenseNetwork, load_shared_network
+from shared_arrays import SharedArrays, publish_once, shared_bundle_stats
+from shared_catalog import SharedCatalog, encode_catalog, get_shared_catalog
+
+
+def test_publish_and_attach_map_the_same_read_only_arrays(tmp_path):
+    path = str(tmp_path / 'bundle')
+    arrays = {'weights': np.arange(12, dtype=np.float32).reshape(3, 4), 'empty': np.zeros(0, dtype=np.int64)}
+    SharedArrays.publish(path, arrays, {'kind': 'test'})
+
+    bundle = SharedArrays.attach(path)
+    assert bundle.metadata == {'kind': 'test'}
+    np.testing.assert_array_equal(bundle['weights'], arrays['weights'])
+    assert bundle['empty'].shape == (0,)
+    assert not bundle['weights'].flags.writeable
+    assert bundle.nbytes == arrays['weights'].nbytes
+
+    SharedArrays.publish(path, {'weights': np.ones(2)})  # Atomic replace
+    assert 'empty' not in SharedArrays.attach(path)
+    assert list(shared_bundle_stats(str(tmp_path))['bundles_mb']) == ['bundle']
+
+
+def test_publish_once_builds_once_per_source(tmp_path):
+    path = str(tmp_path / 'bundle')
+    builds = []
+
+    def build():
+        builds.append(1)
+        return {'x': np.arange(3)}, {}
+
+    publish_once(path, build, source='v1')
+    bundle = publish_once(path, build, source='v1')
+    assert len(builds) == 1
+    assert bundle.metadata['source'] == 'v1'
+    publish_once(path, build, source='v2')
+    assert len(builds) == 2
+
+
+def test_sklearn_export_predicts_like_the_model():
+    from sklearn.neural_network import MLPRegressor
+    from sklearn.preprocessing import StandardScaler
+
+    rng = np.random.default_rng(0)
+    X = rng.normal(5, 2, size=(200, 6))
+    y = X @ rng.normal(size=6) + rng.normal(scale=0.1, size=200)
+    scaler = StandardScaler().fit(X)
+    model = MLPRegressor(hidden_layer_sizes=(16, 8), max_iter=300, random_state=0).fit(scaler.transform(X), y)
+
+    network = DenseNetwork.from_sklearn(model, scaler)
+    np.testing.assert_allclose(network.predict(X).ravel(), model.predict(scaler.transform(X)), rtol=1e-9, atol=1e-9)
+
+
+def test_unsupported_activation_is_rejected():
+    with pytest.raises(ValueError):
+        DenseNetwork([{'type': 'affine', 'a': 'a', 'b': 'b', 'activation': 'softsign'}],
+                     {'a': np.ones((2, 1)), 'b': np.zeros(1)})
+
+
+def test_shared_network_is_exported_once_per_model_file(tmp_path):
+    source = tmp_path / 'model.keras'
+    source.write_bytes(b'v1')
+    rng = np.random.default_rng(1)
+    network = DenseNetwork._build([('affine', rng.normal(size=(4, 3)), rng.normal(size=3), 'relu'),
+                                   ('affine', rng.normal(size=(3, 1)), rng.normal(size=1), 'linear')], np.float32)
+    exports = []
+
+    def export():
+        exports.append(1)
+        return network
+
+    root = str(tmp_path / 'shared')
+    shared = load_shared_network(str(source), export, root)
+    load_shared_network(str(source), export, root)
+    assert len(exports) == 1
+    x = rng.normal(size=(5, 4))
+    np.testing.assert_array_equal(shared.predict(x), network.predict(x))
+
+
+def test_shared_catalog_rows_equal_the_dict_catalog(tmp_path):
+    movies = synthetic_catalog(300)
+    movies[5]['imdb_id'] = 'tt0000005'  # Sparse field
+    movies[7]['ratings'] = {'imdb': 7.1}  # JSON field
+    catalog = SharedCatalog(SharedArrays.publish(str(tmp_path / 'catalog'), *encode_catalog(movies)))
+
+    assert len(catalog) == len(movies)
+    assert catalog[5] == movies[5] and catalog[7] == movies[7] and catalog[-1] == movies[-1]
+    assert list(catalog) == movies
+    assert catalog.take([9, 2, 9]) == [movies[9], movies[2], movies[9]]
+    assert catalog[10:13] == movies[10:13]
+    np.testing.assert_array_equal(catalog.column('rating'), [m['rating'] for m in movies])
+    with pytest.raises(IndexError):
+        catalog[len(movies)]
+
+
+def test_get_shared_catalog_loads_once(tmp_path):
+    loads = []
+
+    def load():
+        loads.append(1)
+        return synthetic_catalog(50)
+
+    root = str(tmp_path / 'shared')
+    first = get_shared_catalog(load, root, source='v1')
+    assert get_shared_catalog(load, root, source='v1') is first
+    assert len(loads) == 1
+    assert list(first) == synthetic_catalog(50)
@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+Tests for the shared cache tier (shared_cache.py)
+Run with: python -m pytest -q test_shared_cache.py
+"""
+
+import os
+import signal
+import threading
+
+import pytest
+
+from memory_cache import LRUCache
+from shared_cache import SQLiteCacheBackend, TieredCache
+
+
+class BlockedBackend:
+    """Shared tier whose writes hang until released (a stalled server)."""
+
+    name = 'blocked'
+
+    def __init__(self):
+        self.release = threading.Event()
+        self.written = []
+
+    def get_many(self, keys):
+        return {}
+
+    def set_many(self, items):
+        self.release.wait()
+        self.written.extend(items)
+
+
+def test_writes_reach_sqlite_and_read_through_fills_l1(tmp_path):
+    backend = SQLiteCacheBackend(str(tmp_path / 'cache.sqlite3'))
+    writer = TieredCache(LRUCache(max_entries=10), backend)
+    writer.put(('prefix', 1), {'hybrid_score': 7.5}, 'predictions')
+    writer.flush()
+    assert backend.size() == 1
+
+    reader = TieredCache(LRUCache(max_entries=10), backend)
+    assert reader.get(('prefix', 1), 'predictions') == {'hybrid_score': 7.5}
+    assert reader.l1.get(('prefix', 1), 'predictions') == {'hybrid_score': 7.5}
+    assert reader.get_stats()['shared']['l2_hits'] == 1
+
+
+def test_pending_writes_are_bounded_while_the_backend_stalls():
+    backend = BlockedBackend()
+    cache = TieredCache(LRUCache(max_entries=1000), backend, max_batch=1, max_pending=5)
+    for i in range(50):
+        cache.put(('k', i), i)
+    stats = cache.get_stats()['shared']
+    assert stats['pending_writes'] <= 5
+    assert stats['l2_dropped'] >= 50 - 5 - 1  # One write may be held by the stalled writer
+    assert len(cache) == 50  # L1 is unaffected
+    backend.release.set()
+    cache.flush()
+
+
+@pytest.mark.skipif(not hasattr(os, 'fork'), reason="needs fork()")
+def test_forked_worker_drains_its_own_writes(tmp_path):
+    backend = SQLiteCacheBackend(str(tmp_path / 'cache.sqlite3'))
+    cache = TieredCache(LRUCache(max_entries=10), backend)
+    pid = os.fork()
+    if pid == 0:
+        code = 1
+        signal.alarm(10)  # A dead writer would make flush() wait forever
+        try:
+            cache.put(('child', 1), {'hybrid_score': 6.0})
+            cache.flush()
+            code = 0 if cache._writer.is_alive() and backend.size() == 1 else 1
+        finally:
+            os._exit(code)
+    _, status = os.waitpid(pid, 0)
+    assert os.WIFEXITED(status) and os.WEXITSTATUS(status) == 0
+    assert backend.size() == 1
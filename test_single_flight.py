@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+Tests for single-flight request coalescing (single_flight.py)
+Run with: python -m pytest -q test_single_flight.py
+"""
+
+import asyncio
+
+import pytest
+
+from single_flight import SingleFlight
+
+
+def test_concurrent_identical_calls_share_one_execution():
+    flight = SingleFlight()
+    executions = []
+
+    async def compute(key):
+        executions.append(key)
+        await asyncio.sleep(0.01)
+        return f"result {key}"
+
+    async def main():
+        calls = [flight.do(key, lambda key=key: compute(key)) for key in ('a', 'a', 'a', 'b')]
+        return await asyncio.gather(*calls)
+
+    assert asyncio.run(main()) == ['result a'] * 3 + ['result b']
+    assert sorted(executions) == ['a', 'b']
+    stats = flight.get_stats()
+    assert stats['calls'] == 4 and stats['executions'] == 2 and stats['coalesced'] == 2
+    assert stats['max_waiters'] == 3 and stats['in_flight'] == 0
+
+
+def test_nothing_is_cached_after_completion():
+    flight = SingleFlight()
+    counter = []
+
+    async def compute():
+        counter.append(1)
+        return len(counter)
+
+    async def main():
+        return [await flight.do('k', compute), await flight.do('k', compute)]
+
+    assert asyncio.run(main()) == [1, 2]
+
+
+def test_errors_reach_every_waiter():
+    flight = SingleFlight()
+
+    async def fail():
+        await asyncio.sleep(0.01)
+        raise ValueError("boom")
+
+    async def main():
+        return await asyncio.gather(flight.do('k', fail), flight.do('k', fail), return_exceptions=True)
+
+    results = asyncio.run(main())
+    assert all(isinstance(r, ValueError) for r in results)
+    assert flight.stats['errors'] == 1 and flight.stats['executions'] == 1
+
+
+def test_a_cancelled_caller_does_not_cancel_the_others():
+    flight = SingleFlight()
+
+    async def compute():
+        await asyncio.sleep(0.05)
+        return 'done'
+
+    async def main():
+        first = asyncio.ensure_future(flight.do('k', compute))
+        second = asyncio.ensure_future(flight.do('k', compute))
+        await asyncio.sleep(0.01)
+        first.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await first
+        return await second
+
+    assert asyncio.run(main()) == 'done'
@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+Tests for streaming latency statistics (streaming_stats.py)
+Run with: python -m pytest -q test_streaming_stats.py
+"""
+
+import random
+
+import numpy as np
+import pytest
+
+from streaming_stats import RingBuffer, StreamingHistogram
+
+RELATIVE_ERROR = 2 ** -8  # Default 7 sub-bucket bits
+
+
+def nearest_rank(values, percentile):
+    ordered = sorted(values)
+    return ordered[min(int(percentile / 100 * len(ordered)), len(ordered) - 1)]
+
+
+@pytest.mark.parametrize('distribution', ['lognormal', 'uniform', 'bimodal'])
+def test_percentiles_are_within_the_relative_error_bound(distribution):
+    rng = random.Random(4)
+    if distribution == 'lognormal':
+        values = [rng.lognormvariate(3, 1.2) for _ in range(20000)]
+    elif distribution == 'uniform':
+        values = [rng.uniform(0.001, 5) for _ in range(20000)]
+    else:
+        values = [rng.gauss(5, 1) if rng.random() < 0.9 else rng.gauss(900, 50) for _ in range(20000)]
+    histogram = StreamingHistogram()
+    for value in values:
+        histogram.record(value)
+
+    percentiles = [1, 25, 50, 90, 95, 99, 99.9]
+    for p, estimate in zip(percentiles, histogram.quantiles(percentiles)):
+        exact = nearest_rank(values, p)
+        assert abs(estimate - exact) <= exact * RELATIVE_ERROR * 1.01, (p, estimate, exact)
+    assert histogram.mean == pytest.approx(np.mean(values))
+    assert histogram.quantile(0) == min(values) and histogram.quantile(100) == max(values)
+
+
+def test_merge_equals_recording_everything_in_one_histogram():
+    rng = random.Random(1)
+    a, b, both = StreamingHistogram(), StreamingHistogram(), StreamingHistogram()
+    for i in range(5000):
+        value = rng.expovariate(0.01)
+        (a if i % 2 else b).record(value)
+        both.record(value)
+    a.merge(b)
+    assert a.quantiles([50, 95, 99]) == both.quantiles([50, 95, 99])
+    assert (a.count, a.min, a.max) == (both.count, both.min, both.max)
+    assert a.mean == pytest.approx(both.mean)
+    with pytest.raises(ValueError):
+        a.merge(StreamingHistogram(sub_bucket_bits=5))
+
+
+def test_zeros_out_of_range_values_and_empty_summary():
+    histogram = StreamingHistogram()
+    assert histogram.summary((50,)) == {'avg': 0, 'min': 0, 'max': 0, 'p50': 0}
+    for value in [0, 0, 0, 1e-9, 5e12, 10]:
+        histogram.record(value)
+    assert histogram.quantile(40) == 0.0
+    assert histogram.quantile(100) == 5e12
+    histogram.clear()
+    assert len(histogram) == 0 and histogram.quantile(50) == 0.0
+
+
+def test_ring_buffer_keeps_the_latest_items_oldest_first():
+    ring = RingBuffer(4)
+    for i in range(10):
+        ring.append(i)
+    assert len(ring) == 4 and ring.latest() == [6, 7, 8, 9] and ring.latest(2) == [8, 9]
+    ring.clear()
+    assert ring.latest() == []
+    with pytest.raises(ValueError):
+        RingBuffer(0)
+
+
+def test_performance_monitor_reports_streaming_percentiles():
+    from performance_optimizer import PerformanceMonitor
+    monitor = PerformanceMonitor()
+    for i in range(1, 1001):
+        monitor.record_request(float(i))
+    monitor.record_request(0.0, error=True)
+    stats = monitor.get_stats()
+    assert stats['p50_response_time'] == pytest.approx(500, rel=RELATIVE_ERROR * 2)
+    assert stats['p99_response_time'] == pytest.approx(990, rel=RELATIVE_ERROR * 2)
+    assert stats['max_response_time'] == 1000 and stats['successful_requests'] == 1000
+    assert stats['error_count'] == 1 and stats['total_requests'] == 1001
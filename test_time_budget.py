@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""
+Tests for deadline-aware anytime scoring of /recommend/enhanced (api.py)
+Run with: python -m pytest -q test_time_budget.py
+"""
+
+import time
+
+import pytest
+
+from conftest import PREFS
+from pagination import DeferredRankingStore
+
+
+def enhanced(api_module, deadline=None, num_recommendations=10):
+    request = api_module.EnhancedRecommendationRequest(user_preferences=PREFS, num_recommendations=num_recommendations)
+    return api_module.compute_enhanced_recommendations(request, DeferredRankingStore(), deadline)
+
+
+def test_generous_budget_returns_the_unbudgeted_ranking(api_module):
+    unbudgeted = enhanced(api_module)
+    budgeted = enhanced(api_module, deadline=time.time() + 600)
+    assert [r.id for r in budgeted.recommendations] == [r.id for r in unbudgeted.recommendations]
+    assert not budgeted.partial and not unbudgeted.partial
+    assert unbudgeted.coverage is None
+    assert budgeted.coverage['chunks'] >= 1 and budgeted.coverage['scored'] <= budgeted.coverage['candidates']
+
+
+def test_expired_budget_still_scores_one_chunk(api_module, monkeypatch):
+    monkeypatch.setattr(api_module, 'ENHANCED_SCORING_CHUNK', 8)
+    response = enhanced(api_module, deadline=time.time() - 1)
+    assert response.partial
+    assert response.coverage['chunks'] == 1 and response.coverage['scored'] == 8
+    assert len(response.recommendations) == 10  # Topped up with popular fallbacks, as before
+
+
+def test_deadline_is_checked_between_chunks(api_module, monkeypatch):
+    monkeypatch.setattr(api_module, 'ENHANCED_SCORING_CHUNK', 8)
+    score_chunk = api_module.score_enhanced_chunk
+    calls = []
+
+    def slow_second_chunk(user_prefs, movies, first_index=0):
+        calls.append(first_index)
+        if len(calls) == 2:
+            time.sleep(0.1)  # The budget runs out while this chunk scores
+        return score_chunk(user_prefs, movies, first_index)
+
+    monkeypatch.setattr(api_module, 'score_enhanced_chunk', slow_second_chunk)
+    response = enhanced(api_module, deadline=time.time() + 0.05)
+    assert calls == [0, 8]
+    assert response.partial and response.coverage['scored'] == 16
+
+
+def test_budget_from_header_or_field(client):
+    body = {'user_preferences': PREFS, 'num_recommendations': 10}
+    plain = client.post('/recommend/enhanced', json=body).json()
+    assert plain['coverage'] is None and not plain['partial']
+
+    by_header = client.post('/recommend/enhanced', json=body, headers={'X-Time-Budget-Ms': '60000'}).json()
+    by_field = client.post('/recommend/enhanced', json={**body, 'time_budget_ms': 60000}).json()
+    for response in (by_header, by_field):
+        assert response['coverage'] is not None and not response['partial']
+        assert [r['id'] for r in response['recommendations']] == [r['id'] for r in plain['recommendations']]
+
+
+@pytest.mark.parametrize('budget', [0, -5])
+def test_non_positive_budget_is_rejected(client, budget):
+    response = client.post('/recommend/enhanced', json={'user_preferences': PREFS, 'time_budget_ms': budget})
+    assert response.status_code == 422